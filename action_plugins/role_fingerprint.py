@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+Controller-side role fingerprinting
+
+Hashes the role's files, the project's modules and plugins and the
+resolved values of the variables the role files reference, lists the files its templates render and passes both to the
+role_fingerprint module, which compares them with (or stores them in)
+the state file on the host in one module call.
+"""
+
+import os
+import sys
+
+from ansible.errors import AnsibleError
+from ansible.module_utils.parsing.convert_bool import boolean
+from ansible.plugins.action import ActionBase
+
+try:
+    from ansible.module_utils.role_fingerprint import fingerprint, plugin_sources, referenced_names, role_sources
+except ImportError:
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'module_utils'))
+    from role_fingerprint import fingerprint, plugin_sources, referenced_names, role_sources
+
+DEFAULT_ROLES_DIR = os.path.join(os.path.dirname(__file__), '..', 'roles')
+
+
+class ActionModule(ActionBase):
+
+    TRANSFERS_FILES = False
+    _VALID_ARGS = frozenset(('role', 'extra_roles', 'state', 'fingerprint', 'paths', 'force', 'state_dir'))
+
+    def _rendered_paths(self, roles_dir, roles, variables):
+        """Destinations of the roles' template tasks on this host"""
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'module_utils'))
+        from storage_render import render_host
+
+        paths = []
+        for entry in render_host(variables.get('inventory_hostname', ''), roles, variables, roles_dir):
+            if 'content' in entry and entry['dest'].startswith('/'):
+                paths.append(entry['dest'])
+        return sorted(set(paths))
+
+    def run(self, tmp=None, task_vars=None):
+        if task_vars is None:
+            task_vars = {}
+
+        result = super(ActionModule, self).run(tmp, task_vars)
+        args = dict(self._task.args)
+        role = args.get('role')
+        if not role:
+            result['failed'] = True
+            result['msg'] = 'role is required'
+            return result
+        module_args = {
+            'role': role,
+            'state': args.get('state', 'checked'),
+            'force': boolean(args.get('force', False), strict=False),
+        }
+        if args.get('state_dir'):
+            module_args['state_dir'] = args['state_dir']
+
+        if module_args['state'] == 'stored':
+            module_args['fingerprint'] = args.get('fingerprint')
+            module_args['paths'] = args.get('paths') or []
+        else:
+            roles = [role] + list(args.get('extra_roles') or [])
+            roles_dir = os.path.dirname(task_vars['role_path']) if 'role_path' in task_vars else DEFAULT_ROLES_DIR
+            sources = role_sources(roles_dir, roles)
+            variables = {}
+            for name in referenced_names(sources, task_vars):
+                try:
+                    variables[name] = self._templar.template(task_vars[name])
+                except AnsibleError:
+                    # Defined later in the play (registered results); the
+                    # raw expression still tracks changes to its definition
+                    variables[name] = str(task_vars[name])
+            project_dir = os.path.dirname(os.path.abspath(roles_dir))
+            module_args['fingerprint'] = fingerprint(sources + plugin_sources(project_dir), variables)
+            try:
+                result['paths'] = self._rendered_paths(roles_dir, roles, variables)
+            except Exception as e:  # offline rendering is best effort
+                self._display.vvv(f"role_fingerprint: cannot list rendered files of {role}: {e}")
+                result['paths'] = []
+            result['fingerprint'] = module_args['fingerprint']
+
+        result.update(self._execute_module(
+            module_name='role_fingerprint', module_args=module_args, task_vars=task_vars,
+        ))
+        return result
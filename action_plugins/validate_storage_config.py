@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+Controller-side configuration validation
+
+Validates the variables of one or more roles against
+module_utils/storage_schema.py in a single pass. Nothing is executed on
+the managed host and every error is reported at once.
+"""
+
+import os
+import sys
+
+from ansible.errors import AnsibleError
+from ansible.plugins.action import ActionBase
+
+try:
+    from ansible.module_utils.storage_schema import schema_variables, validate
+except ImportError:
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'module_utils'))
+    from storage_schema import schema_variables, validate
+
+
+class ActionModule(ActionBase):
+
+    TRANSFERS_FILES = False
+    _VALID_ARGS = frozenset(('schema',))
+
+    def run(self, tmp=None, task_vars=None):
+        if task_vars is None:
+            task_vars = {}
+
+        result = super(ActionModule, self).run(tmp, task_vars)
+        result['changed'] = False
+
+        schemas = self._task.args.get('schema')
+        try:
+            names = schema_variables(schemas)
+        except KeyError as e:
+            result['failed'] = True
+            result['msg'] = str(e)
+            return result
+
+        variables = {}
+        errors = []
+        for name in names:
+            if name not in task_vars:
+                continue
+            try:
+                variables[name] = self._templar.template(task_vars[name])
+            except AnsibleError as e:
+                errors.append(f"{name}: cannot be templated: {e}")
+
+        errors.extend(validate(variables, schemas))
+        result['validated'] = sorted(variables)
+        result['errors'] = errors
+        if errors:
+            result['failed'] = True
+            result['msg'] = f"{len(errors)} configuration error(s):\n" + '\n'.join(errors)
+        else:
+            result['msg'] = f"Configuration is valid ({', '.join(sorted(variables)) or 'nothing to check'})"
+        return result
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+Record per-task, per-host and per-loop-item wall time of playbook runs
+
+Every run is appended to a profile store (SQLite, or JSON for a .json
+path); scripts/converge-report.py prints the slowest tasks and diffs runs.
+"""
+
+import os
+import sqlite3
+import sys
+import time
+
+from ansible.plugins.callback import CallbackBase
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+try:
+    from ansible.module_utils.converge_profile import save_run
+except ImportError:
+    sys.path.insert(0, os.path.join(PROJECT_ROOT, 'module_utils'))
+    from converge_profile import save_run
+
+DOCUMENTATION = '''
+    name: converge_profile
+    type: aggregate
+    short_description: Records task wall time per host and loop item
+    description:
+      - Appends the wall time of every task on every host, and of every loop
+        item, to a SQLite (or JSON) profile store at the end of the run.
+      - Report with scripts/converge-report.py.
+    requirements:
+      - enable in ansible.cfg (callbacks_enabled)
+    options:
+      store:
+        description:
+          - Profile store path; a .json suffix selects the JSON format.
+          - Relative paths are resolved against the project directory, not the
+            directory ansible-playbook was started from.
+        default: .converge-profile.db
+        env:
+          - name: CUBE_STORAGE_PROFILE_STORE
+        ini:
+          - section: callback_converge_profile
+            key: store
+      label:
+        description: Free-form label saved with the run (e.g. a commit id).
+        default: ''
+        env:
+          - name: CUBE_STORAGE_PROFILE_LABEL
+        ini:
+          - section: callback_converge_profile
+            key: label
+'''
+
+
+class CallbackModule(CallbackBase):
+    CALLBACK_VERSION = 2.0
+    CALLBACK_TYPE = 'aggregate'
+    CALLBACK_NAME = 'converge_profile'
+    CALLBACK_NEEDS_ENABLED = True
+
+    def __init__(self):
+        super().__init__()
+        self.playbook = ''
+        self.started = time.time()
+        self.starts = {}
+        self.item_marks = {}
+        self.timings = []
+
+    def v2_playbook_on_start(self, playbook):
+        self.playbook = os.path.basename(playbook._file_name)
+        self.started = time.time()
+
+    def v2_runner_on_start(self, host, task):
+        now = time.monotonic()
+        key = (host.get_name(), task._uuid)
+        self.starts[key] = now
+        self.item_marks[key] = now
+
+    def _record(self, result, status, item=None):
+        task = result._task
+        key = (result._host.get_name(), task._uuid)
+        now = time.monotonic()
+        if item is None:
+            start = self.starts.pop(key, None)
+            self.item_marks.pop(key, None)
+        else:
+            # Loop items run one after another on a host: an item took the
+            # time since the previous item (or the task start) finished
+            start = self.item_marks.get(key)
+            self.item_marks[key] = now
+        if start is None:
+            return
+        self.timings.append({
+            'host': key[0],
+            'role': task._role.get_name() if task._role else '',
+            'task': task.get_name(),
+            'item': '' if item is None else str(item),
+            'seconds': round(now - start, 4),
+            'status': status,
+        })
+
+    def _item_label(self, result):
+        return result._result.get('_ansible_item_label', result._result.get('item', ''))
+
+    def v2_runner_on_ok(self, result):
+        self._record(result, 'changed' if result._result.get('changed') else 'ok')
+
+    def v2_runner_on_failed(self, result, ignore_errors=False):
+        self._record(result, 'failed')
+
+    def v2_runner_on_skipped(self, result):
+        self._record(result, 'skipped')
+
+    def v2_runner_on_unreachable(self, result):
+        self._record(result, 'unreachable')
+
+    def v2_runner_item_on_ok(self, result):
+        status = 'changed' if result._result.get('changed') else 'ok'
+        self._record(result, status, self._item_label(result))
+
+    def v2_runner_item_on_failed(self, result):
+        self._record(result, 'failed', self._item_label(result))
+
+    def v2_runner_item_on_skipped(self, result):
+        self._record(result, 'skipped', self._item_label(result))
+
+    def v2_playbook_on_stats(self, stats):
+        if not self.timings:
+            return
+        run = {
+            'playbook': self.playbook,
+            'label': self.get_option('label') or '',
+            'started': self.started,
+            'finished': time.time(),
+            'timings': self.timings,
+        }
+        store = os.path.join(PROJECT_ROOT, os.path.expanduser(self.get_option('store')))
+        try:
+            run_id = save_run(store, run)
+        except (OSError, ValueError, sqlite3.Error) as e:
+            self._display.warning(f"converge_profile: could not save the run to {store}: {e}")
+            return
+        self._display.display(f"converge profile: run {run_id} saved to {store} "
+                              f"(python3 scripts/converge-report.py top)")
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+Jinja filters shared by the file server roles
+
+nfs_mount_options  - merge base options, a named profile and per-mount
+                     overrides from nfs_mount_profiles into one list
+kdc_locality_order - krb5.conf ``kdc =`` values, KDCs of the given site first
+kdc_hosts          - host names of a KDC list (ports removed)
+idmap_static_map   - idmapd.conf [Static] entries (principal -> local name)
+                     for a kdc_user_principals list
+fscache_culling    - cachefilesd brun/bcull/bstop/frun/fcull/fstop for a
+                     cache file system size and free-space reserve
+export_fragment_name - exports.d file stem of an export path (escaped
+                     like systemd-escape --path, so names never collide)
+"""
+
+import os
+import sys
+
+from ansible.errors import AnsibleFilterError
+
+try:
+    from ansible.module_utils.kerberos_admin import idmap_static_map, kdc_hosts, kdc_locality_order
+    from ansible.module_utils.nfs_exports import fragment_name
+    from ansible.module_utils.nfs_fscache import culling_thresholds
+    from ansible.module_utils.nfs_mount_options import ProfileError, profile_options
+except ImportError:
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'module_utils'))
+    from kerberos_admin import idmap_static_map, kdc_hosts, kdc_locality_order
+    from nfs_exports import fragment_name
+    from nfs_fscache import culling_thresholds
+    from nfs_mount_options import ProfileError, profile_options
+
+
+def nfs_mount_options(profiles, profile, base=None, extra=None, fscache_profiles=None):
+    try:
+        return profile_options(profiles, profile, base, extra, fscache_profiles)
+    except ProfileError as e:
+        raise AnsibleFilterError(str(e))
+
+
+def _checked_filter(func):
+    def wrapper(*args):
+        try:
+            return func(*args)
+        except ValueError as e:
+            raise AnsibleFilterError(str(e))
+    return wrapper
+
+
+class FilterModule(object):
+
+    def filters(self):
+        return {
+            'nfs_mount_options': nfs_mount_options,
+            'kdc_locality_order': _checked_filter(kdc_locality_order),
+            'kdc_hosts': _checked_filter(kdc_hosts),
+            'idmap_static_map': _checked_filter(idmap_static_map),
+            'fscache_culling': _checked_filter(culling_thresholds),
+            'export_fragment_name': fragment_name,
+        }
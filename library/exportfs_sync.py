@@ -0,0 +1,175 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""Incremental NFS export table updates"""
+
+DOCUMENTATION = r'''
+---
+module: exportfs_sync
+short_description: Apply only the changed NFS exports with targeted exportfs calls
+description:
+  - Parses the desired exports files and the snapshot of the last applied
+    export table, and applies only the added, removed and changed
+    (path, client, options) entries with C(exportfs -o ... host:path) and
+    C(exportfs -u host:path).
+  - Falls back to C(exportfs -ra) when there is no snapshot yet or when a
+    targeted call fails.
+  - With I(scope), only the listed exports files (for example the
+    C(/etc/exports.d) fragments that were just templated or removed) are
+    read and compared, so the cost is proportional to what changed.
+  - The snapshot is only updated after a successful apply.
+options:
+  paths:
+    description:
+      - Exports files to read. Directories contribute their C(*.exports) files.
+    type: list
+    elements: path
+    default: [/etc/exports]
+  scope:
+    description:
+      - Exports files to limit the comparison to. Files that no longer exist
+        have all their previously applied entries unexported.
+      - Ignored, and the full table compared, when the snapshot predates
+        per-file sections.
+    type: list
+    elements: path
+  state_file:
+    description: Snapshot of the last successfully applied export entries.
+    type: path
+    default: /var/lib/cube-storage/exports.applied
+  exportfs:
+    description: exportfs binary to run.
+    type: path
+    default: exportfs
+'''
+
+EXAMPLES = r'''
+- name: Reload NFS exports
+  exportfs_sync:
+    paths:
+      - /etc/exports
+      - /etc/exports.d
+
+- name: Reload only the touched export fragments
+  exportfs_sync:
+    paths:
+      - /etc/exports
+      - /etc/exports.d
+    scope:
+      - /etc/exports.d/srv-shares-socialpro.exports
+'''
+
+RETURN = r'''
+added:
+  description: Entries exported by this run.
+  returned: always
+  type: list
+  elements: str
+removed:
+  description: Entries unexported by this run.
+  returned: always
+  type: list
+  elements: str
+changed_entries:
+  description: Entries unexported and exported again with new options.
+  returned: always
+  type: list
+  elements: str
+commands:
+  description: exportfs invocations that were run (or would be, in check mode).
+  returned: always
+  type: list
+  elements: str
+fallback:
+  description: Why a full C(exportfs -ra) was run, if it was.
+  returned: when a full reload was needed
+  type: str
+'''
+
+import os
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.nfs_exports import (
+    diff_exports,
+    diff_scoped,
+    merge_sources,
+    parse_snapshot,
+    plan_commands,
+    read_sources,
+    render_snapshot,
+)
+
+
+def describe(entries):
+    return [f"{client}:{path}({options})" for path, client, options in entries]
+
+
+def main():
+    module = AnsibleModule(
+        argument_spec=dict(
+            paths=dict(type='list', elements='path', default=['/etc/exports']),
+            scope=dict(type='list', elements='path'),
+            state_file=dict(type='path', default='/var/lib/cube-storage/exports.applied'),
+            exportfs=dict(type='path', default='exportfs'),
+        ),
+        supports_check_mode=True,
+    )
+
+    state_file = module.params['state_file']
+    exportfs = module.params['exportfs']
+    scope = module.params['scope']
+
+    result = dict(changed=False, added=[], removed=[], changed_entries=[], commands=[])
+    fallback = None
+    previous = None
+
+    if os.path.isfile(state_file):
+        with open(state_file, 'r') as f:
+            previous = f.read()
+        applied = parse_snapshot(previous)
+        if scope is not None and None not in applied:
+            added, removed, changed, snapshot = diff_scoped(applied, read_sources(scope), scope)
+        else:
+            snapshot = read_sources(module.params['paths'])
+            added, removed, changed = diff_exports(merge_sources(applied), merge_sources(snapshot))
+        commands = plan_commands(added, removed, changed, exportfs)
+        result.update(
+            added=describe(added),
+            removed=describe(removed),
+            changed_entries=describe(changed),
+            commands=[' '.join(c) for c in commands],
+            changed=bool(commands),
+        )
+        if not module.check_mode:
+            for command in commands:
+                rc, out, err = module.run_command(command)
+                if rc != 0:
+                    fallback = f"'{' '.join(command)}' failed: {err.strip() or out.strip()}"
+                    break
+    else:
+        fallback = f"no applied-state snapshot at {state_file}"
+
+    if fallback:
+        result['fallback'] = fallback
+        result['changed'] = True
+        result['commands'].append(f"{exportfs} -ra")
+        # A full reload applies every file, so the snapshot must cover them all
+        snapshot = read_sources(module.params['paths'])
+        if not module.check_mode:
+            rc, out, err = module.run_command([exportfs, '-ra'])
+            if rc != 0:
+                module.fail_json(msg=f"exportfs -ra failed: {err.strip() or out.strip()}", rc=rc, **result)
+
+    content = render_snapshot(snapshot)
+    if not module.check_mode and content != previous:
+        os.makedirs(os.path.dirname(state_file), exist_ok=True)
+        temporary = state_file + '.tmp'
+        with open(temporary, 'w') as f:
+            f.write(content)
+        os.chmod(temporary, 0o644)
+        os.replace(temporary, state_file)
+
+    module.exit_json(**result)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""Batched Kerberos principal management through kadmin.local"""
+
+DOCUMENTATION = r'''
+---
+module: kadmin_principals
+short_description: Create Kerberos principals and export keytabs in batched kadmin sessions
+description:
+  - Lists the principals in the KDC database once, diffs them against the
+    requested principals and creates only the missing ones.
+  - All requests are piped into a small number of kadmin.local sessions
+    (one per I(batch_size) requests) instead of one process per principal.
+  - Optionally exports a keytab per principal into I(keytab_dir). Keytabs
+    are only exported for new principals or when the export file is missing,
+    so existing keys are never randomised on a no-op run.
+options:
+  principals:
+    description:
+      - Principals to ensure. Each item is either a principal name (created
+        with a random key) or a dict with C(name) and C(password).
+    type: list
+    elements: raw
+    required: true
+  realm:
+    description: Realm appended to names that have no C(@REALM) component.
+    type: str
+  keytab_dir:
+    description: Directory to export one C(<principal>.keytab) file per principal into.
+    type: path
+  batch_size:
+    description: Maximum number of requests sent to a single kadmin session.
+    type: int
+    default: 500
+  kadmin:
+    description: kadmin binary to run.
+    type: path
+    default: kadmin.local
+'''
+
+EXAMPLES = r'''
+- name: Create service principals and export their keytabs
+  kadmin_principals:
+    principals: "{{ kdc_service_principals }}"
+    keytab_dir: /var/lib/krb5kdc/keytabs
+
+- name: Create user principals
+  kadmin_principals:
+    principals: "{{ kdc_user_principals }}"
+    realm: EXAMPLE.COM
+'''
+
+RETURN = r'''
+principals:
+  description: Per-principal result, in request order.
+  returned: always
+  type: list
+  elements: dict
+  sample:
+    - principal: nfs/fileserver.example.com@EXAMPLE.COM
+      state: created
+      changed: true
+      keytab: /var/lib/krb5kdc/keytabs/nfs_fileserver.example.com_EXAMPLE.COM.keytab
+created:
+  description: Principals created by this run.
+  returned: always
+  type: list
+  elements: str
+keytabs:
+  description: Keytab files exported by this run.
+  returned: always
+  type: list
+  elements: str
+sessions:
+  description: Number of kadmin sessions started (including listprincs).
+  returned: always
+  type: int
+'''
+
+import os
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.kerberos_admin import (
+    batch_script,
+    chunked,
+    normalize_principals,
+    parse_listprincs,
+    plan_principals,
+    plan_requests,
+)
+
+
+def list_principals(module, kadmin):
+    """Return the set of principals currently in the KDC database"""
+    rc, out, err = module.run_command([kadmin, '-q', 'listprincs'])
+    if rc != 0:
+        module.fail_json(msg=f"listprincs failed: {err.strip() or out.strip()}", rc=rc)
+    return parse_listprincs(out)
+
+
+def main():
+    module = AnsibleModule(
+        argument_spec=dict(
+            principals=dict(type='list', elements='raw', required=True),
+            realm=dict(type='str'),
+            keytab_dir=dict(type='path'),
+            batch_size=dict(type='int', default=500),
+            kadmin=dict(type='path', default='kadmin.local'),
+        ),
+        supports_check_mode=True,
+    )
+
+    kadmin = module.params['kadmin']
+    keytab_dir = module.params['keytab_dir']
+
+    for entry in module.params['principals']:
+        if isinstance(entry, dict) and entry.get('password') is not None:
+            module.no_log_values.add(str(entry['password']))
+
+    try:
+        desired = normalize_principals(module.params['principals'], module.params['realm'])
+    except ValueError as e:
+        module.fail_json(msg=str(e))
+
+    existing = list_principals(module, kadmin)
+    sessions = 1
+    plan = plan_principals(desired, existing, keytab_dir)
+    requests = plan_requests(plan)
+
+    if requests and not module.check_mode:
+        if keytab_dir and not os.path.isdir(keytab_dir):
+            module.fail_json(msg=f"Keytab export directory {keytab_dir} does not exist")
+        for chunk in chunked(requests, module.params['batch_size']):
+            rc, out, err = module.run_command([kadmin], data=batch_script(chunk), binary_data=True)
+            sessions += 1
+            if rc != 0:
+                module.fail_json(msg=f"kadmin session failed: {err.strip()}", rc=rc, stdout=out, stderr=err)
+        existing = list_principals(module, kadmin)
+        sessions += 1
+
+    results = []
+    failed = []
+    for entry in plan:
+        result = {
+            'principal': entry['principal'],
+            'state': 'created' if entry['create'] else 'present',
+            'changed': bool(entry['create'] or entry['keytab']),
+        }
+        if entry['keytab']:
+            result['keytab'] = entry['keytab']
+        if not module.check_mode:
+            if entry['principal'] not in existing:
+                result['state'] = 'failed'
+            elif entry['keytab'] and not os.path.exists(entry['keytab']):
+                result['state'] = 'failed'
+        if result['state'] == 'failed':
+            result['changed'] = False
+            failed.append(entry['principal'])
+        results.append(result)
+
+    output = dict(
+        changed=any(r['changed'] for r in results),
+        principals=results,
+        created=[r['principal'] for r in results if r['state'] == 'created'],
+        keytabs=[r['keytab'] for r in results if r.get('keytab') and r['state'] != 'failed'],
+        sessions=sessions,
+    )
+    if failed:
+        module.fail_json(msg=f"kadmin did not apply {len(failed)} principal(s): {', '.join(failed)}", **output)
+    module.exit_json(**output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""Per-client keytab bundles from the KDC's exported keytabs"""
+
+DOCUMENTATION = r'''
+---
+module: keytab_bundle
+short_description: Assemble per-client keytabs on the KDC, skipping clients that are current
+description:
+  - Reads the keytabs exported by M(kadmin_principals) into I(keytab_dir)
+    and assembles one keytab per client from its principals.
+  - Each bundle is fingerprinted over its (principal, kvno, enctype, key)
+    entries. Clients whose reported fingerprint (see M(keytab_sync)) already
+    matches are skipped, so only new or rekeyed clients receive keys.
+  - The returned bundles contain key material; run the task with
+    C(no_log: true).
+options:
+  keytab_dir:
+    description: Directory holding one exported C(<principal>.keytab) per principal.
+    type: path
+    required: true
+  clients:
+    description: Mapping of client host to the principals its keytab must hold.
+    type: dict
+    required: true
+  current:
+    description: Mapping of client host to the fingerprint of its installed keytab.
+    type: dict
+    default: {}
+'''
+
+EXAMPLES = r'''
+- name: Assemble keytabs for clients that are out of date
+  keytab_bundle:
+    keytab_dir: /var/lib/krb5kdc/keytabs
+    clients:
+      k8s-worker-01:
+        - host/k8s-worker-01@CUBE.K8S
+        - nfs/k8s-worker-01@CUBE.K8S
+    current:
+      k8s-worker-01: "{{ hostvars['k8s-worker-01'].keytab_installed.fingerprint }}"
+  no_log: true
+  register: keytab_bundles
+'''
+
+RETURN = r'''
+bundles:
+  description: Base64 keytab content and fingerprint per out-of-date client.
+  returned: always
+  type: dict
+current:
+  description: Clients whose installed keytab already matches.
+  returned: always
+  type: list
+  elements: str
+missing:
+  description: Principals without an exported keytab, per client.
+  returned: always
+  type: dict
+'''
+
+import base64
+import os
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.kerberos_admin import (
+    KeytabError,
+    keytab_filename,
+    keytab_fingerprint,
+    parse_keytab,
+    render_keytab,
+)
+
+
+def main():
+    module = AnsibleModule(
+        argument_spec=dict(
+            keytab_dir=dict(type='path', required=True),
+            clients=dict(type='dict', required=True),
+            current=dict(type='dict', default={}),
+        ),
+        supports_check_mode=True,
+    )
+
+    keytab_dir = module.params['keytab_dir']
+    current = module.params['current'] or {}
+    exports = {}
+    bundles, up_to_date, missing = {}, [], {}
+
+    for host, principals in sorted(module.params['clients'].items()):
+        entries = []
+        for principal in principals:
+            if principal not in exports:
+                path = os.path.join(keytab_dir, keytab_filename(principal))
+                try:
+                    with open(path, 'rb') as f:
+                        exports[principal] = [e for e in parse_keytab(f.read()) if e['principal'] == principal]
+                except FileNotFoundError:
+                    exports[principal] = None
+                except KeytabError as e:
+                    module.fail_json(msg=f"{path}: {e}")
+            if exports[principal] is None:
+                missing.setdefault(host, []).append(principal)
+                continue
+            entries.extend(exports[principal])
+        if host in missing:
+            continue
+        fingerprint = keytab_fingerprint(entries)
+        if current.get(host) == fingerprint:
+            up_to_date.append(host)
+            continue
+        bundles[host] = {
+            'fingerprint': fingerprint,
+            'principals': list(principals),
+            'content': base64.b64encode(render_keytab(entries)).decode('ascii'),
+        }
+
+    if missing:
+        module.fail_json(
+            msg="No exported keytab for: " + '; '.join(f"{h}: {', '.join(p)}" for h, p in missing.items()),
+            bundles={}, current=up_to_date, missing=missing,
+        )
+    module.exit_json(changed=False, bundles=bundles, current=up_to_date, missing=missing)
+
+
+if __name__ == '__main__':
+    main()
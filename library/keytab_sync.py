@@ -0,0 +1,134 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""Fingerprint and update the managed entries of a client keytab"""
+
+DOCUMENTATION = r'''
+---
+module: keytab_sync
+short_description: Report or replace the managed principals' keys in a keytab
+description:
+  - Without I(content), reports the fingerprint of the I(principals)' entries
+    in I(path) so the KDC can skip clients that are already current
+    (see M(keytab_bundle)).
+  - With I(content), replaces the entries of I(principals) in I(path) with the
+    ones from I(content) and keeps every other entry. The file is only
+    rewritten when the fingerprints differ, atomically and with mode 0600.
+options:
+  path:
+    description: Keytab to inspect or update.
+    type: path
+    default: /etc/krb5.keytab
+  principals:
+    description: Principals managed in the keytab.
+    type: list
+    elements: str
+    required: true
+  content:
+    description: Base64 keytab holding the new entries.
+    type: str
+'''
+
+EXAMPLES = r'''
+- name: Report the installed keytab fingerprint
+  keytab_sync:
+    principals:
+      - host/k8s-worker-01@CUBE.K8S
+      - nfs/k8s-worker-01@CUBE.K8S
+  register: keytab_installed
+
+- name: Install the keytab bundle
+  keytab_sync:
+    principals: "{{ bundle.principals }}"
+    content: "{{ bundle.content }}"
+  no_log: true
+'''
+
+RETURN = r'''
+fingerprint:
+  description: Fingerprint of the managed entries after the run.
+  returned: always
+  type: str
+entries:
+  description: Principal, kvno and enctype of the managed entries (no keys).
+  returned: always
+  type: list
+  elements: dict
+'''
+
+import base64
+import os
+import tempfile
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.kerberos_admin import (
+    KeytabError,
+    keytab_fingerprint,
+    merge_keytab,
+    parse_keytab,
+    render_keytab,
+)
+
+
+def describe(entries, principals):
+    return [
+        {'principal': e['principal'], 'kvno': e['kvno'], 'enctype': e['enctype']}
+        for e in entries if e['principal'] in principals
+    ]
+
+
+def main():
+    module = AnsibleModule(
+        argument_spec=dict(
+            path=dict(type='path', default='/etc/krb5.keytab'),
+            principals=dict(type='list', elements='str', required=True),
+            content=dict(type='str', no_log=True),
+        ),
+        supports_check_mode=True,
+    )
+
+    path = module.params['path']
+    principals = set(module.params['principals'])
+    try:
+        with open(path, 'rb') as f:
+            existing = parse_keytab(f.read())
+    except FileNotFoundError:
+        existing = []
+    except KeytabError as e:
+        module.fail_json(msg=f"{path}: {e}")
+
+    fingerprint = keytab_fingerprint(existing, principals)
+    result = dict(changed=False, fingerprint=fingerprint, entries=describe(existing, principals))
+    if module.params['content'] is None:
+        module.exit_json(**result)
+
+    try:
+        incoming = parse_keytab(base64.b64decode(module.params['content']))
+    except (KeytabError, ValueError) as e:
+        module.fail_json(msg=f"Invalid keytab content: {e}")
+    missing = sorted(principals - {e['principal'] for e in incoming})
+    if missing:
+        module.fail_json(msg=f"Keytab content has no keys for: {', '.join(missing)}")
+
+    if keytab_fingerprint(incoming, principals) == fingerprint:
+        module.exit_json(**result)
+
+    merged = merge_keytab(existing, incoming, principals)
+    result.update(changed=True, fingerprint=keytab_fingerprint(merged, principals),
+                  entries=describe(merged, principals))
+    if not module.check_mode:
+        directory = os.path.dirname(path) or '.'
+        fd, temporary = tempfile.mkstemp(dir=directory, prefix='.keytab-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(render_keytab(merged))
+            os.chmod(temporary, 0o600)
+            os.replace(temporary, path)
+        except OSError as e:
+            if os.path.exists(temporary):
+                os.unlink(temporary)
+            module.fail_json(msg=f"Cannot write {path}: {e}")
+    module.exit_json(**result)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""Compare or store a role fingerprint on the managed host"""
+
+DOCUMENTATION = r'''
+---
+module: role_fingerprint
+short_description: Skip roles whose inputs and rendered files are unchanged
+description:
+  - Normally called through the role_fingerprint action plugin, which computes
+    I(fingerprint) on the controller from the role's files and the resolved
+    values of the variables they reference.
+  - With C(state=checked), reports whether I(fingerprint) equals the one stored
+    in C(<state_dir>/<role>.sha256) and every file recorded with it still has
+    its recorded checksum. Nothing is changed.
+  - With C(state=stored), writes I(fingerprint) and the checksums of I(paths)
+    to the state file, atomically, when they differ.
+options:
+  role:
+    description: Role name, used for the state file name.
+    type: str
+    required: true
+  fingerprint:
+    description: Fingerprint computed on the controller.
+    type: str
+    required: true
+  state:
+    description: Compare with (C(checked)) or write (C(stored)) the state file.
+    type: str
+    choices: [checked, stored]
+    default: checked
+  paths:
+    description: Files rendered by the role, recorded with C(state=stored).
+    type: list
+    elements: path
+    default: []
+  force:
+    description: Report the role as not current, so it runs in full.
+    type: bool
+    default: false
+  state_dir:
+    description: Directory holding the state files.
+    type: path
+    default: /var/lib/cube-storage
+'''
+
+EXAMPLES = r'''
+- name: Fingerprint nfs-server configuration
+  role_fingerprint:
+    role: nfs-server
+  register: nfs_server_fingerprint
+'''
+
+RETURN = r'''
+current:
+  description: Whether the role can be skipped (C(state=checked)).
+  returned: always
+  type: bool
+reason:
+  description: Why the role is or is not current.
+  returned: always
+  type: str
+state_file:
+  description: Path of the state file.
+  returned: always
+  type: str
+'''
+
+import os
+import tempfile
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.role_fingerprint import check_state, format_state, state_path
+
+
+def main():
+    module = AnsibleModule(
+        argument_spec=dict(
+            role=dict(type='str', required=True),
+            fingerprint=dict(type='str', required=True),
+            state=dict(type='str', choices=['checked', 'stored'], default='checked'),
+            paths=dict(type='list', elements='path', default=[]),
+            force=dict(type='bool', default=False),
+            state_dir=dict(type='path', default='/var/lib/cube-storage'),
+        ),
+        supports_check_mode=True,
+    )
+    params = module.params
+    state_file = state_path(params['state_dir'], params['role'])
+
+    if params['state'] == 'checked':
+        if params['force']:
+            current, reason = False, 'forced'
+        else:
+            current, reason = check_state(state_file, params['fingerprint'])
+        module.exit_json(changed=False, current=current, reason=reason, state_file=state_file)
+
+    content = format_state(params['fingerprint'], params['paths'])
+    try:
+        with open(state_file, 'r') as f:
+            changed = f.read() != content
+    except FileNotFoundError:
+        changed = True
+    if changed and not module.check_mode:
+        os.makedirs(params['state_dir'], mode=0o755, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=params['state_dir'], prefix=f".{params['role']}.")
+        with os.fdopen(fd, 'w') as f:
+            f.write(content)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, state_file)
+    module.exit_json(changed=changed, current=True, reason='stored', state_file=state_file)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""Share directory provisioning in one module call"""
+
+DOCUMENTATION = r'''
+---
+module: share_directories
+short_description: Create and validate all share directories in one call
+description:
+  - Creates every share directory that is missing and brings the owner,
+    group and mode of existing ones in line, returning a result per path.
+    Replaces one M(ansible.builtin.file) plus one M(ansible.builtin.stat)
+    invocation per share.
+  - Shares with I(recurse) set also have their contents reconciled by a
+    bounded pool of worker threads that only changes inodes whose owner,
+    group or mode differ, instead of a blind C(chown -R).
+  - Shares with a I(quota) become XFS or ext4 quota projects limited to
+    that size; the file system must be mounted with C(prjquota).
+options:
+  shares:
+    description:
+      - Share definitions. Each item takes C(path) (required), C(owner),
+        C(group), C(mode) (default C(0755)), C(recurse) (default false),
+        C(dir_mode) (mode for directories below the share, default
+        unchanged), C(file_mode) (mode for regular files below the share,
+        default unchanged), C(quota) (size limit such as C(500G),
+        enforced with a project quota) and C(project_id) (project id for
+        the quota, default the one in C(/etc/projid) or the next free one).
+    type: list
+    elements: dict
+    required: true
+  default_owner:
+    description: Owner for shares that do not set one.
+    type: str
+    default: root
+  default_group:
+    description: Group for shares that do not set one.
+    type: str
+    default: root
+  default_mode:
+    description: Mode for shares that do not set one.
+    type: raw
+    default: '0755'
+  workers:
+    description: Worker threads per recursive reconciliation.
+    type: int
+    default: 8
+'''
+
+EXAMPLES = r'''
+- name: Provision share directories
+  share_directories:
+    shares:
+      - path: /srv/shares/public
+        group: users
+        mode: '0775'
+      - path: /srv/shares/builds
+        owner: builder
+        group: builder
+        mode: '0770'
+        recurse: true
+        file_mode: '0660'
+        quota: 2T
+    workers: 16
+'''
+
+RETURN = r'''
+shares:
+  description: Per-path results.
+  returned: always
+  type: list
+  elements: dict
+  contains:
+    path:
+      description: Share path.
+      type: str
+    state:
+      description: C(created), C(updated), C(ok) or C(failed).
+      type: str
+    changes:
+      description: Attributes of the share directory that changed.
+      type: list
+    reconcile:
+      description: >-
+        For recursive shares, entries scanned and changed, per-attribute
+        change counts and the first errors.
+      type: dict
+    quota:
+      description: >-
+        For shares with a quota, the project id, bytes and files used, the
+        limit in bytes and what changed (project, projid, projects, limit).
+      type: dict
+    msg:
+      description: Error message for failed shares.
+      type: str
+'''
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.share_dirs import ShareError, ensure_directory, reconcile_tree
+from ansible.module_utils.share_quota import QuotaError, apply_quota
+
+
+def provision(share, params, check_mode):
+    owner = share.get('owner') or params['default_owner']
+    group = share.get('group') or params['default_group']
+    mode = share.get('mode') or params['default_mode']
+    result = ensure_directory(share['path'], owner, group, mode, check_mode)
+    if share.get('recurse'):
+        if result['state'] == 'created' and check_mode:
+            return result
+        summary = reconcile_tree(
+            share['path'], owner, group, share.get('dir_mode'), share.get('file_mode'),
+            params['workers'], check_mode,
+        )
+        result['reconcile'] = summary
+        if summary['changed'] and result['state'] == 'ok':
+            result['state'] = 'updated'
+    if share.get('quota') is not None:
+        if result['state'] == 'created' and check_mode:
+            return result
+        quota = apply_quota(share['path'], share['quota'], share.get('project_id'), check_mode)
+        result['quota'] = quota
+        if quota['changes'] and result['state'] == 'ok':
+            result['state'] = 'updated'
+    return result
+
+
+def main():
+    module = AnsibleModule(
+        argument_spec=dict(
+            shares=dict(type='list', elements='dict', required=True),
+            default_owner=dict(type='str', default='root'),
+            default_group=dict(type='str', default='root'),
+            default_mode=dict(type='raw', default='0755'),
+            workers=dict(type='int', default=8),
+        ),
+        supports_check_mode=True,
+    )
+
+    results = []
+    for share in module.params['shares']:
+        if not share.get('path'):
+            results.append({'path': None, 'state': 'failed', 'msg': 'share has no path'})
+            continue
+        try:
+            results.append(provision(share, module.params, module.check_mode))
+        except (ShareError, QuotaError, OSError) as e:
+            results.append({'path': share['path'], 'state': 'failed', 'msg': str(e)})
+
+    failed = [r for r in results if r['state'] == 'failed']
+    changed = any(r['state'] in ('created', 'updated') for r in results)
+    if failed:
+        module.fail_json(
+            msg=f"{len(failed)} share(s) failed: " + '; '.join(f"{r['path']}: {r['msg']}" for r in failed),
+            changed=changed, shares=results,
+        )
+    module.exit_json(changed=changed, shares=results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""Backing file systems for shares in one module call"""
+
+DOCUMENTATION = r'''
+---
+module: share_storage
+short_description: Provision LVM volumes and tuned XFS/ext4 file systems for shares
+description:
+  - Puts each share or share group on its own file system, on an LVM
+    logical volume (created, and grown, as needed) or a plain device.
+  - File systems are created with the mkfs parameters of their profile
+    (allocation groups, log size, inode size, stripe alignment) and only
+    on devices without a signature; an existing file system is never
+    reformatted.
+  - The fstab line of each mount point is added or rewritten in place with
+    the profile's mount options, and the file system is mounted, or
+    remounted when its options changed.
+options:
+  volumes:
+    description:
+      - Volume definitions. Each item takes C(name) (LV name), C(mountpoint),
+        either C(device) or C(vg) with C(size) (C(500G), C(100%FREE)) and
+        optionally C(pvs) (physical volumes for a new volume group), plus
+        C(profile), C(fstype), C(mkfs) (parameter overrides) and
+        C(mount_options) (extra options).
+    type: list
+    elements: dict
+    required: true
+  profiles:
+    description:
+      - Named profiles, each with C(fstype) (C(xfs) or C(ext4)), C(mkfs)
+        (parameters such as C(agcount), C(log_size), C(inode_size),
+        C(stripe_unit), C(stripe_width)) and C(mount_options).
+    type: dict
+    required: true
+  default_profile:
+    description: Profile of volumes that do not name one.
+    type: str
+    default: default
+  fstab:
+    description: fstab file to manage.
+    type: path
+    default: /etc/fstab
+'''
+
+EXAMPLES = r'''
+- name: Provision share storage
+  share_storage:
+    volumes:
+      - name: builds
+        vg: data
+        pvs: [/dev/sdb]
+        size: 500G
+        mountpoint: /srv/shares/builds
+        profile: metadata-heavy
+      - name: media
+        device: /dev/md0
+        mountpoint: /srv/shares/media
+        profile: throughput
+        mkfs:
+          stripe_unit: 512k
+          stripe_width: 4
+    profiles: "{{ shares_storage_profiles }}"
+'''
+
+RETURN = r'''
+volumes:
+  description: Per-volume results.
+  returned: always
+  type: list
+  elements: dict
+  contains:
+    name:
+      description: Volume name.
+      type: str
+    device:
+      description: Block device of the file system.
+      type: str
+    state:
+      description: C(changed), C(ok) or C(failed).
+      type: str
+    changes:
+      description: Steps taken (vg, lv, lv_size, mkfs, fstab, mount, remount).
+      type: list
+    options:
+      description: Mount options written to fstab.
+      type: list
+    warnings:
+      description: Options that only apply at the next mount.
+      type: list
+    msg:
+      description: Error message for failed volumes.
+      type: str
+'''
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.share_storage import StorageError, provision_volume
+
+
+def main():
+    module = AnsibleModule(
+        argument_spec=dict(
+            volumes=dict(type='list', elements='dict', required=True),
+            profiles=dict(type='dict', required=True),
+            default_profile=dict(type='str', default='default'),
+            fstab=dict(type='path', default='/etc/fstab'),
+        ),
+        supports_check_mode=True,
+    )
+
+    results = []
+    for volume in module.params['volumes']:
+        try:
+            results.append(provision_volume(
+                volume, module.params['profiles'], module.params['default_profile'],
+                module.check_mode, module.params['fstab'],
+            ))
+        except (StorageError, OSError) as e:
+            results.append({'name': volume.get('name'), 'state': 'failed', 'msg': str(e)})
+
+    for result in results:
+        for warning in result.get('warnings', []):
+            module.warn(warning)
+    failed = [r for r in results if r['state'] == 'failed']
+    changed = any(r['state'] == 'changed' for r in results)
+    if failed:
+        module.fail_json(
+            msg=f"{len(failed)} volume(s) failed: " + '; '.join(f"{r['name']}: {r['msg']}" for r in failed),
+            changed=changed, volumes=results,
+        )
+    module.exit_json(changed=changed, volumes=results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""Documentation stub for the validate_storage_config action plugin"""
+
+DOCUMENTATION = r'''
+---
+module: validate_storage_config
+short_description: Validate role variables against the file server schema
+description:
+  - Runs entirely on the controller (see action_plugins/validate_storage_config.py).
+  - Templates the variables covered by the selected schemas and validates the
+    whole tree in one pass, returning every error at once.
+  - The schema lives in module_utils/storage_schema.py and is shared with the
+    offline tests.
+options:
+  schema:
+    description:
+      - Role schema(s) to validate, e.g. C(nfs-server) or C([samba, shares]).
+      - All schemas are validated when omitted.
+    type: raw
+'''
+
+EXAMPLES = r'''
+- name: Validate NFS server configuration
+  validate_storage_config:
+    schema: nfs-server
+'''
+
+RETURN = r'''
+errors:
+  description: Every validation error found.
+  returned: always
+  type: list
+  elements: str
+validated:
+  description: Variables that were validated.
+  returned: always
+  type: list
+  elements: str
+'''
@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""
+Converge-time profile store, top-N report and run diff
+
+The converge_profile callback plugin records the wall time of every
+task per host, and of every loop item, for each playbook run. Runs are
+kept in a SQLite database (or a JSON file when the store path ends in
+.json) so scripts/converge-report.py can list the slowest tasks, roles,
+hosts or loop items of a run and diff two runs to catch converge-time
+regressions before they reach the whole fleet.
+
+A run is a dict:
+
+  {'playbook': 'site.yml', 'label': '', 'started': <epoch>, 'finished': <epoch>,
+   'timings': [{'host', 'role', 'task', 'item', 'seconds', 'status'}, ...]}
+
+where ``item`` is '' for the whole task on a host and the loop item
+label for the per-item rows.
+"""
+
+import json
+import os
+import sqlite3
+
+GROUPINGS = ('task', 'role', 'host', 'item')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    playbook TEXT NOT NULL,
+    label TEXT NOT NULL DEFAULT '',
+    started REAL NOT NULL,
+    finished REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS timings (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    host TEXT NOT NULL,
+    role TEXT NOT NULL,
+    task TEXT NOT NULL,
+    item TEXT NOT NULL,
+    seconds REAL NOT NULL,
+    status TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS timings_run ON timings(run_id);
+"""
+
+
+def _is_json(path):
+    return str(path).endswith('.json')
+
+
+def _insert(conn, run):
+    cursor = conn.execute(
+        'INSERT INTO runs (playbook, label, started, finished) VALUES (?, ?, ?, ?)',
+        (run['playbook'], run.get('label', ''), run['started'], run['finished']),
+    )
+    conn.executemany(
+        'INSERT INTO timings (run_id, host, role, task, item, seconds, status) VALUES (?, ?, ?, ?, ?, ?, ?)',
+        [(cursor.lastrowid, t['host'], t.get('role', ''), t['task'], t.get('item', ''),
+          t['seconds'], t.get('status', 'ok')) for t in run['timings']],
+    )
+    return cursor.lastrowid
+
+
+def open_store(path):
+    """Open the profile store as a SQLite connection
+
+    A .json store is loaded into an in-memory database, so reports work
+    the same on both formats.
+    """
+    if _is_json(path):
+        conn = sqlite3.connect(':memory:')
+        conn.executescript(SCHEMA)
+        if os.path.exists(path):
+            with open(path) as f:
+                for run in json.load(f).get('runs', []):
+                    _insert(conn, run)
+        return conn
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def save_run(path, run):
+    """Append a run to the store and return its id"""
+    if _is_json(path):
+        data = {'runs': []}
+        if os.path.exists(path):
+            with open(path) as f:
+                data = json.load(f)
+        data['runs'].append(run)
+        tmp = f"{path}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+        return len(data['runs'])
+    conn = open_store(path)
+    try:
+        with conn:
+            return _insert(conn, run)
+    finally:
+        conn.close()
+
+
+def list_runs(conn):
+    """All runs, oldest first, as dicts with their task/host counts"""
+    rows = conn.execute(
+        'SELECT r.id, r.playbook, r.label, r.started, r.finished, '
+        "COUNT(DISTINCT t.host), COUNT(CASE WHEN t.item = '' THEN 1 END) "
+        'FROM runs r LEFT JOIN timings t ON t.run_id = r.id GROUP BY r.id ORDER BY r.id'
+    ).fetchall()
+    return [{'id': row[0], 'playbook': row[1], 'label': row[2], 'started': row[3],
+             'seconds': round(row[4] - row[3], 2), 'hosts': row[5], 'tasks': row[6]} for row in rows]
+
+
+def resolve_run(conn, ref):
+    """Run id for ``ref``: a positive id, or -1 for the latest run, -2 for the one before, ..."""
+    ref = int(ref)
+    ids = [row[0] for row in conn.execute('SELECT id FROM runs ORDER BY id')]
+    if ref < 0 and len(ids) >= -ref:
+        return ids[ref]
+    if ref in ids:
+        return ref
+    raise ValueError(f"no run {ref} in the profile store ({len(ids)} run(s))")
+
+
+def profile(conn, run_id, by='task'):
+    """Time per group in one run: {key: {'total', 'mean', 'max', 'count'}}
+
+    ``task`` and ``role`` group the whole-task rows over all hosts (mean
+    is per host, so runs against different host counts compare fairly),
+    ``host`` sums a host's tasks and ``item`` lists loop items per task.
+    """
+    if by not in GROUPINGS:
+        raise ValueError(f"unknown grouping {by!r}, expected one of {', '.join(GROUPINGS)}")
+    if by == 'item':
+        key, where = "role || ' : ' || task || ' [' || item || ']'", "item != ''"
+    elif by == 'task':
+        key, where = "role || ' : ' || task", "item = ''"
+    else:
+        key, where = by, "item = ''"
+    rows = conn.execute(
+        f'SELECT {key}, SUM(seconds), COUNT(DISTINCT host), MAX(seconds), COUNT(*) '
+        f'FROM timings WHERE run_id = ? AND {where} GROUP BY 1',
+        (run_id,),
+    ).fetchall()
+    return {
+        (name[3:] if name.startswith(' : ') else name): {
+            'total': round(total, 3),
+            'mean': round(total / hosts, 3),
+            'max': round(longest, 3),
+            'count': count,
+        }
+        for name, total, hosts, longest, count in rows
+    }
+
+
+def top(conn, run_id, by='task', limit=20):
+    """The ``limit`` slowest groups of a run as (key, stats) sorted by total time"""
+    rows = sorted(profile(conn, run_id, by).items(), key=lambda row: row[1]['total'], reverse=True)
+    return rows[:limit]
+
+
+def diff(conn, base_id, head_id, by='task', threshold=0.2, min_seconds=1.0):
+    """Compare the per-host mean time of each group between two runs
+
+    Returns rows sorted by the largest increase. A row is a regression
+    when it got slower by more than ``threshold`` (a fraction) and by at
+    least ``min_seconds``; groups only present in the head run count as
+    regressions once they take ``min_seconds``.
+    """
+    base = profile(conn, base_id, by)
+    head = profile(conn, head_id, by)
+    rows = []
+    for key in sorted(set(base) | set(head)):
+        before = base[key]['mean'] if key in base else None
+        after = head[key]['mean'] if key in head else None
+        delta = (after or 0.0) - (before or 0.0)
+        change = delta / before if before else None
+        regression = delta >= min_seconds and (change is None or change > threshold)
+        rows.append({
+            'key': key,
+            'base': before,
+            'head': after,
+            'delta': round(delta, 3),
+            'change': round(change, 3) if change is not None else None,
+            'regression': regression,
+        })
+    rows.sort(key=lambda row: row['delta'], reverse=True)
+    return rows
+
+
+def export_run(conn, run_id):
+    """A stored run as the dict accepted by save_run"""
+    playbook, label, started, finished = conn.execute(
+        'SELECT playbook, label, started, finished FROM runs WHERE id = ?', (run_id,)
+    ).fetchone()
+    timings = conn.execute(
+        'SELECT host, role, task, item, seconds, status FROM timings WHERE run_id = ? ORDER BY rowid',
+        (run_id,),
+    ).fetchall()
+    return {
+        'playbook': playbook, 'label': label, 'started': started, 'finished': finished,
+        'timings': [dict(zip(('host', 'role', 'task', 'item', 'seconds', 'status'), row)) for row in timings],
+    }
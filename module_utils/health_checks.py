@@ -0,0 +1,319 @@
+# -*- coding: utf-8 -*-
+"""
+Fleet health checks derived from the role variables
+
+Turns a host's roles and resolved variables (the ones the roles deploy
+from: nfs_exports, nfs_client_mounts, samba_shares, krb5_keytab_path,
+krb5_kdcs, ...) into a list of declarative checks, and runs them:
+
+  service    systemd unit is active (and enabled)
+  listen     something listens on a local TCP port (/proc/net/tcp{,6})
+  connect    a TCP connection to host:port succeeds from the host
+  file       a regular file exists
+  directory  a directory exists
+  mount      a path is a mount point, optionally of a given fstype
+  command    a shell command exits 0
+
+All checks of a host run in one session: this file is piped to the
+host's python3 (over ssh, or locally for ansible_connection=local) and
+run_checks() reports every result with its duration as JSON. ssh
+connections are multiplexed (ControlMaster/ControlPersist), so re-runs
+reuse them, and hosts are checked concurrently by a bounded thread pool.
+Standard library only, since it also runs on the managed hosts.
+"""
+
+import functools
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from xml.etree import ElementTree
+
+# Variables the checks are derived from (resolved on the controller)
+CHECK_VARIABLES = (
+    'krb5_keytab_path', 'krb5_kdcs', 'krb5_credentials_enabled', 'krb5_credentials_dir', 'kdc_port', 'kdc_is_replica',
+    'nfs_exports', 'nfs_enable_kerberos', 'nfs_client_mounts', 'nfs_client_fscache_enabled',
+    'nfs_provisioner_enabled',
+    'samba_shares', 'shares', 'shares_storage',
+)
+
+# Variables that say how to reach a host
+CONNECTION_VARIABLES = (
+    'ansible_host', 'ansible_port', 'ansible_user', 'ansible_connection',
+    'ansible_python_interpreter', 'ansible_become',
+)
+
+LOCAL_HOSTS = ('localhost', '127.0.0.1', '::1')
+TCP_LISTEN = '0A'
+SSH_OPTIONS = (
+    '-o', 'BatchMode=yes',
+    '-o', 'ControlMaster=auto',
+    '-o', 'ControlPersist=120s',
+    '-o', 'ControlPath=~/.ssh/cube-health-%C',
+)
+
+
+def _kdc_endpoint(entry):
+    if isinstance(entry, dict):
+        return str(entry['host']), int(entry.get('port') or 88)
+    host, sep, port = str(entry).strip().rpartition(':')
+    if sep and port.isdigit():
+        return host, int(port)
+    return str(entry).strip(), 88
+
+
+def derive_checks(roles, values):
+    """Checks for a host running ``roles`` with the resolved variable ``values``"""
+    checks = []
+
+    def add(name, kind, **spec):
+        checks.append(dict(name=name, type=kind, **spec))
+
+    kerberos = values.get('nfs_enable_kerberos', True)
+    if 'kerberos-client' in roles:
+        add('keytab', 'file', path=values.get('krb5_keytab_path', '/etc/krb5.keytab'))
+        for entry in values.get('krb5_kdcs') or []:
+            host, port = _kdc_endpoint(entry)
+            add(f"kdc {host}:{port} reachable", 'connect', host=host, port=port)
+        if values.get('krb5_credentials_enabled', False):
+            add('krb5-credentials service', 'service', unit='krb5-credentials')
+            add('credential cache directory', 'directory', path=values['krb5_credentials_dir'])
+    if 'kerberos-kdc' in roles:
+        add('krb5-kdc service', 'service', unit='krb5-kdc')
+        add('kdc port listening', 'listen', port=int(values.get('kdc_port', 88)))
+        if not values.get('kdc_is_replica', False):
+            add('krb5-admin-server service', 'service', unit='krb5-admin-server')
+            add('kadmin port listening', 'listen', port=749)
+    if 'nfs-server' in roles:
+        add('nfs-server service', 'service', unit='nfs-server')
+        add('nfs port listening', 'listen', port=2049)
+        add('rpc-gssd service', 'service', unit='rpc-gssd')
+        add('rpc-svcgssd service', 'service', unit='rpc-svcgssd')
+        for export in values.get('nfs_exports') or []:
+            add(f"export {export['path']}", 'directory', path=export['path'])
+        if values.get('nfs_provisioner_enabled', False):
+            add('nfs-provisioner service', 'service', unit='nfs-provisioner')
+    if 'nfs-client' in roles:
+        if kerberos:
+            add('rpc-gssd service', 'service', unit='rpc-gssd')
+        if values.get('nfs_client_fscache_enabled', False):
+            add('cachefilesd service', 'service', unit='cachefilesd')
+        for mount in values.get('nfs_client_mounts') or []:
+            if mount.get('state', 'mounted') == 'mounted':
+                add(f"mount {mount['path']}", 'mount', path=mount['path'], fstype='nfs')
+    if 'samba' in roles:
+        add('smbd service', 'service', unit='smbd')
+        add('nmbd service', 'service', unit='nmbd')
+        add('smb port listening', 'listen', port=445)
+        for share in values.get('samba_shares') or []:
+            add(f"samba share {share['name']}", 'directory', path=share['path'])
+    if 'shares' in roles:
+        for volume in values.get('shares_storage') or []:
+            add(f"file system {volume['mountpoint']}", 'mount', path=volume['mountpoint'],
+                fstype=volume.get('fstype'))
+        for share in values.get('shares') or []:
+            add(f"share {share['path']}", 'directory', path=share['path'])
+
+    # A check shared by two roles (rpc-gssd on a server that is also a
+    # client) runs once
+    unique = {}
+    for check in checks:
+        unique.setdefault(check['name'], check)
+    return list(unique.values())
+
+
+# Host side
+
+
+def _listening_ports():
+    ports = set()
+    for table in ('/proc/net/tcp', '/proc/net/tcp6'):
+        try:
+            with open(table) as f:
+                next(f, None)
+                for line in f:
+                    fields = line.split()
+                    if len(fields) > 3 and fields[3] == TCP_LISTEN:
+                        ports.add(int(fields[1].rsplit(':', 1)[1], 16))
+        except OSError:
+            continue
+    return ports
+
+
+def _mounts():
+    mounts = {}
+    with open('/proc/self/mounts') as f:
+        for line in f:
+            fields = line.split()
+            if len(fields) >= 3:
+                mounts[fields[1].replace('\\040', ' ')] = fields[2]
+    return mounts
+
+
+def _check_service(check):
+    unit = check['unit']
+    output = subprocess.run(
+        ['systemctl', 'show', '--property=ActiveState,UnitFileState', unit],
+        capture_output=True, text=True, timeout=check.get('timeout', 10),
+    ).stdout
+    state = dict(line.split('=', 1) for line in output.splitlines() if '=' in line)
+    active, enabled = state.get('ActiveState', 'unknown'), state.get('UnitFileState', 'unknown')
+    if active != 'active':
+        return False, f"{unit} is {active}"
+    if check.get('enabled', True) and enabled not in ('enabled', 'static', 'alias', 'indirect', 'generated'):
+        return False, f"{unit} is active but {enabled or 'not enabled'}"
+    return True, f"{unit} is active and {enabled}"
+
+
+def _check_listen(check):
+    if check['port'] in _listening_ports():
+        return True, f"port {check['port']} is listening"
+    return False, f"nothing listens on port {check['port']}"
+
+
+def _check_connect(check):
+    with socket.create_connection((check['host'], check['port']), timeout=check.get('timeout', 3)):
+        return True, f"connected to {check['host']}:{check['port']}"
+
+
+def _check_path(check):
+    path = check['path']
+    exists = os.path.isdir(path) if check['type'] == 'directory' else os.path.isfile(path)
+    return exists, f"{path} {'exists' if exists else 'is missing'}"
+
+
+def _check_mount(check):
+    path = check['path'].rstrip('/') or '/'
+    fstype = _mounts().get(path)
+    if fstype is None:
+        return False, f"{path} is not mounted"
+    if check.get('fstype') and not fstype.startswith(check['fstype']):
+        return False, f"{path} is {fstype}, expected {check['fstype']}"
+    return True, f"{path} is mounted ({fstype})"
+
+
+def _check_command(check):
+    result = subprocess.run(check['command'], shell=True, capture_output=True, text=True,
+                            timeout=check.get('timeout', 10))
+    output = (result.stdout + result.stderr).strip().splitlines()
+    return result.returncode == 0, output[-1] if output else f"exit status {result.returncode}"
+
+
+CHECKS = {
+    'service': _check_service,
+    'listen': _check_listen,
+    'connect': _check_connect,
+    'file': _check_path,
+    'directory': _check_path,
+    'mount': _check_mount,
+    'command': _check_command,
+}
+
+
+def run_checks(checks):
+    """Run checks on this host, returning one result per check with its duration"""
+    results = []
+    for check in checks:
+        started = time.monotonic()
+        try:
+            passed, message = CHECKS[check['type']](check)
+            status = 'pass' if passed else 'fail'
+        except KeyError as e:
+            status, message = 'error', f"unknown check type or missing field {e}"
+        except (OSError, subprocess.SubprocessError) as e:
+            status, message = 'fail' if check['type'] == 'connect' else 'error', str(e)
+        results.append({
+            'name': check['name'],
+            'type': check['type'],
+            'status': status,
+            'message': message,
+            'duration': round(time.monotonic() - started, 6),
+        })
+    return results
+
+
+# Controller side
+
+
+def host_command(host, connection, timeout=10):
+    """Command that runs python3 on ``host`` reading a program from stdin"""
+    python = connection.get('ansible_python_interpreter') or 'python3'
+    if connection.get('ansible_connection') == 'local' or (
+            host in LOCAL_HOSTS and not connection.get('ansible_host')):
+        return [sys.executable if python == 'python3' else python, '-']
+    target = connection.get('ansible_host') or host
+    if connection.get('ansible_user'):
+        target = f"{connection['ansible_user']}@{target}"
+    command = ['ssh', *SSH_OPTIONS, '-o', f"ConnectTimeout={timeout}"]
+    if connection.get('ansible_port'):
+        command += ['-p', str(connection['ansible_port'])]
+    command.append(target)
+    if connection.get('ansible_become') and connection.get('ansible_user') not in (None, 'root'):
+        command += ['sudo', '-n']
+    return command + [python, '-']
+
+
+@functools.lru_cache(maxsize=None)
+def _source():
+    with open(__file__) as f:
+        return f.read()
+
+
+def _program(checks):
+    """This module followed by a run_checks() call, for the host's python3"""
+    return f"{_source()}\nsys.stdout.write(json.dumps(run_checks(json.loads({json.dumps(checks)!r}))))\n"
+
+
+def check_host(host, connection, checks, timeout=30):
+    """Run all checks of one host in one session; return the host's result"""
+    started = time.monotonic()
+    result = {'host': host, 'status': 'pass', 'checks': []}
+    try:
+        completed = subprocess.run(
+            host_command(host, connection, min(timeout, 10)), input=_program(checks),
+            capture_output=True, text=True, timeout=timeout,
+        )
+        if completed.returncode != 0:
+            raise RuntimeError((completed.stderr.strip().splitlines() or [f"exit status {completed.returncode}"])[-1])
+        result['checks'] = json.loads(completed.stdout)
+    except (OSError, ValueError, RuntimeError, subprocess.TimeoutExpired) as e:
+        result.update(status='unreachable', error=str(e))
+    else:
+        if any(check['status'] != 'pass' for check in result['checks']):
+            result['status'] = 'fail'
+    result['duration'] = round(time.monotonic() - started, 3)
+    return result
+
+
+def run_fleet(jobs, forks=50, timeout=30):
+    """Check (host, connection, checks) jobs concurrently; results in job order"""
+    with ThreadPoolExecutor(max_workers=max(1, min(forks, len(jobs) or 1))) as pool:
+        futures = [pool.submit(check_host, host, connection, checks, timeout) for host, connection, checks in jobs]
+        return [future.result() for future in futures]
+
+
+def junit_report(results, name='storage-health'):
+    """JUnit XML with one testsuite per host and one testcase per check"""
+    suites = ElementTree.Element('testsuites', name=name)
+    for result in results:
+        checks = result['checks']
+        suite = ElementTree.SubElement(
+            suites, 'testsuite', name=result['host'], tests=str(max(len(checks), 1)),
+            failures=str(sum(check['status'] == 'fail' for check in checks)),
+            errors=str(sum(check['status'] == 'error' for check in checks) + ('error' in result)),
+            time=f"{result['duration']:.3f}",
+        )
+        if 'error' in result:
+            case = ElementTree.SubElement(suite, 'testcase', classname=result['host'], name='connection', time='0')
+            ElementTree.SubElement(case, 'error', message=result['error'])
+        for check in checks:
+            case = ElementTree.SubElement(suite, 'testcase', classname=result['host'], name=check['name'],
+                                          time=f"{check['duration']:.6f}")
+            if check['status'] != 'pass':
+                tag = 'failure' if check['status'] == 'fail' else 'error'
+                ElementTree.SubElement(case, tag, message=check['message'], type=check['type'])
+    ElementTree.indent(suites)
+    return ElementTree.tostring(suites, encoding='unicode', xml_declaration=True) + '\n'
@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+"""
+KDC load generation and latency statistics
+
+Drives concurrent authentication requests through a pool of worker
+threads and summarises them per request type (AS for kinit, TGS for
+kvno): throughput and p50/p99 latency. Also rewrites rendered krb5
+profiles so throwaway KDCs built from the kerberos-kdc templates can run
+from temporary directories on unprivileged ports, and runs such KDCs
+(LocalKDC). Used by scripts/kdc-loadtest.py and by the tests that need a
+real KDC (they skip without the MIT krb5 tools).
+"""
+
+import os
+import re
+import socket
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from kerberos_admin import addprinc_request, batch_script, chunked, ktadd_request
+from storage_inventory import STUB_DATE_TIME, load_yaml
+from storage_render import template_environment
+
+ROLES_DIR = Path(__file__).resolve().parent.parent / 'roles'
+REALM = 'LOADTEST.LOCAL'
+DOMAIN = 'loadtest.local'
+REQUIRED_TOOLS = ('kdb5_util', 'kadmin.local', 'krb5kdc', 'kinit', 'kvno', 'kdestroy')
+KADMIN_BATCH_SIZE = 500
+
+
+def set_profile_values(text, values):
+    """Replace ``key = value`` lines of a krb5 profile
+
+    Every occurrence of each key is rewritten, except values that are
+    log destinations (``FILE:...``), so the ``kdc`` realm entry can be
+    pointed at a local port without touching ``[logging] kdc``.
+    """
+    for key, value in values.items():
+        pattern = re.compile(rf'^([ \t]*{re.escape(key)}[ \t]*=[ \t]*)(?![ \t]*FILE:).*$', re.MULTILINE)
+        text = pattern.sub(lambda m, v=str(value): m.group(1) + v, text)
+    return text
+
+
+def localize_profiles(kdc_conf, krb5_conf, directory, enctype):
+    """Point rendered kdc.conf/krb5.conf at ``directory`` and one enctype
+
+    Database, stash, ACL and log paths move into ``directory`` and
+    clients request and accept only ``enctype``; ports and KDC lists
+    come from the kdc_port/kdc_primary/kdc_replicas template variables.
+    Returns the rewritten (kdc_conf, krb5_conf).
+    """
+    kdc_conf = kdc_conf.replace('/var/lib/krb5kdc', directory).replace('/etc/krb5kdc', directory)
+    krb5_conf = set_profile_values(krb5_conf.replace('/var/log', directory), {
+        'default_tgs_enctypes': enctype,
+        'default_tkt_enctypes': enctype,
+        'permitted_enctypes': enctype,
+    })
+    return kdc_conf, krb5_conf
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not values:
+        return 0.0
+    rank = max(1, -(-len(values) * pct // 100))
+    return values[int(rank) - 1]
+
+
+def summarize(samples, elapsed):
+    """Summarise (request_type, seconds, ok) samples per request type
+
+    Returns {type: {requests, errors, throughput, p50_ms, p99_ms,
+    mean_ms}}; latencies cover successful requests only and throughput
+    is successful requests per second of wall-clock time.
+    """
+    by_type = {}
+    for request_type, seconds, ok in samples:
+        entry = by_type.setdefault(request_type, {'latencies': [], 'errors': 0})
+        if ok:
+            entry['latencies'].append(seconds)
+        else:
+            entry['errors'] += 1
+    summary = {}
+    for request_type, entry in sorted(by_type.items()):
+        latencies = sorted(entry['latencies'])
+        summary[request_type] = {
+            'requests': len(latencies) + entry['errors'],
+            'errors': entry['errors'],
+            'throughput': round(len(latencies) / elapsed, 1) if elapsed > 0 else 0.0,
+            'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+            'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+            'mean_ms': round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+        }
+    return summary
+
+
+def timed(request_type, func, *args):
+    """Call ``func`` and return a (request_type, seconds, ok) sample"""
+    start = time.monotonic()
+    ok = bool(func(*args))
+    return request_type, time.monotonic() - start, ok
+
+
+def run_load(task, iterations, concurrency):
+    """Run ``task(worker, iteration)`` ``iterations`` times on ``concurrency`` threads
+
+    ``task`` returns a list of samples (see timed()); ``worker`` is a
+    stable index per thread so tasks can keep per-thread state such as
+    a credential cache. Returns (samples, elapsed seconds).
+    """
+    samples = []
+    lock = threading.Lock()
+    local = threading.local()
+    counter = iter(range(concurrency))
+
+    def run(iteration):
+        if not hasattr(local, 'worker'):
+            with lock:
+                local.worker = next(counter)
+        result = task(local.worker, iteration)
+        with lock:
+            samples.extend(result)
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(run, iteration) for iteration in range(iterations)]:
+            future.result()
+    return samples, time.monotonic() - start
+
+
+# throwaway KDCs -----------------------------------------------------------
+
+class LocalKDC:
+    """A KDC built from the role templates, running from a temporary directory
+
+    ``topology`` holds the kdc_primary/kdc_replicas template variables
+    shared by every instance of the test realm; ``site`` is this
+    instance's kdc_site.
+    """
+
+    def __init__(self, enctype, directory, port, topology, site=''):
+        self.enctype = enctype
+        self.directory = directory
+        self.port = port
+        self.topology = topology
+        self.site = site
+        os.makedirs(directory, exist_ok=True)
+        self.kdc_conf = os.path.join(directory, 'kdc.conf')
+        self.krb5_conf = os.path.join(directory, 'krb5.conf')
+        self.keytab = os.path.join(directory, 'loadtest.keytab')
+        self.env = dict(os.environ, KRB5_CONFIG=self.krb5_conf, KRB5_KDC_PROFILE=self.kdc_conf)
+        self.process = None
+
+    def write_config(self):
+        env = template_environment(str(ROLES_DIR), 'kerberos-kdc')
+        variables = load_yaml(str(ROLES_DIR / 'kerberos-kdc' / 'defaults' / 'main.yml'))
+        variables.update(self.topology)
+        variables.update(
+            kdc_realm=REALM,
+            kdc_domain=DOMAIN,
+            kdc_port=self.port,
+            kdc_site=self.site,
+            kdc_propagation='kprop',
+            kdc_supported_enctypes=[f"{self.enctype}:normal"],
+            ansible_date_time=dict(STUB_DATE_TIME),
+        )
+        kdc_conf, krb5_conf = localize_profiles(
+            env.get_template('kdc.conf.j2').render(**variables),
+            env.get_template('krb5.conf.j2').render(**variables),
+            self.directory, self.enctype,
+        )
+        for path, text in ((self.kdc_conf, kdc_conf), (self.krb5_conf, krb5_conf)):
+            with open(path, 'w') as f:
+                f.write(text)
+        open(os.path.join(self.directory, 'kadm5.acl'), 'w').close()
+
+    def run(self, command, data=None):
+        result = subprocess.run(command, input=data, capture_output=True, text=True, env=self.env)
+        if result.returncode != 0:
+            raise RuntimeError(f"{' '.join(command)}: {(result.stderr or result.stdout).strip()}")
+        return result
+
+    def create(self, master_password, principals=()):
+        self.write_config()
+        self.run(['kdb5_util', '-r', REALM, 'create', '-s', '-P', master_password])
+        requests = [addprinc_request(p) for p in principals]
+        requests += [ktadd_request(p, self.keytab) for p in principals]
+        for chunk in chunked(requests, KADMIN_BATCH_SIZE):
+            self.run(['kadmin.local', '-r', REALM], data=batch_script(chunk))
+
+    def propagate(self, replicas):
+        """Copy the database to replicas: the same full dump kprop ships"""
+        dump = os.path.join(self.directory, 'replica_datatrans')
+        self.run(['kdb5_util', '-r', REALM, 'dump', dump])
+        for replica in replicas:
+            replica.run(['kdb5_util', '-r', REALM, 'load', dump])
+
+    def start(self):
+        self.process = subprocess.Popen(
+            ['krb5kdc', '-n', '-r', REALM], env=self.env,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"krb5kdc exited with status {self.process.returncode}")
+            try:
+                socket.create_connection(('127.0.0.1', self.port), timeout=0.2).close()
+                return
+            except OSError:
+                time.sleep(0.1)
+        raise RuntimeError(f"krb5kdc did not listen on port {self.port}")
+
+    def stop(self):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            self.process.wait(timeout=10)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
@@ -0,0 +1,341 @@
+# -*- coding: utf-8 -*-
+"""
+Kerberos administration helpers
+
+Shared by the kadmin_principals module and the controller-side tooling.
+Everything here is plain Python so it can be exercised offline without a
+KDC: command construction, listprincs parsing, batch planning and keytab
+parsing, merging and fingerprinting.
+"""
+
+import hashlib
+import os
+import re
+
+# Lines kadmin prints that are not principal names
+_NOISE_PATTERNS = (
+    re.compile(r'^Authenticating as principal '),
+    re.compile(r'^kadmin(\.local)?:\s*'),
+)
+
+
+def qualify_principal(name, realm=None):
+    """Append @REALM to a principal name that has no realm component"""
+    name = name.strip()
+    if realm and '@' not in name:
+        return f"{name}@{realm}"
+    return name
+
+
+def keytab_filename(principal):
+    """Return the export file name used for a principal's keytab
+
+    Mirrors the historic ``tr '/@' '_'`` naming so existing exports and
+    playbooks that fetch them keep working.
+    """
+    return principal.replace('/', '_').replace('@', '_') + '.keytab'
+
+
+def quote_argument(value):
+    """Quote a value for the kadmin request parser
+
+    kadmin splits requests on whitespace and honours double quotes; a
+    literal quote inside a quoted string is written as two quotes.
+    """
+    value = str(value)
+    if '\n' in value or '\r' in value:
+        raise ValueError("kadmin arguments cannot contain newlines")
+    return '"' + value.replace('"', '""') + '"'
+
+
+def parse_listprincs(output):
+    """Parse ``listprincs`` output into a set of principal names"""
+    principals = set()
+    for line in output.splitlines():
+        line = line.strip()
+        if not line or any(p.match(line) for p in _NOISE_PATTERNS):
+            continue
+        if ' ' in line:
+            continue
+        principals.add(line)
+    return principals
+
+
+def addprinc_request(principal, password=None):
+    """Build an addprinc request (random key unless a password is given)"""
+    if password is None:
+        return f"addprinc -randkey {quote_argument(principal)}"
+    return f"addprinc -pw {quote_argument(password)} {quote_argument(principal)}"
+
+
+def ktadd_request(principal, keytab, norandkey=False):
+    """Build a ktadd request exporting a principal into a keytab file"""
+    flags = '-norandkey ' if norandkey else ''
+    return f"ktadd -k {quote_argument(keytab)} {flags}{quote_argument(principal)}"
+
+
+def chunked(items, size):
+    """Yield successive lists of at most ``size`` items"""
+    size = max(1, int(size))
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def normalize_principals(principals, realm=None):
+    """Normalise a mixed list of names and {name, password} dicts
+
+    Returns an ordered list of (principal, password) tuples with
+    duplicates removed; the first occurrence of a principal wins.
+    """
+    seen = set()
+    normalized = []
+    for entry in principals:
+        if isinstance(entry, dict):
+            name = entry.get('name')
+            password = entry.get('password')
+        else:
+            name, password = entry, None
+        if not name:
+            raise ValueError(f"Principal entry has no name: {entry!r}")
+        principal = qualify_principal(str(name), realm)
+        if principal in seen:
+            continue
+        seen.add(principal)
+        normalized.append((principal, None if password is None else str(password)))
+    return normalized
+
+
+def plan_principals(desired, existing, keytab_dir=None, keytab_exists=os.path.exists):
+    """Diff desired principals against the KDC database
+
+    ``desired`` is the output of normalize_principals(), ``existing`` the
+    set returned by parse_listprincs(). Returns a list of plan entries
+    (dicts with principal, password, create and keytab keys) in the
+    order the principals were requested. A keytab is only (re-)exported
+    for principals that are being created or whose export file is
+    missing, so converging an unchanged realm performs no rekeying.
+    """
+    plan = []
+    for principal, password in desired:
+        create = principal not in existing
+        keytab = None
+        if keytab_dir:
+            path = os.path.join(keytab_dir, keytab_filename(principal))
+            if create or not keytab_exists(path):
+                keytab = path
+        plan.append({
+            'principal': principal,
+            'password': password,
+            'create': create,
+            'keytab': keytab,
+        })
+    return plan
+
+
+def plan_requests(plan):
+    """Turn a plan into the ordered list of kadmin requests to send
+
+    Keytabs of principals that already exist are exported with
+    -norandkey, so re-exporting a missing file keeps the current keys.
+    """
+    requests = []
+    for entry in plan:
+        if entry['create']:
+            requests.append(addprinc_request(entry['principal'], entry['password']))
+    for entry in plan:
+        if entry['keytab']:
+            requests.append(ktadd_request(entry['principal'], entry['keytab'], norandkey=not entry['create']))
+    return requests
+
+
+def batch_script(requests):
+    """Render requests as the stdin script for one kadmin session"""
+    return '\n'.join(list(requests) + ['quit']) + '\n'
+
+
+# Keytab files (MIT format 0x0502): a 2-byte version followed by entries,
+# each prefixed with a signed 32-bit length (negative lengths are holes
+# left by deleted entries).
+KEYTAB_VERSION = b'\x05\x02'
+
+
+class KeytabError(ValueError):
+    """Raised for keytab data that cannot be parsed"""
+
+
+def _counted(data, offset):
+    length = int.from_bytes(data[offset:offset + 2], 'big')
+    start = offset + 2
+    if start + length > len(data):
+        raise KeytabError("truncated keytab entry")
+    return data[start:start + length], start + length
+
+
+def parse_keytab_entry(raw):
+    """Parse one keytab entry into principal, kvno, enctype and key"""
+    components = int.from_bytes(raw[0:2], 'big')
+    realm, offset = _counted(raw, 2)
+    names = []
+    for _ in range(components):
+        name, offset = _counted(raw, offset)
+        names.append(name.decode('utf-8'))
+    # name_type (4) and timestamp (4)
+    offset += 8
+    kvno = raw[offset]
+    offset += 1
+    enctype = int.from_bytes(raw[offset:offset + 2], 'big')
+    key, offset = _counted(raw, offset + 2)
+    if len(raw) - offset >= 4:
+        kvno32 = int.from_bytes(raw[offset:offset + 4], 'big')
+        if kvno32:
+            kvno = kvno32
+    return {
+        'principal': '/'.join(names) + '@' + realm.decode('utf-8'),
+        'kvno': kvno,
+        'enctype': enctype,
+        'key': key,
+        'raw': raw,
+    }
+
+
+def parse_keytab(data):
+    """Parse keytab bytes into a list of entry dicts (empty data means no entries)"""
+    if not data:
+        return []
+    if data[:2] != KEYTAB_VERSION:
+        raise KeytabError(f"unsupported keytab version {data[:2].hex()}")
+    entries = []
+    offset = 2
+    while offset + 4 <= len(data):
+        size = int.from_bytes(data[offset:offset + 4], 'big', signed=True)
+        offset += 4
+        if size < 0:
+            offset += -size
+            continue
+        if size == 0 or offset + size > len(data):
+            break
+        entries.append(parse_keytab_entry(data[offset:offset + size]))
+        offset += size
+    return entries
+
+
+def build_keytab_entry(principal, kvno, enctype, key, timestamp=0, name_type=1):
+    """Encode one keytab entry (used to assemble keytabs and in tests)"""
+    names, _, realm = principal.rpartition('@')
+
+    def counted(value):
+        value = value.encode('utf-8') if isinstance(value, str) else value
+        return len(value).to_bytes(2, 'big') + value
+
+    parts = names.split('/')
+    raw = len(parts).to_bytes(2, 'big') + counted(realm) + b''.join(counted(p) for p in parts)
+    raw += name_type.to_bytes(4, 'big') + timestamp.to_bytes(4, 'big') + bytes([kvno & 0xff])
+    raw += enctype.to_bytes(2, 'big') + counted(key) + kvno.to_bytes(4, 'big')
+    return parse_keytab_entry(raw)
+
+
+def render_keytab(entries):
+    """Serialise entries back into keytab bytes"""
+    return KEYTAB_VERSION + b''.join(len(e['raw']).to_bytes(4, 'big') + e['raw'] for e in entries)
+
+
+def merge_keytab(existing, incoming, principals):
+    """Replace the entries of ``principals`` in ``existing`` with ``incoming``
+
+    Entries for other principals (e.g. cifs/ keys added by hand) are
+    kept, so the managed principals can be updated without clobbering
+    the rest of /etc/krb5.keytab.
+    """
+    managed = set(principals)
+    kept = [e for e in existing if e['principal'] not in managed]
+    return kept + [e for e in incoming if e['principal'] in managed]
+
+
+def keytab_fingerprint(entries, principals=None):
+    """Stable SHA-256 over the (principal, kvno, enctype, key) of the selected entries
+
+    The same keys in a different order or file layout produce the same
+    fingerprint, so the KDC export and a client keytab can be compared
+    without shipping the keys.
+    """
+    selected = sorted(
+        (e['principal'], e['kvno'], e['enctype'], e['key'])
+        for e in entries if principals is None or e['principal'] in principals
+    )
+    digest = hashlib.sha256()
+    for principal, kvno, enctype, key in selected:
+        digest.update(f"{principal}\0{kvno}\0{enctype}\0".encode('utf-8') + key + b'\0')
+    return digest.hexdigest()
+
+
+def client_principals(hostname, realm, services=('host', 'nfs')):
+    """Service principals of an NFS client, in the historic host/ + nfs/ order"""
+    return [f"{service}/{hostname}@{realm}" for service in services]
+
+
+def idmap_static_map(users, realm):
+    """idmapd.conf [Static] entries mapping user principals to local names
+
+    ``users`` is a kdc_user_principals style list (names or dicts with a
+    name). The GSS principal name@REALM of each user maps to the local
+    name; entries qualified with another realm keep it. Service
+    principals (with a /) are left to nsswitch.
+    """
+    mapping = {}
+    for principal, _ in normalize_principals(users, realm):
+        name = principal.split('@', 1)[0]
+        if '/' in name:
+            continue
+        mapping[principal] = name
+    return dict(sorted(mapping.items()))
+
+
+# KDC lists. Entries are "host", "host:port" or dicts with host, optional
+# port and optional site; port 88 is the default and is left out.
+KDC_DEFAULT_PORT = 88
+
+
+def _kdc_entry(entry):
+    if isinstance(entry, dict):
+        host, port, site = entry.get('host'), entry.get('port'), entry.get('site')
+    else:
+        host, port, site = str(entry), None, None
+    if not host:
+        raise ValueError(f"KDC entry has no host: {entry!r}")
+    host = str(host).strip()
+    if port is None and re.fullmatch(r'[^:\s]+:\d+', host):
+        host, port = host.rsplit(':', 1)
+    return host, int(port) if port is not None else KDC_DEFAULT_PORT, site or None
+
+
+def kdc_address(entry):
+    """krb5.conf ``kdc =`` value of a KDC entry"""
+    host, port, _ = _kdc_entry(entry)
+    return host if port == KDC_DEFAULT_PORT else f"{host}:{port}"
+
+
+def kdc_hosts(kdcs):
+    """Host names of a KDC list (for host/ and kiprop/ principals), duplicates removed"""
+    hosts = []
+    for entry in kdcs or []:
+        host = _kdc_entry(entry)[0]
+        if host not in hosts:
+            hosts.append(host)
+    return hosts
+
+
+def kdc_locality_order(kdcs, site=None):
+    """Order KDCs for krb5.conf: those in ``site`` first, then the rest
+
+    Clients try the ``kdc =`` lines in order and only move on when a KDC
+    does not answer, so listing the local rack's KDCs first keeps ticket
+    traffic local while the remote ones stay available for failover.
+    The listed order is kept within each group; duplicates are removed.
+    """
+    local, remote = [], []
+    for entry in kdcs or []:
+        address = kdc_address(entry)
+        if address in local or address in remote:
+            continue
+        (local if site and _kdc_entry(entry)[2] == site else remote).append(address)
+    return local + remote
@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Keytab-backed credential caches for rpc.gssd
+
+Keeps one file credential cache per configured principal in a directory
+rpc.gssd searches (nfs.conf [gssd] cred-cache-directory), named
+krb5cc_<uid> and owned by that uid, so gssd finds valid tickets for
+root (the mount identity, with use-machine-creds off) and for service
+accounts instead of asking the KDC itself. Each cache holds a TGT from
+the keytab plus pre-fetched tickets for the configured services (the
+NFS server), so a node that reboots or whose pods are rescheduled does
+not send any AS/TGS request as long as its caches are valid.
+
+Refreshes are spread out: every cache is refreshed at a random point
+around renew_at of its ticket lifetime (renew_at +/- jitter), caches that
+have to be fetched at start-up wait a random delay of up to
+startup_splay seconds, and failed refreshes back off exponentially with
+jitter. A TGT that can still be renewed for a full lifetime is renewed
+(one TGS request); otherwise a new one is obtained from the keytab. New
+caches are built next to the live one and renamed over it, so gssd
+never reads a partial cache.
+
+Every cycle writes a status file (expiry, next refresh, refresh counters
+by method and result) that the storage-metrics krb5cc collector exports.
+Standard library only; needs kinit and kvno (krb5-user).
+
+Usage:
+  krb5_credentials.py --config /etc/cube-storage/krb5-credentials.json
+  krb5_credentials.py --config ... --once      # refresh what is due and exit
+  krb5_credentials.py --status                 # print the last status
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import struct
+import subprocess
+import sys
+import time
+
+DEFAULT_CONFIG = '/etc/cube-storage/krb5-credentials.json'
+DEFAULT_STATUS_FILE = '/var/lib/cube-storage/krb5-credentials.json'
+DEFAULTS = {
+    'keytab': '/etc/krb5.keytab',
+    'ccache_dir': '/var/lib/krb5-credentials',
+    'status_file': DEFAULT_STATUS_FILE,
+    'renew_at': 0.6,
+    'jitter': 0.15,
+    'startup_splay': 120,
+    'retry_min': 15,
+    'retry_max': 900,
+    'credentials': [],
+}
+# Longest sleep between cycles, so removed or expired caches are noticed
+MAX_SLEEP = 60
+COMMAND_TIMEOUT = 30
+CONFIG_REALM = 'X-CACHECONF:'
+
+
+class CredentialError(Exception):
+    """Raised when a cache cannot be read or refreshed"""
+
+
+# ccache files -------------------------------------------------------------
+
+class _Reader:
+    def __init__(self, data):
+        self.data = data
+        self.offset = 0
+
+    def unpack(self, fmt):
+        size = struct.calcsize(fmt)
+        if self.offset + size > len(self.data):
+            raise CredentialError('truncated credential cache')
+        values = struct.unpack_from(fmt, self.data, self.offset)
+        self.offset += size
+        return values
+
+    def counted(self):
+        length, = self.unpack('>I')
+        if self.offset + length > len(self.data):
+            raise CredentialError('truncated credential cache')
+        value = self.data[self.offset:self.offset + length]
+        self.offset += length
+        return value
+
+    def principal(self):
+        _, count = self.unpack('>II')
+        realm = self.counted().decode('utf-8', 'replace')
+        components = [self.counted().decode('utf-8', 'replace') for _ in range(count)]
+        return f"{'/'.join(components)}@{realm}"
+
+    def done(self):
+        return self.offset >= len(self.data)
+
+
+def read_ccache(path):
+    """Default principal and credentials of an MIT FILE cache (format 3 or 4)
+
+    Returns {'principal': str, 'credentials': [{'server', 'starttime',
+    'endtime', 'renew_till', 'flags'}]} with times in epoch seconds;
+    cache configuration entries are left out.
+    """
+    with open(path, 'rb') as f:
+        reader = _Reader(f.read())
+    version, = reader.unpack('>H')
+    if version not in (0x0503, 0x0504):
+        raise CredentialError(f"{path}: unsupported credential cache format {version:#06x}")
+    if version == 0x0504:
+        header_length, = reader.unpack('>H')
+        reader.unpack(f'>{header_length}s')
+    principal = reader.principal()
+    credentials = []
+    while not reader.done():
+        reader.principal()
+        server = reader.principal()
+        reader.unpack('>H' if version == 0x0504 else '>HH')
+        reader.counted()
+        authtime, starttime, endtime, renew_till = reader.unpack('>IIII')
+        _, flags, addresses = reader.unpack('>BII')
+        for _ in range(addresses):
+            reader.unpack('>H')
+            reader.counted()
+        authdata, = reader.unpack('>I')
+        for _ in range(authdata):
+            reader.unpack('>H')
+            reader.counted()
+        reader.counted()
+        reader.counted()
+        if server.endswith('@' + CONFIG_REALM):
+            continue
+        credentials.append({'server': server, 'starttime': starttime or authtime, 'endtime': endtime,
+                            'renew_till': renew_till, 'flags': flags})
+    return {'principal': principal, 'credentials': credentials}
+
+
+def tgt_times(path, principal, now):
+    """(starttime, endtime, renew_till) of the valid TGT for ``principal`` in ``path``, or None"""
+    try:
+        cache = read_ccache(path)
+    except (OSError, CredentialError):
+        return None
+    if cache['principal'] != principal:
+        return None
+    realm = principal.rpartition('@')[2]
+    for credential in cache['credentials']:
+        if credential['server'] == f"krbtgt/{realm}@{realm}" and credential['endtime'] > now:
+            return credential['starttime'], credential['endtime'], credential['renew_till']
+    return None
+
+
+# scheduling ---------------------------------------------------------------
+
+def next_refresh(starttime, endtime, now, renew_at, jitter, rng=random):
+    """Refresh time at a random point of renew_at +/- jitter of the ticket lifetime"""
+    fraction = min(0.95, max(0.05, renew_at + rng.uniform(-jitter, jitter)))
+    return max(now, starttime + (endtime - starttime) * fraction)
+
+
+def retry_delay(failures, retry_min, retry_max, rng=random):
+    """Exponential backoff with jitter: half to all of min(retry_max, retry_min * 2^(failures-1))"""
+    delay = min(retry_max, retry_min * 2 ** max(0, failures - 1))
+    return rng.uniform(delay / 2, delay)
+
+
+# manager ------------------------------------------------------------------
+
+def load_config(path):
+    with open(path) as f:
+        config = dict(DEFAULTS, **json.load(f))
+    for credential in config['credentials']:
+        if 'principal' not in credential:
+            raise CredentialError(f"{path}: credential without a principal")
+    return config
+
+
+def write_atomic(path, text):
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+class CredentialManager:
+    """Keeps the configured caches valid; see the module docstring"""
+
+    def __init__(self, config, runner=subprocess.run, clock=time.time, rng=None, env=None):
+        self.config = dict(DEFAULTS, **config)
+        self.runner = runner
+        self.clock = clock
+        self.rng = rng or random.Random()
+        self.env = env
+        self.entries = []
+        previous = {}
+        status = self.read_status()
+        for entry in status.get('credentials', []):
+            previous[entry.get('principal')] = entry
+        for credential in self.config['credentials']:
+            uid = int(credential.get('uid', 0))
+            old = previous.get(credential['principal'], {})
+            self.entries.append({
+                'principal': credential['principal'],
+                'uid': uid,
+                'services': list(credential.get('services', [])),
+                'ccache': os.path.join(self.config['ccache_dir'], f"krb5cc_{uid}"),
+                'next_refresh': None,
+                'expires': None,
+                'failures': 0,
+                'last_refresh': old.get('last_refresh'),
+                'last_method': old.get('last_method'),
+                'last_duration': old.get('last_duration'),
+                'last_error': None,
+                'refreshes': old.get('refreshes', {}),
+            })
+
+    def read_status(self):
+        try:
+            with open(self.config['status_file']) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def run(self, command):
+        try:
+            result = self.runner(command, capture_output=True, text=True, env=self.env, timeout=COMMAND_TIMEOUT)
+        except (OSError, subprocess.SubprocessError) as e:
+            raise CredentialError(f"{command[0]}: {e}")
+        if result.returncode != 0:
+            raise CredentialError(f"{' '.join(command)}: {(result.stderr or result.stdout).strip()}")
+        return result
+
+    def schedule(self, now, splay=None):
+        """Plan the first refresh of every cache: a valid one at its jittered time, others after a splay"""
+        splay = self.config['startup_splay'] if splay is None else splay
+        for entry in self.entries:
+            times = tgt_times(entry['ccache'], entry['principal'], now)
+            entry['expires'] = times[1] if times else None
+            if times:
+                entry['next_refresh'] = next_refresh(times[0], times[1], now, self.config['renew_at'],
+                                                     self.config['jitter'], self.rng)
+            if not times or entry['next_refresh'] <= now:
+                entry['next_refresh'] = now + self.rng.uniform(0, splay)
+
+    def refresh(self, entry, now):
+        """Build a new cache for ``entry`` and rename it over the live one; return the method used
+
+        Every renewal and keytab attempt is counted in entry['refreshes'].
+        """
+        os.makedirs(self.config['ccache_dir'], mode=0o755, exist_ok=True)
+        new = f"{entry['ccache']}.new"
+        times = tgt_times(entry['ccache'], entry['principal'], now)
+        method = 'keytab'
+        try:
+            if times and times[2] >= now + (times[1] - times[0]):
+                shutil.copyfile(entry['ccache'], new)
+                try:
+                    self.run(['kinit', '-R', '-c', f"FILE:{new}"])
+                    method = 'renew'
+                except CredentialError as e:
+                    self.count(entry, 'renew', 'failure')
+                    print(f"{entry['principal']}: renewal failed, using the keytab: {e}", file=sys.stderr)
+            if method == 'keytab':
+                try:
+                    self.run(['kinit', '-k', '-t', self.config['keytab'], '-c', f"FILE:{new}",
+                              entry['principal']])
+                except CredentialError:
+                    self.count(entry, 'keytab', 'failure')
+                    raise
+            for service in entry['services']:
+                self.run(['kvno', '-q', '-c', f"FILE:{new}", service])
+            os.chmod(new, 0o600)
+            if os.geteuid() == 0:
+                os.chown(new, entry['uid'], -1)
+            os.replace(new, entry['ccache'])
+        except (CredentialError, OSError):
+            if os.path.exists(new):
+                os.unlink(new)
+            raise
+        self.count(entry, method, 'success')
+        return method
+
+    def refresh_due(self, now=None):
+        """Refresh the caches that are due; return (refreshed, failed) counts
+
+        A cache that disappears or stops being valid before its refresh
+        (removed by hand, overwritten) is refreshed within retry_min seconds.
+        """
+        now = self.clock() if now is None else now
+        refreshed = failures = 0
+        for entry in self.entries:
+            if entry['expires'] and entry['expires'] > now and not tgt_times(entry['ccache'], entry['principal'], now):
+                entry['expires'] = None
+                entry['next_refresh'] = min(entry['next_refresh'], now + self.rng.uniform(0, self.config['retry_min']))
+            if entry['next_refresh'] > now:
+                continue
+            started = time.monotonic()
+            try:
+                method = self.refresh(entry, now)
+            except (CredentialError, OSError) as e:
+                failures += 1
+                entry['failures'] += 1
+                entry['last_error'] = str(e)
+                entry['next_refresh'] = now + retry_delay(entry['failures'], self.config['retry_min'],
+                                                          self.config['retry_max'], self.rng)
+                print(f"{entry['principal']}: {e}", file=sys.stderr)
+                continue
+            refreshed += 1
+            entry.update(failures=0, last_error=None, last_refresh=now, last_method=method,
+                         last_duration=round(time.monotonic() - started, 3))
+            times = tgt_times(entry['ccache'], entry['principal'], now)
+            entry['expires'] = times[1] if times else None
+            if times:
+                entry['next_refresh'] = next_refresh(times[0], times[1], now, self.config['renew_at'],
+                                                     self.config['jitter'], self.rng)
+            else:
+                entry['next_refresh'] = now + self.config['retry_min']
+        return refreshed, failures
+
+    @staticmethod
+    def count(entry, method, result):
+        counts = entry['refreshes'].setdefault(method, {})
+        counts[result] = counts.get(result, 0) + 1
+
+    def status(self, now=None):
+        now = self.clock() if now is None else now
+        credentials = []
+        for entry in self.entries:
+            times = tgt_times(entry['ccache'], entry['principal'], now)
+            credentials.append({
+                'principal': entry['principal'],
+                'uid': entry['uid'],
+                'ccache': entry['ccache'],
+                'valid': times is not None,
+                'expires': times[1] if times else None,
+                'renew_till': times[2] if times else None,
+                'next_refresh': round(entry['next_refresh'], 3) if entry['next_refresh'] else None,
+                'failures': entry['failures'],
+                'last_refresh': entry['last_refresh'],
+                'last_method': entry['last_method'],
+                'last_duration': entry['last_duration'],
+                'last_error': entry['last_error'],
+                'refreshes': entry['refreshes'],
+            })
+        return {'updated': round(now, 3), 'credentials': credentials}
+
+    def write_status(self, now=None):
+        path = self.config['status_file']
+        if path:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            write_atomic(path, json.dumps(self.status(now), indent=2) + '\n')
+
+    def serve(self):
+        self.schedule(self.clock())
+        while True:
+            self.refresh_due()
+            self.write_status()
+            wake = min((entry['next_refresh'] for entry in self.entries), default=self.clock() + MAX_SLEEP)
+            time.sleep(min(MAX_SLEEP, max(1, wake - self.clock())))
+
+
+def print_status(status):
+    now = time.time()
+    for entry in status.get('credentials', []):
+        expires = f"expires in {int(entry['expires'] - now)}s" if entry.get('expires') else 'no valid TGT'
+        refresh = f"next refresh in {int(entry['next_refresh'] - now)}s" if entry.get('next_refresh') else ''
+        print(f"{entry['principal']} (uid {entry['uid']}): {expires}, {refresh}, "
+              f"{entry['failures']} consecutive failure(s)")
+        if entry.get('last_error'):
+            print(f"  last error: {entry['last_error']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Keep keytab-backed credential caches valid for rpc.gssd')
+    parser.add_argument('--config', default=DEFAULT_CONFIG, help=f'Configuration file (default: {DEFAULT_CONFIG})')
+    parser.add_argument('--once', action='store_true',
+                        help='Refresh missing, invalid and due caches without start-up splay, then exit')
+    parser.add_argument('--status', action='store_true', help='Print the status written by the running service')
+    args = parser.parse_args(argv)
+
+    try:
+        config = load_config(args.config)
+    except (OSError, ValueError, CredentialError) as e:
+        print(f"{args.config}: {e}", file=sys.stderr)
+        return 2
+    manager = CredentialManager(config)
+    if args.status:
+        print_status(manager.read_status())
+        return 0
+    if args.once:
+        manager.schedule(time.time(), splay=0)
+        refreshed, failures = manager.refresh_due()
+        manager.write_status()
+        print(f"{refreshed} cache(s) refreshed, {failures} failed")
+        return 1 if failures else 0
+    manager.serve()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+"""
+NFS benchmark workloads and result comparison
+
+Pure-Python workloads (no fio dependency) that measure what a mounted
+export delivers: sequential write/read throughput, small-file
+create/stat/unlink rates and parallel readers. Each workload runs in a
+directory and returns result dicts; the mount handling lives in
+scripts/nfs-benchmark.py. Results are compared against a stored
+baseline so tuning changes to the roles can be judged by numbers.
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+WORKLOADS = ('seq_write', 'seq_read', 'small_files', 'parallel_read')
+
+DEFAULT_SIZES = {
+    'file_mb': 256,
+    'block_kb': 1024,
+    'small_files': 2000,
+    'small_file_bytes': 4096,
+    'readers': 4,
+    'reader_mb': 64,
+}
+
+MIB = 1024 * 1024
+
+
+def _result(workload, metric, value, unit):
+    return {'workload': workload, 'metric': metric, 'value': round(value, 2), 'unit': unit}
+
+
+def _rate(amount, seconds):
+    return amount / seconds if seconds > 0 else 0.0
+
+
+def _write_file(path, size_mb, block_kb):
+    block = os.urandom(block_kb * 1024)
+    remaining = size_mb * MIB
+    with open(path, 'wb') as f:
+        while remaining > 0:
+            chunk = block if remaining >= len(block) else block[:remaining]
+            f.write(chunk)
+            remaining -= len(chunk)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _drop_cache(path):
+    """Drop the client page cache for a file so reads go to the server"""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+
+
+def _read_file(path, block_kb):
+    total = 0
+    with open(path, 'rb', buffering=0) as f:
+        while True:
+            data = f.read(block_kb * 1024)
+            if not data:
+                return total
+            total += len(data)
+
+
+def seq_write(directory, sizes):
+    path = os.path.join(directory, 'seq.dat')
+    start = time.monotonic()
+    _write_file(path, sizes['file_mb'], sizes['block_kb'])
+    elapsed = time.monotonic() - start
+    return [_result('seq_write', 'throughput', _rate(sizes['file_mb'], elapsed), 'MiB/s')]
+
+
+def seq_read(directory, sizes):
+    path = os.path.join(directory, 'seq.dat')
+    if not os.path.exists(path) or os.path.getsize(path) != sizes['file_mb'] * MIB:
+        _write_file(path, sizes['file_mb'], sizes['block_kb'])
+    _drop_cache(path)
+    start = time.monotonic()
+    total = _read_file(path, sizes['block_kb'])
+    elapsed = time.monotonic() - start
+    return [_result('seq_read', 'throughput', _rate(total / MIB, elapsed), 'MiB/s')]
+
+
+def small_files(directory, sizes):
+    root = os.path.join(directory, 'small')
+    os.makedirs(root, exist_ok=True)
+    payload = b'x' * sizes['small_file_bytes']
+    names = [os.path.join(root, f"f{index:06d}") for index in range(sizes['small_files'])]
+    results = []
+
+    start = time.monotonic()
+    for name in names:
+        with open(name, 'wb') as f:
+            f.write(payload)
+    results.append(_result('small_files', 'create', _rate(len(names), time.monotonic() - start), 'ops/s'))
+
+    start = time.monotonic()
+    for name in names:
+        os.stat(name)
+    results.append(_result('small_files', 'stat', _rate(len(names), time.monotonic() - start), 'ops/s'))
+
+    start = time.monotonic()
+    for name in names:
+        os.unlink(name)
+    results.append(_result('small_files', 'unlink', _rate(len(names), time.monotonic() - start), 'ops/s'))
+    os.rmdir(root)
+    return results
+
+
+def parallel_read(directory, sizes):
+    paths = [os.path.join(directory, f"reader{index}.dat") for index in range(sizes['readers'])]
+    for path in paths:
+        if not os.path.exists(path) or os.path.getsize(path) != sizes['reader_mb'] * MIB:
+            _write_file(path, sizes['reader_mb'], sizes['block_kb'])
+        _drop_cache(path)
+    totals = [0] * len(paths)
+
+    def read(index):
+        totals[index] = _read_file(paths[index], sizes['block_kb'])
+
+    threads = [threading.Thread(target=read, args=(index,)) for index in range(len(paths))]
+    start = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - start
+    return [_result('parallel_read', 'throughput', _rate(sum(totals) / MIB, elapsed), 'MiB/s')]
+
+
+_RUNNERS = {
+    'seq_write': seq_write,
+    'seq_read': seq_read,
+    'small_files': small_files,
+    'parallel_read': parallel_read,
+}
+
+
+def run_workloads(directory, workloads=WORKLOADS, sizes=None):
+    """Run the selected workloads in a scratch directory under ``directory``
+
+    Only the scratch directory is removed afterwards, so existing files
+    (a live share passed with --local) are never read, overwritten or
+    deleted.
+    """
+    sizes = dict(DEFAULT_SIZES, **(sizes or {}))
+    for name in workloads:
+        if name not in _RUNNERS:
+            raise ValueError(f"unknown workload '{name}' (available: {', '.join(WORKLOADS)})")
+    scratch = tempfile.mkdtemp(prefix='.nfs-benchmark-', dir=directory)
+    results = []
+    try:
+        for name in workloads:
+            results.extend(_RUNNERS[name](scratch, sizes))
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+    return results
+
+
+def mount_cases(sec_flavors, variants):
+    """Cross security flavors with option variants into named benchmark cases
+
+    ``variants`` is a list of (name, options) pairs; each case gets an id
+    such as ``krb5i/nconnect=4`` used to match results to the baseline.
+    """
+    cases = []
+    for sec in sec_flavors:
+        for name, options in variants:
+            cases.append({
+                'id': f"{sec}/{name}",
+                'sec': sec,
+                'options': [f"sec={sec}"] + [o for o in options if not o.startswith('sec=')],
+            })
+    return cases
+
+
+def sweep_variants(rsizes=(), nconnects=(), profiles=None):
+    """Option variants: the kernel defaults, each rsize/wsize, each nconnect and each profile"""
+    variants = [('defaults', [])]
+    variants += [(f"rwsize={size}", [f"rsize={size}", f"wsize={size}"]) for size in rsizes]
+    variants += [(f"nconnect={count}", [f"nconnect={count}"]) for count in nconnects]
+    for name, options in sorted((profiles or {}).items()):
+        if options:
+            variants.append((f"profile={name}", list(options)))
+    return variants
+
+
+def result_key(case_id, result):
+    return f"{case_id}:{result['workload']}.{result['metric']}"
+
+
+def flatten_results(report):
+    """Map ``case:workload.metric`` to value for a report's successful cases"""
+    values = {}
+    for case in report.get('cases', []):
+        for result in case.get('results', []):
+            values[result_key(case['id'], result)] = result['value']
+    return values
+
+
+def compare(report, baseline, threshold=10.0):
+    """Compare a report against a baseline report
+
+    All metrics are rates, so a drop of more than ``threshold`` percent
+    is a regression. Returns a list of dicts with key, baseline,
+    current, change (percent) and regression, for keys present in both.
+    """
+    current = flatten_results(report)
+    previous = flatten_results(baseline)
+    rows = []
+    for key in sorted(set(current) & set(previous)):
+        before, after = previous[key], current[key]
+        change = _rate(after - before, before) * 100 if before else 0.0
+        rows.append({
+            'key': key,
+            'baseline': before,
+            'current': after,
+            'change': round(change, 1),
+            'regression': change < -threshold,
+        })
+    return rows
@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+"""
+NFS exports parsing and incremental apply planning
+
+Parses exports(5) files into (path, client, options) entries, diffs two
+sets of entries and turns the difference into targeted exportfs calls,
+so a change to one export does not re-evaluate the whole export table
+with `exportfs -ra`. The applied-state snapshot keeps one section per
+source file so /etc/exports.d fragments can be synced on their own.
+Pure Python, testable against sample files.
+"""
+
+import glob
+import os
+import re
+
+_OCTAL_ESCAPE = re.compile(r'\\([0-7]{3})')
+
+
+def _unescape(value):
+    return _OCTAL_ESCAPE.sub(lambda m: chr(int(m.group(1), 8)), value)
+
+
+def _logical_lines(text):
+    """Join backslash-continued lines and strip comments"""
+    buffer = ''
+    for raw in text.splitlines():
+        line = raw.split('#', 1)[0].rstrip()
+        if line.endswith('\\'):
+            buffer += line[:-1] + ' '
+            continue
+        line = buffer + line
+        buffer = ''
+        if line.strip():
+            yield line.strip()
+    if buffer.strip():
+        yield buffer.strip()
+
+
+def _tokens(line):
+    """Split an exports line on whitespace, honouring double-quoted paths"""
+    tokens = []
+    current = ''
+    quoted = False
+    for char in line:
+        if char == '"':
+            quoted = not quoted
+            continue
+        if char.isspace() and not quoted:
+            if current:
+                tokens.append(current)
+                current = ''
+            continue
+        current += char
+    if current:
+        tokens.append(current)
+    return tokens
+
+
+def normalize_options(options):
+    """Canonical option string: whitespace removed, empty items dropped"""
+    return ','.join(item.strip() for item in str(options or '').split(',') if item.strip())
+
+
+def parse_exports(text):
+    """Parse exports(5) content into an ordered dict of (path, client) -> options
+
+    Supports comments, backslash continuations, quoted paths, octal
+    escapes, per-line default options (``/path -ro host``) and the
+    world-export form ``/path (opts)``. A later entry for the same path
+    and client replaces an earlier one, as exportfs does.
+    """
+    entries = {}
+    for line in _logical_lines(text):
+        tokens = _tokens(line)
+        path = _unescape(tokens[0])
+        defaults = ''
+        clients = tokens[1:]
+        if clients and clients[0].startswith('-'):
+            defaults = clients[0][1:]
+            clients = clients[1:]
+        if not clients:
+            clients = ['*']
+        for token in clients:
+            if '(' in token:
+                client, _, options = token.partition('(')
+                options = options.rstrip(')')
+            else:
+                client, options = token, ''
+            client = client or '*'
+            entries[(path, client)] = normalize_options(','.join(filter(None, [defaults, options])))
+    return entries
+
+
+def exports_files(paths):
+    """Expand exports paths; directories contribute their *.exports files"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, '*.exports'))))
+        elif os.path.isfile(path):
+            files.append(path)
+    return [os.path.normpath(name) for name in files]
+
+
+def read_sources(paths):
+    """Parse exports files into an ordered dict of file -> entries"""
+    sources = {}
+    for name in exports_files(paths):
+        with open(name, 'r') as f:
+            sources[name] = parse_exports(f.read())
+    return sources
+
+
+def merge_sources(sources):
+    """Merge per-file entries in file order, later files winning like exportfs"""
+    entries = {}
+    for file_entries in sources.values():
+        entries.update(file_entries)
+    return entries
+
+
+def read_exports(paths):
+    """Parse and merge exports files; directories contribute their *.exports files"""
+    return merge_sources(read_sources(paths))
+
+
+def render_entries(entries):
+    """Render entries back into exports(5) lines (used for the applied-state snapshot)"""
+    lines = []
+    for (path, client), options in entries.items():
+        quoted = f'"{path}"' if any(c.isspace() for c in path) else path
+        lines.append(f"{quoted} {client}({options})" if options else f"{quoted} {client}")
+    return '\n'.join(lines) + ('\n' if lines else '')
+
+
+_SOURCE_HEADER = '# source: '
+
+
+def render_snapshot(sources):
+    """Render per-file entries as a snapshot with one ``# source:`` section per file"""
+    return ''.join(
+        f"{_SOURCE_HEADER}{name}\n{render_entries(entries)}"
+        for name, entries in sources.items() if entries
+    )
+
+
+def parse_snapshot(text):
+    """Parse a snapshot back into file -> entries
+
+    Entries before the first ``# source:`` header (snapshots written
+    before per-file sections existed) are returned under the None key.
+    """
+    chunks = {}
+    current = None
+    for line in text.splitlines():
+        if line.startswith(_SOURCE_HEADER):
+            current = line[len(_SOURCE_HEADER):].strip()
+            chunks.setdefault(current, [])
+            continue
+        chunks.setdefault(current, []).append(line)
+    sources = {}
+    for name, lines in chunks.items():
+        entries = parse_exports('\n'.join(lines))
+        if entries or name is not None:
+            sources[name] = entries
+    return sources
+
+
+def diff_exports(old, new):
+    """Compare two entry dicts
+
+    Returns (added, removed, changed) lists of (path, client, options)
+    tuples; for changed entries options are the new options.
+    """
+    added = [(p, c, o) for (p, c), o in new.items() if (p, c) not in old]
+    removed = [(p, c, o) for (p, c), o in old.items() if (p, c) not in new]
+    changed = [(p, c, o) for (p, c), o in new.items() if (p, c) in old and old[(p, c)] != o]
+    return added, removed, changed
+
+
+def diff_scoped(applied, current, scope):
+    """Diff only the entries of the files in ``scope``
+
+    ``applied`` is the parsed snapshot (file -> entries) and ``current``
+    the freshly read scoped files; a scoped file missing from
+    ``current`` was deleted, so its applied entries are removed unless
+    another, unscoped file still exports them. Returns (added, removed,
+    changed, snapshot) with the scoped sections of the snapshot replaced.
+    """
+    scope = [os.path.normpath(name) for name in scope]
+    old = merge_sources({name: applied.get(name, {}) for name in scope})
+    new = merge_sources({name: current.get(name, {}) for name in scope})
+    others = merge_sources({name: entries for name, entries in applied.items() if name not in scope})
+    added, removed, changed = diff_exports(old, new)
+    removed = [entry for entry in removed if entry[:2] not in others]
+    snapshot = {name: entries for name, entries in applied.items() if name not in scope}
+    snapshot.update((name, current[name]) for name in scope if name in current)
+    return added, removed, changed, snapshot
+
+
+def fragment_name(path):
+    """Fragment file stem of an export path, escaped like ``systemd-escape --path``
+
+    ``/`` becomes ``-`` and everything outside [A-Za-z0-9:_.] (including
+    ``-`` itself and a leading ``.``) becomes ``\\xNN``, so /srv/a-b and
+    /srv/a/b get different files (srv-a\\x2db and srv-a-b).
+    """
+    escaped = []
+    for index, char in enumerate(str(path).strip('/')):
+        if char == '/':
+            escaped.append('-')
+        elif char.isascii() and (char.isalnum() or char in ':_.') and not (index == 0 and char == '.'):
+            escaped.append(char)
+        else:
+            escaped.extend(f"\\x{byte:02x}" for byte in char.encode('utf-8'))
+    return ''.join(escaped) or '-'
+
+
+def export_target(path, client):
+    """exportfs host:path argument"""
+    return f"{client}:{path}"
+
+
+def plan_commands(added, removed, changed, exportfs='exportfs'):
+    """Build the targeted exportfs argument lists for a diff
+
+    Removed entries are unexported first so a path moving between
+    clients never has both exported. Changed entries are unexported and
+    exported again: exportfs -o merges options into a live entry, so a
+    flag that is dropped rather than negated (no_root_squash) would stay
+    in effect.
+    """
+    def export(path, client, options):
+        if options:
+            return [exportfs, '-o', options, export_target(path, client)]
+        return [exportfs, export_target(path, client)]
+
+    commands = [[exportfs, '-u', export_target(path, client)] for path, client, _ in removed]
+    for path, client, options in changed:
+        commands += [[exportfs, '-u', export_target(path, client)], export(path, client, options)]
+    commands += [export(path, client, options) for path, client, options in added]
+    return commands
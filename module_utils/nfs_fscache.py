@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+FS-Cache culling thresholds for cachefilesd
+
+cachefilesd keeps its cache within limits expressed as percentages of the
+free space (blocks) and free inodes (files) of the file system holding
+the cache directory:
+
+  brun  - culling stops once free space is back above this
+  bcull - culling starts when free space drops below this
+  bstop - no new cache entries are written below this
+
+The nfs-client role sizes them from the space that must stay free for
+everything else on that file system (``nfs_client_fscache_reserve``,
+bytes or a percentage) and the file system's size, so the same setting
+keeps 20G free on a 100G root disk and on a 2T scratch disk. Backs the
+``fscache_culling`` filter.
+"""
+
+import math
+import re
+
+SIZE_UNITS = {'': 1, 'k': 1024, 'm': 1024 ** 2, 'g': 1024 ** 3, 't': 1024 ** 4}
+
+# cachefilesd defaults, used for the inode limits unless overridden
+DEFAULT_THRESHOLDS = {'brun': 10, 'bcull': 7, 'bstop': 3, 'frun': 10, 'fcull': 7, 'fstop': 3}
+
+
+def reserve_percent(reserve, total):
+    """Percentage of ``total`` bytes that ``reserve`` (bytes, "20G" or "10%") stands for"""
+    text = str(reserve).strip()
+    match = re.fullmatch(r'([0-9]+(?:\.[0-9]+)?)\s*%', text)
+    if match:
+        return float(match.group(1))
+    match = re.fullmatch(r'([0-9]+)\s*([kmgt]?)i?b?', text, re.IGNORECASE)
+    if not match:
+        raise ValueError(f"invalid FS-Cache reserve '{reserve}' (bytes, size such as 20G, or percentage)")
+    if not total or int(total) <= 0:
+        raise ValueError(f"invalid size of the cache file system: {total!r}")
+    return 100.0 * int(match.group(1)) * SIZE_UNITS[match.group(2).lower()] / int(total)
+
+
+def culling_thresholds(total, reserve, overrides=None):
+    """brun/bcull/bstop/frun/fcull/fstop percentages for a cache file system of ``total`` bytes
+
+    Culling starts when free space falls to the reserve, writing stops at
+    half of it and culling runs until free space is half the reserve above
+    it again. ``overrides`` sets any threshold explicitly.
+    """
+    bcull = min(90, max(2, math.ceil(reserve_percent(reserve, total))))
+    thresholds = dict(DEFAULT_THRESHOLDS)
+    thresholds.update(bcull=bcull, bstop=max(1, bcull // 2), brun=min(99, bcull + max(3, bcull // 2)))
+    for key, value in (overrides or {}).items():
+        if key not in thresholds:
+            raise ValueError(f"unknown cachefilesd threshold '{key}' (expected {', '.join(DEFAULT_THRESHOLDS)})")
+        thresholds[key] = int(value)
+    for prefix, kind in (('b', 'space'), ('f', 'files')):
+        run, cull, stop = (thresholds[prefix + name] for name in ('run', 'cull', 'stop'))
+        if not 0 <= stop < cull < run < 100:
+            raise ValueError(
+                f"cachefilesd {kind} thresholds must satisfy 0 <= {prefix}stop < {prefix}cull < {prefix}run < 100 "
+                f"(got {prefix}run={run}, {prefix}cull={cull}, {prefix}stop={stop})"
+            )
+    return thresholds
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+NFS mount option profiles
+
+Named profiles (lists of mount options such as ``rsize=1048576`` or
+``noatime``) are defined once in the nfs-client role defaults as
+``nfs_mount_profiles``. This module merges base options, a profile and
+per-mount overrides into one option list. It backs the
+``nfs_mount_options`` filter used by the nfs-client role and
+scripts/nfs-mount-options.py, which renders the same profiles as
+PersistentVolume/StorageClass ``mountOptions``. With FS-Cache enabled on
+the client, mounts of the profiles listed in ``fscache_profiles`` get
+the ``fsc`` option (a per-mount ``nofsc`` still turns it off).
+"""
+
+
+class ProfileError(Exception):
+    """Raised for unknown profiles or malformed option lists"""
+
+
+def split_options(options):
+    """Accept a list or a comma-separated string and return a list of options"""
+    if options is None:
+        return []
+    if isinstance(options, str):
+        options = options.split(',')
+    result = []
+    for option in options:
+        if not isinstance(option, str):
+            raise ProfileError(f"mount option must be a string, got {option!r}")
+        option = option.strip()
+        if option:
+            result.append(option)
+    return result
+
+
+def option_key(option):
+    """Key under which an option overrides another
+
+    ``name=value`` options are keyed by name; flags are keyed without a
+    ``no`` prefix so ``atime`` overrides ``noatime`` and vice versa.
+    """
+    name, equals, _ = option.partition('=')
+    if equals:
+        return name
+    return name[2:] if name.startswith('no') and len(name) > 2 else name
+
+
+def merge_options(*option_lists):
+    """Merge option lists left to right; later options replace earlier ones in place"""
+    merged = {}
+    for options in option_lists:
+        for option in split_options(options):
+            merged[option_key(option)] = option
+    return list(merged.values())
+
+
+def profile_options(profiles, profile, base=None, extra=None, fscache_profiles=None):
+    """Return base options, then the profile's options, then per-mount extras
+
+    ``fsc`` is added after the profile's options when ``profile`` is one of
+    ``fscache_profiles``.
+    """
+    profiles = profiles or {}
+    if profile not in profiles:
+        raise ProfileError(
+            f"unknown NFS mount profile '{profile}' (available: {', '.join(sorted(profiles)) or 'none'})"
+        )
+    fscache = ['fsc'] if profile in (fscache_profiles or []) else []
+    return merge_options(base, profiles[profile], fscache, extra)
@@ -0,0 +1,650 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Dynamic NFS subdirectory provisioner for Kubernetes
+
+Watches PersistentVolumeClaims whose StorageClass names this provisioner
+(cube-storage.io/nfs-subdir by default) and, for each claim, creates a
+subdirectory of the class's export on the NFS server with the requested
+owner and mode (and optionally an XFS project quota of the requested
+size), then creates a PersistentVolume pre-bound to the claim with the
+class's mountOptions. When a PV it created is released with the Delete
+reclaim policy, the directory is removed (or renamed to archived-<name>
+with the class parameter archiveOnDelete: "true") and the PV deleted.
+
+StorageClass parameters:
+  server           NFS server name used in the PVs (required)
+  share            exported directory the subdirectories are created in
+                   (required; also the local path unless --local-root maps it)
+  uid, gid, mode   owner and mode of new directories (user/group names or
+                   ids; default 0, 0, 0775), overridable per claim with the
+                   cube-storage.io/uid, /gid and /mode annotations
+  quota            "true" to limit each directory to the requested size
+                   with an XFS project quota
+  archiveOnDelete  "true" to keep released directories as archived-<name>
+
+Events from the watches (claims, volumes and StorageClasses; a class
+created after its claims queues them) only fill a local cache and put
+the claim or volume key on a work queue; a fixed number of workers reconcile keys, a
+key is never processed by two workers at once and failures are retried
+with exponential backoff. Runs on the NFS server as a standalone script
+(deployed by the nfs-provisioner role). Standard library only.
+
+Usage:
+  nfs_provisioner.py --config /etc/cube-storage/nfs-provisioner.json
+  nfs_provisioner.py --api-server https://k8s.cube.k8s:6443 --token-file token --once
+"""
+
+import argparse
+import collections
+import grp
+import http.client
+import json
+import os
+import pwd
+import re
+import shutil
+import ssl
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+
+PROVISIONER_NAME = 'cube-storage.io/nfs-subdir'
+ANNOTATION_PREFIX = 'cube-storage.io/'
+PROVISIONED_BY = 'pv.kubernetes.io/provisioned-by'
+DEFAULT_CONFIG = '/etc/cube-storage/nfs-provisioner.json'
+SERVICE_ACCOUNT_DIR = '/var/run/secrets/kubernetes.io/serviceaccount'
+# First XFS project id handed out; lower ids are left to the administrator
+PROJECT_ID_BASE = 100000
+
+QUANTITY_SUFFIXES = {
+    '': 1, 'k': 10 ** 3, 'M': 10 ** 6, 'G': 10 ** 9, 'T': 10 ** 12, 'P': 10 ** 15, 'E': 10 ** 18,
+    'Ki': 2 ** 10, 'Mi': 2 ** 20, 'Gi': 2 ** 30, 'Ti': 2 ** 40, 'Pi': 2 ** 50, 'Ei': 2 ** 60,
+}
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+
+
+def log(message):
+    print(message, file=sys.stderr, flush=True)
+
+
+def parse_quantity(quantity):
+    """Bytes of a Kubernetes quantity such as 50Gi, 500M or 1.5Ti"""
+    match = re.fullmatch(r'([0-9]+(?:\.[0-9]+)?)([kMGTPE]i?)?', str(quantity).strip())
+    if not match or (match.group(2) or '') not in QUANTITY_SUFFIXES:
+        raise ValueError(f"invalid quantity '{quantity}'")
+    return int(float(match.group(1)) * QUANTITY_SUFFIXES[match.group(2) or ''])
+
+
+class KubeClient:
+    """Minimal Kubernetes API client with one keep-alive connection per thread"""
+
+    def __init__(self, server, token=None, ca_file=None, insecure=False, timeout=30):
+        url = urllib.parse.urlsplit(server)
+        self.https = url.scheme == 'https'
+        self.host = url.hostname
+        self.port = url.port or (443 if self.https else 80)
+        self.token = token
+        self.timeout = timeout
+        self.context = None
+        if self.https:
+            self.context = ssl.create_default_context(cafile=ca_file)
+            if insecure:
+                self.context.check_hostname = False
+                self.context.verify_mode = ssl.CERT_NONE
+        self.local = threading.local()
+
+    def _connect(self, timeout):
+        if self.https:
+            return http.client.HTTPSConnection(self.host, self.port, timeout=timeout, context=self.context)
+        return http.client.HTTPConnection(self.host, self.port, timeout=timeout)
+
+    def _headers(self, body):
+        headers = {'Accept': 'application/json'}
+        if self.token:
+            headers['Authorization'] = f"Bearer {self.token}"
+        if body is not None:
+            headers['Content-Type'] = 'application/json'
+        return headers
+
+    def request(self, method, path, body=None, params=None):
+        """Send one request and return the decoded JSON response"""
+        if params:
+            path = f"{path}?{urllib.parse.urlencode(params)}"
+        payload = None if body is None else json.dumps(body).encode('utf-8')
+        for attempt in (1, 2):
+            connection = getattr(self.local, 'connection', None)
+            if connection is None:
+                connection = self.local.connection = self._connect(self.timeout)
+            try:
+                connection.request(method, path, body=payload, headers=self._headers(body))
+                response = connection.getresponse()
+                data = response.read()
+                break
+            except (http.client.HTTPException, OSError):
+                # Stale keep-alive connection: reconnect once
+                connection.close()
+                self.local.connection = None
+                if attempt == 2:
+                    raise
+        if response.status >= 400:
+            try:
+                message = json.loads(data).get('message', '')
+            except ValueError:
+                message = data.decode('utf-8', 'replace')
+            raise ApiError(response.status, message or response.reason)
+        return json.loads(data) if data else {}
+
+    def watch(self, path, resource_version, timeout_seconds=300):
+        """Yield watch events (dicts with type and object) until the server ends the watch"""
+        params = {'watch': '1', 'resourceVersion': resource_version,
+                  'timeoutSeconds': str(timeout_seconds), 'allowWatchBookmarks': 'true'}
+        connection = self._connect(timeout_seconds + 30)
+        try:
+            connection.request('GET', f"{path}?{urllib.parse.urlencode(params)}", headers=self._headers(None))
+            response = connection.getresponse()
+            if response.status >= 400:
+                raise ApiError(response.status, response.read().decode('utf-8', 'replace'))
+            for line in response:
+                if line.strip():
+                    yield json.loads(line)
+        finally:
+            connection.close()
+
+
+class WorkQueue:
+    """Deduplicating work queue: a key is queued once and processed by one worker at a time"""
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.queue = collections.deque()
+        self.queued = set()
+        self.processing = set()
+        self.dirty = set()
+        self.closed = False
+
+    def add(self, key):
+        with self.condition:
+            if key in self.processing:
+                # Picked up again when the current run finishes
+                self.dirty.add(key)
+            elif key not in self.queued:
+                self.queued.add(key)
+                self.queue.append(key)
+                self.condition.notify()
+
+    def add_after(self, key, delay):
+        timer = threading.Timer(delay, self.add, args=(key,))
+        timer.daemon = True
+        timer.start()
+
+    def get(self):
+        """Next key, or None once the queue is shut down"""
+        with self.condition:
+            while not self.queue and not self.closed:
+                self.condition.wait()
+            if self.closed:
+                return None
+            key = self.queue.popleft()
+            self.queued.discard(key)
+            self.processing.add(key)
+            return key
+
+    def done(self, key):
+        with self.condition:
+            self.processing.discard(key)
+            if key in self.dirty:
+                self.dirty.discard(key)
+                self.queued.add(key)
+                self.queue.append(key)
+                self.condition.notify()
+
+    def idle(self):
+        with self.condition:
+            return not self.queue and not self.processing
+
+    def shutdown(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+
+def claim_key(claim):
+    metadata = claim['metadata']
+    return f"claim/{metadata['namespace']}/{metadata['name']}"
+
+
+def volume_name(claim):
+    return f"pvc-{claim['metadata']['uid']}"
+
+
+def directory_name(claim):
+    """Subdirectory of a claim: <namespace>-<claim>-<volume>"""
+    metadata = claim['metadata']
+    return f"{metadata['namespace']}-{metadata['name']}-{volume_name(claim)}"
+
+
+def resolve_owner(value, lookup):
+    """uid/gid from a number or a user/group name"""
+    if value is None or value == '':
+        return 0
+    if str(value).isdigit():
+        return int(value)
+    return lookup(str(value))
+
+
+def mount_point(path):
+    """Mount point of the file system holding ``path``"""
+    path = os.path.realpath(path)
+    device = os.stat(path).st_dev
+    while path != '/':
+        parent = os.path.dirname(path)
+        if os.stat(parent).st_dev != device:
+            break
+        path = parent
+    return path
+
+
+def xfs_project_quota(path, project_id, size_bytes, runner=subprocess.run):
+    """Assign ``path`` to an XFS project and limit it to ``size_bytes`` (0 removes the limit)"""
+    mount = mount_point(path)
+    commands = [f"limit -p bhard={size_bytes} {project_id}"]
+    if size_bytes:
+        commands.insert(0, f"project -s -p {path} {project_id}")
+    for command in commands:
+        result = runner(['xfs_quota', '-x', '-c', command, mount], capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"xfs_quota {command!r} failed: {result.stderr.strip()}")
+
+
+class Provisioner:
+    """Reconciles claims of this provisioner's StorageClasses into directories and PVs"""
+
+    def __init__(self, client, name=PROVISIONER_NAME, workers=8, local_root=None,
+                 max_retries=6, retry_delay=0.5, quota=xfs_project_quota, log=log):
+        self.client = client
+        self.name = name
+        self.workers = max(1, int(workers))
+        # {export path prefix: local path prefix} when not running on the NFS server's paths
+        self.local_root = dict(local_root or {})
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.quota = quota
+        self.log = log
+        self.queue = WorkQueue()
+        self.lock = threading.Lock()
+        self.claims = {}
+        self.volumes = {}
+        self.classes = {}
+        self.failures = {}
+        self.threads = []
+        self.stats = {'provisioned': 0, 'deleted': 0, 'errors': 0}
+
+    # Cache ---------------------------------------------------------------
+
+    def handle_claim(self, event_type, claim):
+        key = claim_key(claim)
+        with self.lock:
+            if event_type == 'DELETED':
+                self.claims.pop(key, None)
+                return
+            self.claims[key] = claim
+        self.queue.add(key)
+
+    def handle_volume(self, event_type, volume):
+        name = volume['metadata']['name']
+        with self.lock:
+            if event_type == 'DELETED':
+                self.volumes.pop(name, None)
+                return
+            self.volumes[name] = volume
+        if volume['metadata'].get('annotations', {}).get(PROVISIONED_BY) == self.name:
+            self.queue.add(f"volume/{name}")
+
+    def handle_class(self, event_type, storage_class):
+        name = storage_class['metadata']['name']
+        with self.lock:
+            if event_type == 'DELETED':
+                self.classes.pop(name, None)
+                return
+            self.classes[name] = storage_class
+            pending = [key for key, claim in self.claims.items()
+                       if claim.get('spec', {}).get('storageClassName') == name]
+        if storage_class.get('provisioner') == self.name:
+            for key in pending:
+                self.queue.add(key)
+
+    def storage_class(self, name):
+        """StorageClass from the cache, or the API server when the watch has not delivered it yet
+
+        A missing class is not cached: its claims are queued again when
+        the class is created (handle_class).
+        """
+        with self.lock:
+            if name in self.classes:
+                return self.classes[name]
+        try:
+            storage_class = self.client.request('GET', f"/apis/storage.k8s.io/v1/storageclasses/{name}")
+        except ApiError as e:
+            if e.status != 404:
+                raise
+            return None
+        with self.lock:
+            self.classes[name] = storage_class
+        return storage_class
+
+    def resync(self):
+        """List all classes, claims and volumes into the cache; return their resourceVersions"""
+        with self.lock:
+            self.classes.clear()
+        versions = {}
+        for kind, path, handler in (('classes', '/apis/storage.k8s.io/v1/storageclasses', self.handle_class),
+                                    ('volumes', '/api/v1/persistentvolumes', self.handle_volume),
+                                    ('claims', '/api/v1/persistentvolumeclaims', self.handle_claim)):
+            listing = self.client.request('GET', path)
+            for item in listing.get('items', []):
+                handler('ADDED', item)
+            versions[kind] = listing.get('metadata', {}).get('resourceVersion', '')
+        return versions
+
+    # Reconciliation -------------------------------------------------------
+
+    def local_path(self, export_path):
+        for prefix, local in sorted(self.local_root.items(), key=lambda item: -len(item[0])):
+            if export_path == prefix or export_path.startswith(prefix.rstrip('/') + '/'):
+                return local.rstrip('/') + export_path[len(prefix.rstrip('/')):]
+        return export_path
+
+    def reclaimable_path(self, path, storage_class):
+        """Resolved ``path`` when it lies strictly under the class's share or a local root, else None
+
+        The directory annotation of a PV can be edited by anyone allowed to
+        update PVs; never delete or rename anything outside the shares.
+        """
+        share = storage_class.get('parameters', {}).get('share')
+        roots = [self.local_path(share)] if share else []
+        roots += self.local_root.values()
+        resolved = os.path.realpath(path)
+        for root in roots:
+            root = os.path.realpath(root)
+            if os.path.commonpath([resolved, root]) == root and resolved != root:
+                return resolved
+        return None
+
+    def wants(self, claim):
+        """StorageClass of a claim this provisioner has to provision, or None"""
+        spec = claim.get('spec', {})
+        metadata = claim['metadata']
+        if spec.get('volumeName') or metadata.get('deletionTimestamp'):
+            return None
+        if claim.get('status', {}).get('phase', 'Pending') != 'Pending':
+            return None
+        class_name = spec.get('storageClassName')
+        if not class_name:
+            return None
+        storage_class = self.storage_class(class_name)
+        if not storage_class or storage_class.get('provisioner') != self.name:
+            return None
+        return storage_class
+
+    def next_project_id(self):
+        """Lowest free project id above those recorded on existing volumes (call with the lock held)"""
+        used = set()
+        for volume in self.volumes.values():
+            value = volume['metadata'].get('annotations', {}).get(f"{ANNOTATION_PREFIX}project-id")
+            if value and value.isdigit():
+                used.add(int(value))
+        project_id = PROJECT_ID_BASE
+        while project_id in used:
+            project_id += 1
+        return project_id
+
+    def provision(self, claim, storage_class):
+        metadata, spec = claim['metadata'], claim.get('spec', {})
+        parameters = storage_class.get('parameters', {})
+        annotations = metadata.get('annotations', {})
+        server, share = parameters.get('server'), parameters.get('share')
+        if not server or not share:
+            raise ValueError(f"StorageClass {storage_class['metadata']['name']} needs server and share parameters")
+        name = volume_name(claim)
+        request = spec.get('resources', {}).get('requests', {}).get('storage', '1Gi')
+        export_path = f"{share.rstrip('/')}/{directory_name(claim)}"
+        path = self.local_path(export_path)
+
+        def setting(key, default=None):
+            return annotations.get(f"{ANNOTATION_PREFIX}{key}", parameters.get(key, default))
+
+        uid = resolve_owner(setting('uid'), lambda user: pwd.getpwnam(user).pw_uid)
+        gid = resolve_owner(setting('gid'), lambda group: grp.getgrnam(group).gr_gid)
+        mode = int(str(setting('mode', '0775')), 8)
+        os.makedirs(path, exist_ok=True)
+        os.chown(path, uid, gid)
+        os.chmod(path, mode)
+
+        volume_annotations = {PROVISIONED_BY: self.name, f"{ANNOTATION_PREFIX}directory": path}
+        if str(parameters.get('quota', '')).lower() == 'true':
+            with self.lock:
+                # Reserve the id before the volume exists (kept for retries)
+                reserved = self.volumes.setdefault(name, {'metadata': {'name': name, 'annotations': {
+                    f"{ANNOTATION_PREFIX}project-id": str(self.next_project_id())}}})
+                project_id = int(reserved['metadata']['annotations'][f"{ANNOTATION_PREFIX}project-id"])
+            self.quota(path, project_id, parse_quantity(request))
+            volume_annotations[f"{ANNOTATION_PREFIX}project-id"] = str(project_id)
+
+        volume = {
+            'apiVersion': 'v1',
+            'kind': 'PersistentVolume',
+            'metadata': {'name': name, 'annotations': volume_annotations},
+            'spec': {
+                'capacity': {'storage': request},
+                'accessModes': spec.get('accessModes') or ['ReadWriteMany'],
+                'persistentVolumeReclaimPolicy': storage_class.get('reclaimPolicy', 'Delete'),
+                'storageClassName': spec['storageClassName'],
+                'mountOptions': storage_class.get('mountOptions', []),
+                'volumeMode': spec.get('volumeMode', 'Filesystem'),
+                'nfs': {'server': server, 'path': export_path},
+                'claimRef': {
+                    'apiVersion': 'v1', 'kind': 'PersistentVolumeClaim',
+                    'namespace': metadata['namespace'], 'name': metadata['name'], 'uid': metadata['uid'],
+                },
+            },
+        }
+        try:
+            created = self.client.request('POST', '/api/v1/persistentvolumes', volume)
+        except ApiError as e:
+            if e.status != 409:
+                raise
+            return
+        with self.lock:
+            self.volumes[name] = created
+            self.stats['provisioned'] += 1
+        self.log(f"provisioned {name} for {metadata['namespace']}/{metadata['name']} at {export_path}")
+
+    def reclaim(self, volume):
+        metadata = volume['metadata']
+        path = metadata.get('annotations', {}).get(f"{ANNOTATION_PREFIX}directory")
+        storage_class = self.storage_class(volume['spec'].get('storageClassName', '')) or {}
+        parameters = storage_class.get('parameters', {})
+        if path and os.path.isdir(path):
+            safe = self.reclaimable_path(path, storage_class)
+            if safe is None:
+                raise ValueError(f"refusing to remove {path}: not under the share of its StorageClass")
+            path = safe
+            project_id = metadata['annotations'].get(f"{ANNOTATION_PREFIX}project-id")
+            if project_id:
+                self.quota(path, int(project_id), 0)
+            if str(parameters.get('archiveOnDelete', '')).lower() == 'true':
+                os.rename(path, os.path.join(os.path.dirname(path), f"archived-{os.path.basename(path)}"))
+            else:
+                shutil.rmtree(path)
+        try:
+            self.client.request('DELETE', f"/api/v1/persistentvolumes/{metadata['name']}")
+        except ApiError as e:
+            if e.status != 404:
+                raise
+        with self.lock:
+            self.volumes.pop(metadata['name'], None)
+            self.stats['deleted'] += 1
+        self.log(f"deleted {metadata['name']} ({path})")
+
+    def sync(self, key):
+        kind, _, name = key.partition('/')
+        with self.lock:
+            item = (self.claims if kind == 'claim' else self.volumes).get(key if kind == 'claim' else name)
+        if item is None:
+            return
+        if kind == 'claim':
+            storage_class = self.wants(item)
+            with self.lock:
+                exists = 'spec' in self.volumes.get(volume_name(item), {})
+            if storage_class and not exists:
+                self.provision(item, storage_class)
+        elif (item.get('status', {}).get('phase') == 'Released'
+              and item['spec'].get('persistentVolumeReclaimPolicy') == 'Delete'):
+            self.reclaim(item)
+
+    def worker(self):
+        while True:
+            key = self.queue.get()
+            if key is None:
+                return
+            try:
+                self.sync(key)
+                self.failures.pop(key, None)
+            except Exception as e:  # retried with backoff, a bad claim must not stop the worker
+                attempts = self.failures.get(key, 0) + 1
+                self.failures[key] = attempts
+                with self.lock:
+                    self.stats['errors'] += 1
+                if attempts <= self.max_retries:
+                    self.log(f"{key}: {e} (retry {attempts}/{self.max_retries})")
+                    self.queue.add_after(key, self.retry_delay * 2 ** (attempts - 1))
+                else:
+                    self.log(f"{key}: {e} (giving up until the next change)")
+                    self.failures.pop(key, None)
+            finally:
+                self.queue.done(key)
+
+    def start(self):
+        self.threads = [threading.Thread(target=self.worker, daemon=True) for _ in range(self.workers)]
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self):
+        self.queue.shutdown()
+        for thread in self.threads:
+            thread.join()
+
+    def wait_idle(self, timeout=60, poll=0.01):
+        """Wait until the queue is drained and no retry is pending (used by --once and the tests)"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.queue.idle() and not self.failures:
+                return True
+            time.sleep(poll)
+        return False
+
+    def watch_forever(self, kind, path, handler, resource_version):
+        while True:
+            try:
+                for event in self.client.watch(path, resource_version):
+                    if event.get('type') == 'ERROR':
+                        raise ApiError(event['object'].get('code', 500), event['object'].get('message', ''))
+                    item = event['object']
+                    resource_version = item['metadata'].get('resourceVersion', resource_version)
+                    if event['type'] != 'BOOKMARK':
+                        handler(event['type'], item)
+            except ApiError as e:
+                if e.status != 410:
+                    self.log(f"watch {kind}: {e}")
+                    time.sleep(self.retry_delay)
+                # History expired: relist and continue from the new version
+                resource_version = self.resync()[kind]
+            except (OSError, http.client.HTTPException, ValueError) as e:
+                self.log(f"watch {kind}: {e}")
+                time.sleep(self.retry_delay)
+
+    def run(self):
+        self.start()
+        versions = self.resync()
+        watchers = [
+            threading.Thread(target=self.watch_forever, daemon=True,
+                             args=('classes', '/apis/storage.k8s.io/v1/storageclasses', self.handle_class,
+                                   versions['classes'])),
+            threading.Thread(target=self.watch_forever, daemon=True,
+                             args=('volumes', '/api/v1/persistentvolumes', self.handle_volume, versions['volumes'])),
+            threading.Thread(target=self.watch_forever, daemon=True,
+                             args=('claims', '/api/v1/persistentvolumeclaims', self.handle_claim, versions['claims'])),
+        ]
+        for thread in watchers:
+            thread.start()
+        for thread in watchers:
+            thread.join()
+
+
+def load_config(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Provision per-claim NFS subdirectories for Kubernetes')
+    parser.add_argument('--config', default=DEFAULT_CONFIG, help='JSON file with defaults for the options below')
+    parser.add_argument('--api-server', help='API server URL (default: in-cluster)')
+    parser.add_argument('--token-file', help='Bearer token file')
+    parser.add_argument('--ca-file', help='CA bundle of the API server')
+    parser.add_argument('--insecure-skip-tls-verify', action='store_true')
+    parser.add_argument('--name', help=f'Provisioner name in StorageClasses (default: {PROVISIONER_NAME})')
+    parser.add_argument('--workers', type=int, help='Claims reconciled in parallel (default: 8)')
+    parser.add_argument('--local-root', action='append', metavar='EXPORT=LOCAL',
+                        help='Local path of an export path prefix, repeatable')
+    parser.add_argument('--once', action='store_true', help='Reconcile the current claims and exit')
+    args = parser.parse_args(argv)
+
+    config = load_config(args.config)
+    server = args.api_server or config.get('api_server')
+    if not server and os.environ.get('KUBERNETES_SERVICE_HOST'):
+        server = f"https://{os.environ['KUBERNETES_SERVICE_HOST']}:{os.environ.get('KUBERNETES_SERVICE_PORT', '443')}"
+    if not server:
+        parser.error('no API server: pass --api-server or set api_server in the config file')
+    token_file = args.token_file or config.get('token_file') or os.path.join(SERVICE_ACCOUNT_DIR, 'token')
+    ca_file = args.ca_file or config.get('ca_file')
+    if not ca_file and os.path.exists(os.path.join(SERVICE_ACCOUNT_DIR, 'ca.crt')):
+        ca_file = os.path.join(SERVICE_ACCOUNT_DIR, 'ca.crt')
+    token = None
+    if os.path.exists(token_file):
+        with open(token_file) as f:
+            token = f.read().strip()
+    local_root = dict(config.get('local_root', {}))
+    for entry in args.local_root or []:
+        export, _, local = entry.partition('=')
+        local_root[export] = local
+
+    client = KubeClient(server, token, ca_file, args.insecure_skip_tls_verify or config.get('insecure', False))
+    provisioner = Provisioner(
+        client, name=args.name or config.get('name', PROVISIONER_NAME),
+        workers=args.workers or config.get('workers', 8), local_root=local_root,
+    )
+    if args.once:
+        provisioner.start()
+        provisioner.resync()
+        provisioner.wait_idle(timeout=3600)
+        provisioner.stop()
+        print(json.dumps(provisioner.stats))
+        return 1 if provisioner.stats['errors'] else 0
+    provisioner.run()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+Role fingerprints for skipping roles whose state is unchanged
+
+A role's fingerprint is a SHA-256 over its source files (tasks,
+handlers, defaults, templates, ...), the project's modules and plugins
+(library/, module_utils/, action_plugins/, filter_plugins/: the code the
+roles run and the daemons some of them copy to hosts) and the resolved
+values of every variable the role files reference. After a complete
+run the fingerprint is stored on the host in <state_dir>/<role>.sha256
+together with the checksums of the files the role renders:
+
+  <fingerprint>
+  <sha256>  /etc/nfs.conf
+  <sha256>  /etc/exports
+
+A later run skips the whole role when the fingerprint is unchanged and
+none of the rendered files were modified on the host since. The
+controller side (fingerprint) runs in the role_fingerprint action plugin,
+the host side (state file) in the role_fingerprint module.
+"""
+
+import hashlib
+import json
+import os
+import re
+
+DEFAULT_STATE_DIR = '/var/lib/cube-storage'
+
+# Referenced names whose values change between runs without changing what
+# a role deploys (the fact cache timestamp, per-run placeholders, the
+# selected tags)
+VOLATILE_VARIABLES = frozenset((
+    'ansible_date_time', 'ansible_check_mode', 'ansible_diff_mode', 'ansible_run_tags',
+    'ansible_skip_tags', 'ansible_play_batch', 'ansible_play_hosts', 'ansible_play_hosts_all',
+    'ansible_facts', 'hostvars', 'vars', 'omit', 'item', 'play_hosts',
+))
+
+IDENTIFIER = re.compile(r'[A-Za-z_][A-Za-z0-9_]*')
+
+# Project directories whose Python files the roles execute or install
+PLUGIN_DIRS = ('library', 'module_utils', 'action_plugins', 'filter_plugins')
+
+
+def role_sources(roles_dir, roles):
+    """Return [(relative path, bytes)] of every file of the given roles, sorted"""
+    sources = []
+    for role in roles:
+        root = os.path.join(roles_dir, role)
+        for current, dirs, files in os.walk(root):
+            dirs[:] = sorted(d for d in dirs if d != '__pycache__')
+            for name in sorted(files):
+                path = os.path.join(current, name)
+                with open(path, 'rb') as f:
+                    sources.append((os.path.relpath(path, roles_dir), f.read()))
+    return sources
+
+
+def plugin_sources(project_dir, plugin_dirs=PLUGIN_DIRS):
+    """Return [(relative path, bytes)] of the project's module and plugin sources, sorted
+
+    Part of every role's fingerprint, so a fix to a module or a daemon
+    under module_utils/ reaches hosts whose role inputs are otherwise
+    unchanged.
+    """
+    sources = []
+    for directory in plugin_dirs:
+        root = os.path.join(project_dir, directory)
+        if not os.path.isdir(root):
+            continue
+        for name in sorted(os.listdir(root)):
+            path = os.path.join(root, name)
+            if name.endswith('.py') and os.path.isfile(path):
+                with open(path, 'rb') as f:
+                    sources.append((os.path.join(directory, name), f.read()))
+    return sources
+
+
+def referenced_names(sources, available):
+    """Names from ``available`` that occur in the role sources, minus volatile ones"""
+    tokens = set()
+    for _, content in sources:
+        tokens.update(IDENTIFIER.findall(content.decode('utf-8', 'replace')))
+    return sorted(name for name in tokens & set(available) if name not in VOLATILE_VARIABLES)
+
+
+def fingerprint(sources, variables):
+    """SHA-256 over role sources and resolved variables (values in canonical JSON)"""
+    digest = hashlib.sha256()
+    for path, content in sources:
+        digest.update(path.encode('utf-8') + b'\0')
+        digest.update(hashlib.sha256(content).digest())
+    digest.update(json.dumps(variables, sort_keys=True, default=str).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def state_path(state_dir, role):
+    return os.path.join(state_dir, f"{role}.sha256")
+
+
+def file_digest(path):
+    """SHA-256 of a file, or None when it does not exist"""
+    digest = hashlib.sha256()
+    try:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(65536), b''):
+                digest.update(block)
+    except FileNotFoundError:
+        return None
+    return digest.hexdigest()
+
+
+def format_state(value, paths):
+    """State file content: the fingerprint and the checksums of the rendered files"""
+    lines = [value]
+    for path in sorted(set(paths)):
+        checksum = file_digest(path)
+        if checksum is not None:
+            lines.append(f"{checksum}  {path}")
+    return '\n'.join(lines) + '\n'
+
+
+def parse_state(text):
+    """Return (fingerprint, {path: checksum}) from a state file"""
+    lines = text.splitlines()
+    if not lines:
+        return None, {}
+    files = {}
+    for line in lines[1:]:
+        checksum, _, path = line.partition('  ')
+        if path:
+            files[path] = checksum
+    return lines[0].strip(), files
+
+
+def check_state(state_file, value):
+    """Return (current, reason): whether the role can be skipped on this host"""
+    try:
+        with open(state_file, 'r') as f:
+            stored, files = parse_state(f.read())
+    except FileNotFoundError:
+        return False, 'no fingerprint stored'
+    if stored != value:
+        return False, 'role inputs changed'
+    for path, checksum in sorted(files.items()):
+        if file_digest(path) != checksum:
+            return False, f"{path} was modified on the host"
+    return True, 'unchanged'
@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Project quotas for share directories (XFS and ext4)
+
+A share with a size limit becomes a quota project: the directory gets a
+project id and the inherit flag (FS_IOC_FSSETXATTR, the call behind
+`xfs_io -c chproj` and `chattr -p`/`+P`), so everything created below it
+is charged to the project, and the project's block limit is set with
+quotactl(Q_SETQUOTA, PRJQUOTA). Usage is read back with one
+quotactl(Q_GETQUOTA) per share from the file system's own accounting,
+so reporting costs the same for a share of ten files or ten million,
+instead of a du walk over the metadata.
+
+Project ids are recorded in /etc/projid ("name:id") and /etc/projects
+("id:path"), so xfs_quota and repquota show the share names too. The
+file system must be mounted with project quotas: XFS with prjquota
+(pquota), ext4 created with the quota and project features and mounted
+with prjquota. Used by the share_directories module and installed as
+the share-usage command by the shares role. Standard library only.
+
+Usage:
+  share_quota.py                         # every share in /etc/projects
+  share_quota.py /srv/shares/builds /srv/shares/media --json
+"""
+
+import argparse
+import ctypes
+import ctypes.util
+import errno
+import fcntl
+import json
+import os
+import re
+import struct
+import sys
+
+DEFAULT_PROJID_FILE = '/etc/projid'
+DEFAULT_PROJECTS_FILE = '/etc/projects'
+
+# Share projects get ids from this range; the nfs provisioner uses 100000+
+PROJECT_ID_BASE = 1000
+PROJECT_ID_LIMIT = 100000
+
+# struct fsxattr and its ioctls (linux/fs.h)
+FSXATTR = struct.Struct('=5I8s')
+FS_IOC_FSGETXATTR = 0x801c581f
+FS_IOC_FSSETXATTR = 0x401c5820
+FS_XFLAG_PROJINHERIT = 0x200
+
+# quotactl (linux/quota.h)
+Q_GETQUOTA = 0x800007
+Q_SETQUOTA = 0x800008
+PRJQUOTA = 2
+QIF_BLIMITS = 1
+QUOTA_BLOCK = 1024
+
+# Mount options that turn on project quota accounting
+PROJECT_QUOTA_OPTIONS = ('prjquota', 'pquota', 'pqnoenforce', 'pqnoenf', 'prjjquota')
+
+SIZE_UNITS = {'': 1, 'K': 2 ** 10, 'M': 2 ** 20, 'G': 2 ** 30, 'T': 2 ** 40, 'P': 2 ** 50, 'E': 2 ** 60}
+
+
+class QuotaError(Exception):
+    """Raised when a share's file system cannot enforce project quotas"""
+
+
+class DqBlk(ctypes.Structure):
+    """struct if_dqblk: limits in 1 KiB blocks, current space in bytes"""
+    _fields_ = [
+        ('bhardlimit', ctypes.c_uint64),
+        ('bsoftlimit', ctypes.c_uint64),
+        ('curspace', ctypes.c_uint64),
+        ('ihardlimit', ctypes.c_uint64),
+        ('isoftlimit', ctypes.c_uint64),
+        ('curinodes', ctypes.c_uint64),
+        ('btime', ctypes.c_uint64),
+        ('itime', ctypes.c_uint64),
+        ('valid', ctypes.c_uint32),
+    ]
+
+
+def parse_size(value):
+    """Bytes of a size such as 500G, 1.5T, 20GiB or 1048576 (binary units)"""
+    if isinstance(value, bool):
+        raise QuotaError(f"invalid size '{value}'")
+    if isinstance(value, int):
+        return value
+    match = re.fullmatch(r'([0-9]+(?:\.[0-9]+)?)\s*(?:([KMGTPE])(?:i?B)?)?', str(value).strip(), re.IGNORECASE)
+    if not match:
+        raise QuotaError(f"invalid size '{value}'")
+    return int(float(match.group(1)) * SIZE_UNITS[(match.group(2) or '').upper()])
+
+
+def format_size(size):
+    for unit in ('', 'K', 'M', 'G', 'T', 'P'):
+        if abs(size) < 1024 or unit == 'P':
+            return f"{size:.1f}{unit}" if unit else f"{size}"
+        size /= 1024.0
+
+
+def _unescape(field):
+    return re.sub(r'\\([0-7]{3})', lambda m: chr(int(m.group(1), 8)), field)
+
+
+def parse_mountinfo(text):
+    """Mounts from /proc/self/mountinfo: mountpoint, fstype, source and options"""
+    mounts = []
+    for line in text.splitlines():
+        fields = line.split()
+        if '-' not in fields:
+            continue
+        separator = fields.index('-')
+        options = set(fields[5].split(','))
+        options.update(fields[separator + 3].split(',') if len(fields) > separator + 3 else [])
+        mounts.append({
+            'mountpoint': _unescape(fields[4]),
+            'fstype': fields[separator + 1],
+            'source': _unescape(fields[separator + 2]),
+            'options': options,
+        })
+    return mounts
+
+
+def find_mount(path, mountinfo='/proc/self/mountinfo'):
+    """The mount holding ``path`` (the last mount on the longest matching prefix)"""
+    with open(mountinfo) as f:
+        mounts = parse_mountinfo(f.read())
+    path = os.path.realpath(path)
+    best = None
+    for mount in mounts:
+        point = mount['mountpoint']
+        if path == point or path.startswith(point.rstrip('/') + '/'):
+            if best is None or len(point) >= len(best['mountpoint']):
+                best = mount
+    if best is None:
+        raise QuotaError(f"no mount found for {path}")
+    return best
+
+
+def check_project_quota(mount):
+    if mount['fstype'] not in ('xfs', 'ext4'):
+        raise QuotaError(f"{mount['mountpoint']} is {mount['fstype']}; project quotas need XFS or ext4")
+    if not mount['options'] & set(PROJECT_QUOTA_OPTIONS):
+        raise QuotaError(f"{mount['mountpoint']} is not mounted with project quotas (mount option prjquota)")
+
+
+def get_project(path):
+    """(project id, inherit flag) of a file or directory"""
+    fd = os.open(path, os.O_RDONLY | os.O_NOFOLLOW)
+    try:
+        buffer = bytearray(FSXATTR.size)
+        fcntl.ioctl(fd, FS_IOC_FSGETXATTR, buffer)
+    finally:
+        os.close(fd)
+    xflags, _, _, projid, _, _ = FSXATTR.unpack(bytes(buffer))
+    return projid, bool(xflags & FS_XFLAG_PROJINHERIT)
+
+
+def _set_project(path, projid, inherit):
+    fd = os.open(path, os.O_RDONLY | os.O_NOFOLLOW)
+    try:
+        buffer = bytearray(FSXATTR.size)
+        fcntl.ioctl(fd, FS_IOC_FSGETXATTR, buffer)
+        xflags, extsize, nextents, current, cowextsize, pad = FSXATTR.unpack(bytes(buffer))
+        wanted = xflags | FS_XFLAG_PROJINHERIT if inherit else xflags
+        if current != projid or wanted != xflags:
+            fcntl.ioctl(fd, FS_IOC_FSSETXATTR, FSXATTR.pack(wanted, extsize, nextents, projid, cowextsize, pad))
+    finally:
+        os.close(fd)
+
+
+def set_project(path, projid):
+    """Put a directory and everything below it into a project
+
+    New files inherit the id from the directory; the walk only charges
+    what already exists, so it runs once, when a share gets its quota.
+    """
+    _set_project(path, projid, True)
+    for root, dirs, files in os.walk(path):
+        for name in dirs:
+            _set_project(os.path.join(root, name), projid, True)
+        for name in files:
+            child = os.path.join(root, name)
+            if os.path.isfile(child) and not os.path.islink(child):
+                _set_project(child, projid, False)
+
+
+def _quotactl(command, device, projid, block):
+    libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+    cmd = (command << 8) | PRJQUOTA
+    if libc.quotactl(cmd, device.encode(), projid, ctypes.byref(block)) != 0:
+        code = ctypes.get_errno()
+        raise OSError(code, f"quotactl on {device}: {os.strerror(code)}")
+
+
+def get_quota(device, projid):
+    """Usage and limits of a project: bytes used, files, hard/soft limit in bytes (0 = none)"""
+    block = DqBlk()
+    try:
+        _quotactl(Q_GETQUOTA, device, projid, block)
+    except OSError as e:
+        if e.errno == errno.ESRCH:
+            raise QuotaError(f"project quotas are not enabled on {device}")
+        raise
+    return {
+        'used': block.curspace,
+        'files': block.curinodes,
+        'limit': block.bhardlimit * QUOTA_BLOCK,
+        'soft_limit': block.bsoftlimit * QUOTA_BLOCK,
+    }
+
+
+def set_limit(device, projid, limit, soft_limit=0):
+    """Set a project's block limits in bytes (rounded up to 1 KiB; 0 removes them)"""
+    block = DqBlk()
+    block.bhardlimit = -(-limit // QUOTA_BLOCK)
+    block.bsoftlimit = -(-soft_limit // QUOTA_BLOCK)
+    block.valid = QIF_BLIMITS
+    _quotactl(Q_SETQUOTA, device, projid, block)
+
+
+def project_name(path):
+    """Project name of a share: its path with / replaced by _"""
+    return path.strip('/').replace('/', '_') or 'root'
+
+
+def read_map(path, reverse=False):
+    """Entries of /etc/projid (name:id) or, with reverse, /etc/projects (id:path) as {name: id}"""
+    entries = {}
+    try:
+        with open(path) as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith('#') or ':' not in line:
+                    continue
+                left, _, right = line.partition(':')
+                name, value = (right, left) if reverse else (left, right)
+                if value.strip().isdigit():
+                    entries[name.strip()] = int(value)
+    except FileNotFoundError:
+        pass
+    return entries
+
+
+def update_map(path, key, projid, reverse=False, check_mode=False):
+    """Add or fix one entry of /etc/projid or /etc/projects; return whether it changed"""
+    entries = read_map(path, reverse)
+    if entries.get(key) == projid:
+        return False
+    if check_mode:
+        return True
+    try:
+        with open(path) as f:
+            lines = f.read().splitlines()
+    except FileNotFoundError:
+        lines = []
+    kept = []
+    for line in lines:
+        left, _, right = line.partition(':')
+        if (right if reverse else left).strip() == key:
+            continue
+        kept.append(line)
+    kept.append(f"{projid}:{key}" if reverse else f"{key}:{projid}")
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f:
+        f.write('\n'.join(kept) + '\n')
+    os.chmod(tmp, 0o644)
+    os.replace(tmp, path)
+    return True
+
+
+def allocate_id(used):
+    projid = PROJECT_ID_BASE
+    while projid in used:
+        projid += 1
+    if projid >= PROJECT_ID_LIMIT:
+        raise QuotaError(f"no free project id below {PROJECT_ID_LIMIT}")
+    return projid
+
+
+def apply_quota(path, size, project_id=None, check_mode=False,
+                projid_file=DEFAULT_PROJID_FILE, projects_file=DEFAULT_PROJECTS_FILE,
+                mountinfo='/proc/self/mountinfo'):
+    """Make ``path`` a quota project limited to ``size``; return its quota state and changes"""
+    limit = parse_size(size)
+    mount = find_mount(path, mountinfo)
+    check_project_quota(mount)
+    name = project_name(path)
+    projects = read_map(projid_file)
+    current, inherit = get_project(path)
+    if project_id is None:
+        project_id = projects.get(name)
+    if project_id is None and current and inherit and current not in projects.values():
+        # Set up by hand (xfs_quota project -s) without a projid entry
+        project_id = current
+    if project_id is None:
+        project_id = allocate_id(set(projects.values()))
+    other = next((key for key, value in projects.items() if value == project_id and key != name), None)
+    if other:
+        raise QuotaError(f"project id {project_id} is already used by {other}")
+
+    changes = []
+    if (current, inherit) != (project_id, True):
+        changes.append('project')
+        if not check_mode:
+            set_project(path, project_id)
+    if update_map(projid_file, name, project_id, check_mode=check_mode):
+        changes.append('projid')
+    if update_map(projects_file, path, project_id, reverse=True, check_mode=check_mode):
+        changes.append('projects')
+
+    quota = get_quota(mount['source'], project_id)
+    wanted = -(-limit // QUOTA_BLOCK) * QUOTA_BLOCK
+    if quota['limit'] != wanted:
+        changes.append('limit')
+        if not check_mode:
+            set_limit(mount['source'], project_id, limit)
+        quota['limit'] = wanted
+    return dict(quota, project_id=project_id, changes=changes)
+
+
+def share_usage(paths=None, projects_file=DEFAULT_PROJECTS_FILE, mountinfo='/proc/self/mountinfo'):
+    """Usage of the given shares (default: every path in /etc/projects), one quotactl each"""
+    projects = read_map(projects_file, reverse=True)
+    if not paths:
+        paths = sorted(projects)
+    report = []
+    for path in paths:
+        entry = {'path': path}
+        try:
+            projid = projects.get(path)
+            if projid is None:
+                projid, inherit = get_project(path)
+                if not (projid and inherit):
+                    raise QuotaError('no project quota')
+            mount = find_mount(path, mountinfo)
+            entry.update(get_quota(mount['source'], projid), project_id=projid)
+        except (QuotaError, OSError) as e:
+            entry['error'] = str(e)
+        report.append(entry)
+    return report
+
+
+def format_report(report):
+    lines = [f"{'SHARE':<40} {'USED':>9} {'LIMIT':>9} {'USE%':>5} {'FILES':>10}"]
+    for entry in report:
+        if 'error' in entry:
+            lines.append(f"{entry['path']:<40} {entry['error']}")
+            continue
+        limit = entry['limit']
+        percent = f"{100.0 * entry['used'] / limit:.0f}%" if limit else '-'
+        lines.append(f"{entry['path']:<40} {format_size(entry['used']):>9} "
+                     f"{format_size(limit) if limit else 'none':>9} {percent:>5} {entry['files']:>10}")
+    return '\n'.join(lines) + '\n'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Per-share usage from the project quota accounting')
+    parser.add_argument('paths', nargs='*', help=f'Share paths (default: every share in {DEFAULT_PROJECTS_FILE})')
+    parser.add_argument('--projects-file', default=DEFAULT_PROJECTS_FILE)
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    args = parser.parse_args(argv)
+
+    report = share_usage(args.paths, args.projects_file)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        sys.stdout.write(format_report(report))
+    return 1 if any('error' in entry for entry in report) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,311 @@
+# -*- coding: utf-8 -*-
+"""
+Backing file systems for shares: LVM volumes, tuned mkfs and fstab
+
+Each volume puts one share (or a share group such as /srv/shares) on its
+own XFS or ext4 file system, on an LVM logical volume or a plain device.
+Named profiles carry the mkfs parameters (allocation groups, log size,
+inode size, stripe alignment) and mount options (noatime, allocsize,
+logbufs, ...) for a workload, so large sequential writes and small-file
+build caches each get a file system laid out for them.
+
+Every step is idempotent: volume groups and logical volumes are created
+when missing and only ever grown, a device is formatted only when it has
+no file system signature (never reformatted), the fstab line of the
+mount point is added or rewritten in place and the file system is
+mounted (or remounted after its options changed). Used by the
+share_storage module.
+"""
+
+import os
+import re
+import subprocess
+
+# mkfs parameter -> (mkfs flag, sub-option), per file system; several
+# parameters with the same flag are joined (-d agcount=32,su=256k,sw=4)
+MKFS_PARAMETERS = {
+    'xfs': {
+        'agcount': ('-d', 'agcount'),
+        'stripe_unit': ('-d', 'su'),
+        'stripe_width': ('-d', 'sw'),
+        'log_size': ('-l', 'size'),
+        'log_stripe_unit': ('-l', 'su'),
+        'inode_size': ('-i', 'size'),
+        'block_size': ('-b', 'size'),
+        'reflink': ('-m', 'reflink'),
+        'label': ('-L', None),
+    },
+    'ext4': {
+        'block_size': ('-b', None),
+        'inode_size': ('-I', None),
+        'bytes_per_inode': ('-i', None),
+        'journal_size': ('-J', 'size'),
+        'lazy_init': ('-E', 'lazy_itable_init'),
+        'stripe_unit': ('-E', 'stride'),
+        'stripe_width': ('-E', 'stripe_width'),
+        'features': ('-O', None),
+        'label': ('-L', None),
+    },
+}
+
+# fsck pass for the fstab entry (XFS is never checked at boot)
+FSCK_PASS = {'xfs': 0, 'ext4': 2}
+
+SIZE_UNITS = {'': 1, 'k': 2 ** 10, 'm': 2 ** 20, 'g': 2 ** 30, 't': 2 ** 40}
+
+
+class StorageError(Exception):
+    """Raised for invalid volume definitions or failed LVM/mkfs/mount commands"""
+
+
+def _bytes(value):
+    match = re.fullmatch(r'([0-9]+)\s*([kmgt]?)i?b?', str(value).strip(), re.IGNORECASE)
+    if not match:
+        raise StorageError(f"invalid size '{value}'")
+    return int(match.group(1)) * SIZE_UNITS[match.group(2).lower()]
+
+
+def _option_key(option):
+    # Same rule as nfs_mount_options.option_key: atime overrides noatime
+    name, equals, _ = option.partition('=')
+    if equals:
+        return name
+    return name[2:] if name.startswith('no') and len(name) > 2 else name
+
+
+def merge_mount_options(*option_lists):
+    """Merge option lists; a later option replaces an earlier one with the same name"""
+    merged = {}
+    for options in option_lists:
+        if isinstance(options, str):
+            options = options.split(',')
+        for option in options or []:
+            option = str(option).strip()
+            if option:
+                merged[_option_key(option)] = option
+    return list(merged.values())
+
+
+def volume_spec(volume, profiles, default_profile='default'):
+    """Validate a volume and merge its profile into fstype, mkfs and mount_options"""
+    for key in ('name', 'mountpoint'):
+        if not volume.get(key):
+            raise StorageError(f"volume has no {key}: {volume!r}")
+    if not os.path.isabs(volume['mountpoint']):
+        raise StorageError(f"{volume['name']}: mountpoint must be absolute")
+    if bool(volume.get('device')) == bool(volume.get('vg')):
+        raise StorageError(f"{volume['name']}: set either device or vg (with size)")
+    if volume.get('vg') and not volume.get('size'):
+        raise StorageError(f"{volume['name']}: an LVM volume needs a size (e.g. 500G or 100%FREE)")
+    name = volume.get('profile') or default_profile
+    if name not in (profiles or {}):
+        raise StorageError(
+            f"{volume['name']}: unknown storage profile '{name}' (available: {', '.join(sorted(profiles or {}))})"
+        )
+    profile = profiles[name]
+    fstype = volume.get('fstype') or profile.get('fstype', 'xfs')
+    if fstype not in MKFS_PARAMETERS:
+        raise StorageError(f"{volume['name']}: unsupported file system '{fstype}' (xfs or ext4)")
+    mkfs = dict(profile.get('mkfs') or {}, **(volume.get('mkfs') or {}))
+    unknown = sorted(set(mkfs) - set(MKFS_PARAMETERS[fstype]))
+    if unknown:
+        raise StorageError(f"{volume['name']}: unknown {fstype} mkfs parameter(s): {', '.join(unknown)}")
+    return dict(
+        volume,
+        profile=name,
+        fstype=fstype,
+        mkfs=mkfs,
+        mount_options=merge_mount_options(profile.get('mount_options'), volume.get('mount_options')),
+    )
+
+
+def ext4_stripe(stripe_unit, stripe_width, block_size=4096):
+    """ext4 stride/stripe_width (in blocks) for a RAID chunk size and data disk count"""
+    stride = _bytes(stripe_unit) // int(block_size)
+    if stride < 1:
+        raise StorageError(f"stripe_unit {stripe_unit} is smaller than the block size")
+    return stride, stride * int(stripe_width)
+
+
+def mkfs_command(fstype, mkfs, device):
+    """mkfs argv for a device with the given parameters"""
+    mkfs = dict(mkfs)
+    if 'stripe_width' in mkfs and 'stripe_unit' not in mkfs:
+        raise StorageError('stripe_width needs a stripe_unit')
+    if fstype == 'ext4' and 'stripe_unit' in mkfs:
+        # ext4 takes the stripe geometry in file system blocks
+        mkfs['stripe_unit'], mkfs['stripe_width'] = ext4_stripe(
+            mkfs['stripe_unit'], mkfs.get('stripe_width', 1), mkfs.get('block_size', 4096))
+    groups = {}
+    for key, value in mkfs.items():
+        flag, sub = MKFS_PARAMETERS[fstype][key]
+        if isinstance(value, bool):
+            value = int(value)
+        groups.setdefault(flag, []).append(f"{sub}={value}" if sub else str(value))
+    command = [f"mkfs.{fstype}", '-q']
+    for flag, values in groups.items():
+        command += [flag, ','.join(values)]
+    return command + [device]
+
+
+def run(command, runner=subprocess.run, check=True):
+    """Run a command; raise StorageError with its stderr when it fails and ``check`` is set"""
+    try:
+        result = runner(command, capture_output=True, text=True)
+    except OSError as e:
+        raise StorageError(f"{command[0]}: {e}")
+    if check and result.returncode != 0:
+        message = (result.stderr or result.stdout).strip().splitlines()
+        raise StorageError(f"{' '.join(command)} failed: {message[-1] if message else result.returncode}")
+    return result
+
+
+def ensure_logical_volume(spec, check_mode=False, runner=subprocess.run):
+    """Create the volume group and logical volume when missing, grow the LV when asked"""
+    vg, name, size = spec['vg'], spec['name'], str(spec['size'])
+    device = f"/dev/{vg}/{name}"
+    changes = []
+    if run(['vgs', '--noheadings', '-o', 'vg_name', vg], runner, check=False).returncode != 0:
+        if not spec.get('pvs'):
+            raise StorageError(f"volume group {vg} does not exist and no pvs are given to create it")
+        changes.append('vg')
+        if check_mode:
+            return device, changes + ['lv']
+        run(['vgcreate', '-y', vg] + list(spec['pvs']), runner)
+
+    sizing = ['-l', size] if '%' in size else ['-L', size]
+    lvs = run(['lvs', '--noheadings', '--units', 'b', '--nosuffix', '-o', 'lv_size', f"{vg}/{name}"],
+              runner, check=False)
+    if lvs.returncode != 0:
+        changes.append('lv')
+        if not check_mode:
+            run(['lvcreate', '-y', '--wipesignatures', 'y', '-n', name] + sizing + [vg], runner)
+    elif '%' not in size and _bytes(size) > int(lvs.stdout.strip() or 0):
+        # Grow only; --resizefs grows the mounted file system along with it
+        changes.append('lv_size')
+        if not check_mode:
+            run(['lvextend', '--resizefs'] + sizing + [f"{vg}/{name}"], runner)
+    return device, changes
+
+
+def probe(device, runner=subprocess.run):
+    """blkid TYPE/UUID/LABEL of a device ({} when it has no signature)"""
+    result = run(['blkid', '-p', '-o', 'export', device], runner, check=False)
+    if result.returncode == 2:
+        return {}
+    if result.returncode != 0:
+        raise StorageError(f"blkid {device} failed: {result.stderr.strip()}")
+    return dict(line.split('=', 1) for line in result.stdout.splitlines() if '=' in line)
+
+
+def ensure_filesystem(device, fstype, mkfs, check_mode=False, runner=subprocess.run):
+    """Format ``device`` unless it already has a signature; refuse to replace another one"""
+    found = probe(device, runner)
+    if found.get('TYPE') == fstype:
+        return found, []
+    if found:
+        raise StorageError(f"{device} already holds {found.get('TYPE') or 'data'}, not formatting it as {fstype}")
+    if check_mode:
+        return found, ['mkfs']
+    run(mkfs_command(fstype, mkfs, device), runner)
+    return probe(device, runner), ['mkfs']
+
+
+def fstab_line(source, mountpoint, fstype, options):
+    return f"{source} {mountpoint} {fstype} {','.join(options) or 'defaults'} 0 {FSCK_PASS[fstype]}"
+
+
+def update_fstab(source, mountpoint, fstype, options, fstab='/etc/fstab', check_mode=False):
+    """Add or rewrite the fstab line of ``mountpoint``; return whether it changed"""
+    wanted = fstab_line(source, mountpoint, fstype, options)
+    try:
+        with open(fstab) as f:
+            lines = f.read().splitlines()
+    except FileNotFoundError:
+        lines = []
+    index = None
+    for number, line in enumerate(lines):
+        fields = line.split()
+        if len(fields) >= 2 and not fields[0].startswith('#') and fields[1] == mountpoint:
+            if fields == wanted.split():
+                return False
+            index = number
+            break
+    if check_mode:
+        return True
+    if index is None:
+        lines.append(wanted)
+    else:
+        lines[index] = wanted
+    tmp = f"{fstab}.tmp"
+    with open(tmp, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+    os.chmod(tmp, 0o644)
+    os.replace(tmp, fstab)
+    return True
+
+
+def mounted_source(mountpoint, mountinfo='/proc/self/mountinfo'):
+    """Device mounted on ``mountpoint`` (the top-most mount), or None"""
+    source = None
+    with open(mountinfo) as f:
+        for line in f:
+            fields = line.split()
+            if '-' not in fields:
+                continue
+            separator = fields.index('-')
+            if fields[4].replace('\\040', ' ') == mountpoint:
+                source = fields[separator + 2]
+    return source
+
+
+def ensure_mounted(spec, source, fstab_changed, fstab='/etc/fstab', check_mode=False,
+                   mountinfo='/proc/self/mountinfo', runner=subprocess.run):
+    """Mount the volume from its fstab line, or remount it when the line changed"""
+    mountpoint = spec['mountpoint']
+    fstab_args = ['-T', fstab] if fstab != '/etc/fstab' else []
+    if mounted_source(mountpoint, mountinfo) is None:
+        if os.path.isdir(mountpoint) and os.listdir(mountpoint):
+            raise StorageError(f"{mountpoint} is not empty; not mounting {source} over existing data")
+        if check_mode:
+            return ['mount'], []
+        os.makedirs(mountpoint, exist_ok=True)
+        run(['mount'] + fstab_args + [mountpoint], runner)
+        return ['mount'], []
+    if not fstab_changed or check_mode:
+        return (['remount'] if fstab_changed else []), []
+    result = run(['mount'] + fstab_args + ['-o', 'remount', mountpoint], runner, check=False)
+    if result.returncode != 0:
+        # XFS cannot change allocsize/logbufs/logbsize on a live mount
+        return [], [f"{mountpoint}: new mount options apply at the next mount ({result.stderr.strip()})"]
+    return ['remount'], []
+
+
+def provision_volume(volume, profiles, default_profile='default', check_mode=False, fstab='/etc/fstab',
+                     mountinfo='/proc/self/mountinfo', runner=subprocess.run):
+    """Bring one volume to its LV, file system, fstab line and mount; return its result"""
+    spec = volume_spec(volume, profiles, default_profile)
+    result = {'name': spec['name'], 'mountpoint': spec['mountpoint'], 'profile': spec['profile'],
+              'fstype': spec['fstype'], 'changes': [], 'warnings': []}
+    if spec.get('vg'):
+        device, changes = ensure_logical_volume(spec, check_mode, runner)
+        result['changes'] += changes
+    else:
+        device = spec['device']
+    result['device'] = device
+    if check_mode and 'lv' in result['changes']:
+        result['changes'] += ['mkfs', 'fstab', 'mount']
+    else:
+        found, changes = ensure_filesystem(device, spec['fstype'], spec['mkfs'], check_mode, runner)
+        result['changes'] += changes
+        source = f"UUID={found['UUID']}" if found.get('UUID') and not spec.get('vg') else device
+        result['options'] = spec['mount_options']
+        fstab_changed = update_fstab(source, spec['mountpoint'], spec['fstype'], spec['mount_options'],
+                                     fstab, check_mode)
+        if fstab_changed:
+            result['changes'].append('fstab')
+        changes, warnings = ensure_mounted(spec, source, fstab_changed, fstab, check_mode, mountinfo, runner)
+        result['changes'] += changes
+        result['warnings'] += warnings
+    result['state'] = 'changed' if result['changes'] else 'ok'
+    return result
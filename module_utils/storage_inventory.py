@@ -0,0 +1,632 @@
+# -*- coding: utf-8 -*-
+"""
+Controller-side inventory and variable resolution
+
+Loads a YAML inventory with its group_vars/host_vars, the plays in the
+playbooks and the role defaults, and resolves Jinja expressions lazily,
+roughly the way ansible-playbook would for a host but without connecting
+to it. Facts that the roles reference (ansible_hostname, ansible_fqdn,
+ansible_date_time, ...) are stubbed from the inventory, or taken from the
+jsonfile fact cache when one is available.
+
+This is a fast path for validation and rendering, not a replacement for
+Ansible: lookups, vault decryption and hostvars of other hosts are not
+supported. Requires PyYAML and Jinja2 (both ship with Ansible).
+"""
+
+import ast
+import json
+import os
+import re
+from collections.abc import Mapping
+
+import yaml
+
+from kerberos_admin import idmap_static_map, kdc_hosts, kdc_locality_order
+from nfs_exports import fragment_name
+from nfs_fscache import culling_thresholds
+from nfs_mount_options import ProfileError, profile_options
+
+VAR_FILE_EXTENSIONS = ('', '.yml', '.yaml', '.json')
+
+# A fixed timestamp keeps rendered "Generated on" headers stable
+STUB_DATE_TIME = {
+    'date': '1970-01-01',
+    'time': '00:00:00',
+    'iso8601': '1970-01-01T00:00:00Z',
+    'epoch': '0',
+    'year': '1970',
+    'month': '01',
+    'day': '01',
+    'hour': '00',
+    'minute': '00',
+    'second': '00',
+    'tz': 'UTC',
+}
+
+# Placeholder hardware facts for hosts that are never contacted, so
+# templates sized from facts render deterministically (use --fact-cache
+# for the real values)
+STUB_HARDWARE = {
+    'ansible_processor_vcpus': 2,
+    'ansible_memtotal_mb': 4096,
+}
+
+
+class InventoryError(Exception):
+    """Raised when inventory, variable or playbook files cannot be loaded"""
+
+
+class TemplateError(Exception):
+    """Raised when a variable cannot be templated"""
+
+
+class _Loader(getattr(yaml, 'CSafeLoader', yaml.SafeLoader)):
+    """SafeLoader that tolerates Ansible's !vault and !unsafe tags"""
+
+
+def _opaque_scalar(loader, node):
+    return loader.construct_scalar(node)
+
+
+_Loader.add_constructor('!vault', _opaque_scalar)
+_Loader.add_constructor('!unsafe', _opaque_scalar)
+
+
+_FILE_CACHE = {}
+
+
+def load_yaml(path):
+    """Load a YAML or JSON file, returning None for empty documents
+
+    Parsed files are cached by path and mtime: role defaults and
+    group_vars are shared by every host, so each is parsed once per run.
+    Callers must treat the returned data as read-only.
+    """
+    try:
+        key = (os.path.abspath(path), os.stat(path).st_mtime_ns)
+        if key not in _FILE_CACHE:
+            with open(path, 'r') as f:
+                _FILE_CACHE[key] = yaml.load(f, Loader=_Loader)
+        return _FILE_CACHE[key]
+    except (OSError, yaml.YAMLError) as e:
+        raise InventoryError(f"Cannot load {path}: {e}")
+
+
+def load_var_files(directory, name):
+    """Load <directory>/<name>[.yml|.yaml|.json] or every file in <directory>/<name>/"""
+    variables = {}
+    base = os.path.join(directory, name)
+    if os.path.isdir(base):
+        for entry in sorted(os.listdir(base)):
+            path = os.path.join(base, entry)
+            if os.path.isfile(path) and os.path.splitext(entry)[1] in VAR_FILE_EXTENSIONS:
+                variables.update(load_yaml(path) or {})
+        return variables
+    for extension in VAR_FILE_EXTENSIONS:
+        path = base + extension
+        if os.path.isfile(path):
+            data = load_yaml(path) or {}
+            if not isinstance(data, dict):
+                raise InventoryError(f"{path} must contain a mapping of variables")
+            variables.update(data)
+            break
+    return variables
+
+
+class Inventory:
+    """A parsed YAML inventory with group/host variable files"""
+
+    def __init__(self, path):
+        self.path = path
+        self.base_dir = os.path.dirname(os.path.abspath(path))
+        self.groups = {'all': {'hosts': [], 'children': [], 'vars': {}}}
+        self.hosts = {}
+        self.parents = {'all': set()}
+        data = load_yaml(path) or {}
+        if not isinstance(data, dict):
+            raise InventoryError(f"{path} is not a YAML inventory")
+        for name, group in data.items():
+            self._parse_group(name, group or {}, None)
+        for name in self.groups:
+            if name != 'all' and not self.parents.get(name):
+                self.parents[name] = {'all'}
+                self.groups['all']['children'].append(name)
+        self._depth = {}
+        self._group_vars = {}
+        self._members = {}
+
+    def _parse_group(self, name, data, parent):
+        group = self.groups.setdefault(name, {'hosts': [], 'children': [], 'vars': {}})
+        parents = self.parents.setdefault(name, set())
+        if parent:
+            parents.add(parent)
+            if name not in self.groups[parent]['children']:
+                self.groups[parent]['children'].append(name)
+        group['vars'].update(data.get('vars') or {})
+        for host, host_vars in (data.get('hosts') or {}).items():
+            self.hosts.setdefault(host, {}).update(host_vars or {})
+            if host not in group['hosts']:
+                group['hosts'].append(host)
+        for child, child_data in (data.get('children') or {}).items():
+            self._parse_group(child, child_data or {}, name)
+
+    def depth(self, group):
+        """Distance of a group from 'all' (longest path), used for precedence"""
+        if group not in self._depth:
+            self._depth[group] = 0 if group == 'all' else 1 + max(
+                (self.depth(parent) for parent in self.parents.get(group) or {'all'}), default=0
+            )
+        return self._depth[group]
+
+    def group_hosts(self, group):
+        """All hosts in a group, including hosts of its child groups"""
+        if group == 'all':
+            return list(self.hosts)
+        if group in self._members:
+            return list(self._members[group])
+        seen = []
+        stack = [group]
+        visited = set()
+        while stack:
+            name = stack.pop(0)
+            if name in visited or name not in self.groups:
+                continue
+            visited.add(name)
+            for host in self.groups[name]['hosts']:
+                if host not in seen:
+                    seen.append(host)
+            stack.extend(self.groups[name]['children'])
+        self._members[group] = seen
+        return list(seen)
+
+    def host_groups(self, host):
+        """Groups a host belongs to, ordered from lowest to highest precedence"""
+        groups = [name for name in self.groups if host in self.group_hosts(name)]
+        return sorted(groups, key=lambda name: (self.depth(name), name))
+
+    def match(self, pattern):
+        """Resolve an Ansible host pattern (a:b, a,b, a:&b, a:!b, a[0]) to hosts"""
+        if isinstance(pattern, (list, tuple)):
+            pattern = ','.join(pattern)
+        selected = []
+        # ':' inside a [start:end] subscript is not a separator
+        terms = [t.strip() for t in re.split(r'[:,](?![^\[]*\])', str(pattern or '')) if t.strip()]
+        for term in sorted(terms, key=lambda t: t[0] in '&!'):
+            if term.startswith('&'):
+                keep = set(self._match_term(term[1:]))
+                selected = [h for h in selected if h in keep]
+            elif term.startswith('!'):
+                drop = set(self._match_term(term[1:]))
+                selected = [h for h in selected if h not in drop]
+            else:
+                selected.extend(h for h in self._match_term(term) if h not in selected)
+        return selected
+
+    def _match_term(self, term):
+        if term in ('all', '*'):
+            return list(self.hosts)
+        if term in self.groups:
+            return self.group_hosts(term)
+        if term in self.hosts:
+            return [term]
+        subscript = re.fullmatch(r'(.+)\[(-?\d+)(?::(-?\d*))?\]', term)
+        if subscript:
+            # group[0] or group[0:2] (Ansible slices include the end)
+            hosts = self._match_term(subscript.group(1))
+            start = int(subscript.group(2))
+            if subscript.group(3) is None:
+                return hosts[start:start + 1] if start != -1 else hosts[-1:]
+            end = int(subscript.group(3)) if subscript.group(3) else len(hosts) - 1
+            return hosts[start:end + 1 if end != -1 else None]
+        if any(c in term for c in '*?['):
+            regex = re.compile(
+                '^' + re.escape(term).replace(r'\*', '.*').replace(r'\?', '.').replace(r'\[', '[').replace(r'\]', ']') + '$'
+            )
+            return [h for h in self.hosts if regex.match(h)]
+        return []
+
+    def group_vars(self, group):
+        """Inventory vars of a group merged with its group_vars file(s)"""
+        if group not in self._group_vars:
+            variables = dict(self.groups[group]['vars'])
+            variables.update(load_var_files(os.path.join(self.base_dir, 'group_vars'), group))
+            self._group_vars[group] = variables
+        return self._group_vars[group]
+
+    def host_vars(self, host):
+        """Inventory vars of a host merged with its host_vars file(s)"""
+        variables = dict(self.hosts.get(host) or {})
+        variables.update(load_var_files(os.path.join(self.base_dir, 'host_vars'), host))
+        return variables
+
+
+def load_plays(playbook):
+    """Parse a playbook into plays with hosts, roles, vars and vars_files"""
+    data = load_yaml(playbook) or []
+    base_dir = os.path.dirname(os.path.abspath(playbook))
+    plays = []
+    for entry in data:
+        if not isinstance(entry, dict):
+            continue
+        imported = entry.get('import_playbook') or entry.get('ansible.builtin.import_playbook')
+        if imported:
+            plays.extend(load_plays(os.path.join(base_dir, imported)))
+            continue
+        roles = []
+        for role in entry.get('roles') or []:
+            roles.append(role.get('role') or role.get('name') if isinstance(role, dict) else role)
+        vars_files = entry.get('vars_files') or []
+        if isinstance(vars_files, str):
+            vars_files = [vars_files]
+        plays.append({
+            'name': entry.get('name', ''),
+            'hosts': entry.get('hosts', ''),
+            'roles': [role for role in roles if role],
+            'vars': entry.get('vars') or {},
+            'vars_files': [os.path.normpath(os.path.join(base_dir, path)) for path in vars_files],
+            'playbook': playbook,
+        })
+    return plays
+
+
+def role_files(roles_dir, role, kind):
+    """Load roles/<role>/<kind>/main.yml (kind is 'defaults' or 'vars')"""
+    return load_var_files(os.path.join(roles_dir, role, kind), 'main')
+
+
+def load_fact_cache(directory, host):
+    """Load a host's facts from an Ansible jsonfile fact cache, if present"""
+    if not directory:
+        return {}
+    path = os.path.join(directory, host)
+    if not os.path.isfile(path):
+        return {}
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def stub_facts(inventory, host, host_vars):
+    """Facts derived from the inventory for hosts that are never contacted"""
+    fqdn = str(host_vars.get('ansible_host') or host)
+    short = host.split('.')[0]
+    return {
+        'inventory_hostname': host,
+        'inventory_hostname_short': short,
+        'inventory_dir': inventory.base_dir,
+        'group_names': [g for g in inventory.host_groups(host) if g not in ('all', 'ungrouped')],
+        'groups': {name: inventory.group_hosts(name) for name in inventory.groups},
+        'ansible_hostname': fqdn.split('.')[0] if '.' in fqdn and not fqdn[0].isdigit() else short,
+        'ansible_nodename': fqdn,
+        'ansible_fqdn': fqdn,
+        'ansible_date_time': dict(STUB_DATE_TIME),
+        **STUB_HARDWARE,
+    }
+
+
+def host_variables(inventory, host, roles=(), plays=(), roles_dir='roles', fact_cache=None, extra_vars=None):
+    """Merge every variable source for a host in Ansible precedence order
+
+    Returns the raw (untemplated) variables; pass them to Templar to
+    resolve expressions.
+    """
+    variables = {}
+    for role in roles:
+        variables.update(role_files(roles_dir, role, 'defaults'))
+    raw_host_vars = inventory.host_vars(host)
+    variables.update(stub_facts(inventory, host, raw_host_vars))
+    for group in inventory.host_groups(host):
+        variables.update(inventory.group_vars(group))
+    variables.update(raw_host_vars)
+    variables.update(load_fact_cache(fact_cache, host))
+    for play in plays:
+        variables.update(play['vars'])
+        for path in play['vars_files']:
+            if os.path.isfile(path):
+                variables.update(load_yaml(path) or {})
+    for role in roles:
+        variables.update(role_files(roles_dir, role, 'vars'))
+    variables.update(extra_vars or {})
+    return variables
+
+
+def host_roles(inventory, plays):
+    """Map each host to the ordered roles and plays that target it"""
+    mapping = {}
+    for play in plays:
+        for host in inventory.match(play['hosts']):
+            entry = mapping.setdefault(host, {'roles': [], 'plays': []})
+            entry['plays'].append(play)
+            for role in play['roles']:
+                if role not in entry['roles']:
+                    entry['roles'].append(role)
+    return mapping
+
+
+# ---------------------------------------------------------------------------
+# Jinja templating
+# ---------------------------------------------------------------------------
+
+_ENVIRONMENT = None
+
+# Compiled variable expressions by source string, shared by every Templar
+# (and so every host) in the process
+_TEMPLATES = {}
+
+
+def _to_bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ('yes', 'on', '1', 'true', 't', 'y')
+
+
+def _flatten(value, levels=None):
+    result = []
+    for item in value:
+        if isinstance(item, (list, tuple)) and (levels is None or levels > 0):
+            result.extend(_flatten(item, None if levels is None else levels - 1))
+        else:
+            result.append(item)
+    return result
+
+
+def _combine(*dicts, recursive=False):
+    result = {}
+    for d in dicts:
+        for key, value in d.items():
+            if recursive and isinstance(value, dict) and isinstance(result.get(key), dict):
+                result[key] = _combine(result[key], value, recursive=True)
+            else:
+                result[key] = value
+    return result
+
+
+def _difference(value, other):
+    other = list(other)
+    result = []
+    for item in value:
+        if item not in other and item not in result:
+            result.append(item)
+    return result
+
+
+def _mandatory(value, msg=None):
+    from jinja2 import Undefined
+    if isinstance(value, Undefined):
+        raise TemplateError(msg or "Mandatory variable not defined")
+    return value
+
+
+def _regex_search(value, pattern):
+    match = re.search(pattern, str(value))
+    return match.group(0) if match else None
+
+
+def _ternary(value, true_val, false_val, none_val=None):
+    if value is None and none_val is not None:
+        return none_val
+    return true_val if value else false_val
+
+
+def _nfs_mount_options(profiles, profile, base=None, extra=None, fscache_profiles=None):
+    try:
+        return profile_options(profiles, profile, base, extra, fscache_profiles)
+    except ProfileError as e:
+        raise TemplateError(str(e))
+
+
+def _checked_filter(func):
+    def wrapper(*args):
+        try:
+            return func(*args)
+        except ValueError as e:
+            raise TemplateError(str(e))
+    return wrapper
+
+
+# The subset of Ansible's filters and tests the roles use
+ANSIBLE_FILTERS = {
+    'bool': _to_bool,
+    'ternary': _ternary,
+    'regex_replace': lambda value, pattern, replacement='', ignorecase=False: re.sub(
+        pattern, replacement, str(value), flags=re.I if ignorecase else 0
+    ),
+    'regex_search': _regex_search,
+    'flatten': _flatten,
+    'combine': _combine,
+    'difference': _difference,
+    'mandatory': _mandatory,
+    'to_json': lambda value, **kw: json.dumps(value, **kw),
+    'to_nice_json': lambda value, indent=4: json.dumps(value, indent=indent, sort_keys=True),
+    'to_yaml': lambda value, **kw: yaml.safe_dump(value, **kw),
+    'basename': os.path.basename,
+    'dirname': os.path.dirname,
+    'quote': lambda value: "'" + str(value).replace("'", "'\"'\"'") + "'",
+    'dict2items': lambda value: [{'key': k, 'value': v} for k, v in value.items()],
+    'items2dict': lambda value: {item['key']: item['value'] for item in value},
+}
+
+# The project's own filters from filter_plugins/storage_filters.py
+PROJECT_FILTERS = {
+    'nfs_mount_options': _nfs_mount_options,
+    'kdc_locality_order': _checked_filter(kdc_locality_order),
+    'kdc_hosts': _checked_filter(kdc_hosts),
+    'idmap_static_map': _checked_filter(idmap_static_map),
+    'fscache_culling': _checked_filter(culling_thresholds),
+    'export_fragment_name': fragment_name,
+}
+
+ANSIBLE_TESTS = {
+    'match': lambda value, pattern: re.match(pattern, str(value)) is not None,
+    'search': lambda value, pattern: re.search(pattern, str(value)) is not None,
+    'regex': lambda value, pattern: re.search(pattern, str(value)) is not None,
+}
+
+
+def configure_environment(env):
+    """Register Ansible's filters and tests on a Jinja environment"""
+    env.filters.update(ANSIBLE_FILTERS)
+    env.filters.update(PROJECT_FILTERS)
+    env.tests.update(ANSIBLE_TESTS)
+    return env
+
+
+def environment():
+    """Return the shared native Jinja environment used for variables"""
+    global _ENVIRONMENT
+    if _ENVIRONMENT is None:
+        from jinja2 import ChainableUndefined, StrictUndefined
+        from jinja2.nativetypes import NativeEnvironment
+
+        # Like Ansible: attributes of an undefined variable are undefined
+        # too (so registered.key | default(...) works), any other use fails
+        class ChainableStrictUndefined(ChainableUndefined, StrictUndefined):
+            pass
+
+        _ENVIRONMENT = configure_environment(NativeEnvironment(
+            undefined=ChainableStrictUndefined, keep_trailing_newline=True, trim_blocks=True,
+        ))
+    return _ENVIRONMENT
+
+
+def compile_template(source):
+    """Return the compiled template for an expression, compiling it once per process"""
+    template = _TEMPLATES.get(source)
+    if template is None:
+        template = _TEMPLATES[source] = environment().from_string(source)
+    return template
+
+
+def is_template(value):
+    return isinstance(value, str) and ('{{' in value or '{%' in value)
+
+
+class Templar(Mapping):
+    """Lazily templated view over a raw variable mapping
+
+    Each variable is rendered on first access (with cycle detection) and
+    cached, so resolving the handful of variables a check needs does not
+    template the whole variable tree. Compiled expressions are shared
+    across instances (see compile_template).
+    """
+
+    def __init__(self, variables):
+        self._raw = variables
+        self._cache = {}
+        self._resolving = []
+
+    def __getitem__(self, name):
+        if name in self._cache:
+            return self._cache[name]
+        if name not in self._raw:
+            if name in environment().globals:
+                return environment().globals[name]
+            raise KeyError(name)
+        if name in self._resolving:
+            chain = ' -> '.join(self._resolving + [name])
+            raise TemplateError(f"recursive loop detected in template: {chain}")
+        self._resolving.append(name)
+        try:
+            value = self.template(self._raw[name])
+        finally:
+            self._resolving.pop()
+        self._cache[name] = value
+        return value
+
+    def __contains__(self, name):
+        return name in self._raw or name in environment().globals
+
+    def __iter__(self):
+        return iter(self._raw)
+
+    def __len__(self):
+        return len(self._raw)
+
+    def template(self, value):
+        """Template a value (recursively for lists and dicts)"""
+        if isinstance(value, dict):
+            return {key: self.template(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [self.template(item) for item in value]
+        if not is_template(value):
+            return value
+        from jinja2 import TemplateError as JinjaTemplateError, Undefined
+        from jinja2.nativetypes import native_concat
+
+        try:
+            template = compile_template(value)
+            context = template.new_context(self, shared=True)
+            result = native_concat(template.root_render_func(context))
+            if isinstance(result, Undefined):
+                # Native rendering returns a lone undefined value untouched
+                result._fail_with_undefined_error()
+        except JinjaTemplateError as e:
+            raise TemplateError(f"{e.__class__.__name__}: {e} (in {value!r})")
+        if isinstance(result, str) and result[:1] in '[{' and result[-1:] in ']}':
+            try:
+                result = ast.literal_eval(result)
+            except (ValueError, SyntaxError):
+                pass
+        return result
+
+
+def resolve(variables, names):
+    """Template the given variable names, returning (values, errors)"""
+    templar = Templar(variables)
+    values = {}
+    errors = []
+    for name in names:
+        if name not in variables:
+            continue
+        try:
+            values[name] = templar[name]
+        except TemplateError as e:
+            errors.append(f"{name}: cannot be templated: {e}")
+    return values, errors
+
+
+def parse_extra_vars(values):
+    """Parse -e arguments (key=value pairs or @file) into a dict"""
+    extra = {}
+    for value in values or []:
+        if value.startswith('@'):
+            data = load_yaml(value[1:]) or {}
+            if not isinstance(data, dict):
+                raise InventoryError(f"{value[1:]} must contain a mapping of variables")
+            extra.update(data)
+        elif value.lstrip().startswith('{'):
+            extra.update(yaml.safe_load(value) or {})
+        else:
+            for pair in value.split():
+                key, sep, item = pair.partition('=')
+                if not sep:
+                    raise InventoryError(f"Invalid extra variable '{pair}' (expected key=value)")
+                extra[key] = item
+    return extra
+
+
+def collect_hosts(inventory_path, playbooks, limit=None, roles_dir='roles', fact_cache=None, extra_vars=None):
+    """Resolve the raw variables of every host targeted by the playbooks
+
+    Returns a list of (host, roles, variables) tuples in inventory order.
+    Hosts that no play targets are skipped.
+    """
+    inventory = Inventory(inventory_path)
+    plays = []
+    for playbook in playbooks:
+        plays.extend(load_plays(playbook))
+    mapping = host_roles(inventory, plays)
+    selected = inventory.match(limit) if limit else list(inventory.hosts)
+    hosts = []
+    for host in inventory.hosts:
+        if host not in mapping or host not in selected:
+            continue
+        entry = mapping[host]
+        variables = host_variables(
+            inventory, host, entry['roles'], entry['plays'], roles_dir, fact_cache, extra_vars,
+        )
+        hosts.append((host, entry['roles'], variables))
+    return hosts
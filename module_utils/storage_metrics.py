@@ -0,0 +1,572 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Runtime metrics for the file server in Prometheus text format
+
+Collectors for the hot paths of the storage stack:
+
+  nfsd   - /proc/net/rpc/nfsd (threads, reply cache, RPC errors, per-op
+           counts for NFSv3 and NFSv4 operations), /proc/fs/nfsd/pool_stats
+           (per-pool arrivals, queued sockets, thread wakeups) and the
+           client-side RPC retransmits in /proc/net/rpc/nfs
+  samba  - smbstatus sessions per protocol, share connections, open files
+  kdc    - AS/TGS requests by outcome, tailed from the krb5kdc log
+  krb5cc - credential caches kept by krb5_credentials.py for rpc.gssd:
+           ticket expiry, next refresh, refreshes by method and result,
+           read from the status file it writes every cycle
+  fscache - client-side FS-Cache: /proc/fs/fscache/stats and
+           /proc/fs/netfs/stats counters, reads served from the cache vs
+           fetched from the server, NFS READ calls sent and free space
+           and files left on the cache file system
+
+Every collector is cheap enough to run every few seconds on a busy
+server: the /proc files are read in one call each, smbstatus runs once,
+and the KDC log is read incrementally from the last offset (kept in a
+state file with the accumulated counters, so the counters stay monotonic
+across runs and survive log rotation).
+
+Deployed by the storage-metrics role (included from the nfs-server,
+samba, kerberos-kdc, kerberos-client and nfs-client roles) as a standalone script that writes a
+node_exporter textfile or serves /metrics over HTTP. Standard library only.
+
+Usage:
+  storage_metrics.py --collector nfsd --collector kdc
+  storage_metrics.py --textfile /var/lib/prometheus/node-exporter/cube_storage.prom
+  storage_metrics.py --listen :9731 --interval 10
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+
+PREFIX = 'cube_storage_'
+DEFAULT_CONFIG_DIR = '/etc/cube-storage/metrics.d'
+DEFAULT_STATE_FILE = '/var/lib/cube-storage/metrics-state.json'
+DEFAULT_KDC_LOG = '/var/log/krb5kdc.log'
+COLLECTORS = ('nfsd', 'samba', 'kdc', 'krb5cc', 'fscache')
+DEFAULT_KRB5CC_STATUS = '/var/lib/cube-storage/krb5-credentials.json'
+DEFAULT_FSCACHE_DIR = '/var/cache/fscache'
+
+NFS3_OPS = (
+    'null', 'getattr', 'setattr', 'lookup', 'access', 'readlink', 'read', 'write', 'create',
+    'mkdir', 'symlink', 'mknod', 'remove', 'rmdir', 'rename', 'link', 'readdir',
+    'readdirplus', 'fsstat', 'fsinfo', 'pathconf', 'commit',
+)
+
+# Indexed by NFSv4 operation number (RFC 7530/5661/7862/8276); 0-2 are unused
+NFS4_OPS = (
+    None, None, None, 'access', 'close', 'commit', 'create', 'delegpurge', 'delegreturn',
+    'getattr', 'getfh', 'link', 'lock', 'lockt', 'locku', 'lookup', 'lookupp', 'nverify',
+    'open', 'openattr', 'open_confirm', 'open_downgrade', 'putfh', 'putpubfh', 'putrootfh',
+    'read', 'readdir', 'readlink', 'remove', 'rename', 'renew', 'restorefh', 'savefh',
+    'secinfo', 'setattr', 'setclientid', 'setclientid_confirm', 'verify', 'write',
+    'release_lockowner', 'backchannel_ctl', 'bind_conn_to_session', 'exchange_id',
+    'create_session', 'destroy_session', 'free_stateid', 'get_dir_delegation',
+    'getdeviceinfo', 'getdevicelist', 'layoutcommit', 'layoutget', 'layoutreturn',
+    'secinfo_no_name', 'sequence', 'set_ssv', 'test_stateid', 'want_delegation',
+    'destroy_clientid', 'reclaim_complete', 'allocate', 'copy', 'copy_notify', 'deallocate',
+    'io_advise', 'layouterror', 'layoutstats', 'offload_cancel', 'offload_status',
+    'read_plus', 'seek', 'write_same', 'clone', 'getxattr', 'setxattr', 'listxattrs',
+    'removexattr',
+)
+
+# krb5kdc request lines: "AS_REQ (4 etypes {18 17 20 19}) 10.0.0.5: ISSUE: authtime ..."
+# or "TGS_REQ (...) 10.0.0.5: UNKNOWN_SERVER: authtime 0, ..."
+KDC_REQUEST = re.compile(r'\b(AS_REQ|TGS_REQ) .*?: ([A-Z][A-Z0-9_]*):')
+# Outcomes that are part of a normal exchange rather than failures
+KDC_OK_STATUSES = ('ISSUE', 'NEEDED_PREAUTH')
+
+SMB_PROTOCOL = re.compile(r'\b(SMB[0-9](?:_[0-9]+)?|NT1)\b')
+
+# FS-Cache/netfs stats lines: "Retrvls: n=4 ok=3 wt=0 nod=1 ..."
+FSCACHE_LINE = re.compile(r'^([A-Za-z][\w-]*)\s*:\s*(.*)$')
+FSCACHE_COUNTER = re.compile(r'([\w-]+)=(-?[0-9]+)')
+# Position of READ in the client procN lines of /proc/net/rpc/nfs
+NFS_CLIENT_READ = {'3': ('proc3', 6), '4': ('proc4', 1)}
+
+
+class MetricSet:
+    """Metric families in insertion order, rendered as Prometheus text"""
+
+    def __init__(self):
+        self.families = {}
+
+    def add(self, name, kind, help_text, value, **labels):
+        family = self.families.setdefault(PREFIX + name, {'type': kind, 'help': help_text, 'samples': []})
+        family['samples'].append((labels, value))
+
+    def render(self):
+        lines = []
+        for name, family in self.families.items():
+            lines.append(f"# HELP {name} {family['help']}")
+            lines.append(f"# TYPE {name} {family['type']}")
+            for labels, value in family['samples']:
+                lines.append(f"{name}{_labels(labels)} {_number(value)}")
+        return '\n'.join(lines) + '\n' if lines else ''
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        f'{key}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34)).replace(chr(10), " ")}"'
+        for key, value in sorted(labels.items())
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+def _number(value):
+    if isinstance(value, float) and not value.is_integer():
+        return repr(value)
+    return str(int(value))
+
+
+def read_file(path):
+    try:
+        with open(path, 'r') as f:
+            return f.read()
+    except (FileNotFoundError, PermissionError):
+        return None
+
+
+# nfsd ---------------------------------------------------------------------
+
+def parse_rpc_stats(text):
+    """Parse /proc/net/rpc/nfsd (or nfs) into {line label: [numbers]}"""
+    stats = {}
+    for line in text.splitlines():
+        fields = line.split()
+        if len(fields) < 2:
+            continue
+        values = []
+        for field in fields[1:]:
+            try:
+                values.append(int(field))
+            except ValueError:
+                values.append(float(field))
+        stats[fields[0]] = values
+    return stats
+
+
+def op_counts(stats, label, names):
+    """Per-operation counts of a procN/procNops line ("proc3 22 v0 v1 ...")
+
+    Unused operation numbers are skipped; numbers beyond ``names`` (newer
+    kernels) are reported as op<number>.
+    """
+    values = stats.get(label)
+    if not values:
+        return {}
+    counts = {}
+    for index, value in enumerate(values[1:1 + int(values[0])]):
+        if index >= len(names):
+            counts[f"op{index}"] = value
+        elif names[index]:
+            counts[names[index]] = value
+    return counts
+
+
+def parse_pool_stats(text):
+    """Parse /proc/fs/nfsd/pool_stats into a list of {column: value} per pool"""
+    columns, pools = [], []
+    for line in text.splitlines():
+        if line.startswith('#'):
+            columns = [name.replace('-', '_') for name in line.lstrip('#').split()]
+            continue
+        values = line.split()
+        if columns and len(values) == len(columns):
+            pools.append(dict(zip(columns, (int(value) for value in values))))
+    return pools
+
+
+def collect_nfsd(metrics, proc_root='/proc'):
+    text = read_file(os.path.join(proc_root, 'net', 'rpc', 'nfsd'))
+    if text is None:
+        raise FileNotFoundError('/proc/net/rpc/nfsd not found (nfsd not loaded)')
+    stats = parse_rpc_stats(text)
+    if 'th' in stats:
+        metrics.add('nfsd_threads', 'gauge', 'Configured nfsd threads.', stats['th'][0])
+        metrics.add('nfsd_all_threads_busy_total', 'counter',
+                    'Times all nfsd threads were busy (0 on kernels that no longer track it).', stats['th'][1])
+    if 'rc' in stats:
+        hits, misses, nocache = stats['rc'][:3]
+        metrics.add('nfsd_reply_cache_hits_total', 'counter',
+                    'Retransmitted requests answered from the duplicate reply cache.', hits)
+        metrics.add('nfsd_reply_cache_misses_total', 'counter', 'Requests not found in the reply cache.', misses)
+        metrics.add('nfsd_reply_cache_nocache_total', 'counter', 'Requests that bypass the reply cache.', nocache)
+    if 'io' in stats:
+        metrics.add('nfsd_read_bytes_total', 'counter', 'Bytes read from disk by nfsd.', stats['io'][0])
+        metrics.add('nfsd_written_bytes_total', 'counter', 'Bytes written to disk by nfsd.', stats['io'][1])
+    if 'net' in stats:
+        metrics.add('nfsd_tcp_connections_total', 'counter', 'TCP connections accepted by nfsd.', stats['net'][3])
+    if 'rpc' in stats:
+        calls, badcalls, badfmt, badauth, badclnt = stats['rpc'][:5]
+        metrics.add('nfsd_rpc_calls_total', 'counter', 'RPC calls received by nfsd.', calls)
+        for reason, value in (('badcalls', badcalls), ('badfmt', badfmt), ('badauth', badauth),
+                              ('badclnt', badclnt)):
+            metrics.add('nfsd_rpc_errors_total', 'counter', 'Rejected RPC calls by reason.', value, reason=reason)
+    for version, label, names in (('3', 'proc3', NFS3_OPS), ('4', 'proc4ops', NFS4_OPS)):
+        for op, value in op_counts(stats, label, names).items():
+            metrics.add('nfsd_operations_total', 'counter', 'NFS operations served, by version and operation.',
+                        value, version=version, op=op)
+
+    pool_text = read_file(os.path.join(proc_root, 'fs', 'nfsd', 'pool_stats'))
+    for pool in parse_pool_stats(pool_text or ''):
+        name = str(pool.get('pool', 0))
+        for column, help_text in (
+            ('packets_arrived', 'Packets arrived at the nfsd thread pool.'),
+            ('sockets_enqueued', 'Sockets queued because no nfsd thread was idle (pool saturation).'),
+            ('threads_woken', 'nfsd threads woken to handle a socket.'),
+            ('threads_timedout', 'nfsd threads that timed out waiting for work.'),
+        ):
+            if column in pool:
+                metrics.add(f"nfsd_pool_{column}_total", 'counter', help_text, pool[column], pool=name)
+
+    client_text = read_file(os.path.join(proc_root, 'net', 'rpc', 'nfs'))
+    if client_text:
+        rpc = parse_rpc_stats(client_text).get('rpc')
+        if rpc and len(rpc) >= 2:
+            metrics.add('nfs_client_rpc_retransmits_total', 'counter',
+                        'RPC retransmissions by the NFS client on this host.', rpc[1])
+
+
+# samba --------------------------------------------------------------------
+
+def parse_smbstatus(text):
+    """Count sessions per protocol, connections per share and open files in smbstatus output"""
+    result = {'sessions': {}, 'shares': {}, 'open_files': 0}
+    section = None
+    for line in text.splitlines():
+        stripped = line.strip()
+        if not stripped:
+            continue
+        if stripped.startswith('PID') and 'Username' in stripped:
+            section = 'sessions'
+            continue
+        if stripped.startswith('Service') and 'pid' in stripped:
+            section = 'shares'
+            continue
+        if stripped.startswith('Pid') and 'DenyMode' in stripped:
+            section = 'files'
+            continue
+        if stripped.startswith('Locked files') or stripped.startswith('Samba version'):
+            section = None
+            continue
+        if set(stripped) == {'-'} or section is None:
+            continue
+        if section == 'sessions':
+            match = SMB_PROTOCOL.search(stripped)
+            protocol = match.group(1) if match else 'unknown'
+            result['sessions'][protocol] = result['sessions'].get(protocol, 0) + 1
+        elif section == 'shares':
+            share = stripped.split()[0]
+            result['shares'][share] = result['shares'].get(share, 0) + 1
+        elif section == 'files':
+            result['open_files'] += 1
+    return result
+
+
+def collect_samba(metrics, smbstatus='smbstatus'):
+    output = subprocess.run([smbstatus], capture_output=True, text=True, timeout=10)
+    if output.returncode != 0:
+        raise RuntimeError(f"smbstatus failed: {output.stderr.strip()}")
+    status = parse_smbstatus(output.stdout)
+    metrics.add('smb_sessions', 'gauge', 'Active SMB sessions by protocol.', sum(status['sessions'].values()),
+                protocol='all')
+    for protocol, count in sorted(status['sessions'].items()):
+        metrics.add('smb_sessions', 'gauge', 'Active SMB sessions by protocol.', count, protocol=protocol)
+    for share, count in sorted(status['shares'].items()):
+        metrics.add('smb_share_connections', 'gauge', 'Connections per SMB share.', count, share=share)
+    metrics.add('smb_open_files', 'gauge', 'Files currently opened over SMB.', status['open_files'])
+
+
+# kdc ----------------------------------------------------------------------
+
+def count_kdc_requests(lines, counts=None):
+    """Add AS/TGS requests by outcome from krb5kdc log lines to ``counts``"""
+    counts = {} if counts is None else counts
+    for line in lines:
+        match = KDC_REQUEST.search(line)
+        if match:
+            key = f"{match.group(1)}|{match.group(2)}"
+            counts[key] = counts.get(key, 0) + 1
+    return counts
+
+
+def tail_log(path, state):
+    """Return the complete lines appended to ``path`` since ``state`` and the new state
+
+    ``state`` holds the inode and offset of the last read. A new inode or
+    a file shorter than the offset (rotation, truncation) restarts from
+    the beginning; a trailing partial line is left for the next run.
+    """
+    with open(path, 'rb') as f:
+        st = os.fstat(f.fileno())
+        offset = state.get('offset', 0)
+        if state.get('inode') != st.st_ino or st.st_size < offset:
+            offset = 0
+        f.seek(offset)
+        data = f.read()
+    end = data.rfind(b'\n') + 1
+    lines = data[:end].decode('utf-8', 'replace').splitlines()
+    return lines, {'inode': st.st_ino, 'offset': offset + end}
+
+
+def collect_kdc(metrics, state, path=DEFAULT_KDC_LOG):
+    kdc_state = state.setdefault('kdc', {})
+    lines, position = tail_log(path, kdc_state.get('position', {}))
+    counts = count_kdc_requests(lines, kdc_state.setdefault('counts', {}))
+    kdc_state['position'] = position
+    for key, value in sorted(counts.items()):
+        request, status = key.split('|', 1)
+        metrics.add('krb5kdc_requests_total', 'counter', 'KDC requests by type and outcome.', value,
+                    type=request.split('_')[0], status=status)
+    errors = {}
+    for key, value in counts.items():
+        request, status = key.split('|', 1)
+        if status not in KDC_OK_STATUSES:
+            errors[request] = errors.get(request, 0) + value
+    for request in ('AS_REQ', 'TGS_REQ'):
+        metrics.add('krb5kdc_request_errors_total', 'counter', 'Failed KDC requests by type.',
+                    errors.get(request, 0), type=request.split('_')[0])
+
+
+# krb5cc -------------------------------------------------------------------
+
+def collect_krb5cc(metrics, status_file=DEFAULT_KRB5CC_STATUS, now=None):
+    text = read_file(status_file)
+    if text is None:
+        raise FileNotFoundError(f"{status_file} not found (krb5-credentials not running)")
+    status = json.loads(text)
+    now = time.time() if now is None else now
+    metrics.add('krb5cc_status_age_seconds', 'gauge', 'Seconds since the credential manager last wrote its status.',
+                round(max(0.0, now - status.get('updated', 0)), 3))
+    for entry in status.get('credentials', []):
+        labels = {'principal': entry['principal'], 'uid': entry['uid']}
+        metrics.add('krb5cc_valid', 'gauge', 'Whether the cache holds a valid TGT.', int(bool(entry.get('valid'))),
+                    **labels)
+        for key, name, help_text in (
+            ('expires', 'krb5cc_expiry_timestamp_seconds', 'Expiry of the TGT in the cache.'),
+            ('renew_till', 'krb5cc_renew_until_timestamp_seconds', 'Time until which the TGT can be renewed.'),
+            ('next_refresh', 'krb5cc_next_refresh_timestamp_seconds', 'Scheduled (jittered) refresh of the cache.'),
+            ('last_refresh', 'krb5cc_last_refresh_timestamp_seconds', 'Last successful refresh of the cache.'),
+            ('last_duration', 'krb5cc_last_refresh_duration_seconds', 'Time the last successful refresh took.'),
+        ):
+            if entry.get(key) is not None:
+                metrics.add(name, 'gauge', help_text, entry[key], **labels)
+        metrics.add('krb5cc_consecutive_failures', 'gauge', 'Refresh failures since the last success.',
+                    entry.get('failures', 0), **labels)
+        for method, results in sorted(entry.get('refreshes', {}).items()):
+            for result, value in sorted(results.items()):
+                metrics.add('krb5cc_refreshes_total', 'counter',
+                            'Cache refreshes by method (renew: TGS, keytab: AS) and result.', value,
+                            method=method, result=result, **labels)
+
+
+# fscache ------------------------------------------------------------------
+
+def parse_fscache_stats(text, stats=None):
+    """Parse /proc/fs/fscache/stats or /proc/fs/netfs/stats into {section: {counter: value}}
+
+    Sections that appear on several lines (``Allocs``, ``Retrvls``) are merged.
+    """
+    stats = {} if stats is None else stats
+    for line in text.splitlines():
+        match = FSCACHE_LINE.match(line.strip())
+        if not match:
+            continue
+        counters = FSCACHE_COUNTER.findall(match.group(2))
+        if counters:
+            stats.setdefault(match.group(1), {}).update((name, int(value)) for name, value in counters)
+    return stats
+
+
+def fscache_reads(stats):
+    """(cache, server) read counts, or None without FS-Cache statistics
+
+    netfs kernels (5.17+) count read subrequests served by the cache
+    (CaRdOps RD) and downloaded from the server (DownOps DL); older ones
+    count page retrievals satisfied by the cache (Retrvls ok) and those
+    that found no data in it (Retrvls nod).
+    """
+    if 'CaRdOps' in stats or 'DownOps' in stats:
+        return stats.get('CaRdOps', {}).get('RD', 0), stats.get('DownOps', {}).get('DL', 0)
+    if 'Retrvls' in stats:
+        return stats['Retrvls'].get('ok', 0), stats['Retrvls'].get('nod', 0)
+    return None
+
+
+def collect_fscache(metrics, proc_root='/proc', cache_dir=DEFAULT_FSCACHE_DIR):
+    stats = {}
+    for path in (('fs', 'fscache', 'stats'), ('fs', 'netfs', 'stats')):
+        parse_fscache_stats(read_file(os.path.join(proc_root, *path)) or '', stats)
+    if not stats:
+        raise FileNotFoundError('/proc/fs/fscache/stats not found (fscache not loaded)')
+    for section, counters in sorted(stats.items()):
+        for name, value in sorted(counters.items()):
+            metrics.add('fscache_events_total', 'counter',
+                        'FS-Cache and netfs statistics by section and counter.', value, section=section, event=name)
+    reads = fscache_reads(stats)
+    if reads is not None:
+        for source, value in zip(('cache', 'server'), reads):
+            metrics.add('fscache_reads_total', 'counter',
+                        'Reads of cached NFS files served from the local cache or fetched from the server.',
+                        value, source=source)
+
+    client_text = read_file(os.path.join(proc_root, 'net', 'rpc', 'nfs'))
+    if client_text:
+        client = parse_rpc_stats(client_text)
+        for version, (label, index) in NFS_CLIENT_READ.items():
+            values = client.get(label)
+            if values and values[0] > index:
+                metrics.add('nfs_client_read_calls_total', 'counter',
+                            'READ calls sent to NFS servers by this host, by version.', values[1 + index],
+                            version=version)
+
+    if cache_dir and os.path.isdir(cache_dir):
+        st = os.statvfs(cache_dir)
+        for resource, free, total in (('space', st.f_bavail, st.f_blocks), ('files', st.f_favail, st.f_files)):
+            if total:
+                metrics.add('fscache_cache_free_ratio', 'gauge',
+                            'Free share of the cache file system (compare with the cachefilesd culling limits).',
+                            round(free / total, 4), resource=resource)
+
+
+# driver -------------------------------------------------------------------
+
+def load_config(directory):
+    """Enabled collectors: one file per collector in ``directory`` (optional JSON options)"""
+    config = {}
+    if not os.path.isdir(directory):
+        return config
+    for name in sorted(os.listdir(directory)):
+        if name not in COLLECTORS:
+            continue
+        text = read_file(os.path.join(directory, name)) or ''
+        config[name] = json.loads(text) if text.strip() else {}
+    return config
+
+
+def load_state(path):
+    text = read_file(path) if path else None
+    try:
+        return json.loads(text) if text else {}
+    except ValueError:
+        return {}
+
+
+def write_atomic(path, text):
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def collect(config, state, proc_root='/proc'):
+    """Run the configured collectors and return the metrics text"""
+    metrics = MetricSet()
+    for name, options in config.items():
+        start = time.monotonic()
+        success = 1
+        try:
+            if name == 'nfsd':
+                collect_nfsd(metrics, options.get('proc', proc_root))
+            elif name == 'samba':
+                collect_samba(metrics, options.get('smbstatus', 'smbstatus'))
+            elif name == 'kdc':
+                collect_kdc(metrics, state, options.get('log', DEFAULT_KDC_LOG))
+            elif name == 'krb5cc':
+                collect_krb5cc(metrics, options.get('status_file', DEFAULT_KRB5CC_STATUS))
+            elif name == 'fscache':
+                collect_fscache(metrics, options.get('proc', proc_root),
+                                options.get('cache_dir', DEFAULT_FSCACHE_DIR))
+        except (OSError, RuntimeError, ValueError, subprocess.SubprocessError) as e:
+            success = 0
+            print(f"{name}: {e}", file=sys.stderr)
+        metrics.add('collector_success', 'gauge', 'Whether the collector succeeded.', success, collector=name)
+        metrics.add('collector_duration_seconds', 'gauge', 'Time spent in the collector.',
+                    round(time.monotonic() - start, 6), collector=name)
+    return metrics.render()
+
+
+def serve(address, port, interval, config, state, state_file):
+    """Serve /metrics, refreshing at most every ``interval`` seconds
+
+    Concurrent scrapes share one refresh: collectors advance offsets and
+    counters in ``state``, so two running at once would count the same
+    KDC log lines twice.
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    cache = {'time': 0.0, 'body': b''}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            with lock:
+                if time.monotonic() - cache['time'] >= interval:
+                    cache['body'] = collect(config, state).encode('utf-8')
+                    cache['time'] = time.monotonic()
+                    if state_file:
+                        write_atomic(state_file, json.dumps(state))
+                body = cache['body']
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    ThreadingHTTPServer((address, port), Handler).serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Export file server metrics in Prometheus text format')
+    parser.add_argument('--collector', action='append', choices=COLLECTORS,
+                        help=f'Collector to run, repeatable (default: the files in {DEFAULT_CONFIG_DIR})')
+    parser.add_argument('--config-dir', default=DEFAULT_CONFIG_DIR, help='Directory of enabled collectors')
+    parser.add_argument('--kdc-log', default=DEFAULT_KDC_LOG, help='krb5kdc log (with --collector kdc)')
+    parser.add_argument('--fscache-dir', default=DEFAULT_FSCACHE_DIR,
+                        help='cachefilesd cache directory (with --collector fscache)')
+    parser.add_argument('--state-file', default=DEFAULT_STATE_FILE,
+                        help='Offsets and counters kept between runs ("" to disable)')
+    parser.add_argument('--textfile', help='Write the metrics atomically to this .prom file')
+    parser.add_argument('--listen', help='Serve /metrics on [address]:port instead of printing')
+    parser.add_argument('--interval', type=float, default=10, help='Minimum seconds between collections (HTTP)')
+    args = parser.parse_args(argv)
+
+    if args.collector:
+        options = {'kdc': {'log': args.kdc_log}, 'fscache': {'cache_dir': args.fscache_dir}}
+        config = {name: options.get(name, {}) for name in args.collector}
+    else:
+        config = load_config(args.config_dir)
+    state = load_state(args.state_file)
+
+    if args.listen:
+        address, _, port = args.listen.rpartition(':')
+        serve(address, int(port), args.interval, config, state, args.state_file)
+        return 0
+
+    text = collect(config, state)
+    if args.state_file:
+        os.makedirs(os.path.dirname(args.state_file) or '.', exist_ok=True)
+        write_atomic(args.state_file, json.dumps(state))
+    if args.textfile:
+        write_atomic(args.textfile, text)
+    else:
+        sys.stdout.write(text)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+"""
+Local rendering of role templates
+
+Discovers the template tasks of each role (src, dest, loop and when) and
+renders them for a host from the variables resolved by storage_inventory,
+without contacting the host. Templates are compiled once per process and
+reused for every host. Used by scripts/render-configs.py to review config
+changes across the fleet as a unified diff against a stored baseline.
+"""
+
+import difflib
+import os
+
+from storage_inventory import (
+    STUB_DATE_TIME,
+    Templar,
+    TemplateError,
+    configure_environment,
+    load_yaml,
+)
+
+TEMPLATE_ACTIONS = ('template', 'ansible.builtin.template', 'ansible.legacy.template')
+INCLUDE_ACTIONS = (
+    'include_tasks', 'import_tasks',
+    'ansible.builtin.include_tasks', 'ansible.builtin.import_tasks',
+)
+
+_ENVIRONMENTS = {}
+_TASK_CACHE = {}
+
+
+def template_environment(roles_dir, role):
+    """Return the cached file-template environment for a role"""
+    key = (os.path.abspath(roles_dir), role)
+    if key not in _ENVIRONMENTS:
+        from jinja2 import Environment, FileSystemLoader, StrictUndefined
+
+        # Same settings as Ansible's template module
+        _ENVIRONMENTS[key] = configure_environment(Environment(
+            loader=FileSystemLoader(os.path.join(roles_dir, role, 'templates')),
+            undefined=StrictUndefined,
+            trim_blocks=True,
+            keep_trailing_newline=True,
+            auto_reload=False,
+        ))
+    return _ENVIRONMENTS[key]
+
+
+def _walk_tasks(tasks, tasks_dir, inherited_when):
+    for task in tasks or []:
+        if not isinstance(task, dict):
+            continue
+        when = list(inherited_when)
+        condition = task.get('when')
+        if condition is not None:
+            when.extend(condition if isinstance(condition, list) else [condition])
+        if 'block' in task:
+            yield from _walk_tasks(task['block'], tasks_dir, when)
+            continue
+        for action in INCLUDE_ACTIONS:
+            if action in task:
+                target = task[action]
+                if isinstance(target, dict):
+                    target = target.get('file')
+                if isinstance(target, str) and '{{' not in target:
+                    path = os.path.join(tasks_dir, target)
+                    if os.path.isfile(path):
+                        yield from _walk_tasks(load_yaml(path), tasks_dir, when)
+                break
+        for action in TEMPLATE_ACTIONS:
+            if action in task and isinstance(task[action], dict):
+                args = task[action]
+                if 'src' in args and 'dest' in args:
+                    yield {
+                        'name': task.get('name', args['src']),
+                        'src': args['src'],
+                        'dest': args['dest'],
+                        'loop': task.get('loop', task.get('with_items')),
+                        'loop_var': (task.get('loop_control') or {}).get('loop_var', 'item'),
+                        'when': when,
+                    }
+                break
+
+
+def template_tasks(roles_dir, role):
+    """Return the template tasks of a role (cached per process)"""
+    key = (os.path.abspath(roles_dir), role)
+    if key not in _TASK_CACHE:
+        tasks_dir = os.path.join(roles_dir, role, 'tasks')
+        main = os.path.join(tasks_dir, 'main.yml')
+        tasks = load_yaml(main) if os.path.isfile(main) else []
+        _TASK_CACHE[key] = list(_walk_tasks(tasks, tasks_dir, []))
+    return _TASK_CACHE[key]
+
+
+def _evaluate_when(templar, conditions):
+    for condition in conditions:
+        if isinstance(condition, bool):
+            if not condition:
+                return False
+            continue
+        if not templar.template('{{ (' + str(condition) + ') | bool }}'):
+            return False
+    return True
+
+
+def render_host(host, roles, variables, roles_dir, stub_date_time=True):
+    """Render every template task of the host's roles
+
+    Returns a list of dicts with role, src, dest and either content or
+    error (templates skipped by their ``when`` are omitted). With
+    stub_date_time, ansible_date_time is pinned so "Generated on"
+    headers do not show up as changes.
+    """
+    variables = dict(variables)
+    variables.setdefault('ansible_managed', 'Ansible managed')
+    if stub_date_time:
+        variables['ansible_date_time'] = dict(STUB_DATE_TIME)
+
+    # One view for the host: variables resolved for one task are reused by
+    # the next; loop items get their own view with the loop variable set
+    templar = Templar(variables)
+    rendered = []
+    for role in roles:
+        env = template_environment(roles_dir, role)
+        for task in template_tasks(roles_dir, role):
+            entry = {'role': role, 'src': task['src'], 'dest': task['dest']}
+            try:
+                if not _evaluate_when(templar, task['when']):
+                    continue
+                items = [None] if task['loop'] is None else templar.template(task['loop'])
+            except TemplateError as e:
+                entry['error'] = f"{task['name']}: {e}"
+                rendered.append(entry)
+                continue
+            for item in items:
+                item_templar = templar
+                if task['loop'] is not None:
+                    item_templar = Templar(dict(variables, **{task['loop_var']: item}))
+                result = dict(entry)
+                try:
+                    result['dest'] = str(item_templar.template(task['dest']))
+                    src = str(item_templar.template(task['src']))
+                    template = env.get_template(src)
+                    context = template.new_context(item_templar, shared=True)
+                    result['content'] = env.concat(template.root_render_func(context))
+                except TemplateError as e:
+                    result['error'] = f"{task['name']}: {e}"
+                except Exception as e:  # jinja2 errors carry the template location
+                    result['error'] = f"{task['name']}: {e.__class__.__name__}: {e}"
+                rendered.append(result)
+    return rendered
+
+
+def relative_path(host, role, dest):
+    """Path of a rendered file inside an output or baseline tree"""
+    return os.path.join(host, role, dest.lstrip('/'))
+
+
+def write_tree(directory, host, rendered):
+    """Write rendered files for a host under <directory>/<host>/<role>/<dest>"""
+    for entry in rendered:
+        if 'content' not in entry:
+            continue
+        path = os.path.join(directory, relative_path(host, entry['role'], entry['dest']))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(entry['content'])
+
+
+def baseline_files(directory, host, roles=None):
+    """Relative paths of the baseline files stored for a host (optionally per role)"""
+    roots = [os.path.join(directory, host, role) for role in roles] if roles else [os.path.join(directory, host)]
+    found = []
+    for root in roots:
+        for current, _, files in os.walk(root):
+            for name in files:
+                found.append(os.path.relpath(os.path.join(current, name), directory))
+    return sorted(found)
+
+
+def diff_host(directory, host, rendered, roles=None):
+    """Unified diff of a host's rendered files against the baseline tree
+
+    Baseline files without a rendered counterpart are shown as deleted;
+    pass ``roles`` to only consider the baseline of those roles.
+    """
+    chunks = []
+    seen = set()
+    for entry in rendered:
+        if 'content' not in entry:
+            continue
+        relative = relative_path(host, entry['role'], entry['dest'])
+        seen.add(relative)
+        path = os.path.join(directory, relative)
+        old = []
+        if os.path.isfile(path):
+            with open(path, 'r') as f:
+                old = f.read().splitlines(keepends=True)
+        new = entry['content'].splitlines(keepends=True)
+        chunks.extend(difflib.unified_diff(
+            old, new,
+            fromfile=f"a/{relative}" if os.path.isfile(path) else '/dev/null',
+            tofile=f"b/{relative}",
+        ))
+    for relative in baseline_files(directory, host, roles):
+        if relative in seen:
+            continue
+        with open(os.path.join(directory, relative), 'r') as f:
+            old = f.read().splitlines(keepends=True)
+        chunks.extend(difflib.unified_diff(old, [], fromfile=f"a/{relative}", tofile='/dev/null'))
+    return ''.join(line if line.endswith('\n') else line + '\n\\ No newline at end of file\n' for line in chunks)
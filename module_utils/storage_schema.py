@@ -0,0 +1,700 @@
+# -*- coding: utf-8 -*-
+"""
+Configuration schema for the file server roles
+
+A single declarative schema describes the variables each role accepts.
+validate() walks the whole variable tree in one pass and returns every
+error it finds, so a broken inventory is reported in one run instead of
+failing on the first assert. The schema is plain Python and is used by
+the validate_storage_config action plugin, the controller-side CLI and
+the offline tests.
+
+Field specs are dicts with these keys:
+  type       - 'str', 'int', 'bool', 'list', 'dict' or 'any'
+  required   - the variable/field must be present
+  non_empty  - strings and lists must not be empty
+  pattern    - regular expression a string must fully match
+  absolute   - string must be an absolute path
+  choices    - allowed values
+  min/max    - bounds for integers
+  items      - spec applied to each list element
+  fields     - specs for dict keys (unknown keys are allowed)
+  values     - spec applied to every value of a dict
+  check      - callable(value) returning an error string or None
+
+Besides 'variables' and per-variable 'checks', a schema may list
+'cross_checks': callables(variables) returning error strings for rules
+that span several variables (e.g. a mount naming an undefined profile).
+"""
+
+import re
+
+REALM_PATTERN = r'[A-Z0-9.-]+'
+SERVICE_PRINCIPAL_PATTERN = r'[a-zA-Z0-9_-]+/[a-zA-Z0-9.-]+@[A-Z0-9.-]+'
+CREDENTIAL_PRINCIPAL_PATTERN = r'[a-zA-Z0-9_][a-zA-Z0-9_.-]*(/[a-zA-Z0-9.-]+)?@[A-Z0-9.-]+'
+NFS_SEC_FLAVORS = ('sys', 'krb5', 'krb5i', 'krb5p')
+SAMBA_SECURITY_MODES = ('user', 'ads', 'domain')
+MODE_PATTERN = r'0?[0-7]{3,4}'
+SOCKET_BUFFER_PATTERN = r'[0-9]+ [0-9]+ [0-9]+'
+MOUNT_OPTION_PATTERN = r'[a-z0-9_-]+(=[^,\s]+)?'
+MOUNT_STATES = ('mounted', 'present', 'unmounted', 'absent', 'remounted')
+STORAGE_FSTYPES = ('xfs', 'ext4')
+LVM_NAME_PATTERN = r'[a-zA-Z0-9_][a-zA-Z0-9+_.-]*'
+LV_EXTENTS_PATTERN = r'[0-9]+%(FREE|VG|PVS)'
+SMB_PROTOCOLS = ('NT1', 'SMB2', 'SMB2_02', 'SMB2_10', 'SMB3', 'SMB3_00', 'SMB3_02', 'SMB3_11')
+SAMBA_LOG_LEVEL_PATTERN = r'[0-9]+( [a-z_]+:[0-9]+)*'
+KDC_ADDRESS_PATTERN = r'[a-zA-Z0-9.-]+(:[0-9]{1,5})?'
+KDC_PROPAGATION_METHODS = ('iprop', 'kprop')
+# Sections of nfs.conf (nfs-utils) and idmapd.conf (libnfsidmap)
+NFS_CONF_SECTIONS = (
+    'general', 'exportd', 'exportfs', 'gssd', 'lockd', 'mountd', 'nfsd', 'nfsdcld',
+    'nfsdcltrack', 'nfsrahead', 'sm-notify', 'statd', 'svcgssd',
+)
+IDMAPD_CONF_SECTIONS = ('General', 'Mapping', 'Translation', 'Static', 'UMICH_SCHEMA')
+CONF_KEY_PATTERN = r'[^\s=\[\]#;]+'
+SHELL_VARIABLE_PATTERN = r'[A-Z_][A-Z0-9_]*'
+SIZE_PATTERN = r'[0-9]+(\.[0-9]+)?\s*([KMGTPE](i?B)?)?'
+FSCACHE_RESERVE_PATTERN = r'[0-9]+\s*([KMGT](i?B)?)?|[0-9]+(\.[0-9]+)?\s*%'
+FSCACHE_THRESHOLDS = ('brun', 'bcull', 'bstop', 'frun', 'fcull', 'fstop')
+USER_PRINCIPAL_PATTERN = r'[a-zA-Z0-9_][a-zA-Z0-9_.-]*(@[A-Z0-9.-]+)?'
+NFS_SERVER_TUNING_KEYS = (
+    'threads', 'rdma', 'rdma_port', 'tcp_max_slot_table_entries',
+    'rmem_max', 'wmem_max', 'tcp_rmem', 'tcp_wmem',
+)
+
+
+def parse_export_options(options):
+    """Split an exports option string into an ordered dict of name -> value"""
+    parsed = {}
+    for option in str(options).split(','):
+        option = option.strip()
+        if not option:
+            continue
+        name, _, value = option.partition('=')
+        parsed[name] = value if _ else None
+    return parsed
+
+
+def check_nfs_options(options):
+    """Check that NFS export options carry a valid sec= flavor list"""
+    sec = parse_export_options(options).get('sec')
+    if not sec:
+        return "must include a security option (sec=sys, sec=krb5, sec=krb5i, or sec=krb5p)"
+    invalid = [flavor for flavor in sec.split(':') if flavor not in NFS_SEC_FLAVORS]
+    if invalid:
+        return f"has unsupported sec= flavor(s): {', '.join(invalid)}"
+    return None
+
+
+def check_mode(mode):
+    """Check a permission mode given as an octal string or YAML integer"""
+    if isinstance(mode, int) and not isinstance(mode, bool):
+        return None if 0 <= mode <= 0o7777 else "must be a valid octal permission mode"
+    if isinstance(mode, str) and re.fullmatch(MODE_PATTERN, mode):
+        return None
+    return f"'{mode}' must be a valid octal permission mode (e.g. \"0775\")"
+
+
+def check_nfs_fsids(exports):
+    """Check that no two export paths share an fsid"""
+    errors = []
+    owners = {}
+    for index, export in enumerate(exports):
+        if not isinstance(export, dict):
+            continue
+        path = export.get('path')
+        for client in export.get('clients') or []:
+            if not isinstance(client, dict):
+                continue
+            fsid = parse_export_options(client.get('options', '')).get('fsid')
+            if fsid is None:
+                continue
+            first = owners.setdefault(fsid, (index, path))
+            if first[1] != path:
+                errors.append(
+                    f"nfs_exports[{index}]: fsid={fsid} on '{path}' is already used by "
+                    f"nfs_exports[{first[0]}] ('{first[1]}')"
+                )
+    return errors
+
+
+def check_known_keys(*names):
+    """Return a check rejecting dict keys outside ``names`` (catches typos in tuning blocks)"""
+    def check(value):
+        unknown = sorted(str(key) for key in value if key not in names)
+        if unknown:
+            return f"unknown key(s): {', '.join(unknown)} (expected: {', '.join(names)})"
+        return None
+    return check
+
+
+def check_conf_keys(pattern):
+    """Return a check rejecting config file keys that do not fully match ``pattern``"""
+    def check(value):
+        invalid = sorted(str(key) for key in value if not re.fullmatch(pattern, str(key)))
+        if invalid:
+            return f"invalid key(s): {', '.join(invalid)}"
+        return None
+    return check
+
+
+def check_conf_value(value):
+    """Check a config file value: a scalar without line breaks or shell quoting characters"""
+    if isinstance(value, (dict, list, tuple)):
+        return "must be a single value, not a list or mapping"
+    if isinstance(value, str) and re.search(r'[\n"$`\\]', value):
+        return f"'{value}' must not contain line breaks, quotes, $, ` or \\"
+    return None
+
+
+def check_idmap_user(entry):
+    """Check a static ID mapping entry: a user name or a dict with a name"""
+    name = entry.get('name') if isinstance(entry, dict) else entry
+    if not isinstance(name, str) or not re.fullmatch(USER_PRINCIPAL_PATTERN, name):
+        return f"'{name}' must be a user name, optionally with @REALM"
+    return None
+
+
+def check_size(size):
+    """Check a size limit: bytes or a number with a binary unit (500G, 1.5TiB)"""
+    if isinstance(size, int) and not isinstance(size, bool):
+        valid = size >= 0
+    else:
+        valid = isinstance(size, str) and re.fullmatch(SIZE_PATTERN, size.strip(), re.IGNORECASE)
+    if not valid:
+        return f"'{size}' is not a size (e.g. 500G, 2T or a number of bytes)"
+    return None
+
+
+def check_fraction(value):
+    """Check a fraction of a ticket lifetime: a number between 0 and 1"""
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not 0 <= value < 1:
+        return f"'{value}' is not a fraction between 0 and 1 (e.g. 0.6)"
+    return None
+
+
+def check_fscache_reserve(reserve):
+    """Check the free space kept on the FS-Cache file system: bytes, a size or a percentage"""
+    if isinstance(reserve, int) and not isinstance(reserve, bool):
+        valid = reserve >= 0
+    else:
+        valid = isinstance(reserve, str) and re.fullmatch(FSCACHE_RESERVE_PATTERN, reserve.strip(), re.IGNORECASE)
+        if valid and reserve.strip().endswith('%'):
+            valid = float(reserve.strip()[:-1]) < 90
+    if not valid:
+        return f"'{reserve}' is not a size (e.g. 20G) or a percentage below 90 (e.g. 10%)"
+    return None
+
+
+def check_volume(volume):
+    """Check that a storage volume sits on either a device or a volume group with a size"""
+    if bool(volume.get('device')) == bool(volume.get('vg')):
+        return "set either device or vg (with size)"
+    if volume.get('vg') and volume.get('size') is None:
+        return "a volume in a volume group needs a size (e.g. 500G or 100%FREE)"
+    size = volume.get('size')
+    if size is not None and not re.fullmatch(LV_EXTENTS_PATTERN, str(size)) and check_size(size):
+        return f"size '{size}' must be a size such as 500G or extents such as 100%FREE"
+    return None
+
+
+def check_log_level(level):
+    """Check a Samba log level such as 1 or "3 auth:5 winbind:5\""""
+    if isinstance(level, bool) or not re.fullmatch(SAMBA_LOG_LEVEL_PATTERN, str(level)):
+        return f"'{level}' is not a Samba log level (e.g. 1 or \"3 auth:5 winbind:5\")"
+    return None
+
+
+def check_mount_profiles(variables):
+    """Check that every NFS client mount names a defined mount profile"""
+    profiles = variables.get('nfs_mount_profiles')
+    if not isinstance(profiles, dict):
+        return []
+    default = variables.get('nfs_client_default_mount_profile', 'default')
+    errors = []
+    if default not in profiles:
+        errors.append(f"nfs_client_default_mount_profile: unknown profile '{default}'")
+    for index, mount in enumerate(variables.get('nfs_client_mounts') or []):
+        if isinstance(mount, dict) and mount.get('profile') is not None and mount['profile'] not in profiles:
+            errors.append(f"nfs_client_mounts[{index}].profile: unknown profile '{mount['profile']}'")
+    return errors
+
+
+def check_fscache_profiles(variables):
+    """Check that the FS-Cache profiles are defined mount profiles"""
+    profiles = variables.get('nfs_mount_profiles')
+    if not isinstance(profiles, dict):
+        return []
+    return [
+        f"nfs_client_fscache_profiles: unknown profile '{name}'"
+        for name in variables.get('nfs_client_fscache_profiles') or [] if name not in profiles
+    ]
+
+
+def check_credential_schedule(variables):
+    """Check that jittered refreshes fall inside the ticket lifetime and the retry bounds are ordered"""
+    if not variables.get('krb5_credentials_enabled'):
+        return []
+    errors = []
+    renew_at, jitter = variables.get('krb5_credentials_renew_at', 0.6), variables.get('krb5_credentials_jitter', 0.15)
+    if not 0 < renew_at - jitter < renew_at + jitter < 1:
+        errors.append(f"krb5_credentials_renew_at +/- krb5_credentials_jitter must stay between 0 and 1 "
+                      f"(got {renew_at} +/- {jitter})")
+    if variables.get('krb5_credentials_retry_min', 15) > variables.get('krb5_credentials_retry_max', 900):
+        errors.append("krb5_credentials_retry_min must not exceed krb5_credentials_retry_max")
+    return errors
+
+
+def check_storage_profiles(variables):
+    """Check that share storage volumes and the default name defined profiles"""
+    profiles = variables.get('shares_storage_profiles')
+    if not isinstance(profiles, dict) or not variables.get('shares_storage'):
+        return []
+    default = variables.get('shares_storage_default_profile', 'default')
+    errors = []
+    if default not in profiles:
+        errors.append(f"shares_storage_default_profile: unknown profile '{default}'")
+    for index, volume in enumerate(variables.get('shares_storage') or []):
+        if isinstance(volume, dict) and volume.get('profile') is not None and volume['profile'] not in profiles:
+            errors.append(f"shares_storage[{index}].profile: unknown profile '{volume['profile']}'")
+    return errors
+
+
+def check_kdc_entry(entry):
+    """Check a KDC list entry: "host", "host:port" or a dict with host, port and site"""
+    if isinstance(entry, dict):
+        unknown = check_known_keys('host', 'port', 'site')(entry)
+        if unknown:
+            return unknown
+        host, port = entry.get('host'), entry.get('port')
+        if not isinstance(host, str) or not re.fullmatch(r'[a-zA-Z0-9.-]+', host):
+            return f"host '{host}' must be a host name"
+        if port is not None and (isinstance(port, bool) or not isinstance(port, int) or not 0 < port < 65536):
+            return f"port '{port}' must be an integer between 1 and 65535"
+        return None
+    if isinstance(entry, str) and re.fullmatch(KDC_ADDRESS_PATTERN, entry):
+        return None
+    return f"'{entry}' must be \"host\", \"host:port\" or a dict with host, port and site"
+
+
+def check_kdc_replicas(variables):
+    """Check that replica KDCs are unique and do not include the primary"""
+    replicas = variables.get('kdc_replicas')
+    if not isinstance(replicas, (list, tuple)):
+        return []
+    hosts = [entry.get('host') if isinstance(entry, dict) else str(entry).split(':')[0] for entry in replicas]
+    primary = variables.get('kdc_primary')
+    primary = primary.get('host') if isinstance(primary, dict) else str(primary or '').split(':')[0]
+    errors = []
+    for index, host in enumerate(hosts):
+        if host == primary:
+            errors.append(f"kdc_replicas[{index}]: '{host}' is the primary KDC")
+        elif host in hosts[:index]:
+            errors.append(f"kdc_replicas[{index}]: '{host}' duplicates kdc_replicas[{hosts.index(host)}]")
+    return errors
+
+
+def check_unique(field, variable):
+    """Return a whole-list check rejecting duplicate values of ``field``"""
+    def check(items):
+        errors = []
+        seen = {}
+        for index, item in enumerate(items):
+            if not isinstance(item, dict) or field not in item:
+                continue
+            value = item[field]
+            if value in seen:
+                errors.append(
+                    f"{variable}[{index}].{field}: '{value}' duplicates {variable}[{seen[value]}]"
+                )
+            else:
+                seen[value] = index
+        return errors
+    return check
+
+
+ABSOLUTE_PATH = {'type': 'str', 'required': True, 'non_empty': True, 'absolute': True}
+
+SAMBA_SHARE_PERFORMANCE = {
+    'aio_read_size': {'type': 'int', 'min': 0},
+    'aio_write_size': {'type': 'int', 'min': 0},
+    'use_sendfile': {'type': 'bool'},
+    'strict_locking': {'type': 'bool'},
+    'strict_sync': {'type': 'bool'},
+}
+SAMBA_PERFORMANCE = dict(
+    SAMBA_SHARE_PERFORMANCE,
+    server_min_protocol={'type': 'str', 'choices': SMB_PROTOCOLS},
+    server_max_protocol={'type': 'str', 'choices': SMB_PROTOCOLS},
+    client_min_protocol={'type': 'str', 'choices': SMB_PROTOCOLS},
+    server_multi_channel_support={'type': 'bool'},
+    min_receivefile_size={'type': 'int', 'min': 0},
+    socket_options={'type': 'str'},
+    log_level={'check': check_log_level},
+)
+
+CONF_VALUE = {'check': check_conf_value}
+
+
+def conf_sections(*sections):
+    """Spec for an INI data model: {section: {key: value}} with known sections"""
+    return {
+        'type': 'dict',
+        'check': check_known_keys(*sections),
+        'values': {'type': 'dict', 'check': check_conf_keys(CONF_KEY_PATTERN), 'values': CONF_VALUE},
+    }
+
+
+SHELL_VARIABLES = {'type': 'dict', 'check': check_conf_keys(SHELL_VARIABLE_PATTERN), 'values': CONF_VALUE}
+
+IDMAP_STATIC_USERS = {'type': 'list', 'items': {'check': check_idmap_user}}
+IDMAP_CACHE_TIMEOUT = {'type': 'int', 'min': 1}
+
+SCHEMAS = {
+    'kerberos-client': {
+        'variables': {
+            'krb5_realm': {'type': 'str', 'required': True, 'non_empty': True, 'pattern': REALM_PATTERN},
+            'krb5_kdc': {'type': 'str', 'required': True, 'non_empty': True},
+            'krb5_kdcs': {'type': 'list', 'non_empty': True, 'items': {'check': check_kdc_entry}},
+            'krb5_site': {'type': 'str'},
+            'krb5_keytab_path': ABSOLUTE_PATH,
+            'krb5_service_principals': {
+                'type': 'list',
+                'required': True,
+                'items': {'type': 'str', 'non_empty': True, 'pattern': SERVICE_PRINCIPAL_PATTERN},
+            },
+            'krb5_credentials_enabled': {'type': 'bool'},
+            'krb5_credentials': {
+                'type': 'list',
+                'items': {
+                    'type': 'dict',
+                    'fields': {
+                        'principal': {'type': 'str', 'required': True, 'pattern': CREDENTIAL_PRINCIPAL_PATTERN},
+                        'uid': {'type': 'int', 'min': 0},
+                        'services': {'type': 'list', 'items': {'type': 'str', 'pattern': SERVICE_PRINCIPAL_PATTERN}},
+                    },
+                },
+            },
+            'krb5_credentials_dir': {'type': 'str', 'non_empty': True, 'absolute': True},
+            'krb5_credentials_renew_at': {'check': check_fraction},
+            'krb5_credentials_jitter': {'check': check_fraction},
+            'krb5_credentials_startup_splay': {'type': 'int', 'min': 0},
+            'krb5_credentials_retry_min': {'type': 'int', 'min': 1},
+            'krb5_credentials_retry_max': {'type': 'int', 'min': 1},
+        },
+        'checks': {
+            'krb5_credentials': [check_unique('uid', 'krb5_credentials')],
+        },
+        'cross_checks': [check_credential_schedule],
+    },
+    'kerberos-kdc': {
+        'variables': {
+            'kdc_realm': {'type': 'str', 'required': True, 'non_empty': True, 'pattern': REALM_PATTERN},
+            'kdc_port': {'type': 'int', 'min': 1, 'max': 65535},
+            'kdc_primary': {'required': True, 'check': check_kdc_entry},
+            'kdc_replicas': {'type': 'list', 'items': {'check': check_kdc_entry}},
+            'kdc_site': {'type': 'str'},
+            'kdc_propagation': {'type': 'str', 'choices': KDC_PROPAGATION_METHODS},
+            'kdc_iprop_port': {'type': 'int', 'min': 1, 'max': 65535},
+            'kdc_kprop_port': {'type': 'int', 'min': 1, 'max': 65535},
+            'kdc_kprop_interval': {'type': 'int', 'min': 1, 'max': 59},
+        },
+        'cross_checks': [check_kdc_replicas],
+    },
+    'samba': {
+        'variables': {
+            'samba_workgroup': {'type': 'str', 'required': True, 'non_empty': True},
+            'samba_realm': {'type': 'str', 'required': True, 'non_empty': True},
+            'samba_security': {'type': 'str', 'required': True, 'choices': SAMBA_SECURITY_MODES},
+            'samba_shares': {
+                'type': 'list',
+                'required': True,
+                'items': {
+                    'type': 'dict',
+                    'fields': {
+                        'name': {'type': 'str', 'required': True, 'non_empty': True},
+                        'path': ABSOLUTE_PATH,
+                        'performance': {
+                            'type': 'dict',
+                            'fields': SAMBA_SHARE_PERFORMANCE,
+                            'check': check_known_keys(*SAMBA_SHARE_PERFORMANCE),
+                        },
+                    },
+                },
+            },
+            'samba_log_level': {'check': check_log_level},
+            'samba_performance': {
+                'type': 'dict',
+                'fields': SAMBA_PERFORMANCE,
+                'check': check_known_keys(*SAMBA_PERFORMANCE),
+            },
+        },
+        'checks': {
+            'samba_shares': [check_unique('name', 'samba_shares')],
+        },
+    },
+    'nfs-server': {
+        'variables': {
+            'nfs_exports': {
+                'type': 'list',
+                'required': True,
+                'items': {
+                    'type': 'dict',
+                    'fields': {
+                        'path': ABSOLUTE_PATH,
+                        'clients': {
+                            'type': 'list',
+                            'required': True,
+                            'non_empty': True,
+                            'items': {
+                                'type': 'dict',
+                                'fields': {
+                                    'host': {'type': 'str', 'required': True, 'non_empty': True},
+                                    'options': {
+                                        'type': 'str',
+                                        'required': True,
+                                        'non_empty': True,
+                                        'check': check_nfs_options,
+                                    },
+                                },
+                            },
+                        },
+                    },
+                },
+            },
+            'nfs_server_tuning': {
+                'type': 'dict',
+                'fields': {
+                    'threads': {'type': 'int', 'min': 1, 'max': 4096},
+                    'rdma': {'type': 'bool'},
+                    'rdma_port': {'type': 'int', 'min': 1, 'max': 65535},
+                    'tcp_max_slot_table_entries': {'type': 'int', 'min': 2, 'max': 65536},
+                    'rmem_max': {'type': 'int', 'min': 4096},
+                    'wmem_max': {'type': 'int', 'min': 4096},
+                    'tcp_rmem': {'type': 'str', 'pattern': SOCKET_BUFFER_PATTERN},
+                    'tcp_wmem': {'type': 'str', 'pattern': SOCKET_BUFFER_PATTERN},
+                },
+                'check': check_known_keys(*NFS_SERVER_TUNING_KEYS),
+            },
+            'nfs_server_nfs_conf': conf_sections(*NFS_CONF_SECTIONS),
+            'nfs_server_idmapd_conf': conf_sections(*IDMAPD_CONF_SECTIONS),
+            'nfs_server_nfs_common': SHELL_VARIABLES,
+            'nfs_server_nfs_kernel_server': SHELL_VARIABLES,
+            'nfs_server_idmap_static_users': IDMAP_STATIC_USERS,
+            'nfs_server_idmap_cache_timeout': IDMAP_CACHE_TIMEOUT,
+        },
+        'checks': {
+            'nfs_exports': [check_nfs_fsids, check_unique('path', 'nfs_exports')],
+        },
+    },
+    'nfs-client': {
+        'variables': {
+            'nfs_mount_profiles': {
+                'type': 'dict',
+                'values': {'type': 'list', 'items': {'type': 'str', 'pattern': MOUNT_OPTION_PATTERN}},
+            },
+            'nfs_client_mount_base_options': {
+                'type': 'list',
+                'items': {'type': 'str', 'pattern': MOUNT_OPTION_PATTERN},
+            },
+            'nfs_client_default_mount_profile': {'type': 'str', 'non_empty': True},
+            'nfs_client_nfs_conf': conf_sections(*NFS_CONF_SECTIONS),
+            'nfs_client_idmapd_conf': conf_sections(*IDMAPD_CONF_SECTIONS),
+            'nfs_client_nfs_common': SHELL_VARIABLES,
+            'nfs_client_idmap_static_users': IDMAP_STATIC_USERS,
+            'nfs_client_idmap_cache_timeout': IDMAP_CACHE_TIMEOUT,
+            'nfs_client_mounts': {
+                'type': 'list',
+                'items': {
+                    'type': 'dict',
+                    'fields': {
+                        'src': {'type': 'str', 'required': True, 'pattern': r'[^:\s]+:/\S*'},
+                        'path': ABSOLUTE_PATH,
+                        'profile': {'type': 'str', 'non_empty': True},
+                        'options': {'type': 'list', 'items': {'type': 'str', 'pattern': MOUNT_OPTION_PATTERN}},
+                        'state': {'type': 'str', 'choices': MOUNT_STATES},
+                    },
+                },
+            },
+            'nfs_client_fscache_enabled': {'type': 'bool'},
+            'nfs_client_fscache_profiles': {'type': 'list', 'items': {'type': 'str', 'non_empty': True}},
+            'nfs_client_fscache_dir': {'type': 'str', 'non_empty': True, 'absolute': True},
+            'nfs_client_fscache_tag': {'type': 'str', 'pattern': r'[A-Za-z0-9_.-]{1,32}'},
+            'nfs_client_fscache_reserve': {'check': check_fscache_reserve},
+            'nfs_client_fscache_culling': {
+                'type': 'dict',
+                'check': check_known_keys(*FSCACHE_THRESHOLDS),
+                'values': {'type': 'int', 'min': 0, 'max': 99},
+            },
+        },
+        'checks': {
+            'nfs_client_mounts': [check_unique('path', 'nfs_client_mounts')],
+        },
+        'cross_checks': [check_mount_profiles, check_fscache_profiles],
+    },
+    'shares': {
+        'variables': {
+            'shares': {
+                'type': 'list',
+                'required': True,
+                'items': {
+                    'type': 'dict',
+                    'fields': {
+                        'path': ABSOLUTE_PATH,
+                        'owner': {'non_empty': True},
+                        'group': {'non_empty': True},
+                        'mode': {'check': check_mode},
+                        'recurse': {'type': 'bool'},
+                        'dir_mode': {'check': check_mode},
+                        'file_mode': {'check': check_mode},
+                        'quota': {'check': check_size},
+                        'project_id': {'type': 'int', 'min': 1, 'max': 99999},
+                    },
+                },
+            },
+            'shares_storage': {
+                'type': 'list',
+                'items': {
+                    'type': 'dict',
+                    'check': check_volume,
+                    'fields': {
+                        'name': {'type': 'str', 'required': True, 'pattern': LVM_NAME_PATTERN},
+                        'mountpoint': ABSOLUTE_PATH,
+                        'device': {'type': 'str', 'absolute': True},
+                        'vg': {'type': 'str', 'pattern': LVM_NAME_PATTERN},
+                        'pvs': {'type': 'list', 'non_empty': True, 'items': {'type': 'str', 'absolute': True}},
+                        'profile': {'type': 'str', 'non_empty': True},
+                        'fstype': {'type': 'str', 'choices': STORAGE_FSTYPES},
+                        'mkfs': {'type': 'dict'},
+                        'mount_options': {'type': 'list', 'items': {'type': 'str', 'pattern': MOUNT_OPTION_PATTERN}},
+                    },
+                },
+            },
+            'shares_storage_profiles': {
+                'type': 'dict',
+                'values': {
+                    'type': 'dict',
+                    'fields': {
+                        'fstype': {'type': 'str', 'choices': STORAGE_FSTYPES},
+                        'mkfs': {'type': 'dict'},
+                        'mount_options': {'type': 'list', 'items': {'type': 'str', 'pattern': MOUNT_OPTION_PATTERN}},
+                    },
+                },
+            },
+            'shares_storage_default_profile': {'type': 'str', 'non_empty': True},
+        },
+        'checks': {
+            'shares': [check_unique('path', 'shares'), check_unique('project_id', 'shares')],
+            'shares_storage': [check_unique('mountpoint', 'shares_storage')],
+        },
+        'cross_checks': [check_storage_profiles],
+    },
+}
+
+_TYPES = {
+    'str': str,
+    'int': int,
+    'bool': bool,
+    'list': (list, tuple),
+    'dict': dict,
+}
+
+
+def _type_ok(value, expected):
+    if expected == 'any':
+        return True
+    if expected == 'int' and isinstance(value, bool):
+        return False
+    return isinstance(value, _TYPES[expected])
+
+
+def validate_value(value, spec, where):
+    """Validate one value against a field spec and return a list of errors"""
+    errors = []
+    expected = spec.get('type', 'any')
+    if not _type_ok(value, expected):
+        return [f"{where}: must be of type {expected}, got {type(value).__name__}"]
+
+    if spec.get('non_empty') and isinstance(value, (str, list, tuple)) and len(value) == 0:
+        errors.append(f"{where}: must not be empty")
+    if 'choices' in spec and value not in spec['choices']:
+        errors.append(f"{where}: must be one of: {', '.join(map(str, spec['choices']))}")
+    if isinstance(value, str) and value:
+        if spec.get('absolute') and not value.startswith('/'):
+            errors.append(f"{where}: must be an absolute path (starting with /), got '{value}'")
+        if 'pattern' in spec and not re.fullmatch(spec['pattern'], value):
+            errors.append(f"{where}: '{value}' does not match {spec['pattern']}")
+    if isinstance(value, int) and not isinstance(value, bool):
+        if 'min' in spec and value < spec['min']:
+            errors.append(f"{where}: must be >= {spec['min']}")
+        if 'max' in spec and value > spec['max']:
+            errors.append(f"{where}: must be <= {spec['max']}")
+    if 'items' in spec and isinstance(value, (list, tuple)):
+        for index, item in enumerate(value):
+            errors.extend(validate_value(item, spec['items'], f"{where}[{index}]"))
+    if 'fields' in spec and isinstance(value, dict):
+        for name, field_spec in spec['fields'].items():
+            if name not in value or value[name] is None:
+                if field_spec.get('required'):
+                    errors.append(f"{where}.{name}: is required")
+                continue
+            errors.extend(validate_value(value[name], field_spec, f"{where}.{name}"))
+    if 'values' in spec and isinstance(value, dict):
+        for name, item in value.items():
+            errors.extend(validate_value(item, spec['values'], f"{where}.{name}"))
+    if 'check' in spec and not errors:
+        message = spec['check'](value)
+        if message:
+            errors.append(f"{where}: {message}")
+    return errors
+
+
+def schema_names(schemas=None):
+    """Normalise a schema selection (None, a name or a list) to a list of names"""
+    if schemas is None:
+        return list(SCHEMAS)
+    if isinstance(schemas, str):
+        schemas = [schemas]
+    unknown = [name for name in schemas if name not in SCHEMAS]
+    if unknown:
+        raise KeyError(f"Unknown schema(s): {', '.join(unknown)}")
+    return list(schemas)
+
+
+def schema_variables(schemas=None):
+    """Return the variable names covered by the selected schemas"""
+    names = []
+    for schema in schema_names(schemas):
+        for variable in SCHEMAS[schema]['variables']:
+            if variable not in names:
+                names.append(variable)
+    return names
+
+
+def validate(variables, schemas=None):
+    """Validate a variable mapping against one or more role schemas
+
+    Returns a list of human-readable error strings; an empty list means
+    the configuration is valid.
+    """
+    errors = []
+    for schema in schema_names(schemas):
+        definition = SCHEMAS[schema]
+        schema_errors = []
+        for name, spec in definition['variables'].items():
+            if name not in variables or variables[name] is None:
+                if spec.get('required'):
+                    schema_errors.append(f"{name}: must be defined")
+                continue
+            value_errors = validate_value(variables[name], spec, name)
+            schema_errors.extend(value_errors)
+            if not value_errors:
+                for check in definition.get('checks', {}).get(name, []):
+                    schema_errors.extend(check(variables[name]))
+        # Rules spanning variables only make sense once each one is valid
+        if not schema_errors:
+            for check in definition.get('cross_checks', []):
+                schema_errors.extend(check(variables))
+        errors.extend(schema_errors)
+    # A variable shared by several schemas is reported once
+    return list(dict.fromkeys(errors))
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Report slow tasks and converge-time regressions from the profile store
+
+Reads the runs the converge_profile callback plugin records (enabled in
+ansible.cfg) for every playbook run: the wall time of each task per host
+and of each loop item. `top` lists the slowest tasks, roles, hosts or
+loop items of a run; `diff` compares the per-host mean time of every
+task between two runs and fails when one got slower than the threshold,
+so converge-time regressions are caught on a lab run before they reach
+the whole fleet.
+
+Runs are referred to by id, or by -1 (latest), -2 (the one before), ...
+
+Usage:
+  python3 scripts/converge-report.py runs
+  python3 scripts/converge-report.py top                     # slowest tasks of the latest run
+  python3 scripts/converge-report.py top --by role -n 10 --run 12
+  python3 scripts/converge-report.py top --by item           # slowest loop items
+  python3 scripts/converge-report.py diff                    # previous run vs latest
+  python3 scripts/converge-report.py diff 12 15 --threshold 0.1 --format json
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / 'module_utils'))
+
+from converge_profile import GROUPINGS, diff, export_run, list_runs, open_store, resolve_run, top  # noqa: E402
+
+DEFAULT_STORE = PROJECT_ROOT / '.converge-profile.db'
+
+
+class Colors:
+    GREEN = '\033[0;32m'
+    RED = '\033[0;31m'
+    YELLOW = '\033[1;33m'
+    NC = '\033[0m'  # No Color
+
+
+def _seconds(value):
+    return '-' if value is None else f"{value:.2f}"
+
+
+def show_runs(conn, args):
+    runs = list_runs(conn)
+    if args.format == 'json':
+        print(json.dumps(runs, indent=2))
+        return 0
+    print(f"{'id':>5}  {'started':<19}  {'seconds':>8}  {'hosts':>5}  {'tasks':>6}  playbook")
+    for run in runs:
+        started = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(run['started']))
+        label = f" ({run['label']})" if run['label'] else ''
+        print(f"{run['id']:>5}  {started:<19}  {run['seconds']:>8.2f}  {run['hosts']:>5}  {run['tasks']:>6}  "
+              f"{run['playbook']}{label}")
+    return 0
+
+
+def show_top(conn, args):
+    run_id = resolve_run(conn, args.run)
+    rows = top(conn, run_id, args.by, args.limit)
+    if args.format == 'json':
+        print(json.dumps({'run': run_id, 'by': args.by,
+                          'rows': [dict(stats, key=key) for key, stats in rows]}, indent=2))
+        return 0
+    print(f"Slowest {args.by}s of run {run_id}")
+    print(f"{'total s':>9} {'mean s':>8} {'max s':>8} {'count':>6}  {args.by}")
+    for key, stats in rows:
+        print(f"{stats['total']:>9.2f} {stats['mean']:>8.2f} {stats['max']:>8.2f} {stats['count']:>6}  {key}")
+    return 0
+
+
+def show_diff(conn, args):
+    base_id = resolve_run(conn, args.base)
+    head_id = resolve_run(conn, args.head)
+    rows = diff(conn, base_id, head_id, args.by, args.threshold, args.min_seconds)
+    regressions = [row for row in rows if row['regression']]
+    if args.format == 'json':
+        print(json.dumps({'base': base_id, 'head': head_id, 'by': args.by, 'rows': rows}, indent=2))
+        return 1 if regressions else 0
+
+    print(f"Run {base_id} -> run {head_id}, per-host mean seconds by {args.by}")
+    print(f"{'base':>8} {'head':>8} {'delta':>8} {'change':>7}  {args.by}")
+    for row in rows[:args.limit]:
+        change = f"{row['change']:+.0%}" if row['change'] is not None else 'new' if row['base'] is None else 'gone'
+        color = Colors.RED if row['regression'] else Colors.NC
+        print(f"{color}{_seconds(row['base']):>8} {_seconds(row['head']):>8} {row['delta']:>+8.2f} {change:>7}  "
+              f"{row['key']}{Colors.NC}")
+    print()
+    if regressions:
+        print(f"{Colors.RED}✗ FAIL: {len(regressions)} {args.by}(s) slower by more than "
+              f"{args.threshold:.0%} and {args.min_seconds}s{Colors.NC}")
+        return 1
+    print(f"{Colors.GREEN}✓ PASS: no converge-time regressions{Colors.NC}")
+    return 0
+
+
+def show_export(conn, args):
+    print(json.dumps(export_run(conn, resolve_run(conn, args.run)), indent=2))
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--store', default=str(DEFAULT_STORE),
+                        help='Profile store, SQLite or .json (default: .converge-profile.db)')
+    parser.add_argument('--format', choices=('text', 'json'), default='text', help='Output format')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    commands.add_parser('runs', help='List recorded runs')
+
+    top_parser = commands.add_parser('top', help='Slowest tasks, roles, hosts or loop items of a run')
+    top_parser.add_argument('--run', default='-1', help='Run id, or -1 for the latest (default)')
+    top_parser.add_argument('--by', choices=GROUPINGS, default='task', help='Grouping (default: task)')
+    top_parser.add_argument('-n', '--limit', type=int, default=20, help='Rows to show (default: 20)')
+
+    diff_parser = commands.add_parser('diff', help='Compare two runs and flag regressions')
+    diff_parser.add_argument('base', nargs='?', default='-2', help='Base run (default: -2, the previous run)')
+    diff_parser.add_argument('head', nargs='?', default='-1', help='Head run (default: -1, the latest run)')
+    diff_parser.add_argument('--by', choices=GROUPINGS, default='task', help='Grouping (default: task)')
+    diff_parser.add_argument('--threshold', type=float, default=0.2,
+                             help='Relative slowdown that counts as a regression (default: 0.2)')
+    diff_parser.add_argument('--min-seconds', type=float, default=1.0,
+                             help='Ignore slowdowns smaller than this (default: 1.0)')
+    diff_parser.add_argument('-n', '--limit', type=int, default=20, help='Rows to show (default: 20)')
+
+    export_parser = commands.add_parser('export', help='Print a run as JSON')
+    export_parser.add_argument('--run', default='-1', help='Run id, or -1 for the latest (default)')
+    args = parser.parse_args()
+
+    if not args.store.endswith('.json') and not Path(args.store).exists():
+        print(f"{Colors.RED}✗ no profile store at {args.store}; run a playbook first{Colors.NC}", file=sys.stderr)
+        return 2
+    conn = open_store(args.store)
+    handlers = {'runs': show_runs, 'top': show_top, 'diff': show_diff, 'export': show_export}
+    try:
+        return handlers[args.command](conn, args)
+    except ValueError as e:
+        print(f"{Colors.RED}✗ {e}{Colors.NC}", file=sys.stderr)
+        return 2
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
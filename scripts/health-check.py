@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Check the health of every inventory host after a rollout
+
+Derives each host's checks from its roles and the same variables the
+roles deploy from (services, listening ports, keytab, KDC reachability,
+exported and shared directories, NFS mounts; see
+module_utils/health_checks.py) and runs them on all hosts concurrently:
+one multiplexed ssh session per host with every check in it, at most
+--forks hosts at a time. Replaces the serial validate-checkpoint-5.sh,
+validate-checkpoint-8.sh, test-kdc-connectivity.sh and test-nfs-mount.sh
+runs. Results can be written as JSON or JUnit XML with per-check timing.
+
+Usage:
+  python3 scripts/health-check.py                        # every host
+  python3 scripts/health-check.py -l fileservers --forks 100
+  python3 scripts/health-check.py --json health.json --junit health.xml
+  python3 scripts/health-check.py --list -l k8s-worker-01    # show the derived checks
+"""
+
+import argparse
+import glob
+import json
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / 'module_utils'))
+
+from health_checks import CHECK_VARIABLES, CONNECTION_VARIABLES, derive_checks, junit_report, run_fleet  # noqa: E402
+from storage_inventory import InventoryError, collect_hosts, parse_extra_vars, resolve  # noqa: E402
+
+
+class Colors:
+    GREEN = '\033[0;32m'
+    RED = '\033[0;31m'
+    YELLOW = '\033[1;33m'
+    NC = '\033[0m'  # No Color
+
+
+def plan(hosts):
+    """(host, connection, checks) jobs from collect_hosts() output, plus templating errors"""
+    jobs, errors = [], []
+    for host, roles, variables in hosts:
+        values, host_errors = resolve(variables, CHECK_VARIABLES + CONNECTION_VARIABLES)
+        errors.extend(f"{host}: {error}" for error in host_errors)
+        connection = {name: values[name] for name in CONNECTION_VARIABLES if name in values}
+        jobs.append((host, connection, derive_checks(roles, values)))
+    return jobs, errors
+
+
+def print_results(results, elapsed):
+    for result in results:
+        if result['status'] == 'unreachable':
+            print(f"{Colors.RED}✗ UNREACHABLE{Colors.NC}: {result['host']}: {result['error']}")
+            continue
+        failed = [check for check in result['checks'] if check['status'] != 'pass']
+        passed = len(result['checks']) - len(failed)
+        if failed:
+            print(f"{Colors.RED}✗ FAIL{Colors.NC}: {result['host']} ({passed}/{len(result['checks'])} checks)")
+            for check in failed:
+                print(f"  {Colors.YELLOW}→{Colors.NC} {check['name']}: {check['message']}")
+        else:
+            print(f"{Colors.GREEN}✓ PASS{Colors.NC}: {result['host']} ({passed} checks, {result['duration']:.2f}s)")
+    healthy = sum(result['status'] == 'pass' for result in results)
+    print()
+    print(f"{healthy}/{len(results)} hosts healthy in {elapsed:.2f}s")
+
+
+def write_output(path, content):
+    if path == '-':
+        sys.stdout.write(content)
+    else:
+        with open(path, 'w') as f:
+            f.write(content)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('-i', '--inventory', default=str(PROJECT_ROOT / 'inventory' / 'hosts.yml'),
+                        help="inventory file (default: inventory/hosts.yml)")
+    parser.add_argument('-p', '--playbook', action='append', dest='playbooks',
+                        help="playbook(s) that map hosts to roles (default: playbooks/*.yml)")
+    parser.add_argument('-l', '--limit', help="host pattern to check (default: all)")
+    parser.add_argument('-e', '--extra-vars', action='append', default=[],
+                        help="extra variables as key=value or @file (highest precedence)")
+    parser.add_argument('-f', '--forks', type=int, default=50,
+                        help="hosts checked at the same time (default: 50)")
+    parser.add_argument('-t', '--timeout', type=int, default=30,
+                        help="seconds allowed per host (default: 30)")
+    parser.add_argument('--json', metavar='FILE', help="write results as JSON ('-' for stdout)")
+    parser.add_argument('--junit', metavar='FILE', help="write results as JUnit XML ('-' for stdout)")
+    parser.add_argument('--list', action='store_true', help="print the derived checks without running them")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    playbooks = args.playbooks or sorted(glob.glob(str(PROJECT_ROOT / 'playbooks' / '*.yml')))
+    started = time.monotonic()
+
+    try:
+        hosts = collect_hosts(
+            args.inventory, playbooks, args.limit,
+            roles_dir=str(PROJECT_ROOT / 'roles'),
+            extra_vars=parse_extra_vars(args.extra_vars),
+        )
+    except InventoryError as e:
+        print(f"{Colors.RED}✗ ERROR{Colors.NC}: {e}", file=sys.stderr)
+        return 2
+    if not hosts:
+        matched = f"limit '{args.limit}'" if args.limit else "the playbooks"
+        print(f"{Colors.RED}✗ ERROR{Colors.NC}: no hosts matched by {matched}", file=sys.stderr)
+        return 2
+
+    jobs, errors = plan(hosts)
+    for error in errors:
+        print(f"{Colors.RED}✗ ERROR{Colors.NC}: {error}", file=sys.stderr)
+    if errors:
+        return 2
+    if args.list:
+        print(json.dumps({host: checks for host, _, checks in jobs}, indent=2))
+        return 0
+
+    results = run_fleet(jobs, forks=args.forks, timeout=args.timeout)
+    elapsed = time.monotonic() - started
+
+    if args.json:
+        write_output(args.json, json.dumps({
+            'hosts': results,
+            'failed': sum(result['status'] != 'pass' for result in results),
+            'total': len(results),
+            'elapsed': round(elapsed, 3),
+        }, indent=2) + '\n')
+    if args.junit:
+        write_output(args.junit, junit_report(results))
+    if '-' not in (args.json, args.junit):
+        print_results(results, elapsed)
+
+    return 0 if all(result['status'] == 'pass' for result in results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
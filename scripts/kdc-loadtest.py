@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+KDC authentication load generator and latency benchmark
+
+Stands up a throwaway KDC in a temporary directory from the kerberos-kdc
+role's kdc.conf.j2 and krb5.conf.j2 (on a free local port, no root
+needed), creates N synthetic principals plus an nfs/ service principal
+and drives concurrent authentications against it: each one is a
+keytab kinit (AS request) followed by a kvno for the service (TGS
+request), like a pod remounting a Kerberos share. Throughput and
+p50/p99 latency are reported per enctype and per request type, with one
+KDC per enctype so aes128 and aes256 configurations can be compared.
+
+With --replicas N the primary's database is copied to N replica KDCs on
+further ports (the full dump kprop ships) and the clients are spread
+over one site per KDC, each with the krb5.conf the role renders for that
+site (its own KDC first), to measure how replicas scale authentication.
+
+Latencies include starting the kinit/kvno processes, so they are an
+upper bound on the KDC's own service time; compare runs made on the
+same machine. Requires the MIT krb5 KDC and client tools (krb5-kdc,
+krb5-admin-server, krb5-user).
+
+Usage:
+  python3 scripts/kdc-loadtest.py
+  python3 scripts/kdc-loadtest.py -n 200 -r 5000 -c 64
+  python3 scripts/kdc-loadtest.py -r 5000 -c 64 --replicas 2
+  python3 scripts/kdc-loadtest.py --enctype aes256-cts-hmac-sha1-96 --enctype aes128-cts-hmac-sha1-96 \\
+      --output /tmp/kdc-load.json
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / 'module_utils'))
+
+from kdc_load import DOMAIN, REALM, REQUIRED_TOOLS, LocalKDC, free_port, run_load, summarize, timed  # noqa: E402
+
+DEFAULT_ENCTYPES = ['aes256-cts-hmac-sha1-96', 'aes128-cts-hmac-sha1-96']
+
+
+class Colors:
+    GREEN = '\033[0;32m'
+    RED = '\033[0;31m'
+    YELLOW = '\033[1;33m'
+    NC = '\033[0m'  # No Color
+
+
+def authenticate(kdcs, keytab, users, service, worker, iteration):
+    """One AS + TGS exchange for a synthetic user, with a per-thread cache
+
+    Worker threads are spread over the sites; each uses the krb5.conf of
+    its site's KDC, which lists that KDC first.
+    """
+    kdc = kdcs[worker % len(kdcs)]
+    principal = users[iteration % len(users)]
+    cache = f"FILE:{os.path.join(kdc.directory, f'cc_{worker}')}"
+
+    def call(command):
+        return subprocess.run(command, env=kdc.env, stdout=subprocess.DEVNULL,
+                              stderr=subprocess.DEVNULL).returncode == 0
+
+    samples = [timed('AS', call, ['kinit', '-k', '-t', keytab, '-c', cache, principal])]
+    if samples[0][2]:
+        samples.append(timed('TGS', call, ['kvno', '-q', '-c', cache, service]))
+    call(['kdestroy', '-q', '-c', cache])
+    return samples
+
+
+def benchmark(enctype, args):
+    users = [f"loadtest/user{index:05d}@{REALM}" for index in range(args.principals)]
+    service = f"nfs/fileserver.{DOMAIN}@{REALM}"
+    directory = tempfile.mkdtemp(prefix='kdc-loadtest-')
+    ports = [free_port() for _ in range(args.replicas + 1)]
+    sites = [f"site-{index}" for index in range(len(ports))]
+    topology = {
+        'kdc_primary': {'host': '127.0.0.1', 'port': ports[0], 'site': sites[0]},
+        'kdc_replicas': [{'host': '127.0.0.1', 'port': port, 'site': site}
+                         for port, site in zip(ports[1:], sites[1:])],
+    }
+    kdcs = [LocalKDC(enctype, os.path.join(directory, site), port, topology, site)
+            for port, site in zip(ports, sites)]
+    primary, replicas = kdcs[0], kdcs[1:]
+    master_password = os.urandom(12).hex()
+    try:
+        primary.create(master_password, users + [service])
+        for replica in replicas:
+            replica.create(master_password)
+        primary.propagate(replicas)
+        for kdc in kdcs:
+            kdc.start()
+
+        def task(worker, iteration):
+            return authenticate(kdcs, primary.keytab, users, service, worker, iteration)
+
+        run_load(task, args.concurrency, args.concurrency)
+        samples, elapsed = run_load(task, args.requests, args.concurrency)
+    finally:
+        for kdc in kdcs:
+            kdc.stop()
+        if args.keep:
+            print(f"  kept {directory}")
+        else:
+            shutil.rmtree(directory, ignore_errors=True)
+    return {
+        'enctype': enctype,
+        'kdcs': len(kdcs),
+        'elapsed': round(elapsed, 2),
+        'requests': summarize(samples, elapsed),
+    }
+
+
+def print_report(results):
+    print(f"{'enctype':<28} {'type':<4} {'req':>6} {'err':>5} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    for result in results:
+        for request_type, stats in result['requests'].items():
+            color = Colors.RED if stats['errors'] else Colors.NC
+            print(f"{color}{result['enctype']:<28} {request_type:<4} {stats['requests']:>6} {stats['errors']:>5} "
+                  f"{stats['throughput']:>8} {stats['p50_ms']:>8} {stats['p99_ms']:>8}{Colors.NC}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('-n', '--principals', type=int, default=100,
+                        help='Synthetic user principals to create (default: 100)')
+    parser.add_argument('-r', '--requests', type=int, default=1000,
+                        help='Authentications (kinit + kvno) per enctype (default: 1000)')
+    parser.add_argument('-c', '--concurrency', type=int, default=16,
+                        help='Concurrent clients (default: 16)')
+    parser.add_argument('--replicas', type=int, default=0,
+                        help='Replica KDCs on further ports, one site each (default: 0)')
+    parser.add_argument('--enctype', action='append', dest='enctypes',
+                        help=f"Enctype to benchmark, repeatable (default: {' and '.join(DEFAULT_ENCTYPES)})")
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    parser.add_argument('--keep', action='store_true', help='Keep the KDC directories for inspection')
+    args = parser.parse_args()
+
+    missing = [tool for tool in REQUIRED_TOOLS if not shutil.which(tool)]
+    if missing:
+        print(f"{Colors.RED}✗ missing Kerberos tools: {', '.join(missing)}{Colors.NC}", file=sys.stderr)
+        return 2
+
+    results = []
+    for enctype in args.enctypes or DEFAULT_ENCTYPES:
+        print(f"Benchmarking {enctype}: {args.requests} authentications, {args.concurrency} clients, "
+              f"{args.principals} principals, {args.replicas + 1} KDC(s)")
+        try:
+            results.append(benchmark(enctype, args))
+        except RuntimeError as e:
+            print(f"{Colors.RED}✗ {enctype}: {e}{Colors.NC}", file=sys.stderr)
+            return 1
+
+    print()
+    print_report(results)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'realm': REALM, 'concurrency': args.concurrency, 'results': results}, f, indent=2)
+            f.write('\n')
+
+    failed = any(stats['errors'] for result in results for stats in result['requests'].values())
+    if failed:
+        print(f"{Colors.RED}✗ FAIL: some authentications failed{Colors.NC}")
+        return 1
+    print(f"{Colors.GREEN}✓ PASS: all authentications succeeded{Colors.NC}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Loopback NFS throughput and metadata benchmark
+
+Exports a scratch directory on localhost with the nfs-server role's
+exports.j2 template, mounts it once per benchmark case and runs
+sequential write/read, small-file create/stat/unlink and parallel
+reader workloads. Cases cross the security flavors (sec=sys, krb5,
+krb5i, krb5p) with rsize/wsize and nconnect sweeps and, optionally, the
+nfs-client mount profiles, so the cost of Kerberos integrity/privacy
+and the effect of mount tuning are measured on the same machine.
+
+Results are written as JSON and compared against a stored baseline; a
+drop of more than --threshold percent in any metric is a regression
+(exit code 1). Run as root on a host with nfs-kernel-server installed;
+the krb5 flavors also need an nfs/ principal for --server in the host
+keytab and rpc-gssd running, otherwise those cases are reported as
+failed and the rest still run. --local runs the workloads in a plain
+directory without NFS (the raw disk reference, no root needed).
+
+Usage:
+  sudo python3 scripts/nfs-benchmark.py --output /tmp/nfs-bench.json
+  sudo python3 scripts/nfs-benchmark.py --sec sys,krb5,krb5i,krb5p --rsize '' --nconnect ''
+  sudo python3 scripts/nfs-benchmark.py --profiles --update-baseline
+  python3 scripts/nfs-benchmark.py --local /srv/shares --file-mb 64
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / 'module_utils'))
+
+from nfs_benchmark import DEFAULT_SIZES, WORKLOADS, compare, mount_cases, run_workloads, sweep_variants  # noqa: E402
+from nfs_exports import parse_exports, plan_commands  # noqa: E402
+from storage_inventory import load_yaml  # noqa: E402
+from storage_render import template_environment  # noqa: E402
+
+DEFAULT_BASELINE = PROJECT_ROOT / 'tests' / 'baselines' / 'nfs-benchmark.json'
+ROLES_DIR = PROJECT_ROOT / 'roles'
+SEC_FLAVORS = ('sys', 'krb5', 'krb5i', 'krb5p')
+# Kept away from the fsids used by nfs_exports in group_vars
+BENCH_FSID = 4242
+
+
+class Colors:
+    GREEN = '\033[0;32m'
+    RED = '\033[0;31m'
+    YELLOW = '\033[1;33m'
+    NC = '\033[0m'  # No Color
+
+
+def csv_list(value, cast=str):
+    return [cast(item) for item in value.split(',') if item.strip()]
+
+
+def render_export(path, client, sec_flavors):
+    """Render the benchmark export through the nfs-server exports.j2 template"""
+    options = f"rw,sync,no_subtree_check,no_root_squash,fsid={BENCH_FSID},sec={':'.join(sec_flavors)}"
+    template = template_environment(str(ROLES_DIR), 'nfs-server').get_template('exports.j2')
+    return template.render(
+        nfs_exports=[{'path': path, 'clients': [{'host': client, 'options': options}]}],
+        nfs_exports_fragments=False,
+    )
+
+
+def run(command, check=True):
+    result = subprocess.run(command, capture_output=True, text=True)
+    if check and result.returncode != 0:
+        raise RuntimeError(f"{' '.join(command)}: {(result.stderr or result.stdout).strip()}")
+    return result
+
+
+def mount_profiles():
+    defaults = load_yaml(str(ROLES_DIR / 'nfs-client' / 'defaults' / 'main.yml'))
+    return defaults.get('nfs_mount_profiles') or {}
+
+
+def run_case(args, case, sizes):
+    """Mount the export with the case options, run the workloads and unmount"""
+    entry = {'id': case['id'], 'sec': case['sec'], 'options': case['options']}
+    options = ','.join(['vers=4.2'] + case['options'])
+    mounted = run(['mount', '-t', 'nfs4', '-o', options, f"{args.server}:{args.export_path}", args.mountpoint],
+                  check=False)
+    if mounted.returncode != 0:
+        entry['error'] = (mounted.stderr or mounted.stdout).strip()
+        return entry
+    try:
+        entry['results'] = run_workloads(args.mountpoint, args.workloads, sizes)
+    except OSError as e:
+        entry['error'] = str(e)
+    finally:
+        run(['umount', args.mountpoint], check=False)
+    return entry
+
+
+def run_nfs(args, sizes):
+    variants = sweep_variants(args.rsize, args.nconnect, mount_profiles() if args.profiles else None)
+    cases = mount_cases(args.sec, variants)
+    entries = parse_exports(render_export(args.export_path, args.client, args.sec))
+    added = [(path, client, options) for (path, client), options in entries.items()]
+
+    os.makedirs(args.export_path, exist_ok=True)
+    os.makedirs(args.mountpoint, exist_ok=True)
+    for command in plan_commands(added, [], []):
+        run(command)
+    results = []
+    try:
+        for case in cases:
+            print(f"  {case['id']} ...", end=' ', flush=True)
+            entry = run_case(args, case, sizes)
+            print(f"{Colors.RED}failed{Colors.NC}" if 'error' in entry else 'done')
+            results.append(entry)
+    finally:
+        for command in plan_commands([], added, []):
+            run(command, check=False)
+    return results
+
+
+def print_results(report):
+    for case in report['cases']:
+        if 'error' in case:
+            print(f"{Colors.RED}✗ {case['id']}: {case['error']}{Colors.NC}")
+            continue
+        metrics = ', '.join(f"{r['workload']}.{r['metric']}={r['value']} {r['unit']}" for r in case['results'])
+        print(f"{Colors.GREEN}✓{Colors.NC} {case['id']}: {metrics}")
+
+
+def print_comparison(rows, threshold):
+    regressions = [row for row in rows if row['regression']]
+    for row in rows:
+        color = Colors.RED if row['regression'] else Colors.NC
+        print(f"{color}  {row['key']}: {row['baseline']} -> {row['current']} ({row['change']:+.1f}%){Colors.NC}")
+    if regressions:
+        print(f"{Colors.RED}✗ FAIL: {len(regressions)} metric(s) regressed more than {threshold}%{Colors.NC}")
+    else:
+        print(f"{Colors.GREEN}✓ PASS: no metric regressed more than {threshold}% ({len(rows)} compared){Colors.NC}")
+    return not regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--export-path', default='/srv/nfs-bench',
+                        help='Scratch directory exported over loopback (default: /srv/nfs-bench)')
+    parser.add_argument('--mountpoint', default='/mnt/nfs-bench', help='Mount point (default: /mnt/nfs-bench)')
+    parser.add_argument('--server', default='127.0.0.1',
+                        help='Server name used to mount; krb5 flavors need the FQDN of the host (default: 127.0.0.1)')
+    parser.add_argument('--client', default='127.0.0.1', help='Client spec of the export (default: 127.0.0.1)')
+    parser.add_argument('--sec', type=csv_list, default=['sys'],
+                        help=f"Comma-separated security flavors from {','.join(SEC_FLAVORS)} (default: sys)")
+    parser.add_argument('--rsize', type=lambda v: csv_list(v, int), default=[65536, 262144, 1048576],
+                        help='Comma-separated rsize/wsize sweep, empty to skip (default: 65536,262144,1048576)')
+    parser.add_argument('--nconnect', type=lambda v: csv_list(v, int), default=[1, 4, 8],
+                        help='Comma-separated nconnect sweep, empty to skip (default: 1,4,8)')
+    parser.add_argument('--profiles', action='store_true', help='Also run every nfs-client mount profile')
+    parser.add_argument('--workloads', type=csv_list, default=list(WORKLOADS),
+                        help=f"Comma-separated workloads (default: {','.join(WORKLOADS)})")
+    parser.add_argument('--file-mb', type=int, default=DEFAULT_SIZES['file_mb'],
+                        help=f"Sequential file size in MiB (default: {DEFAULT_SIZES['file_mb']})")
+    parser.add_argument('--small-files', type=int, default=DEFAULT_SIZES['small_files'],
+                        help=f"Files per small-file storm (default: {DEFAULT_SIZES['small_files']})")
+    parser.add_argument('--readers', type=int, default=DEFAULT_SIZES['readers'],
+                        help=f"Parallel readers (default: {DEFAULT_SIZES['readers']})")
+    parser.add_argument('--reader-mb', type=int, default=DEFAULT_SIZES['reader_mb'],
+                        help=f"File size per parallel reader in MiB (default: {DEFAULT_SIZES['reader_mb']})")
+    parser.add_argument('--local', metavar='DIR', help='Run the workloads in DIR without NFS')
+    parser.add_argument('--output', help='Write the JSON report to this file')
+    parser.add_argument('--baseline', default=str(DEFAULT_BASELINE),
+                        help='Baseline report to compare against (default: tests/baselines/nfs-benchmark.json)')
+    parser.add_argument('--update-baseline', action='store_true', help='Store this run as the baseline')
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help='Regression threshold in percent (default: 10)')
+    args = parser.parse_args(argv)
+
+    unknown = [sec for sec in args.sec if sec not in SEC_FLAVORS]
+    if unknown:
+        parser.error(f"unknown security flavor(s): {', '.join(unknown)}")
+    unknown = [name for name in args.workloads if name not in WORKLOADS]
+    if unknown:
+        parser.error(f"unknown workload(s): {', '.join(unknown)}")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    sizes = {
+        'file_mb': args.file_mb,
+        'small_files': args.small_files,
+        'readers': args.readers,
+        'reader_mb': args.reader_mb,
+    }
+    report = {
+        'meta': {
+            'host': platform.node(),
+            'kernel': platform.release(),
+            'started': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'mode': 'local' if args.local else 'nfs',
+            'sizes': dict(DEFAULT_SIZES, **sizes),
+        },
+        'cases': [],
+    }
+
+    if args.local:
+        report['cases'].append({'id': 'local', 'results': run_workloads(args.local, args.workloads, sizes)})
+    else:
+        if os.geteuid() != 0:
+            print(f"{Colors.RED}✗ exporting and mounting need root (use --local for a plain directory){Colors.NC}",
+                  file=sys.stderr)
+            return 2
+        print(f"Benchmarking {args.server}:{args.export_path} on {args.mountpoint}")
+        try:
+            report['cases'] = run_nfs(args, sizes)
+        except RuntimeError as e:
+            print(f"{Colors.RED}✗ {e}{Colors.NC}", file=sys.stderr)
+            return 2
+
+    print_results(report)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+            f.write('\n')
+
+    status = 0
+    if args.update_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+            f.write('\n')
+        print(f"Baseline written to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print(f"\nComparison with {args.baseline}:")
+        if not print_comparison(compare(report, baseline, args.threshold), args.threshold):
+            status = 1
+    if any('error' in case for case in report['cases']):
+        status = status or 1
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+NFS mount options from the nfs-client performance profiles
+
+Resolves nfs_mount_profiles and nfs_client_mount_base_options for an NFS
+client host (role defaults, group_vars and host_vars) and prints the
+merged mount options, or a PersistentVolume / StorageClass manifest
+using them as mountOptions, so Kubernetes mounts use the same tuning as
+the mounts managed by the nfs-client role. When the host has FS-Cache
+enabled (nfs_client_fscache_enabled), profiles listed in
+nfs_client_fscache_profiles get the fsc option here too; -o nofsc
+turns it off.
+
+Usage:
+  python3 scripts/nfs-mount-options.py --list
+  python3 scripts/nfs-mount-options.py -p throughput
+  python3 scripts/nfs-mount-options.py -p throughput --format pv \\
+      --name builds-pv --path /srv/shares/builds --capacity 500Gi
+  python3 scripts/nfs-mount-options.py -p metadata-heavy --format storageclass \\
+      --name nfs-metadata --path /srv/shares/builds -o nconnect=16
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import yaml
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / 'module_utils'))
+
+from nfs_mount_options import ProfileError, profile_options  # noqa: E402
+from storage_inventory import InventoryError, collect_hosts, parse_extra_vars, resolve  # noqa: E402
+
+
+class Colors:
+    GREEN = '\033[0;32m'
+    RED = '\033[0;31m'
+    YELLOW = '\033[1;33m'
+    NC = '\033[0m'  # No Color
+
+
+VARIABLES = (
+    'nfs_mount_profiles', 'nfs_client_mount_base_options', 'nfs_client_default_mount_profile',
+    'nfs_client_fscache_mount_profiles',
+)
+DEFAULT_SERVER = 'file-server.cube.k8s'
+CSI_PROVISIONER = 'nfs.csi.k8s.io'
+
+
+def load_profiles(args):
+    """Resolve the profile variables for the selected NFS client host"""
+    playbooks = args.playbook or [str(p) for p in sorted((PROJECT_ROOT / 'playbooks').glob('*.yml'))]
+    hosts = collect_hosts(
+        args.inventory, playbooks, args.limit, str(PROJECT_ROOT / 'roles'),
+        extra_vars=parse_extra_vars(args.extra_vars),
+    )
+    for host, roles, variables in hosts:
+        if 'nfs-client' not in roles:
+            continue
+        values, errors = resolve(variables, VARIABLES)
+        if errors:
+            raise InventoryError(f"{host}: " + '; '.join(errors))
+        return host, values
+    raise InventoryError(f"no host running the nfs-client role matches '{args.limit or 'all'}'")
+
+
+def persistent_volume(args, options):
+    return {
+        'apiVersion': 'v1',
+        'kind': 'PersistentVolume',
+        'metadata': {'name': args.name, 'labels': {'nfs-mount-profile': args.profile}},
+        'spec': {
+            'capacity': {'storage': args.capacity},
+            'accessModes': ['ReadWriteMany'],
+            'persistentVolumeReclaimPolicy': 'Retain',
+            'storageClassName': args.storage_class,
+            'mountOptions': options,
+            'nfs': {'server': args.server, 'path': args.path},
+        },
+    }
+
+
+def storage_class(args, options):
+    return {
+        'apiVersion': 'storage.k8s.io/v1',
+        'kind': 'StorageClass',
+        'metadata': {'name': args.name, 'labels': {'nfs-mount-profile': args.profile}},
+        'provisioner': CSI_PROVISIONER,
+        'parameters': {'server': args.server, 'share': args.path},
+        'reclaimPolicy': 'Retain',
+        'volumeBindingMode': 'Immediate',
+        'mountOptions': options,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Print NFS mount options or Kubernetes manifests for an nfs-client performance profile',
+    )
+    parser.add_argument('-i', '--inventory', default=str(PROJECT_ROOT / 'inventory' / 'hosts.yml'),
+                        help='Inventory file (default: inventory/hosts.yml)')
+    parser.add_argument('--playbook', action='append',
+                        help='Playbook used to map hosts to roles (repeatable, default: playbooks/*.yml)')
+    parser.add_argument('-l', '--limit', default='nfs_clients',
+                        help='Host pattern whose variables are used (default: nfs_clients, first match)')
+    parser.add_argument('-e', '--extra-vars', action='append', default=[],
+                        help='Extra variables as key=value or JSON')
+    parser.add_argument('-p', '--profile', help='Profile name (default: nfs_client_default_mount_profile)')
+    parser.add_argument('-o', '--option', action='append', default=[],
+                        help='Additional mount option overriding the profile (repeatable)')
+    parser.add_argument('--list', action='store_true', help='List the available profiles and exit')
+    parser.add_argument('--format', choices=['options', 'pv', 'storageclass'], default='options',
+                        help='Output format (default: options)')
+    parser.add_argument('--name', help='Manifest name (pv/storageclass formats)')
+    parser.add_argument('--server', default=DEFAULT_SERVER, help=f'NFS server (default: {DEFAULT_SERVER})')
+    parser.add_argument('--path', help='Export path (pv/storageclass formats)')
+    parser.add_argument('--capacity', default='100Gi', help='PersistentVolume capacity (default: 100Gi)')
+    parser.add_argument('--storage-class', default='nfs-kerberos',
+                        help='storageClassName of a generated PersistentVolume (default: nfs-kerberos)')
+    args = parser.parse_args()
+
+    if args.format != 'options' and not (args.name and args.path):
+        parser.error('--name and --path are required for the pv and storageclass formats')
+
+    try:
+        host, values = load_profiles(args)
+    except InventoryError as e:
+        print(f"{Colors.RED}✗ {e}{Colors.NC}", file=sys.stderr)
+        return 2
+
+    profiles = values['nfs_mount_profiles']
+    if args.list:
+        for name in sorted(profiles):
+            print(f"{name}: {','.join(profiles[name]) or '(kernel defaults)'}")
+        return 0
+
+    args.profile = args.profile or values['nfs_client_default_mount_profile']
+    try:
+        options = profile_options(profiles, args.profile, values['nfs_client_mount_base_options'], args.option,
+                                  values['nfs_client_fscache_mount_profiles'])
+    except ProfileError as e:
+        print(f"{Colors.RED}✗ {e}{Colors.NC}", file=sys.stderr)
+        return 1
+
+    if args.format == 'options':
+        print(','.join(options))
+        return 0
+
+    manifest = persistent_volume(args, options) if args.format == 'pv' else storage_class(args, options)
+    print(f"# Generated by scripts/nfs-mount-options.py from profile '{args.profile}' ({host})")
+    print('---')
+    print(yaml.safe_dump(manifest, sort_keys=False), end='')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -228,7 +228,7 @@ def test_kerberos_template_content():
         has_realms = '[realms]' in content
         has_domain_realm = '[domain_realm]' in content
         has_realm_var = '{{ krb5_realm }}' in content
-        has_kdc_var = '{{ krb5_kdc }}' in content
+        has_kdc_var = 'krb5_kdcs' in content
         
         all_present = has_libdefaults and has_realms and has_domain_realm and has_realm_var and has_kdc_var
         
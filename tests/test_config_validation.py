@@ -4,7 +4,8 @@ Configuration Validation Tests
 
 These tests verify that the Ansible roles properly validate configuration
 variables and fail with appropriate error messages when invalid configuration
-is provided.
+is provided. Validation is driven by module_utils/storage_schema.py, which is
+exercised here directly against sample configurations.
 
 Run with: python3 tests/test_config_validation.py
 """
@@ -13,6 +14,10 @@ import os
 import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'module_utils'))
+
+import storage_schema  # noqa: E402
+
 
 class Colors:
     GREEN = '\033[0;32m'
@@ -30,244 +35,373 @@ def print_test(name, passed, message=""):
     return passed
 
 
-def test_kerberos_validation_tasks_exist():
-    """Test that kerberos-client role has validation tasks"""
+VALID_CONFIG = {
+    'krb5_realm': 'CUBE.K8S',
+    'krb5_kdc': 'kdc.cube.k8s',
+    'krb5_keytab_path': '/etc/krb5.keytab',
+    'krb5_service_principals': [
+        'nfs/file-server.cube.k8s@CUBE.K8S',
+        'cifs/file-server.cube.k8s@CUBE.K8S',
+    ],
+    'kdc_realm': 'CUBE.K8S',
+    'kdc_primary': 'kdc.cube.k8s',
+    'samba_workgroup': 'CUBE',
+    'samba_realm': 'CUBE.K8S',
+    'samba_security': 'user',
+    'samba_shares': [
+        {'name': 'socialpro', 'path': '/srv/shares/socialpro'},
+    ],
+    'nfs_exports': [
+        {
+            'path': '/srv/shares/socialpro',
+            'clients': [
+                {'host': '*.cube.k8s', 'options': 'rw,sync,sec=krb5:krb5i:krb5p,no_subtree_check,fsid=1'},
+                {'host': '*', 'options': 'rw,sync,sec=krb5:krb5i:krb5p,no_subtree_check,fsid=1'},
+            ],
+        },
+    ],
+    'shares': [
+        {'path': '/srv/shares/socialpro', 'owner': 'root', 'group': 'users', 'mode': '0775'},
+    ],
+}
+
+
+def config_with(**overrides):
+    """Return a copy of the valid configuration with some variables replaced"""
+    config = dict(VALID_CONFIG)
+    config.update(overrides)
+    return config
+
+
+def errors_for(schema, **overrides):
+    """Validate one role schema against a modified configuration"""
+    return storage_schema.validate(config_with(**overrides), schema)
+
+
+def check_role_uses_schema_validation(role, tag):
+    """Check that a role validates through the schema action in one task"""
     try:
-        with open("roles/kerberos-client/tasks/main.yml", 'r') as f:
+        with open(f"roles/{role}/tasks/main.yml", 'r') as f:
             content = f.read()
-        
-        has_realm_validation = 'Validate krb5_realm is defined and non-empty' in content
-        has_kdc_validation = 'Validate krb5_kdc is defined and non-empty' in content
-        has_keytab_validation = 'Validate keytab path is absolute' in content
-        has_principal_validation = 'Validate krb5_service_principals structure' in content
-        
-        all_present = has_realm_validation and has_kdc_validation and has_keytab_validation and has_principal_validation
-        
-        return print_test(
-            "Kerberos role has validation tasks",
-            all_present,
-            "Missing validation tasks in kerberos-client role"
-        )
-    except Exception as e:
-        return print_test("Kerberos validation tasks", False, str(e))
 
+        has_action = 'validate_storage_config:' in content
+        has_schema = f"schema: {role}" in content
+        has_tag = f"- {tag}\n    - validation" in content
+        no_assert_loops = 'ansible.builtin.assert' not in content
 
-def test_samba_validation_tasks_exist():
-    """Test that samba role has validation tasks"""
-    try:
-        with open("roles/samba/tasks/main.yml", 'r') as f:
-            content = f.read()
-        
-        has_shares_validation = 'Validate samba_shares structure' in content
-        has_workgroup_validation = 'Validate samba_workgroup is defined' in content
-        has_realm_validation = 'Validate samba_realm is defined' in content
-        has_security_validation = 'Validate samba_security mode' in content
-        
-        all_present = has_shares_validation and has_workgroup_validation and has_realm_validation and has_security_validation
-        
         return print_test(
-            "Samba role has validation tasks",
-            all_present,
-            "Missing validation tasks in samba role"
+            f"{role} role validates via validate_storage_config",
+            has_action and has_schema and has_tag and no_assert_loops,
+            f"{role} must use a single validate_storage_config task tagged 'validation'"
         )
     except Exception as e:
-        return print_test("Samba validation tasks", False, str(e))
+        return print_test(f"{role} validation task", False, str(e))
 
 
-def test_nfs_validation_tasks_exist():
-    """Test that nfs-server role has validation tasks"""
-    try:
-        with open("roles/nfs-server/tasks/main.yml", 'r') as f:
-            content = f.read()
-        
-        has_exports_validation = 'Validate nfs_exports structure' in content
-        has_export_fields_validation = 'Validate each NFS export has required fields' in content
-        has_client_validation = 'Validate NFS export client configuration' in content
-        has_kerberos_validation = 'Validate NFS exports use Kerberos security' in content
-        
-        all_present = has_exports_validation and has_export_fields_validation and has_client_validation and has_kerberos_validation
-        
-        return print_test(
-            "NFS role has validation tasks",
-            all_present,
-            "Missing validation tasks in nfs-server role"
-        )
-    except Exception as e:
-        return print_test("NFS validation tasks", False, str(e))
+def test_kerberos_validation_tasks_exist():
+    """Test that kerberos-client role has schema validation"""
+    return check_role_uses_schema_validation('kerberos-client', 'kerberos')
 
 
-def test_shares_validation_tasks_exist():
-    """Test that shares role has validation tasks"""
-    try:
-        with open("roles/shares/tasks/main.yml", 'r') as f:
-            content = f.read()
-        
-        has_shares_validation = 'Validate shares configuration' in content
-        has_path_validation = 'Validate each share has required path' in content
-        has_absolute_path_check = "is match('^/')" in content
-        
-        all_present = has_shares_validation and has_path_validation and has_absolute_path_check
-        
-        return print_test(
-            "Shares role has validation tasks",
-            all_present,
-            "Missing validation tasks in shares role"
-        )
-    except Exception as e:
-        return print_test("Shares validation tasks", False, str(e))
+def test_kdc_validation_tasks_exist():
+    """Test that kerberos-kdc role has schema validation"""
+    return check_role_uses_schema_validation('kerberos-kdc', 'kdc')
 
 
-def test_validation_uses_assert_module():
-    """Test that validation tasks use ansible.builtin.assert"""
-    try:
-        roles_to_check = ['kerberos-client', 'samba', 'nfs-server', 'shares']
-        all_use_assert = True
-        
-        for role in roles_to_check:
-            with open(f"roles/{role}/tasks/main.yml", 'r') as f:
-                content = f.read()
-            
-            if 'ansible.builtin.assert' not in content:
-                all_use_assert = False
-                break
-        
-        return print_test(
-            "Validation tasks use ansible.builtin.assert",
-            all_use_assert,
-            "Some roles don't use ansible.builtin.assert for validation"
-        )
-    except Exception as e:
-        return print_test("Assert module usage", False, str(e))
+def test_samba_validation_tasks_exist():
+    """Test that samba role has schema validation"""
+    return check_role_uses_schema_validation('samba', 'samba')
 
 
-def test_validation_has_fail_messages():
-    """Test that validation tasks have fail_msg defined"""
-    try:
-        roles_to_check = ['kerberos-client', 'samba', 'nfs-server', 'shares']
-        all_have_fail_msg = True
-        
-        for role in roles_to_check:
-            with open(f"roles/{role}/tasks/main.yml", 'r') as f:
-                content = f.read()
-            
-            # Count assert tasks and fail_msg occurrences
-            assert_count = content.count('ansible.builtin.assert')
-            fail_msg_count = content.count('fail_msg:')
-            
-            # Each assert should have a fail_msg
-            if assert_count > 0 and fail_msg_count < assert_count:
-                all_have_fail_msg = False
-                break
-        
-        return print_test(
-            "Validation tasks have fail_msg defined",
-            all_have_fail_msg,
-            "Some assert tasks missing fail_msg"
-        )
-    except Exception as e:
-        return print_test("Fail message presence", False, str(e))
+def test_nfs_validation_tasks_exist():
+    """Test that nfs-server role has schema validation"""
+    return check_role_uses_schema_validation('nfs-server', 'nfs')
+
+
+def test_nfs_client_validation_tasks_exist():
+    """Test that nfs-client role has schema validation"""
+    return check_role_uses_schema_validation('nfs-client', 'nfs-client')
+
+
+def test_shares_validation_tasks_exist():
+    """Test that shares role has schema validation"""
+    return check_role_uses_schema_validation('shares', 'shares')
+
+
+def test_schema_covers_role_variables():
+    """Test that the schema covers the variables the roles rely on"""
+    expected = {
+        'kerberos-client': {'krb5_realm', 'krb5_kdc', 'krb5_kdcs', 'krb5_keytab_path', 'krb5_service_principals',
+                            'krb5_credentials', 'krb5_credentials_dir', 'krb5_credentials_renew_at'},
+        'kerberos-kdc': {'kdc_realm', 'kdc_primary', 'kdc_replicas', 'kdc_propagation'},
+        'samba': {'samba_workgroup', 'samba_realm', 'samba_security', 'samba_shares', 'samba_performance'},
+        'nfs-server': {'nfs_exports', 'nfs_server_tuning', 'nfs_server_nfs_conf', 'nfs_server_idmapd_conf',
+                       'nfs_server_nfs_common', 'nfs_server_nfs_kernel_server'},
+        'nfs-client': {'nfs_mount_profiles', 'nfs_client_mount_base_options', 'nfs_client_mounts',
+                       'nfs_client_nfs_conf', 'nfs_client_idmapd_conf', 'nfs_client_nfs_common',
+                       'nfs_client_fscache_profiles', 'nfs_client_fscache_reserve'},
+        'shares': {'shares', 'shares_storage', 'shares_storage_profiles'},
+    }
+    missing = {}
+    for role, names in expected.items():
+        absent = sorted(names - set(storage_schema.schema_variables(role)))
+        if absent:
+            missing[role] = absent
+
+    return print_test(
+        "Schema covers all role variables",
+        not missing,
+        f"Variables missing from schema: {missing}"
+    )
+
+
+def test_valid_configuration_passes():
+    """Test that a known-good configuration has no errors"""
+    errors = storage_schema.validate(VALID_CONFIG)
+    return print_test(
+        "Valid configuration passes schema validation",
+        errors == [],
+        f"Unexpected errors: {errors}"
+    )
+
+
+def test_validation_reports_all_errors():
+    """Test that every error is reported in one pass with its location"""
+    errors = storage_schema.validate(config_with(
+        krb5_realm='cube.k8s',
+        samba_security='share',
+        shares=[{'path': 'srv/relative'}],
+        nfs_exports=[{'path': '/srv/a', 'clients': [{'host': '*', 'options': 'rw'}]}],
+    ))
+    locations = ['krb5_realm', 'samba_security', 'shares[0].path', 'nfs_exports[0].clients[0].options']
+    all_reported = all(any(error.startswith(location) for error in errors) for location in locations)
+
+    return print_test(
+        "All errors are reported at once with their location",
+        all_reported and len(errors) == 4,
+        f"Got: {errors}"
+    )
 
 
 def test_kerberos_realm_format_validation():
-    """Test that kerberos role validates realm format"""
-    try:
-        with open("roles/kerberos-client/tasks/main.yml", 'r') as f:
-            content = f.read()
-        
-        has_format_check = 'Validate krb5_realm format' in content
-        has_regex = "is match('^[A-Z0-9.-]+" in content
-        
-        return print_test(
-            "Kerberos role validates realm format (uppercase)",
-            has_format_check and has_regex,
-            "Missing realm format validation"
-        )
-    except Exception as e:
-        return print_test("Realm format validation", False, str(e))
+    """Test that the schema validates realm format"""
+    lowercase = errors_for('kerberos-client', krb5_realm='cube.k8s')
+    empty = errors_for('kerberos-client', krb5_realm='')
+    config = config_with()
+    del config['krb5_realm']
+    missing = storage_schema.validate(config, 'kerberos-client')
+
+    return print_test(
+        "Kerberos schema validates realm format (uppercase)",
+        bool(lowercase) and bool(empty) and missing == ['krb5_realm: must be defined'],
+        f"Got: {lowercase} / {empty} / {missing}"
+    )
 
 
 def test_service_principal_format_validation():
-    """Test that kerberos role validates service principal format"""
-    try:
-        with open("roles/kerberos-client/tasks/main.yml", 'r') as f:
-            content = f.read()
-        
-        has_principal_format = 'Validate each service principal format' in content
-        has_format_regex = 'service/hostname@REALM' in content
-        
-        return print_test(
-            "Kerberos role validates service principal format",
-            has_principal_format and has_format_regex,
-            "Missing service principal format validation"
-        )
-    except Exception as e:
-        return print_test("Service principal format validation", False, str(e))
+    """Test that the schema validates service principal format"""
+    bad = errors_for('kerberos-client', krb5_service_principals=['nfs-file-server', 'nfs/host@lower.realm'])
+    good = errors_for('kerberos-client', krb5_service_principals=['host/k8s-worker-01@CUBE.K8S'])
+
+    return print_test(
+        "Kerberos schema validates service principal format (service/hostname@REALM)",
+        len(bad) == 2 and good == [],
+        f"Got: {bad} / {good}"
+    )
+
+
+def test_credential_cache_validation():
+    """Test that the schema validates credential cache principals and schedule"""
+    principal = errors_for('kerberos-client', krb5_credentials_enabled=True,
+                           krb5_credentials=[{'principal': 'host-k8s-worker-01', 'uid': 0}])
+    schedule = errors_for('kerberos-client', krb5_credentials_enabled=True,
+                          krb5_credentials_renew_at=0.9, krb5_credentials_jitter=0.2)
+    disabled = errors_for('kerberos-client', krb5_credentials_renew_at=0.9, krb5_credentials_jitter=0.2)
+    good = errors_for('kerberos-client', krb5_credentials_enabled=True,
+                      krb5_credentials=[{'principal': 'host/k8s-worker-01@CUBE.K8S', 'uid': 0,
+                                         'services': ['nfs/file-server@CUBE.K8S']}])
+
+    return print_test(
+        "Kerberos schema validates credential cache principals and refresh schedule",
+        len(principal) == 1 and len(schedule) == 1 and 'krb5_credentials_jitter' in schedule[0]
+        and disabled == [] and good == [],
+        f"Got: {principal} / {schedule} / {disabled} / {good}"
+    )
 
 
 def test_samba_security_mode_validation():
-    """Test that samba role validates security mode"""
-    try:
-        with open("roles/samba/tasks/main.yml", 'r') as f:
-            content = f.read()
-        
-        has_security_validation = 'Validate samba_security mode' in content
-        has_valid_modes = "['user', 'ads', 'domain']" in content
-        
-        return print_test(
-            "Samba role validates security mode",
-            has_security_validation and has_valid_modes,
-            "Missing security mode validation"
-        )
-    except Exception as e:
-        return print_test("Samba security mode validation", False, str(e))
+    """Test that the schema validates samba security mode"""
+    valid = all(errors_for('samba', samba_security=mode) == [] for mode in ['user', 'ads', 'domain'])
+    invalid = errors_for('samba', samba_security='share')
+
+    return print_test(
+        "Samba schema validates security mode",
+        valid and len(invalid) == 1,
+        f"Got: {invalid}"
+    )
+
+
+def test_samba_performance_validation():
+    """Test that samba_performance keys, types and log levels are validated"""
+    valid = errors_for('samba', samba_performance={'aio_read_size': 16384, 'log_level': '3 auth:5'})
+    invalid = errors_for('samba', samba_performance={'use_sendfile': 'maybe', 'log_level': 'debug'})
+    typo = errors_for('samba', samba_performance={'multi_channel': True})
+
+    return print_test(
+        "Samba performance profile is validated",
+        valid == [] and len(invalid) == 2 and len(typo) == 1 and 'multi_channel' in typo[0],
+        f"Got: {valid} / {invalid} / {typo}"
+    )
 
 
 def test_nfs_kerberos_security_validation():
-    """Test that NFS role validates Kerberos security options"""
-    try:
-        with open("roles/nfs-server/tasks/main.yml", 'r') as f:
-            content = f.read()
-        
-        has_krb5_check = 'Validate NFS exports use Kerberos security' in content
-        has_sec_krb5 = 'sec=krb5' in content
-        
-        return print_test(
-            "NFS role validates Kerberos security options",
-            has_krb5_check and has_sec_krb5,
-            "Missing Kerberos security validation"
-        )
-    except Exception as e:
-        return print_test("NFS Kerberos security validation", False, str(e))
+    """Test that the schema validates NFS sec= options"""
+    def export(options):
+        return [{'path': '/srv/a', 'clients': [{'host': '*', 'options': options}]}]
+
+    accepted = all(
+        errors_for('nfs-server', nfs_exports=export(f"rw,sync,sec={sec}")) == []
+        for sec in ['sys', 'krb5', 'krb5i', 'krb5p', 'krb5:krb5i:krb5p']
+    )
+    missing_sec = errors_for('nfs-server', nfs_exports=export('rw,sync'))
+    bad_flavor = errors_for('nfs-server', nfs_exports=export('rw,sec=krb5:lipkey'))
+
+    return print_test(
+        "NFS schema validates sec= security options",
+        accepted and len(missing_sec) == 1 and 'lipkey' in ''.join(bad_flavor),
+        f"Got: {missing_sec} / {bad_flavor}"
+    )
+
+
+def test_nfs_fsid_uniqueness_validation():
+    """Test that two export paths cannot share an fsid"""
+    exports = [
+        {'path': '/srv/a', 'clients': [{'host': '*', 'options': 'rw,sec=krb5,fsid=1'}]},
+        {'path': '/srv/b', 'clients': [{'host': '*', 'options': 'rw,sec=krb5,fsid=1'}]},
+    ]
+    errors = errors_for('nfs-server', nfs_exports=exports)
+
+    return print_test(
+        "NFS schema rejects duplicate fsid values",
+        len(errors) == 1 and 'fsid=1' in errors[0],
+        f"Got: {errors}"
+    )
+
+
+def test_nfs_server_tuning_validation():
+    """Test that NFS tuning values are range- and key-checked"""
+    valid = errors_for('nfs-server', nfs_server_tuning={'threads': 64, 'rdma': True, 'tcp_rmem': '4096 87380 16777216'})
+    bounds = errors_for('nfs-server', nfs_server_tuning={'threads': 0, 'tcp_max_slot_table_entries': 1})
+    typo = errors_for('nfs-server', nfs_server_tuning={'thread': 64})
+
+    return print_test(
+        "NFS tuning values and keys are validated",
+        valid == [] and len(bounds) == 2 and len(typo) == 1 and 'thread' in typo[0],
+        f"Got: {valid} / {bounds} / {typo}"
+    )
+
+
+def test_nfs_daemon_config_validation():
+    """Test that the nfs.conf, idmapd.conf and /etc/default data models are validated"""
+    valid = errors_for('nfs-server', nfs_server_nfs_conf={'mountd': {'manage-gids': True}, 'nfsd': {'threads': 64}},
+                       nfs_server_idmapd_conf={'Static': {'alice@CUBE.K8S': 'alice'}},
+                       nfs_server_nfs_kernel_server={'RPCMOUNTDOPTS': '--manage-gids --no-nfs-version 3'})
+    sections = errors_for('nfs-client', nfs_client_nfs_conf={'nfs-d': {'vers4': True}},
+                          nfs_client_idmapd_conf={'general': {'Domain': 'cube.k8s'}})
+    values = errors_for('nfs-server', nfs_server_nfs_conf={'nfsd': {'threads': [8, 16]}},
+                        nfs_server_nfs_common={'NEED_GSSD': 'yes"; rm -rf /'})
+    keys = errors_for('nfs-server', nfs_server_nfs_conf={'nfsd': {'bad key': 1}},
+                      nfs_server_nfs_common={'need_statd': 'yes'})
+    idmap = errors_for('nfs-client', nfs_client_idmap_static_users=[{'name': 'alice'}, 'bob@CUBE.K8S', 'bad user'],
+                       nfs_client_idmap_cache_timeout=0)
+
+    return print_test(
+        "NFS daemon config models are validated",
+        valid == [] and len(sections) == 2 and 'nfs-d' in sections[0]
+        and len(values) == 2 and 'single value' in values[0] and 'quotes' in values[1]
+        and len(keys) == 2 and 'bad key' in keys[0] and 'need_statd' in keys[1]
+        and len(idmap) == 2 and 'bad user' in idmap[0],
+        f"Got: {valid} / {sections} / {values} / {keys} / {idmap}"
+    )
+
+
+def test_share_quota_validation():
+    """Test that share quotas are sizes and project ids are in range and unique"""
+    valid = errors_for('shares', shares=[{'path': '/srv/a', 'quota': '500G'},
+                                         {'path': '/srv/b', 'quota': '1.5TiB', 'project_id': 2000}])
+    invalid = errors_for('shares', shares=[{'path': '/srv/a', 'quota': 'lots'},
+                                           {'path': '/srv/b', 'quota': True, 'project_id': 0}])
+    duplicate = errors_for('shares', shares=[{'path': '/srv/a', 'project_id': 2000},
+                                             {'path': '/srv/b', 'project_id': 2000}])
+
+    return print_test(
+        "Share quotas and project ids are validated",
+        valid == [] and len(invalid) == 3 and 'lots' in invalid[0]
+        and len(duplicate) == 1 and 'duplicates' in duplicate[0],
+        f"Got: {valid} / {invalid} / {duplicate}"
+    )
+
+
+def test_share_storage_validation():
+    """Test that storage volumes need a device or a volume group and a known profile"""
+    profiles = {'default': {'fstype': 'xfs', 'mount_options': ['noatime']}}
+    valid = errors_for('shares', shares_storage_profiles=profiles, shares_storage=[
+        {'name': 'builds', 'vg': 'data', 'size': '100%FREE', 'mountpoint': '/srv/shares/builds'},
+        {'name': 'media', 'device': '/dev/md0', 'mountpoint': '/srv/shares/media', 'mount_options': ['prjquota']},
+    ])
+    invalid = errors_for('shares', shares_storage_profiles=profiles, shares_storage=[
+        {'name': 'both', 'device': '/dev/sdb', 'vg': 'data', 'size': '1T', 'mountpoint': '/srv/a'},
+        {'name': 'nosize', 'vg': 'data', 'mountpoint': '/srv/b'},
+        {'name': 'btrfs', 'device': '/dev/sdc', 'fstype': 'btrfs', 'mountpoint': '/srv/c'},
+    ])
+    profile = errors_for('shares', shares_storage_profiles=profiles, shares_storage=[
+        {'name': 'builds', 'device': '/dev/sdb', 'mountpoint': '/srv/a', 'profile': 'fast'},
+    ])
+
+    return print_test(
+        "Share storage volumes and profiles are validated",
+        valid == [] and len(invalid) == 3 and 'either device or vg' in invalid[0] and 'size' in invalid[1]
+        and 'fstype' in invalid[2] and len(profile) == 1 and "'fast'" in profile[0],
+        f"Got: {valid} / {invalid} / {profile}"
+    )
+
+
+def test_kdc_replication_validation():
+    """Test that KDC lists, propagation settings and replica uniqueness are validated"""
+    valid = errors_for('kerberos-kdc', kdc_replicas=['kdc2.cube.k8s:8888', {'host': 'kdc3.cube.k8s', 'site': 'b'}],
+                       kdc_propagation='kprop')
+    invalid = errors_for('kerberos-kdc', kdc_replicas=['kdc2 cube', {'host': 'kdc3', 'zone': 'b'}],
+                         kdc_propagation='rsync')
+    overlap = errors_for('kerberos-kdc', kdc_replicas=['kdc.cube.k8s', 'kdc2.cube.k8s', 'kdc2.cube.k8s:89'])
+    clients = errors_for('kerberos-client', krb5_kdcs=[{'host': 'kdc2', 'port': 0}])
+
+    return print_test(
+        "KDC replication settings are validated",
+        valid == [] and len(invalid) == 3 and 'zone' in invalid[1]
+        and len(overlap) == 2 and 'is the primary' in overlap[0] and 'duplicates' in overlap[1]
+        and len(clients) == 1 and 'port' in clients[0],
+        f"Got: {valid} / {invalid} / {overlap} / {clients}"
+    )
 
 
 def test_absolute_path_validation():
-    """Test that roles validate absolute paths"""
-    try:
-        roles_with_paths = {
-            'kerberos-client': 'krb5_keytab_path',
-            'samba': 'path',
-            'nfs-server': 'path',
-            'shares': 'path'
-        }
-        
-        all_validate_paths = True
-        
-        for role, path_var in roles_with_paths.items():
-            with open(f"roles/{role}/tasks/main.yml", 'r') as f:
-                content = f.read()
-            
-            # Check for absolute path validation (starts with /)
-            if "is match('^/')" not in content:
-                all_validate_paths = False
-                break
-        
-        return print_test(
-            "Roles validate absolute paths",
-            all_validate_paths,
-            "Some roles don't validate absolute paths"
-        )
-    except Exception as e:
-        return print_test("Absolute path validation", False, str(e))
+    """Test that the schema validates absolute paths for every role"""
+    cases = {
+        'kerberos-client': {'krb5_keytab_path': 'etc/krb5.keytab'},
+        'samba': {'samba_shares': [{'name': 'data', 'path': 'srv/data'}]},
+        'nfs-server': {'nfs_exports': [{'path': 'srv/data', 'clients': [{'host': '*', 'options': 'sec=krb5'}]}]},
+        'shares': {'shares': [{'path': 'srv/data'}]},
+    }
+    failing = [
+        role for role, overrides in cases.items()
+        if not any('absolute path' in error for error in errors_for(role, **overrides))
+    ]
+
+    return print_test(
+        "Schema validates absolute paths",
+        not failing,
+        f"Relative paths accepted for: {failing}"
+    )
 
 
 def test_validation_tags():
@@ -281,7 +415,7 @@ def test_validation_tags():
                 content = f.read()
             
             # Check if validation tasks have validation tag
-            if 'ansible.builtin.assert' in content and '- validation' not in content:
+            if 'validate_storage_config' in content and '- validation' not in content:
                 all_have_validation_tag = False
                 break
         
@@ -307,15 +441,26 @@ def main():
     
     tests = [
         test_kerberos_validation_tasks_exist,
+        test_kdc_validation_tasks_exist,
         test_samba_validation_tasks_exist,
         test_nfs_validation_tasks_exist,
+        test_nfs_client_validation_tasks_exist,
         test_shares_validation_tasks_exist,
-        test_validation_uses_assert_module,
-        test_validation_has_fail_messages,
+        test_schema_covers_role_variables,
+        test_valid_configuration_passes,
+        test_validation_reports_all_errors,
         test_kerberos_realm_format_validation,
         test_service_principal_format_validation,
+        test_credential_cache_validation,
         test_samba_security_mode_validation,
+        test_samba_performance_validation,
         test_nfs_kerberos_security_validation,
+        test_nfs_fsid_uniqueness_validation,
+        test_nfs_server_tuning_validation,
+        test_nfs_daemon_config_validation,
+        test_share_quota_validation,
+        test_share_storage_validation,
+        test_kdc_replication_validation,
         test_absolute_path_validation,
         test_validation_tags,
     ]
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Converge Profile Tests
+
+These tests verify module_utils/converge_profile.py, the store behind the
+converge_profile callback plugin and scripts/converge-report.py: saving
+runs to SQLite and JSON stores, the top-N report and the run diff.
+
+Run with: python3 tests/test_converge_profile.py
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / 'module_utils'))
+
+import converge_profile  # noqa: E402
+
+
+class Colors:
+    GREEN = '\033[0;32m'
+    RED = '\033[0;31m'
+    YELLOW = '\033[1;33m'
+    NC = '\033[0m'  # No Color
+
+
+def print_test(name, passed, message=""):
+    """Print test result with color"""
+    status = f"{Colors.GREEN}✓ PASS{Colors.NC}" if passed else f"{Colors.RED}✗ FAIL{Colors.NC}"
+    print(f"{status}: {name}")
+    if message and not passed:
+        print(f"  {Colors.YELLOW}→{Colors.NC} {message}")
+    return passed
+
+
+def make_run(apt_seconds, lineinfile_seconds, hosts=('fs1', 'fs2')):
+    timings = []
+    for host in hosts:
+        timings.append({'host': host, 'role': 'common', 'task': 'Install packages', 'item': '',
+                        'seconds': apt_seconds, 'status': 'ok'})
+        timings.append({'host': host, 'role': 'nfs-server', 'task': 'Configure nfs.conf', 'item': '',
+                        'seconds': lineinfile_seconds * 2, 'status': 'changed'})
+        for item in ('threads', 'rdma'):
+            timings.append({'host': host, 'role': 'nfs-server', 'task': 'Configure nfs.conf', 'item': item,
+                            'seconds': lineinfile_seconds, 'status': 'changed'})
+        timings.append({'host': host, 'role': '', 'task': 'Gathering Facts', 'item': '',
+                        'seconds': 0.5, 'status': 'ok'})
+    return {'playbook': 'site.yml', 'label': '', 'started': 1000.0, 'finished': 1060.0, 'timings': timings}
+
+
+def test_runs_round_trip_through_both_stores():
+    """Test that SQLite and JSON stores keep runs in order and export them unchanged"""
+    directory = tempfile.mkdtemp()
+    results = []
+    for name in ('profile.db', 'profile.json'):
+        path = os.path.join(directory, name)
+        first, second = make_run(10.0, 1.0), make_run(12.0, 1.0, hosts=('fs1',))
+        converge_profile.save_run(path, first)
+        converge_profile.save_run(path, second)
+        conn = converge_profile.open_store(path)
+        runs = converge_profile.list_runs(conn)
+        latest = converge_profile.resolve_run(conn, -1)
+        results.append(
+            [(run['hosts'], run['tasks'], run['seconds']) for run in runs] == [(2, 6, 60.0), (1, 3, 60.0)]
+            and latest == runs[-1]['id']
+            and converge_profile.resolve_run(conn, -2) == runs[0]['id']
+            and converge_profile.export_run(conn, latest) == second
+        )
+        conn.close()
+    assert print_test("Runs round-trip through SQLite and JSON stores", all(results), f"Got: {results}")
+
+
+def test_top_report():
+    """Test that the top report orders groups by total time with per-host mean and max"""
+    path = os.path.join(tempfile.mkdtemp(), 'profile.db')
+    converge_profile.save_run(path, make_run(10.0, 1.5))
+    conn = converge_profile.open_store(path)
+    run_id = converge_profile.resolve_run(conn, -1)
+    tasks = converge_profile.top(conn, run_id, 'task', limit=2)
+    items = converge_profile.top(conn, run_id, 'item')
+    roles = dict(converge_profile.top(conn, run_id, 'role'))
+    passed = (
+        [key for key, _ in tasks] == ['common : Install packages', 'nfs-server : Configure nfs.conf']
+        and tasks[0][1] == {'total': 20.0, 'mean': 10.0, 'max': 10.0, 'count': 2}
+        and [key for key, _ in items] == ['nfs-server : Configure nfs.conf [rdma]',
+                                          'nfs-server : Configure nfs.conf [threads]']
+        and roles['']['total'] == 1.0
+    )
+    conn.close()
+    assert print_test("Top report lists the slowest tasks, loop items and roles", passed,
+                      f"tasks={tasks} items={items}")
+
+
+def test_diff_flags_regressions():
+    """Test that the diff compares per-host means and flags slowdowns past the threshold"""
+    path = os.path.join(tempfile.mkdtemp(), 'profile.db')
+    converge_profile.save_run(path, make_run(10.0, 1.0))
+    # Half the hosts: totals halve, but the per-host mean of the slow task grows
+    converge_profile.save_run(path, make_run(15.0, 1.05, hosts=('fs1',)))
+    conn = converge_profile.open_store(path)
+    rows = {row['key']: row for row in converge_profile.diff(conn, 1, 2, threshold=0.2, min_seconds=1.0)}
+    conn.close()
+    passed = (
+        rows['common : Install packages']['regression']
+        and rows['common : Install packages']['delta'] == 5.0
+        and rows['common : Install packages']['change'] == 0.5
+        and not rows['nfs-server : Configure nfs.conf']['regression']
+        and not rows['Gathering Facts']['regression']
+    )
+    try:
+        converge_profile.diff(converge_profile.open_store(path), 1, 2, by='playbook')
+        passed = False
+    except ValueError:
+        pass
+    assert print_test("Diff flags per-host slowdowns past the threshold", passed, f"Got: {rows}")
+
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("Converge Profile Tests")
+    print("=" * 60)
+    print()
+
+    tests = [
+        test_runs_round_trip_through_both_stores,
+        test_top_report,
+        test_diff_flags_regressions,
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            test()
+            results.append(True)
+        except AssertionError:
+            results.append(False)
+        except Exception as e:
+            print_test(test.__name__, False, str(e))
+            results.append(False)
+
+    print()
+    print("=" * 60)
+    passed = sum(results)
+    total = len(results)
+
+    if passed == total:
+        print(f"{Colors.GREEN}All tests passed! ({passed}/{total}){Colors.NC}")
+        return 0
+    else:
+        print(f"{Colors.RED}Some tests failed. ({passed}/{total} passed){Colors.NC}")
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Health Check Runner Tests
+
+These tests verify module_utils/health_checks.py: checks derived from the
+role variables, every check type run against localhost, and the bounded
+host pool with its JSON-ready results and JUnit report.
+
+Run with: python3 tests/test_health_checks.py
+"""
+
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from xml.etree import ElementTree
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / 'module_utils'))
+
+import health_checks  # noqa: E402
+
+LOCAL = {'ansible_connection': 'local'}
+
+
+class Colors:
+    GREEN = '\033[0;32m'
+    RED = '\033[0;31m'
+    YELLOW = '\033[1;33m'
+    NC = '\033[0m'  # No Color
+
+
+def print_test(name, passed, message=""):
+    """Print test result with color"""
+    status = f"{Colors.GREEN}✓ PASS{Colors.NC}" if passed else f"{Colors.RED}✗ FAIL{Colors.NC}"
+    print(f"{status}: {name}")
+    if message and not passed:
+        print(f"  {Colors.YELLOW}→{Colors.NC} {message}")
+    return passed
+
+
+def listening_socket():
+    server = socket.socket()
+    server.bind(('127.0.0.1', 0))
+    server.listen()
+    return server, server.getsockname()[1]
+
+
+def test_checks_derived_from_role_variables():
+    """Test that checks follow the roles and the variables the roles deploy from"""
+    values = {
+        'krb5_keytab_path': '/etc/krb5.keytab',
+        'krb5_kdcs': ['kdc.cube.k8s', 'kdc2.cube.k8s:8888', {'host': 'kdc3.cube.k8s', 'site': 'b'}],
+        'kdc_is_replica': True,
+        'nfs_exports': [{'path': '/srv/shares/socialpro', 'clients': []}],
+        'nfs_client_mounts': [{'src': 'fs:/srv/a', 'path': '/mnt/a'}, {'src': 'fs:/srv/b', 'path': '/mnt/b',
+                                                                      'state': 'absent'}],
+        'shares': [{'path': '/srv/shares/socialpro'}],
+    }
+    checks = health_checks.derive_checks(
+        ['kerberos-client', 'kerberos-kdc', 'nfs-server', 'nfs-client', 'shares'], values)
+    names = [check['name'] for check in checks]
+    kdcs = [(check['host'], check['port']) for check in checks if check['type'] == 'connect']
+
+    passed = (
+        kdcs == [('kdc.cube.k8s', 88), ('kdc2.cube.k8s', 8888), ('kdc3.cube.k8s', 88)]
+        and 'krb5-admin-server service' not in names
+        and names.count('rpc-gssd service') == 1
+        and 'export /srv/shares/socialpro' in names and 'share /srv/shares/socialpro' in names
+        and 'mount /mnt/a' in names and 'mount /mnt/b' not in names
+        and health_checks.derive_checks(['common'], values) == []
+    )
+    assert print_test("Checks are derived from the roles' variables", passed, f"names={names} kdcs={kdcs}")
+
+
+def test_localhost_check_types():
+    """Test every check type against localhost in one session"""
+    directory = tempfile.mkdtemp()
+    keytab = os.path.join(directory, 'krb5.keytab')
+    open(keytab, 'w').close()
+    server, port = listening_socket()
+    closed, closed_port = listening_socket()
+    closed.close()
+    checks = [
+        {'name': 'keytab', 'type': 'file', 'path': keytab},
+        {'name': 'missing keytab', 'type': 'file', 'path': os.path.join(directory, 'missing')},
+        {'name': 'share', 'type': 'directory', 'path': directory},
+        {'name': 'listening', 'type': 'listen', 'port': port},
+        {'name': 'not listening', 'type': 'listen', 'port': closed_port},
+        {'name': 'kdc reachable', 'type': 'connect', 'host': '127.0.0.1', 'port': port},
+        {'name': 'kdc down', 'type': 'connect', 'host': '127.0.0.1', 'port': closed_port},
+        {'name': 'root mounted', 'type': 'mount', 'path': '/'},
+        {'name': 'not nfs', 'type': 'mount', 'path': '/', 'fstype': 'nfs-nope'},
+        {'name': 'command', 'type': 'command', 'command': 'test -d /'},
+        {'name': 'typo', 'type': 'servce', 'unit': 'smbd'},
+    ]
+    try:
+        result = health_checks.check_host('localhost', LOCAL, checks)
+    finally:
+        server.close()
+
+    statuses = {check['name']: check['status'] for check in result['checks']}
+    expected = {
+        'keytab': 'pass', 'missing keytab': 'fail', 'share': 'pass', 'listening': 'pass',
+        'not listening': 'fail', 'kdc reachable': 'pass', 'kdc down': 'fail', 'root mounted': 'pass',
+        'not nfs': 'fail', 'command': 'pass', 'typo': 'error',
+    }
+    passed = (
+        result['status'] == 'fail'
+        and statuses == expected
+        and all(check['duration'] >= 0 for check in result['checks'])
+    )
+    assert print_test("Every check type runs against localhost", passed, f"result={result}")
+
+
+def test_fleet_pool_and_reports():
+    """Test that hosts are checked concurrently and reported as JUnit"""
+    directory = tempfile.mkdtemp()
+    checks = [
+        {'name': 'share', 'type': 'directory', 'path': directory},
+        {'name': 'keytab', 'type': 'file', 'path': os.path.join(directory, 'krb5.keytab')},
+        {'name': 'slow', 'type': 'command', 'command': 'sleep 1'},
+    ]
+    jobs = [(f"k8s-worker-{index:02d}", LOCAL, checks) for index in range(24)]
+    jobs.append(('broken', {'ansible_connection': 'local', 'ansible_python_interpreter': '/nonexistent/python3'},
+                 checks))
+    started = time.monotonic()
+    results = health_checks.run_fleet(jobs, forks=25)
+    elapsed = time.monotonic() - started
+    report = ElementTree.fromstring(health_checks.junit_report(results))
+    suites = report.findall('testsuite')
+    ssh = health_checks.host_command('k8s-worker-01', {'ansible_host': '10.0.0.5', 'ansible_user': 'deploy',
+                                                       'ansible_become': True, 'ansible_port': 2222})
+
+    passed = (
+        elapsed < 12
+        and [result['host'] for result in results] == [host for host, _, _ in jobs]
+        and sum(result['status'] == 'fail' for result in results) == 24
+        and results[-1]['status'] == 'unreachable'
+        and len(suites) == 25
+        and suites[0].get('failures') == '1' and float(suites[0].findall('testcase')[2].get('time')) >= 1
+        and suites[-1].find('testcase/error') is not None
+        and 'ControlMaster=auto' in ssh and ssh[-5:] == ['deploy@10.0.0.5', 'sudo', '-n', 'python3', '-']
+        and '2222' in ssh
+    )
+    assert print_test("24 hosts with a 1s check finish together and are reported as JUnit", passed,
+                      f"elapsed={elapsed:.2f}s last={results[-1]} ssh={ssh}")
+
+
+def test_cli_rejects_empty_limit():
+    """Test that health-check.py fails when the limit matches no hosts"""
+    result = subprocess.run(
+        [sys.executable, str(PROJECT_ROOT / 'scripts' / 'health-check.py'), '-l', 'nosuchhost'],
+        capture_output=True, text=True, cwd=str(PROJECT_ROOT),
+    )
+    passed = result.returncode == 2 and 'no hosts matched' in result.stderr
+    assert print_test("An empty limit is an error, not 0/0 healthy", passed, result.stderr or result.stdout)
+
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("Health Check Runner Tests")
+    print("=" * 60)
+    print()
+
+    tests = [
+        test_checks_derived_from_role_variables,
+        test_localhost_check_types,
+        test_fleet_pool_and_reports,
+        test_cli_rejects_empty_limit,
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            test()
+            results.append(True)
+        except AssertionError:
+            results.append(False)
+        except Exception as e:
+            print_test(test.__name__, False, str(e))
+            results.append(False)
+
+    print()
+    print("=" * 60)
+    passed = sum(results)
+    total = len(results)
+
+    if passed == total:
+        print(f"{Colors.GREEN}All tests passed! ({passed}/{total}){Colors.NC}")
+        return 0
+    else:
+        print(f"{Colors.RED}Some tests failed. ({passed}/{total} passed){Colors.NC}")
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+KDC Load Generator Tests
+
+These tests verify module_utils/kdc_load.py, which scripts/kdc-loadtest.py
+uses to point the kerberos-kdc templates at a throwaway KDC and to
+summarise AS/TGS latencies. No KDC is needed: the load runner is driven
+with an in-process task.
+
+Run with: python3 tests/test_kdc_load.py
+"""
+
+import os
+import sys
+import threading
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / 'module_utils'))
+
+import kdc_load  # noqa: E402
+from storage_inventory import STUB_DATE_TIME, load_yaml  # noqa: E402
+from storage_render import template_environment  # noqa: E402
+
+
+class Colors:
+    GREEN = '\033[0;32m'
+    RED = '\033[0;31m'
+    YELLOW = '\033[1;33m'
+    NC = '\033[0m'  # No Color
+
+
+def print_test(name, passed, message=""):
+    """Print test result with color"""
+    status = f"{Colors.GREEN}✓ PASS{Colors.NC}" if passed else f"{Colors.RED}✗ FAIL{Colors.NC}"
+    print(f"{status}: {name}")
+    if message and not passed:
+        print(f"  {Colors.YELLOW}→{Colors.NC} {message}")
+    return passed
+
+
+def test_role_templates_are_localized():
+    """Test that rendered kdc.conf/krb5.conf point at a local port, directory and enctype"""
+    env = template_environment(str(PROJECT_ROOT / 'roles'), 'kerberos-kdc')
+    variables = load_yaml(str(PROJECT_ROOT / 'roles' / 'kerberos-kdc' / 'defaults' / 'main.yml'))
+    variables.update(kdc_realm='LOADTEST.LOCAL', kdc_domain='loadtest.local', kdc_port=18888,
+                     kdc_primary={'host': '127.0.0.1', 'port': 18888}, kdc_site='',
+                     kdc_supported_enctypes=['aes128-cts-hmac-sha1-96:normal'],
+                     ansible_date_time=dict(STUB_DATE_TIME))
+    kdc_conf, krb5_conf = kdc_load.localize_profiles(
+        env.get_template('kdc.conf.j2').render(**variables),
+        env.get_template('krb5.conf.j2').render(**variables),
+        '/tmp/kdc', 'aes128-cts-hmac-sha1-96',
+    )
+    passed = (
+        'database_name = /tmp/kdc/principal' in kdc_conf
+        and 'key_stash_file = /tmp/kdc/.k5.LOADTEST.LOCAL' in kdc_conf
+        and kdc_conf.count('kdc_ports = 18888') == 2
+        and 'kdc_ports = 88' not in kdc_conf
+        and 'kdc = 127.0.0.1:18888' in krb5_conf
+        and 'kdc = FILE:/tmp/kdc/krb5kdc.log' in krb5_conf
+        and 'permitted_enctypes = aes128-cts-hmac-sha1-96\n' in krb5_conf
+        and 'aes256' not in krb5_conf
+    )
+    assert print_test("Role templates are rewritten for a throwaway KDC", passed, krb5_conf)
+
+
+def test_latency_summary():
+    """Test per-type throughput, percentiles and error counts"""
+    samples = [('AS', ms / 1000, True) for ms in range(1, 101)]
+    samples += [('TGS', 0.002, True), ('TGS', 0.004, True), ('TGS', 1.0, False)]
+    summary = kdc_load.summarize(samples, elapsed=2.0)
+    passed = (
+        summary['AS'] == {'requests': 100, 'errors': 0, 'throughput': 50.0,
+                          'p50_ms': 50.0, 'p99_ms': 99.0, 'mean_ms': 50.5}
+        and summary['TGS']['requests'] == 3
+        and summary['TGS']['errors'] == 1
+        and summary['TGS']['p99_ms'] == 4.0
+    )
+    assert print_test("Latency summary reports throughput and p50/p99 per request type", passed, f"Got: {summary}")
+
+
+def test_load_runner_concurrency():
+    """Test that every iteration runs once on at most `concurrency` stable workers"""
+    seen = {}
+    lock = threading.Lock()
+
+    def task(worker, iteration):
+        with lock:
+            seen.setdefault(worker, set()).add(threading.get_ident())
+        return [kdc_load.timed('AS', lambda: iteration % 10 != 0)]
+
+    samples, elapsed = kdc_load.run_load(task, iterations=50, concurrency=4)
+    passed = (
+        len(samples) == 50
+        and sum(1 for s in samples if not s[2]) == 5
+        and set(seen) <= {0, 1, 2, 3}
+        and all(len(threads) == 1 for threads in seen.values())
+        and elapsed > 0
+    )
+    assert print_test("Load runner runs every iteration on stable worker indices", passed, f"Got: {seen}")
+
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("KDC Load Generator Tests")
+    print("=" * 60)
+    print()
+
+    # Change to project root if running from tests directory
+    if Path.cwd().name == 'tests':
+        os.chdir('..')
+
+    tests = [
+        test_role_templates_are_localized,
+        test_latency_summary,
+        test_load_runner_concurrency,
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            test()
+            results.append(True)
+        except AssertionError:
+            results.append(False)
+        except Exception as e:
+            print_test(test.__name__, False, str(e))
+            results.append(False)
+
+    print()
+    print("=" * 60)
+    passed = sum(results)
+    total = len(results)
+
+    if passed == total:
+        print(f"{Colors.GREEN}All tests passed! ({passed}/{total}){Colors.NC}")
+        return 0
+    else:
+        print(f"{Colors.RED}Some tests failed. ({passed}/{total} passed){Colors.NC}")
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Kerberos Administration Helper Tests
+
+These tests exercise the batching logic behind the kadmin_principals module
+(module_utils/kerberos_admin.py) offline, without a KDC.
+
+Run with: python3 tests/test_kerberos_admin.py
+"""
+
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'module_utils'))
+
+import kerberos_admin  # noqa: E402
+
+
+class Colors:
+    GREEN = '\033[0;32m'
+    RED = '\033[0;31m'
+    YELLOW = '\033[1;33m'
+    NC = '\033[0m'  # No Color
+
+
+def print_test(name, passed, message=""):
+    """Print test result with color"""
+    status = f"{Colors.GREEN}✓ PASS{Colors.NC}" if passed else f"{Colors.RED}✗ FAIL{Colors.NC}"
+    print(f"{status}: {name}")
+    if message and not passed:
+        print(f"  {Colors.YELLOW}→{Colors.NC} {message}")
+    return passed
+
+
+LISTPRINCS_OUTPUT = """Authenticating as principal root/admin@CUBE.K8S with password.
+K/M@CUBE.K8S
+admin/admin@CUBE.K8S
+alice@CUBE.K8S
+kadmin/admin@CUBE.K8S
+nfs/file-server.cube.k8s@CUBE.K8S
+"""
+
+
+def test_parse_listprincs():
+    """Test that listprincs output is parsed into principal names"""
+    principals = kerberos_admin.parse_listprincs(LISTPRINCS_OUTPUT)
+    passed = (
+        'alice@CUBE.K8S' in principals
+        and 'nfs/file-server.cube.k8s@CUBE.K8S' in principals
+        and len(principals) == 5
+    )
+    assert print_test("listprincs output is parsed", passed, f"Got: {sorted(principals)}")
+
+
+def test_normalize_principals():
+    """Test that names and user dicts are qualified and de-duplicated"""
+    desired = kerberos_admin.normalize_principals(
+        ['nfs/a.cube.k8s@CUBE.K8S', {'name': 'bob', 'password': 'secret'}, 'bob'],
+        realm='CUBE.K8S',
+    )
+    passed = desired == [
+        ('nfs/a.cube.k8s@CUBE.K8S', None),
+        ('bob@CUBE.K8S', 'secret'),
+    ]
+    assert print_test("Principals are qualified and de-duplicated", passed, f"Got: {desired}")
+
+
+def test_plan_only_creates_missing_principals():
+    """Test that existing principals are not re-created or rekeyed"""
+    existing = kerberos_admin.parse_listprincs(LISTPRINCS_OUTPUT)
+    desired = kerberos_admin.normalize_principals(
+        ['nfs/file-server.cube.k8s@CUBE.K8S', 'cifs/file-server.cube.k8s@CUBE.K8S'],
+    )
+    plan = kerberos_admin.plan_principals(
+        desired, existing, keytab_dir='/keytabs', keytab_exists=lambda path: True,
+    )
+    requests = kerberos_admin.plan_requests(plan)
+    passed = (
+        [entry['create'] for entry in plan] == [False, True]
+        and plan[0]['keytab'] is None
+        and plan[1]['keytab'] == '/keytabs/cifs_file-server.cube.k8s_CUBE.K8S.keytab'
+        and len(requests) == 2
+        and requests[0].startswith('addprinc -randkey')
+        and requests[1].startswith('ktadd -k')
+        and '-norandkey' not in requests[1]
+    )
+    assert print_test("Only missing principals are created and exported", passed, f"Got: {requests}")
+
+
+def test_plan_exports_missing_keytabs():
+    """Test that an existing principal with a missing export file is exported"""
+    desired = kerberos_admin.normalize_principals(['nfs/file-server.cube.k8s@CUBE.K8S'])
+    plan = kerberos_admin.plan_principals(
+        desired, {'nfs/file-server.cube.k8s@CUBE.K8S'}, keytab_dir='/keytabs',
+        keytab_exists=lambda path: False,
+    )
+    requests = kerberos_admin.plan_requests(plan)
+    passed = (
+        not plan[0]['create'] and plan[0]['keytab'] is not None
+        and requests == [
+            'ktadd -k "/keytabs/nfs_file-server.cube.k8s_CUBE.K8S.keytab" -norandkey "nfs/file-server.cube.k8s@CUBE.K8S"',
+        ]
+    )
+    assert print_test("Missing keytab files are re-exported without rekeying", passed, f"Got: {requests}")
+
+
+def test_password_quoting():
+    """Test that passwords with spaces and quotes are quoted for kadmin"""
+    request = kerberos_admin.addprinc_request('alice@CUBE.K8S', 'p a"ss')
+    passed = request == 'addprinc -pw "p a""ss" "alice@CUBE.K8S"'
+    try:
+        kerberos_admin.quote_argument('bad\nvalue')
+        passed = False
+    except ValueError:
+        pass
+    assert print_test("kadmin arguments are quoted safely", passed, f"Got: {request}")
+
+
+def test_batch_script_chunking():
+    """Test that requests are split into bounded kadmin sessions"""
+    requests = [kerberos_admin.addprinc_request(f"user{i}@CUBE.K8S", 'x') for i in range(1201)]
+    chunks = list(kerberos_admin.chunked(requests, 500))
+    script = kerberos_admin.batch_script(chunks[0])
+    passed = (
+        [len(chunk) for chunk in chunks] == [500, 500, 201]
+        and script.endswith('quit\n')
+        and script.count('\n') == 501
+    )
+    assert print_test("Requests are chunked into kadmin sessions", passed)
+
+
+def keytab_entries(kvno=2):
+    """host/ and nfs/ entries for one worker plus an unrelated cifs/ entry"""
+    build = kerberos_admin.build_keytab_entry
+    return [
+        build('host/k8s-worker-01@CUBE.K8S', kvno, 18, b'h' * 32),
+        build('nfs/k8s-worker-01@CUBE.K8S', kvno, 18, b'n' * 32),
+        build('cifs/k8s-worker-01@CUBE.K8S', 1, 18, b'c' * 32),
+    ]
+
+
+def test_keytab_round_trip():
+    """Test that keytabs are parsed, holes skipped and re-rendered byte for byte"""
+    entries = keytab_entries()
+    data = kerberos_admin.render_keytab(entries)
+    # A deleted entry leaves a negative-length hole that must be skipped
+    holed = data[:2] + (-8).to_bytes(4, 'big', signed=True) + b'\0' * 8 + data[2:]
+    parsed = kerberos_admin.parse_keytab(holed)
+    passed = (
+        [(e['principal'], e['kvno'], e['enctype'], e['key']) for e in parsed]
+        == [(e['principal'], e['kvno'], e['enctype'], e['key']) for e in entries]
+        and kerberos_admin.render_keytab(parsed) == data
+    )
+    assert print_test("Keytabs round-trip through parse/render", passed, f"Got: {parsed}")
+
+
+def test_keytab_fingerprint_and_merge():
+    """Test that fingerprints ignore order and unmanaged entries, and merges keep them"""
+    managed = kerberos_admin.client_principals('k8s-worker-01', 'CUBE.K8S')
+    current = keytab_entries(kvno=2)
+    rekeyed = keytab_entries(kvno=3)[:2]
+    fingerprint = kerberos_admin.keytab_fingerprint(current, managed)
+    merged = kerberos_admin.merge_keytab(current, rekeyed, managed)
+    passed = (
+        managed == ['host/k8s-worker-01@CUBE.K8S', 'nfs/k8s-worker-01@CUBE.K8S']
+        and kerberos_admin.keytab_fingerprint(list(reversed(current)), managed) == fingerprint
+        and kerberos_admin.keytab_fingerprint(current[:2]) == fingerprint
+        and kerberos_admin.keytab_fingerprint(rekeyed, managed) != fingerprint
+        and [(e['principal'], e['kvno']) for e in merged] == [
+            ('cifs/k8s-worker-01@CUBE.K8S', 1),
+            ('host/k8s-worker-01@CUBE.K8S', 3),
+            ('nfs/k8s-worker-01@CUBE.K8S', 3),
+        ]
+    )
+    assert print_test("Keytab fingerprints detect rekeys and merges keep other keys", passed)
+
+
+def test_kdc_locality_order():
+    """Test that same-site KDCs come first and ports/duplicates are normalised"""
+    kdcs = [
+        'kdc1.cube.k8s',
+        {'host': 'kdc2.cube.k8s', 'site': 'rack-b'},
+        {'host': 'kdc3.cube.k8s', 'port': 8888, 'site': 'rack-c'},
+        {'host': 'kdc4.cube.k8s', 'port': 88, 'site': 'rack-b'},
+        'kdc1.cube.k8s:88',
+    ]
+    passed = (
+        kerberos_admin.kdc_locality_order(kdcs, 'rack-b') == [
+            'kdc2.cube.k8s', 'kdc4.cube.k8s', 'kdc1.cube.k8s', 'kdc3.cube.k8s:8888',
+        ]
+        and kerberos_admin.kdc_locality_order(kdcs)[:2] == ['kdc1.cube.k8s', 'kdc2.cube.k8s']
+        and kerberos_admin.kdc_hosts(kdcs + ['kdc5.cube.k8s:750'])[-2:] == ['kdc4.cube.k8s', 'kdc5.cube.k8s']
+    )
+    assert print_test("KDCs are ordered by locality", passed)
+
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("Kerberos Administration Helper Tests")
+    print("=" * 60)
+    print()
+
+    # Change to project root if running from tests directory
+    if Path.cwd().name == 'tests':
+        os.chdir('..')
+
+    tests = [
+        test_parse_listprincs,
+        test_normalize_principals,
+        test_plan_only_creates_missing_principals,
+        test_plan_exports_missing_keytabs,
+        test_password_quoting,
+        test_batch_script_chunking,
+        test_keytab_round_trip,
+        test_keytab_fingerprint_and_merge,
+        test_kdc_locality_order,
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            test()
+            results.append(True)
+        except AssertionError:
+            results.append(False)
+        except Exception as e:
+            print_test(test.__name__, False, str(e))
+            results.append(False)
+
+    print()
+    print("=" * 60)
+    passed = sum(results)
+    total = len(results)
+
+    if passed == total:
+        print(f"{Colors.GREEN}All tests passed! ({passed}/{total}){Colors.NC}")
+        return 0
+    else:
+        print(f"{Colors.RED}Some tests failed. ({passed}/{total} passed){Colors.NC}")
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Kerberos Credential Cache Manager Tests
+
+These tests verify module_utils/krb5_credentials.py, the service the
+kerberos-client role runs to keep keytab-backed credential caches valid
+for rpc.gssd: ccache parsing and the jittered schedule, the refresh cycle
+(keytab, renewal, backoff, repair, restart without refetching) against
+simulated kinit/kvno plus the storage-metrics krb5cc collector, and,
+when the MIT krb5 KDC and client tools are installed, real caches from a
+throwaway local KDC.
+
+Run with: python3 tests/test_krb5_credentials.py
+"""
+
+import os
+import random
+import shutil
+import stat
+import struct
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / 'module_utils'))
+
+import kdc_load  # noqa: E402
+import krb5_credentials  # noqa: E402
+import storage_metrics  # noqa: E402
+
+REALM = 'CUBE.K8S'
+HOST = f"host/k8s-worker-01.cube.k8s@{REALM}"
+NFS = f"nfs/file-server.cube.k8s@{REALM}"
+TGT = f"krbtgt/{REALM}@{REALM}"
+LIFETIME = 24 * 3600
+RENEWABLE = 7 * 24 * 3600
+
+
+class Colors:
+    GREEN = '\033[0;32m'
+    RED = '\033[0;31m'
+    YELLOW = '\033[1;33m'
+    NC = '\033[0m'  # No Color
+
+
+def print_test(name, passed, message=""):
+    """Print test result with color"""
+    status = f"{Colors.GREEN}✓ PASS{Colors.NC}" if passed else f"{Colors.RED}✗ FAIL{Colors.NC}"
+    print(f"{status}: {name}")
+    if message and not passed:
+        print(f"  {Colors.YELLOW}→{Colors.NC} {message}")
+    return passed
+
+
+def _counted(data):
+    return struct.pack('>I', len(data)) + data
+
+
+def _principal(name):
+    components, _, realm = name.rpartition('@')
+    parts = components.split('/')
+    return struct.pack('>II', 1, len(parts)) + _counted(realm.encode()) + b''.join(
+        _counted(part.encode()) for part in parts)
+
+
+def write_ccache(path, principal, credentials):
+    """Write an MIT format 4 cache with (server, starttime, endtime, renew_till) credentials"""
+    data = b'\x05\x04' + struct.pack('>HHH', 12, 1, 8) + b'\x00' * 8 + _principal(principal)
+    for server, starttime, endtime, renew_till in credentials:
+        data += _principal(principal) + _principal(server) + struct.pack('>H', 18) + _counted(b'k' * 32)
+        data += struct.pack('>IIIIBIII', starttime, starttime, endtime, renew_till, 0, 0x40e10000, 0, 0)
+        data += _counted(b'ticket') + _counted(b'')
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def cache_entries(path):
+    return [(c['server'], c['starttime'], c['endtime'], c['renew_till'])
+            for c in krb5_credentials.read_ccache(path)['credentials']]
+
+
+class FakeKerberos:
+    """Simulated kinit -k, kinit -R and kvno writing real cache files"""
+
+    def __init__(self, now):
+        self.now = now
+        self.requests = []
+        self.fail = False
+
+    def __call__(self, command, **kwargs):
+        path = command[command.index('-c') + 1][len('FILE:'):]
+        now = int(self.now)
+        if self.fail:
+            return subprocess.CompletedProcess(command, 1, '', 'Cannot contact any KDC for realm')
+        if command[:2] == ['kinit', '-k']:
+            self.requests.append('AS')
+            write_ccache(path, command[-1], [(TGT, now, now + LIFETIME, now + RENEWABLE)])
+        elif command[:2] == ['kinit', '-R']:
+            self.requests.append('TGS')
+            principal = krb5_credentials.read_ccache(path)['principal']
+            renew_till = dict((e[0], e[3]) for e in cache_entries(path))[TGT]
+            write_ccache(path, principal, [(TGT, now, min(now + LIFETIME, renew_till), renew_till)])
+        elif command[0] == 'kvno':
+            self.requests.append('TGS')
+            principal = krb5_credentials.read_ccache(path)['principal']
+            entries = cache_entries(path)
+            tgt = [e for e in entries if e[0] == TGT][0]
+            write_ccache(path, principal, entries + [(command[-1], now, tgt[2], 0)])
+        return subprocess.CompletedProcess(command, 0, '', '')
+
+
+def test_ccache_parsing_and_schedule():
+    """Test cache parsing and that refreshes of a fleet spread over the jitter window"""
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'krb5cc_0')
+    now = 1_800_000_000
+    write_ccache(path, HOST, [(f"krb5_ccache_conf_data/pa_type/{TGT[:-len(REALM) - 1]}@X-CACHECONF:", 0, 0, 0),
+                              (TGT, now - 3600, now + LIFETIME - 3600, now + RENEWABLE),
+                              (NFS, now - 3600, now + LIFETIME - 3600, 0)])
+    cache = krb5_credentials.read_ccache(path)
+    times = krb5_credentials.tgt_times(path, HOST, now)
+    expired = krb5_credentials.tgt_times(path, HOST, now + LIFETIME)
+    other = krb5_credentials.tgt_times(path, f"host/other@{REALM}", now)
+    with open(path, 'r+b') as f:
+        f.truncate(60)
+    truncated = krb5_credentials.tgt_times(path, HOST, now)
+    shutil.rmtree(directory)
+
+    # 500 nodes whose tickets were all issued at the same moment (a mass reboot)
+    rng = random.Random(7)
+    refreshes = sorted(krb5_credentials.next_refresh(now, now + LIFETIME, now, 0.6, 0.15, rng) - now
+                       for _ in range(500))
+    buckets = {int(offset // 3600) for offset in refreshes}
+    delays = [krb5_credentials.retry_delay(failures, 15, 900, rng) for failures in (1, 2, 3, 10)]
+
+    passed = (
+        cache['principal'] == HOST and [c['server'] for c in cache['credentials']] == [TGT, NFS]
+        and times == (now - 3600, now + LIFETIME - 3600, now + RENEWABLE)
+        and expired is None and other is None and truncated is None
+        and refreshes[0] >= 0.45 * LIFETIME and refreshes[-1] <= 0.75 * LIFETIME
+        and len(buckets) >= 7
+        and 7.5 <= delays[0] <= 15 and 15 <= delays[1] <= 30 and 30 <= delays[2] <= 60 and 450 <= delays[3] <= 900
+    )
+    assert print_test("Caches are parsed and refreshes spread over the jitter window", passed,
+                      f"cache={cache} times={times} spread={refreshes[0]}..{refreshes[-1]} "
+                      f"buckets={len(buckets)} delays={delays}")
+
+
+def test_refresh_cycle():
+    """Test keytab fetch, restart without refetching, renewal, backoff, repair and metrics"""
+    directory = tempfile.mkdtemp()
+    t0 = 1_800_000_000
+    kerberos = FakeKerberos(t0)
+    config = {
+        'keytab': '/etc/krb5.keytab',
+        'ccache_dir': os.path.join(directory, 'ccache'),
+        'status_file': os.path.join(directory, 'status.json'),
+        'startup_splay': 120,
+        'credentials': [{'principal': HOST, 'uid': 0, 'services': [NFS]}],
+    }
+
+    def manager(seed):
+        return krb5_credentials.CredentialManager(config, runner=kerberos, rng=random.Random(seed),
+                                                  clock=lambda: kerberos.now)
+
+    try:
+        first = manager(1)
+        first.schedule(t0)
+        splay = first.entries[0]['next_refresh'] - t0
+        early = first.refresh_due(t0)
+        kerberos.now = t0 + 121
+        fetched = first.refresh_due()
+        first.write_status()
+        ccache = first.entries[0]['ccache']
+        fetched_entries = [e[0] for e in cache_entries(ccache)]
+        mode = stat.S_IMODE(os.stat(ccache).st_mode)
+        requests_after_fetch = list(kerberos.requests)
+
+        # Service restart (or node reboot with the cache directory kept): nothing is refetched
+        kerberos.now = t0 + 600
+        second = manager(2)
+        second.schedule(kerberos.now)
+        restarted = second.refresh_due()
+        due = second.entries[0]['next_refresh']
+
+        kerberos.now = due
+        renewed = second.refresh_due()
+        method = second.entries[0]['last_method']
+
+        kerberos.fail = True
+        kerberos.now = second.entries[0]['next_refresh']
+        failed = second.refresh_due()
+        backoff = second.entries[0]['next_refresh'] - kerberos.now
+        still_valid = krb5_credentials.tgt_times(ccache, HOST, kerberos.now) is not None
+        kerberos.fail = False
+
+        kerberos.now += backoff
+        recovered = second.refresh_due()
+        os.unlink(ccache)
+        kerberos.now += 10
+        second.refresh_due()
+        repair_delay = second.entries[0]['next_refresh'] - kerberos.now
+        kerberos.now += repair_delay
+        repaired = second.refresh_due()
+        second.write_status(kerberos.now)
+        metrics = storage_metrics.MetricSet()
+        storage_metrics.collect_krb5cc(metrics, config['status_file'], now=kerberos.now + 5)
+        text = metrics.render()
+    finally:
+        shutil.rmtree(directory)
+
+    labels = f'principal="{HOST}",uid="0"'
+    refreshes = 'cube_storage_krb5cc_refreshes_total{{method="{}",principal="%s",result="{}",uid="0"}} {}' % HOST
+    passed = (
+        0 <= splay <= 120 and early == (0, 0) and fetched == (1, 0)
+        and fetched_entries == [TGT, NFS] and mode == 0o600
+        and requests_after_fetch == ['AS', 'TGS']
+        and restarted == (0, 0) and 0.45 * LIFETIME <= due - (t0 + 121) <= 0.75 * LIFETIME
+        and renewed == (1, 0) and method == 'renew'
+        and failed == (0, 1) and 7.5 <= backoff <= 15 and still_valid
+        and recovered == (1, 0) and 0 <= repair_delay <= 15 and repaired == (1, 0)
+        and refreshes.format('keytab', 'success', 2) in text and refreshes.format('keytab', 'failure', 1) in text
+        and refreshes.format('renew', 'success', 2) in text and refreshes.format('renew', 'failure', 1) in text
+        and f'cube_storage_krb5cc_valid{{{labels}}} 1' in text
+        and 'cube_storage_krb5cc_status_age_seconds 5' in text
+    )
+    assert print_test("Caches are fetched once, renewed on a jittered schedule and repaired", passed,
+                      f"splay={splay} fetched={fetched} {fetched_entries} mode={oct(mode)} due={due - t0} restarted={restarted} renewed={renewed}/{method} "
+                      f"failed={failed} backoff={backoff} valid={still_valid} recovered={recovered} repair={repair_delay} repaired={repaired} requests={kerberos.requests}\n{text}")
+
+
+def test_local_kdc():
+    """Test real caches from a throwaway KDC built from the kerberos-kdc role templates"""
+    missing = [tool for tool in kdc_load.REQUIRED_TOOLS if not shutil.which(tool)]
+    if missing:
+        print(f"{Colors.YELLOW}- SKIP{Colors.NC}: local KDC test (needs {', '.join(missing)})")
+        return
+    directory = tempfile.mkdtemp(prefix='krb5-credentials-')
+    port = kdc_load.free_port()
+    kdc = kdc_load.LocalKDC('aes256-cts-hmac-sha1-96', os.path.join(directory, 'kdc'), port,
+                            {'kdc_primary': {'host': '127.0.0.1', 'port': port}, 'kdc_replicas': []})
+    host = f"host/node.{kdc_load.DOMAIN}@{kdc_load.REALM}"
+    service = f"nfs/fileserver.{kdc_load.DOMAIN}@{kdc_load.REALM}"
+    config = {
+        'keytab': kdc.keytab,
+        'ccache_dir': os.path.join(directory, 'ccache'),
+        'status_file': os.path.join(directory, 'status.json'),
+        'credentials': [{'principal': host, 'uid': os.getuid(), 'services': [service]}],
+    }
+    try:
+        kdc.create(os.urandom(12).hex(), [host, service])
+        kdc.start()
+        first = krb5_credentials.CredentialManager(config, env=kdc.env)
+        first.schedule(first.clock(), splay=0)
+        fetched = first.refresh_due()
+        cache = krb5_credentials.read_ccache(first.entries[0]['ccache'])
+        second = krb5_credentials.CredentialManager(config, env=kdc.env)
+        second.schedule(second.clock(), splay=0)
+        again = second.refresh_due()
+        klist = subprocess.run(['klist', '-s', '-c', f"FILE:{first.entries[0]['ccache']}"], env=kdc.env)
+    finally:
+        kdc.stop()
+        shutil.rmtree(directory, ignore_errors=True)
+
+    servers = [credential['server'] for credential in cache['credentials']]
+    passed = (
+        fetched == (1, 0) and again == (0, 0) and cache['principal'] == host
+        and f"krbtgt/{kdc_load.REALM}@{kdc_load.REALM}" in servers and service in servers
+        and klist.returncode == 0
+    )
+    assert print_test("Local KDC issues the TGT and service ticket into the cache", passed,
+                      f"fetched={fetched} again={again} cache={cache}")
+
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("Kerberos Credential Cache Manager Tests")
+    print("=" * 60)
+    print()
+
+    tests = [
+        test_ccache_parsing_and_schedule,
+        test_refresh_cycle,
+        test_local_kdc,
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            test()
+            results.append(True)
+        except AssertionError:
+            results.append(False)
+        except Exception as e:
+            print_test(test.__name__, False, str(e))
+            results.append(False)
+
+    print()
+    print("=" * 60)
+    passed = sum(results)
+    total = len(results)
+
+    if passed == total:
+        print(f"{Colors.GREEN}All tests passed! ({passed}/{total}){Colors.NC}")
+        return 0
+    else:
+        print(f"{Colors.RED}Some tests failed. ({passed}/{total} passed){Colors.NC}")
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
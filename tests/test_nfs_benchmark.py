@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+NFS Benchmark Tests
+
+These tests verify module_utils/nfs_benchmark.py (workloads, case matrix
+and baseline comparison) and scripts/nfs-benchmark.py in --local mode,
+which runs the same workloads in a plain directory without NFS or root.
+
+Run with: python3 tests/test_nfs_benchmark.py
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / 'module_utils'))
+
+import nfs_benchmark  # noqa: E402
+
+BENCHMARK = str(PROJECT_ROOT / 'scripts' / 'nfs-benchmark.py')
+TINY_SIZES = {'file_mb': 2, 'small_files': 20, 'readers': 2, 'reader_mb': 1}
+
+
+class Colors:
+    GREEN = '\033[0;32m'
+    RED = '\033[0;31m'
+    YELLOW = '\033[1;33m'
+    NC = '\033[0m'  # No Color
+
+
+def print_test(name, passed, message=""):
+    """Print test result with color"""
+    status = f"{Colors.GREEN}✓ PASS{Colors.NC}" if passed else f"{Colors.RED}✗ FAIL{Colors.NC}"
+    print(f"{status}: {name}")
+    if message and not passed:
+        print(f"  {Colors.YELLOW}→{Colors.NC} {message}")
+    return passed
+
+
+def test_workloads_run_and_clean_up():
+    """Test that every workload reports a rate and leaves the directory empty"""
+    with tempfile.TemporaryDirectory() as directory:
+        results = nfs_benchmark.run_workloads(directory, sizes=TINY_SIZES)
+        leftovers = os.listdir(directory)
+    metrics = [f"{r['workload']}.{r['metric']}" for r in results]
+    passed = (
+        metrics == [
+            'seq_write.throughput', 'seq_read.throughput',
+            'small_files.create', 'small_files.stat', 'small_files.unlink',
+            'parallel_read.throughput',
+        ]
+        and all(r['value'] > 0 for r in results)
+        and leftovers == []
+    )
+    assert print_test("Workloads report positive rates and clean up", passed, f"Got: {results} {leftovers}")
+
+
+def test_existing_files_survive():
+    """Test that files already in the directory are neither overwritten nor removed"""
+    with tempfile.TemporaryDirectory() as directory:
+        for name in ('foo.dat', 'seq.dat'):
+            with open(os.path.join(directory, name), 'w') as f:
+                f.write(f"user data in {name}")
+        nfs_benchmark.run_workloads(directory, ['seq_write', 'seq_read', 'parallel_read'], TINY_SIZES)
+        contents = {}
+        for name in sorted(os.listdir(directory)):
+            with open(os.path.join(directory, name)) as f:
+                contents[name] = f.read()
+    passed = contents == {'foo.dat': 'user data in foo.dat', 'seq.dat': 'user data in seq.dat'}
+    assert print_test("Existing files in the directory are left alone", passed, f"Got: {contents}")
+
+
+def test_case_matrix():
+    """Test that security flavors are crossed with the option sweeps"""
+    variants = nfs_benchmark.sweep_variants(
+        [65536], [4], {'default': [], 'throughput': ['sec=sys', 'nconnect=8']},
+    )
+    cases = nfs_benchmark.mount_cases(['sys', 'krb5p'], variants)
+    ids = [case['id'] for case in cases]
+    by_id = {case['id']: case['options'] for case in cases}
+    passed = (
+        ids == [
+            'sys/defaults', 'sys/rwsize=65536', 'sys/nconnect=4', 'sys/profile=throughput',
+            'krb5p/defaults', 'krb5p/rwsize=65536', 'krb5p/nconnect=4', 'krb5p/profile=throughput',
+        ]
+        and by_id['krb5p/profile=throughput'] == ['sec=krb5p', 'nconnect=8']
+        and by_id['sys/rwsize=65536'] == ['sec=sys', 'rsize=65536', 'wsize=65536']
+    )
+    assert print_test("Cases cross sec flavors with rsize/nconnect/profile variants", passed, f"Got: {ids}")
+
+
+def test_baseline_comparison():
+    """Test that drops beyond the threshold are regressions and gains are not"""
+    def report(seq, create):
+        return {'cases': [
+            {'id': 'sys/defaults', 'results': [
+                {'workload': 'seq_read', 'metric': 'throughput', 'value': seq, 'unit': 'MiB/s'},
+                {'workload': 'small_files', 'metric': 'create', 'value': create, 'unit': 'ops/s'},
+            ]},
+            {'id': 'krb5/defaults', 'error': 'mount.nfs4: access denied'},
+        ]}
+
+    rows = nfs_benchmark.compare(report(800, 1000), report(1000, 900), threshold=10)
+    by_key = {row['key']: row for row in rows}
+    passed = (
+        len(rows) == 2
+        and by_key['sys/defaults:seq_read.throughput']['regression'] is True
+        and by_key['sys/defaults:seq_read.throughput']['change'] == -20.0
+        and by_key['sys/defaults:small_files.create']['regression'] is False
+    )
+    assert print_test("Baseline comparison flags regressions only", passed, f"Got: {rows}")
+
+
+def test_local_mode_cli():
+    """Test the CLI without NFS: JSON report, baseline update and comparison"""
+    with tempfile.TemporaryDirectory() as directory:
+        workdir = os.path.join(directory, 'data')
+        os.mkdir(workdir)
+        baseline = os.path.join(directory, 'baseline.json')
+        output = os.path.join(directory, 'report.json')
+        common = [sys.executable, BENCHMARK, '--local', workdir, '--baseline', baseline,
+                  '--file-mb', '2', '--small-files', '20', '--readers', '2', '--reader-mb', '1',
+                  '--workloads', 'seq_write,small_files']
+        first = subprocess.run(common + ['--update-baseline'], capture_output=True, text=True)
+        second = subprocess.run(common + ['--output', output, '--threshold', '100'], capture_output=True, text=True)
+        with open(output) as f:
+            report = json.load(f)
+    passed = (
+        first.returncode == 0
+        and second.returncode == 0
+        and 'Comparison with' in second.stdout
+        and report['meta']['mode'] == 'local'
+        and len(report['cases'][0]['results']) == 4
+    )
+    assert print_test("nfs-benchmark.py --local writes and compares reports", passed,
+                      first.stderr or second.stderr or second.stdout)
+
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("NFS Benchmark Tests")
+    print("=" * 60)
+    print()
+
+    tests = [
+        test_workloads_run_and_clean_up,
+        test_existing_files_survive,
+        test_case_matrix,
+        test_baseline_comparison,
+        test_local_mode_cli,
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            test()
+            results.append(True)
+        except AssertionError:
+            results.append(False)
+        except Exception as e:
+            print_test(test.__name__, False, str(e))
+            results.append(False)
+
+    print()
+    print("=" * 60)
+    passed = sum(results)
+    total = len(results)
+
+    if passed == total:
+        print(f"{Colors.GREEN}All tests passed! ({passed}/{total}){Colors.NC}")
+        return 0
+    else:
+        print(f"{Colors.RED}Some tests failed. ({passed}/{total} passed){Colors.NC}")
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
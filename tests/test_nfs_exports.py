@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+NFS Exports Parser and Differ Tests
+
+These tests verify module_utils/nfs_exports.py, which backs the exportfs_sync
+module used by the nfs-server "reload nfs exports" handler, against the sample
+exports files in tests/fixtures/exports.
+
+Run with: python3 tests/test_nfs_exports.py
+"""
+
+import os
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / 'module_utils'))
+
+import nfs_exports  # noqa: E402
+
+FIXTURES = PROJECT_ROOT / 'tests' / 'fixtures' / 'exports'
+
+
+class Colors:
+    GREEN = '\033[0;32m'
+    RED = '\033[0;31m'
+    YELLOW = '\033[1;33m'
+    NC = '\033[0m'  # No Color
+
+
+def print_test(name, passed, message=""):
+    """Print test result with color"""
+    status = f"{Colors.GREEN}✓ PASS{Colors.NC}" if passed else f"{Colors.RED}✗ FAIL{Colors.NC}"
+    print(f"{status}: {name}")
+    if message and not passed:
+        print(f"  {Colors.YELLOW}→{Colors.NC} {message}")
+    return passed
+
+
+def load(name):
+    """Parse a fixture exports file"""
+    return nfs_exports.read_exports([str(FIXTURES / name)])
+
+
+def test_parse_sample_exports():
+    """Test parsing of continuations, quoted paths, defaults and world exports"""
+    entries = load('before.exports')
+    expected = {
+        ('/srv/shares/socialpro', '*.cube.k8s'): 'rw,sync,sec=krb5:krb5i:krb5p,no_subtree_check,fsid=1',
+        ('/srv/shares/socialpro', '*'): 'rw,sync,sec=krb5:krb5i:krb5p,no_subtree_check,fsid=1',
+        ('/srv/shares/builds', '10.0.0.0/24'): 'rw,async,sec=sys,no_subtree_check,fsid=2',
+        ('/srv/shares/builds', '10.0.1.0/24'): 'ro,sec=sys,fsid=2',
+        ('/srv/shares/team share', 'alice.cube.k8s'): 'sync,no_subtree_check,rw,sec=krb5p',
+        ('/srv/shares/team share', 'bob.cube.k8s'): 'sync,no_subtree_check',
+        ('/srv/shares/legacy', '*'): 'ro,sec=sys',
+    }
+    assert print_test("Sample exports file is parsed", entries == expected, f"Got: {entries}")
+
+
+def test_rendered_exports_template_parses():
+    """Test that exports.j2 output parses back to the nfs_exports variable"""
+    import storage_render
+
+    nfs_export_list = [
+        {'path': '/srv/shares/socialpro', 'clients': [
+            {'host': '*.cube.k8s', 'options': 'rw,sync,sec=krb5,fsid=1'},
+            {'host': '*', 'options': 'ro,sec=krb5p,fsid=1'},
+        ]},
+        {'path': '/srv/shares/builds', 'clients': [{'host': '10.0.0.0/24', 'options': 'rw,sec=sys,fsid=2'}]},
+    ]
+    rendered = [
+        entry for entry in storage_render.render_host(
+            'fs01', ['nfs-server'], {'nfs_exports': nfs_export_list, 'nfs_exports_fragments': False},
+            str(PROJECT_ROOT / 'roles'),
+        )
+        if entry['dest'] == '/etc/exports'
+    ]
+    entries = nfs_exports.parse_exports(rendered[0]['content'])
+    expected = {
+        (export['path'], client['host']): client['options']
+        for export in nfs_export_list for client in export['clients']
+    }
+    assert print_test("Rendered exports.j2 output parses", entries == expected, f"Got: {entries}")
+
+
+def test_diff_exports():
+    """Test that only added, removed and changed entries are reported"""
+    added, removed, changed = nfs_exports.diff_exports(load('before.exports'), load('after.exports'))
+    passed = (
+        added == [('/srv/shares/builds', '10.0.2.0/24', 'rw,async,sec=sys,no_subtree_check,fsid=2')]
+        and removed == [('/srv/shares/builds', '10.0.1.0/24', 'ro,sec=sys,fsid=2')]
+        and changed == [('/srv/shares/socialpro', '*', 'rw,sync,sec=krb5p,no_subtree_check,fsid=1')]
+    )
+    assert print_test("Diff reports only touched entries", passed, f"Got: {added} / {removed} / {changed}")
+
+
+def test_plan_targeted_commands():
+    """Test that the diff becomes targeted exportfs calls, removals first"""
+    before, after = load('before.exports'), load('after.exports')
+    commands = nfs_exports.plan_commands(*nfs_exports.diff_exports(before, after))
+    expected = [
+        ['exportfs', '-u', '10.0.1.0/24:/srv/shares/builds'],
+        ['exportfs', '-u', '*:/srv/shares/socialpro'],
+        ['exportfs', '-o', 'rw,sync,sec=krb5p,no_subtree_check,fsid=1', '*:/srv/shares/socialpro'],
+        ['exportfs', '-o', 'rw,async,sec=sys,no_subtree_check,fsid=2', '10.0.2.0/24:/srv/shares/builds'],
+    ]
+    assert print_test("Targeted exportfs commands are planned", commands == expected, f"Got: {commands}")
+
+
+def test_dropped_flag_is_not_merged():
+    """Test that removing a flag unexports the entry before exporting the new options"""
+    before = {('/srv/shares/builds', '10.0.1.0/24'): 'rw,sync,no_root_squash,fsid=2'}
+    after = {('/srv/shares/builds', '10.0.1.0/24'): 'rw,sync,fsid=2'}
+    commands = nfs_exports.plan_commands(*nfs_exports.diff_exports(before, after))
+    expected = [
+        ['exportfs', '-u', '10.0.1.0/24:/srv/shares/builds'],
+        ['exportfs', '-o', 'rw,sync,fsid=2', '10.0.1.0/24:/srv/shares/builds'],
+    ]
+    assert print_test("Dropping no_root_squash re-exports from scratch", commands == expected, f"Got: {commands}")
+
+
+def test_unchanged_exports_plan_nothing():
+    """Test that reformatting without semantic changes applies nothing"""
+    before = load('before.exports')
+    reparsed = nfs_exports.parse_exports(nfs_exports.render_entries(before))
+    commands = nfs_exports.plan_commands(*nfs_exports.diff_exports(before, reparsed))
+    assert print_test("Snapshot round-trips with no commands", reparsed == before and commands == [])
+
+
+def test_scoped_fragment_diff():
+    """Test that a scoped sync only compares the touched fragment files"""
+    applied = nfs_exports.parse_snapshot(
+        "# source: /etc/exports.d/srv-shares-a.exports\n/srv/shares/a *(rw,fsid=1)\n"
+        "# source: /etc/exports.d/srv-shares-b.exports\n/srv/shares/b *(rw,fsid=2)\n"
+        "# source: /etc/exports.d/srv-shares-c.exports\n/srv/shares/c *(rw,fsid=3)\n"
+    )
+    current = {'/etc/exports.d/srv-shares-a.exports': {('/srv/shares/a', '*'): 'ro,fsid=1'}}
+    scope = ['/etc/exports.d/srv-shares-a.exports', '/etc/exports.d/srv-shares-c.exports']
+    added, removed, changed, snapshot = nfs_exports.diff_scoped(applied, current, scope)
+    passed = (
+        added == []
+        and changed == [('/srv/shares/a', '*', 'ro,fsid=1')]
+        and removed == [('/srv/shares/c', '*', 'rw,fsid=3')]
+        and nfs_exports.parse_snapshot(nfs_exports.render_snapshot(snapshot)) == {
+            '/etc/exports.d/srv-shares-b.exports': {('/srv/shares/b', '*'): 'rw,fsid=2'},
+            '/etc/exports.d/srv-shares-a.exports': {('/srv/shares/a', '*'): 'ro,fsid=1'},
+        }
+    )
+    assert print_test("Scoped diff touches only the listed fragments", passed, f"Got: {added} / {removed} / {changed}")
+
+
+def test_fragment_mode_renders_one_file_per_export():
+    """Test that fragment mode writes one <escaped path>.exports per nfs_exports entry, without collisions"""
+    import storage_render
+
+    variables = {
+        'nfs_exports_fragments': True,
+        'nfs_exports_fragment_dir': '/etc/exports.d',
+        'nfs_exports': [
+            {'path': '/srv/shares/socialpro', 'clients': [{'host': '*', 'options': 'rw,sec=krb5,fsid=1'}]},
+            {'path': '/srv/shares/builds', 'clients': [{'host': '10.0.0.0/24', 'options': 'rw,sec=sys,fsid=2'}]},
+            {'path': '/srv/a-b', 'clients': [{'host': '*', 'options': 'ro,fsid=3'}]},
+            {'path': '/srv/a/b', 'clients': [{'host': '*', 'options': 'ro,fsid=4'}]},
+        ],
+    }
+    rendered = {
+        entry['dest']: entry['content']
+        for entry in storage_render.render_host('fs01', ['nfs-server'], variables, str(PROJECT_ROOT / 'roles'))
+        if entry['dest'].startswith('/etc/exports')
+    }
+    passed = (
+        sorted(rendered) == [
+            '/etc/exports', '/etc/exports.d/srv-a-b.exports', '/etc/exports.d/srv-a\\x2db.exports',
+            '/etc/exports.d/srv-shares-builds.exports', '/etc/exports.d/srv-shares-socialpro.exports',
+        ]
+        and nfs_exports.parse_exports(rendered['/etc/exports.d/srv-a\\x2db.exports']) == {('/srv/a-b', '*'): 'ro,fsid=3'}
+        and nfs_exports.parse_exports(rendered['/etc/exports']) == {}
+        and nfs_exports.parse_exports(rendered['/etc/exports.d/srv-shares-builds.exports']) == {
+            ('/srv/shares/builds', '10.0.0.0/24'): 'rw,sec=sys,fsid=2',
+        }
+    )
+    assert print_test("Fragment mode renders one file per export", passed, f"Got: {sorted(rendered)}")
+
+
+def test_stale_fragments_are_found_and_removed():
+    """Test that the find task matches rendered fragments so a dropped export's file is removed"""
+    import re
+    import tempfile
+    import yaml
+    import storage_render
+    from storage_inventory import Templar
+
+    with open(PROJECT_ROOT / 'roles' / 'nfs-server' / 'tasks' / 'configure.yml') as f:
+        tasks = {task['name']: task for task in yaml.safe_load(f)}
+    fact = tasks['Compute NFS export fragment files']['ansible.builtin.set_fact']['nfs_export_fragment_files']
+    find = tasks['Find managed NFS export fragments']['ansible.builtin.find']
+    remove = tasks['Remove stale NFS export fragments']['loop']
+
+    kept = {'path': '/srv/shares/builds', 'clients': [{'host': '10.0.0.0/24', 'options': 'rw,sec=sys,fsid=2'}]}
+    dropped = {'path': '/srv/shares/old', 'clients': [{'host': '*', 'options': 'ro,fsid=3'}]}
+
+    with tempfile.TemporaryDirectory() as fragment_dir:
+        variables = {'nfs_exports_fragments': True, 'nfs_exports_fragment_dir': fragment_dir}
+        for entry in storage_render.render_host(
+            'fs01', ['nfs-server'], dict(variables, nfs_exports=[kept, dropped]), str(PROJECT_ROOT / 'roles'),
+        ):
+            if entry['dest'].startswith(fragment_dir + '/'):
+                Path(entry['dest']).write_text(entry['content'])
+        Path(fragment_dir, 'local.exports').write_text('/srv/local *(ro)\n')
+
+        # ansible.builtin.find applies `contains` with re.match to each line
+        contains = re.compile(find['contains'])
+        found = sorted(
+            str(path) for path in Path(fragment_dir).glob(find['patterns'])
+            if any(contains.match(line) for line in path.read_text().splitlines())
+        )
+        templar = Templar(dict(
+            variables, nfs_exports=[kept], nfs_export_fragment_files=fact,
+            nfs_export_fragments_found={'files': [{'path': path} for path in found]},
+        ))
+        stale = templar.template(remove)
+        for path in stale:
+            os.unlink(path)
+        remaining = sorted(path.name for path in Path(fragment_dir).iterdir())
+
+    passed = (
+        len(found) == 2
+        and stale == [f'{fragment_dir}/srv-shares-old.exports']
+        and remaining == ['local.exports', 'srv-shares-builds.exports']
+    )
+    assert print_test("Stale fragments are found and removed", passed,
+                      f"Found: {found}, stale: {stale}, remaining: {remaining}")
+
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("NFS Exports Parser and Differ Tests")
+    print("=" * 60)
+    print()
+
+    # Change to project root if running from tests directory
+    if Path.cwd().name == 'tests':
+        os.chdir('..')
+
+    tests = [
+        test_parse_sample_exports,
+        test_rendered_exports_template_parses,
+        test_diff_exports,
+        test_plan_targeted_commands,
+        test_dropped_flag_is_not_merged,
+        test_unchanged_exports_plan_nothing,
+        test_scoped_fragment_diff,
+        test_fragment_mode_renders_one_file_per_export,
+        test_stale_fragments_are_found_and_removed,
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            test()
+            results.append(True)
+        except AssertionError:
+            results.append(False)
+        except Exception as e:
+            print_test(test.__name__, False, str(e))
+            results.append(False)
+
+    print()
+    print("=" * 60)
+    passed = sum(results)
+    total = len(results)
+
+    if passed == total:
+        print(f"{Colors.GREEN}All tests passed! ({passed}/{total}){Colors.NC}")
+        return 0
+    else:
+        print(f"{Colors.RED}Some tests failed. ({passed}/{total} passed){Colors.NC}")
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
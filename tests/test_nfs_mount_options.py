@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+NFS Mount Profile Tests
+
+These tests verify module_utils/nfs_mount_options.py, the nfs_mount_profiles
+defaults of the nfs-client role and scripts/nfs-mount-options.py, which
+renders the same profiles as Kubernetes mountOptions, and the FS-Cache
+settings of the role (fsc mount option, cachefilesd culling limits from
+module_utils/nfs_fscache.py).
+
+Run with: python3 tests/test_nfs_mount_options.py
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import yaml
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / 'module_utils'))
+
+import nfs_mount_options  # noqa: E402
+import storage_inventory  # noqa: E402
+import storage_schema  # noqa: E402
+
+GENERATE = str(PROJECT_ROOT / 'scripts' / 'nfs-mount-options.py')
+ROLES_DIR = str(PROJECT_ROOT / 'roles')
+
+
+class Colors:
+    GREEN = '\033[0;32m'
+    RED = '\033[0;31m'
+    YELLOW = '\033[1;33m'
+    NC = '\033[0m'  # No Color
+
+
+def print_test(name, passed, message=""):
+    """Print test result with color"""
+    status = f"{Colors.GREEN}✓ PASS{Colors.NC}" if passed else f"{Colors.RED}✗ FAIL{Colors.NC}"
+    print(f"{status}: {name}")
+    if message and not passed:
+        print(f"  {Colors.YELLOW}→{Colors.NC} {message}")
+    return passed
+
+
+def role_defaults(**overrides):
+    """Templated nfs-client defaults"""
+    defaults = storage_inventory.role_files(ROLES_DIR, 'nfs-client', 'defaults')
+    return storage_inventory.Templar(dict(defaults, krb5_realm='CUBE.K8S', **overrides))
+
+
+def test_later_options_override_earlier():
+    """Test that profile and per-mount options replace base options by name"""
+    options = nfs_mount_options.merge_options(
+        ['vers=4', 'sec=krb5', 'atime'], 'rsize=1048576, noatime', ['sec=krb5p', 'vers=4.2'],
+    )
+    passed = options == ['vers=4.2', 'sec=krb5p', 'noatime', 'rsize=1048576']
+    assert print_test("Later options override earlier ones in place", passed, f"Got: {options}")
+
+
+def test_role_profiles_resolve():
+    """Test that the nfs-client filter merges base options, profile and extras"""
+    templar = role_defaults(nfs_enable_kerberos=False)
+    options = templar.template(
+        "{{ nfs_mount_profiles | nfs_mount_options('throughput', nfs_client_mount_base_options, ['nconnect=16']) }}"
+    )
+    passed = options == ['vers=4', 'sec=sys', 'rsize=1048576', 'wsize=1048576', 'nconnect=16', 'noatime']
+    try:
+        templar.template("{{ nfs_mount_profiles | nfs_mount_options('bogus') }}")
+        passed = False
+    except storage_inventory.TemplateError as e:
+        passed = passed and "unknown NFS mount profile 'bogus'" in str(e)
+    assert print_test("Role profiles resolve through nfs_mount_options", passed, f"Got: {options}")
+
+
+def test_mounts_must_name_defined_profiles():
+    """Test that the schema rejects mounts naming an undefined profile"""
+    templar = role_defaults()
+    variables = {name: templar[name] for name in storage_schema.schema_variables('nfs-client')}
+    valid = storage_schema.validate(
+        dict(variables, nfs_client_mounts=[{'src': 'fs:/srv/a', 'path': '/mnt/a', 'profile': 'read-mostly'}]),
+        'nfs-client',
+    )
+    invalid = storage_schema.validate(
+        dict(variables, nfs_client_mounts=[{'src': 'fs:/srv/a', 'path': '/mnt/a', 'profile': 'fast'}]),
+        'nfs-client',
+    )
+    passed = valid == [] and invalid == ["nfs_client_mounts[0].profile: unknown profile 'fast'"]
+    assert print_test("Mounts must name a defined profile", passed, f"Got: {valid} / {invalid}")
+
+
+def test_fscache_option_and_culling():
+    """Test that FS-Cache profiles get fsc and cachefilesd limits follow the reserve and disk size"""
+    templar = role_defaults(nfs_client_fscache_enabled=True)
+    expression = "{{ nfs_mount_profiles | nfs_mount_options(%r, nfs_client_mount_base_options, %r, " \
+                 "nfs_client_fscache_mount_profiles) }}"
+    cached = templar.template(expression % ('read-mostly', []))
+    opted_out = templar.template(expression % ('read-mostly', ['nofsc']))
+    uncached = templar.template(expression % ('throughput', []))
+    disabled = role_defaults().template(expression % ('read-mostly', []))
+    small = templar.template("{{ 107374182400 | fscache_culling(nfs_client_fscache_reserve) }}")
+    large = templar.template("{{ 2199023255552 | fscache_culling('20G', {'fcull': 5}) }}")
+    try:
+        templar.template("{{ 107374182400 | fscache_culling('5%', {'bstop': 9}) }}")
+        error = None
+    except storage_inventory.TemplateError as e:
+        error = str(e)
+    variables = {name: templar[name] for name in storage_schema.schema_variables('nfs-client')}
+    invalid = storage_schema.validate(
+        dict(variables, nfs_client_fscache_reserve='95%', nfs_client_fscache_culling={'bcul': 10}), 'nfs-client',
+    ) + storage_schema.validate(dict(variables, nfs_client_fscache_profiles=['fast']), 'nfs-client')
+    passed = (
+        cached[-1] == 'fsc' and opted_out[-1] == 'nofsc' and 'fsc' not in cached[:-1]
+        and 'fsc' not in uncached and 'fsc' not in disabled
+        and small == {'brun': 30, 'bcull': 20, 'bstop': 10, 'frun': 10, 'fcull': 7, 'fstop': 3}
+        and (large['brun'], large['bcull'], large['bstop'], large['fcull']) == (5, 2, 1, 5)
+        and error is not None and 'bstop < bcull' in error
+        and len(invalid) == 3 and "unknown profile 'fast'" in ' '.join(invalid)
+    )
+    assert print_test("FS-Cache adds fsc to its profiles and sizes cachefilesd from the disk", passed,
+                      f"cached={cached} small={small} large={large} error={error} invalid={invalid}")
+
+
+def test_generated_persistent_volume():
+    """Test that the generator emits a PV whose mountOptions come from the profile"""
+    result = subprocess.run(
+        [sys.executable, GENERATE, '-p', 'read-mostly', '--format', 'pv',
+         '--name', 'assets-pv', '--path', '/srv/shares/assets'],
+        capture_output=True, text=True,
+    )
+    manifest = yaml.safe_load(result.stdout) if result.returncode == 0 else {}
+    passed = (
+        manifest.get('kind') == 'PersistentVolume'
+        and manifest['spec']['nfs'] == {'server': 'file-server.cube.k8s', 'path': '/srv/shares/assets'}
+        and manifest['spec']['mountOptions'][:2] == ['vers=4', 'sec=krb5']
+        and 'actimeo=600' in manifest['spec']['mountOptions']
+    )
+    assert print_test("Generated PersistentVolume uses profile mountOptions", passed, result.stdout or result.stderr)
+
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("NFS Mount Profile Tests")
+    print("=" * 60)
+    print()
+
+    # Change to project root if running from tests directory
+    if Path.cwd().name == 'tests':
+        os.chdir('..')
+
+    tests = [
+        test_later_options_override_earlier,
+        test_role_profiles_resolve,
+        test_mounts_must_name_defined_profiles,
+        test_fscache_option_and_culling,
+        test_generated_persistent_volume,
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            test()
+            results.append(True)
+        except AssertionError:
+            results.append(False)
+        except Exception as e:
+            print_test(test.__name__, False, str(e))
+            results.append(False)
+
+    print()
+    print("=" * 60)
+    passed = sum(results)
+    total = len(results)
+
+    if passed == total:
+        print(f"{Colors.GREEN}All tests passed! ({passed}/{total}){Colors.NC}")
+        return 0
+    else:
+        print(f"{Colors.RED}Some tests failed. ({passed}/{total} passed){Colors.NC}")
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
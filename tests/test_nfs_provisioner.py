@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+NFS Provisioner Tests
+
+These tests run module_utils/nfs_provisioner.py against a fake Kubernetes
+API server (a local HTTP server keeping PVCs, PVs and StorageClasses in
+memory): per-claim directories and pre-bound PVs for the provisioner's
+StorageClass only, bounded concurrency and retries, and reclaiming
+released volumes.
+
+Run with: python3 tests/test_nfs_provisioner.py
+"""
+
+import json
+import os
+import stat
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / 'module_utils'))
+
+import nfs_provisioner  # noqa: E402
+
+SHARE = '/srv/shares/k8s'
+
+
+class Colors:
+    GREEN = '\033[0;32m'
+    RED = '\033[0;31m'
+    YELLOW = '\033[1;33m'
+    NC = '\033[0m'  # No Color
+
+
+def print_test(name, passed, message=""):
+    """Print test result with color"""
+    status = f"{Colors.GREEN}✓ PASS{Colors.NC}" if passed else f"{Colors.RED}✗ FAIL{Colors.NC}"
+    print(f"{status}: {name}")
+    if message and not passed:
+        print(f"  {Colors.YELLOW}→{Colors.NC} {message}")
+    return passed
+
+
+class FakeApiServer:
+    """In-memory PVC/PV/StorageClass API with request counting"""
+
+    def __init__(self, classes, claims, post_delay=0.0, fail_posts=()):
+        self.classes = {c['metadata']['name']: c for c in classes}
+        self.claims = list(claims)
+        self.volumes = {}
+        self.post_delay = post_delay
+        self.fail_posts = set(fail_posts)
+        self.posts = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def reply(self, status, body):
+                data = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                if self.path == '/api/v1/persistentvolumeclaims':
+                    return self.reply(200, {'metadata': {'resourceVersion': '1'}, 'items': api.claims})
+                if self.path == '/apis/storage.k8s.io/v1/storageclasses':
+                    return self.reply(200, {'metadata': {'resourceVersion': '1'}, 'items': list(api.classes.values())})
+                if self.path == '/api/v1/persistentvolumes':
+                    with api.lock:
+                        items = list(api.volumes.values())
+                    return self.reply(200, {'metadata': {'resourceVersion': '1'}, 'items': items})
+                name = self.path.rsplit('/', 1)[-1]
+                if self.path.startswith('/apis/storage.k8s.io/v1/storageclasses/') and name in api.classes:
+                    return self.reply(200, api.classes[name])
+                self.reply(404, {'message': f"{self.path} not found"})
+
+            def do_POST(self):
+                volume = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                name = volume['metadata']['name']
+                with api.lock:
+                    api.posts += 1
+                    api.in_flight += 1
+                    api.max_in_flight = max(api.max_in_flight, api.in_flight)
+                time.sleep(api.post_delay)
+                with api.lock:
+                    api.in_flight -= 1
+                    if name in api.fail_posts:
+                        api.fail_posts.discard(name)
+                        return self.reply(500, {'message': 'etcdserver: request timed out'})
+                    if name in api.volumes:
+                        return self.reply(409, {'message': f"{name} already exists"})
+                    api.volumes[name] = volume
+                self.reply(201, volume)
+
+            def do_DELETE(self):
+                name = self.path.rsplit('/', 1)[-1]
+                with api.lock:
+                    volume = api.volumes.pop(name, None)
+                self.reply(200 if volume else 404, volume or {'message': 'not found'})
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def storage_class(name, provisioner=nfs_provisioner.PROVISIONER_NAME, **parameters):
+    return {
+        'metadata': {'name': name},
+        'provisioner': provisioner,
+        'reclaimPolicy': 'Delete',
+        'mountOptions': ['vers=4', 'sec=krb5', 'nconnect=8'],
+        'parameters': dict({'server': 'file-server.cube.k8s', 'share': SHARE,
+                            'uid': str(os.getuid()), 'gid': str(os.getgid())}, **parameters),
+    }
+
+
+def claim(name, storage='1Gi', class_name='nfs-kerberos', namespace='default', annotations=None, **spec):
+    return {
+        'metadata': {'name': name, 'namespace': namespace, 'uid': f"uid-{namespace}-{name}",
+                     'annotations': annotations or {}},
+        'spec': dict({'storageClassName': class_name, 'accessModes': ['ReadWriteMany'],
+                      'resources': {'requests': {'storage': storage}}}, **spec),
+        'status': {'phase': 'Pending'},
+    }
+
+
+def run_provisioner(api, root, workers=4, quota=None):
+    provisioner = nfs_provisioner.Provisioner(
+        nfs_provisioner.KubeClient(api.url), workers=workers, local_root={SHARE: root},
+        retry_delay=0.01, quota=quota or (lambda path, project_id, size: None), log=lambda message: None,
+    )
+    provisioner.start()
+    provisioner.resync()
+    idle = provisioner.wait_idle(timeout=30)
+    provisioner.stop()
+    return provisioner, idle
+
+
+def test_provisions_claims_of_its_class():
+    """Test that only the provisioner's pending claims get a directory and a pre-bound PV"""
+    root = tempfile.mkdtemp()
+    quotas = []
+    api = FakeApiServer(
+        [storage_class('nfs-kerberos', quota='true'), storage_class('local', provisioner='rancher.io/local-path')],
+        [claim('web', '5Gi', annotations={'cube-storage.io/mode': '2770'}), claim('db', '10Gi', namespace='prod'),
+         claim('cache', class_name='local'), claim('bound', volumeName='nfs-socialpro-pv')],
+        fail_posts={'pvc-uid-prod-db'},
+    )
+    try:
+        provisioner, idle = run_provisioner(api, root, quota=lambda path, project_id, size: quotas.append(
+            (os.path.basename(path), project_id, size)))
+    finally:
+        api.close()
+
+    web = api.volumes.get('pvc-uid-default-web', {})
+    web_dir = os.path.join(root, 'default-web-pvc-uid-default-web')
+    passed = (
+        idle
+        and sorted(api.volumes) == ['pvc-uid-default-web', 'pvc-uid-prod-db']
+        and web['spec']['nfs'] == {'server': 'file-server.cube.k8s', 'path': f"{SHARE}/default-web-pvc-uid-default-web"}
+        and web['spec']['mountOptions'] == ['vers=4', 'sec=krb5', 'nconnect=8']
+        and web['spec']['claimRef']['uid'] == 'uid-default-web'
+        and web['spec']['capacity'] == {'storage': '5Gi'}
+        and stat.S_IMODE(os.stat(web_dir).st_mode) == 0o2770
+        and os.path.isdir(os.path.join(root, 'prod-db-pvc-uid-prod-db'))
+        and sorted(size for _, _, size in quotas) == [5 * 2 ** 30, 10 * 2 ** 30, 10 * 2 ** 30]
+        and len({(name, project_id) for name, project_id, _ in quotas}) == 2
+        and provisioner.stats == {'provisioned': 2, 'deleted': 0, 'errors': 1}
+    )
+    assert print_test("Provisions directories and pre-bound PVs for its StorageClass only", passed,
+                      f"volumes={sorted(api.volumes)} quotas={quotas} stats={provisioner.stats}")
+
+
+def test_bounded_concurrency_and_idempotence():
+    """Test that hundreds of claims are provisioned with bounded concurrency, once"""
+    root = tempfile.mkdtemp()
+    claims = [claim(f"build-{index}") for index in range(300)]
+    api = FakeApiServer([storage_class('nfs-kerberos')], claims, post_delay=0.002)
+    try:
+        started = time.monotonic()
+        first, idle = run_provisioner(api, root, workers=4)
+        elapsed = time.monotonic() - started
+        second, idle_again = run_provisioner(api, root, workers=4)
+    finally:
+        api.close()
+
+    passed = (
+        idle and idle_again
+        and len(api.volumes) == 300 and api.posts == 300
+        and 1 < api.max_in_flight <= 4
+        and first.stats['provisioned'] == 300 and second.stats['provisioned'] == 0
+        and len(os.listdir(root)) == 300
+    )
+    assert print_test("300 claims provisioned once with at most 4 requests in flight", passed,
+                      f"posts={api.posts} max_in_flight={api.max_in_flight} elapsed={elapsed:.2f}s")
+
+
+def test_released_volumes_are_reclaimed():
+    """Test that released Delete volumes lose their directory (or archive it) and are deleted"""
+    root = tempfile.mkdtemp()
+    api = FakeApiServer([storage_class('nfs-kerberos'), storage_class('nfs-archive', archiveOnDelete='true')],
+                        [claim('old'), claim('kept', class_name='nfs-archive')])
+    try:
+        run_provisioner(api, root)
+        for volume in api.volumes.values():
+            volume['status'] = {'phase': 'Released'}
+        api.claims = []
+        provisioner, idle = run_provisioner(api, root)
+    finally:
+        api.close()
+
+    passed = (
+        idle
+        and api.volumes == {}
+        and sorted(os.listdir(root)) == ['archived-default-kept-pvc-uid-default-kept']
+        and provisioner.stats['deleted'] == 2
+    )
+    assert print_test("Released volumes are removed or archived and their PVs deleted", passed,
+                      f"left={os.listdir(root)} volumes={sorted(api.volumes)}")
+
+
+def test_class_created_after_claim():
+    """Test that a claim created before its StorageClass is provisioned once the class appears"""
+    root = tempfile.mkdtemp()
+    api = FakeApiServer([], [claim('early')])
+    provisioner = nfs_provisioner.Provisioner(
+        nfs_provisioner.KubeClient(api.url), workers=2, local_root={SHARE: root},
+        retry_delay=0.01, quota=lambda path, project_id, size: None, log=lambda message: None,
+    )
+    try:
+        provisioner.start()
+        provisioner.resync()
+        idle = provisioner.wait_idle(timeout=30)
+        before = sorted(api.volumes)
+        api.classes['nfs-kerberos'] = storage_class('nfs-kerberos')
+        provisioner.handle_class('ADDED', api.classes['nfs-kerberos'])
+        idle_after = provisioner.wait_idle(timeout=30)
+        provisioner.stop()
+    finally:
+        api.close()
+
+    passed = idle and idle_after and before == [] and sorted(api.volumes) == ['pvc-uid-default-early']
+    assert print_test("Claims waiting for their StorageClass are provisioned when it is created", passed,
+                      f"before={before} after={sorted(api.volumes)}")
+
+
+def test_reclaim_stays_inside_the_share():
+    """Test that an edited directory annotation outside the share is never removed"""
+    root = tempfile.mkdtemp()
+    outside = tempfile.mkdtemp()
+    with open(os.path.join(outside, 'keep.dat'), 'w') as f:
+        f.write('data')
+    api = FakeApiServer([storage_class('nfs-kerberos')], [claim('escape'), claim('dotdot'), claim('share')])
+    try:
+        run_provisioner(api, root)
+        targets = {'escape': outside, 'dotdot': os.path.join(root, '..', os.path.basename(outside)), 'share': root}
+        for claim_name, target in targets.items():
+            volume = api.volumes[f"pvc-uid-default-{claim_name}"]
+            volume['metadata']['annotations']['cube-storage.io/directory'] = target
+            volume['status'] = {'phase': 'Released'}
+        api.claims = []
+        provisioner, idle = run_provisioner(api, root)
+    finally:
+        api.close()
+
+    passed = (
+        idle
+        and os.path.isfile(os.path.join(outside, 'keep.dat'))
+        and os.path.isdir(root) and len(os.listdir(root)) == 3
+        and len(api.volumes) == 3 and provisioner.stats['deleted'] == 0
+    )
+    assert print_test("Reclaim refuses directories outside the class's share", passed,
+                      f"volumes={sorted(api.volumes)} left={os.listdir(root)} stats={provisioner.stats}")
+
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("NFS Provisioner Tests")
+    print("=" * 60)
+    print()
+
+    tests = [
+        test_provisions_claims_of_its_class,
+        test_bounded_concurrency_and_idempotence,
+        test_released_volumes_are_reclaimed,
+        test_class_created_after_claim,
+        test_reclaim_stays_inside_the_share,
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            test()
+            results.append(True)
+        except AssertionError:
+            results.append(False)
+        except Exception as e:
+            print_test(test.__name__, False, str(e))
+            results.append(False)
+
+    print()
+    print("=" * 60)
+    passed = sum(results)
+    total = len(results)
+
+    if passed == total:
+        print(f"{Colors.GREEN}All tests passed! ({passed}/{total}){Colors.NC}")
+        return 0
+    else:
+        print(f"{Colors.RED}Some tests failed. ({passed}/{total} passed){Colors.NC}")
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
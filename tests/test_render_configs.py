@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Template Rendering Tests
+
+These tests render the role templates locally with module_utils/storage_render.py
+and check them against the stored baseline in tests/baselines/rendered. When a
+template or default changes on purpose, refresh the baseline with:
+
+  python3 scripts/render-configs.py --update-baseline
+
+Run with: python3 tests/test_render_configs.py
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / 'module_utils'))
+
+import storage_render  # noqa: E402
+
+RENDER = str(PROJECT_ROOT / 'scripts' / 'render-configs.py')
+ROLES_DIR = str(PROJECT_ROOT / 'roles')
+
+
+class Colors:
+    GREEN = '\033[0;32m'
+    RED = '\033[0;31m'
+    YELLOW = '\033[1;33m'
+    NC = '\033[0m'  # No Color
+
+
+def print_test(name, passed, message=""):
+    """Print test result with color"""
+    status = f"{Colors.GREEN}✓ PASS{Colors.NC}" if passed else f"{Colors.RED}✗ FAIL{Colors.NC}"
+    print(f"{status}: {name}")
+    if message and not passed:
+        print(f"  {Colors.YELLOW}→{Colors.NC} {message}")
+    return passed
+
+
+def samba_defaults():
+    """Raw samba role defaults"""
+    import storage_inventory
+
+    return storage_inventory.role_files(ROLES_DIR, 'samba', 'defaults')
+
+
+def test_rendered_configs_match_baseline():
+    """Test that the project inventory renders exactly the stored baseline"""
+    result = subprocess.run([sys.executable, RENDER], capture_output=True, text=True)
+    assert print_test(
+        "Rendered configs match tests/baselines/rendered",
+        result.returncode == 0 and result.stdout == '',
+        result.stdout[:2000] or result.stderr,
+    )
+
+
+def test_variable_change_produces_unified_diff():
+    """Test that a variable change shows up as a unified diff"""
+    result = subprocess.run(
+        [sys.executable, RENDER, '-l', 'fileserver01', '--role', 'samba', '-e', 'samba_workgroup=CUBE'],
+        capture_output=True, text=True,
+    )
+    passed = (
+        result.returncode == 1
+        and '-    workgroup = WORKGROUP' in result.stdout
+        and '+    workgroup = CUBE' in result.stdout
+        and result.stdout.count('+++ ') == 1
+    )
+    assert print_test("Variable changes produce a unified diff", passed, result.stdout or result.stderr)
+
+
+def test_date_time_header_is_stubbed():
+    """Test that the smb.conf ansible_date_time header does not cause diffs"""
+    variables = dict(
+        samba_defaults(), samba_workgroup='CUBE', samba_realm='CUBE.K8S',
+        ansible_date_time={'iso8601': '2026-10-18T12:00:00Z'},
+    )
+    stubbed = storage_render.render_host('fs01', ['samba'], variables, ROLES_DIR)
+    real = storage_render.render_host('fs01', ['samba'], variables, ROLES_DIR, stub_date_time=False)
+    passed = (
+        'Generated on 1970-01-01T00:00:00Z' in stubbed[0]['content']
+        and 'Generated on 2026-10-18T12:00:00Z' in real[0]['content']
+    )
+    assert print_test("ansible_date_time is stubbable", passed)
+
+
+def test_loop_and_when_template_tasks():
+    """Test that looped and conditional template tasks render per item"""
+    with tempfile.TemporaryDirectory() as roles_dir:
+        os.makedirs(os.path.join(roles_dir, 'demo', 'tasks'))
+        os.makedirs(os.path.join(roles_dir, 'demo', 'templates'))
+        with open(os.path.join(roles_dir, 'demo', 'tasks', 'main.yml'), 'w') as f:
+            f.write(
+                "- name: Per-item config\n"
+                "  ansible.builtin.template:\n"
+                "    src: item.j2\n"
+                "    dest: \"/etc/demo/{{ item.name }}.conf\"\n"
+                "  loop: \"{{ demo_items }}\"\n"
+                "  when: demo_enabled | bool\n"
+            )
+        with open(os.path.join(roles_dir, 'demo', 'templates', 'item.j2'), 'w') as f:
+            f.write("value = {{ item.value }}\n")
+        variables = {'demo_items': [{'name': 'a', 'value': 1}, {'name': 'b', 'value': 2}], 'demo_enabled': 'yes'}
+        rendered = storage_render.render_host('h', ['demo'], variables, roles_dir)
+        skipped = storage_render.render_host('h', ['demo'], dict(variables, demo_enabled=False), roles_dir)
+    passed = (
+        [(r['dest'], r['content']) for r in rendered] == [
+            ('/etc/demo/a.conf', 'value = 1\n'), ('/etc/demo/b.conf', 'value = 2\n'),
+        ]
+        and skipped == []
+    )
+    assert print_test("Looped and conditional template tasks render per item", passed, f"Got: {rendered}")
+
+
+def test_samba_performance_profile():
+    """Test that samba_performance renders into [global] and per-share sections"""
+    variables = dict(
+        samba_defaults(), krb5_realm='CUBE.K8S',
+        samba_performance={'server_multi_channel_support': False, 'socket_options': 'TCP_NODELAY'},
+        samba_shares=[{'name': 'builds', 'path': '/srv/shares/builds',
+                       'performance': {'strict_sync': False, 'aio_write_size': 0}}],
+    )
+    content = storage_render.render_host('fs01', ['samba'], variables, ROLES_DIR)[0]['content']
+    global_section, share_section = content.split('[builds]')
+    passed = (
+        '    server multi channel support = no\n' in global_section
+        and '    socket options = TCP_NODELAY\n' in global_section
+        and '    use sendfile = yes\n' in global_section
+        and '    log level = 1\n' in global_section
+        and '    strict sync = no\n    aio write size = 0\n' in share_section
+    )
+    assert print_test("samba_performance renders global and share settings", passed, content)
+
+
+def test_nfs_tuning_is_sized_from_facts():
+    """Test that the nfs-server tuning defaults scale with vCPUs and memory"""
+    import storage_inventory
+
+    defaults = storage_inventory.role_files(ROLES_DIR, 'nfs-server', 'defaults')
+
+    def settings(**facts):
+        return storage_inventory.Templar(dict(defaults, **facts)).template('{{ nfs_server_tuning_settings }}')
+
+    small = settings(ansible_processor_vcpus=1, ansible_memtotal_mb=1024)
+    large = settings(ansible_processor_vcpus=16, ansible_memtotal_mb=65536)
+    pinned = settings(ansible_processor_vcpus=16, ansible_memtotal_mb=65536, nfs_server_tuning={'threads': 32})
+    passed = (
+        (int(small['threads']), int(small['rmem_max'])) == (8, 4194304)
+        and (int(large['threads']), int(large['rmem_max'])) == (128, 16777216)
+        and int(pinned['threads']) == 32 and int(pinned['rmem_max']) == 16777216
+    )
+    assert print_test("NFS tuning is auto-sized from facts", passed, f"Got: {small} / {large} / {pinned}")
+
+
+def test_nfs_daemon_configs_merge_overrides():
+    """Test that daemon config overrides merge into the role models, one file per daemon"""
+    import storage_inventory
+
+    defaults = storage_inventory.role_files(ROLES_DIR, 'nfs-server', 'defaults')
+    variables = dict(defaults, inventory_hostname='fs1', krb5_realm='CUBE.K8S',
+                     ansible_processor_vcpus=4, ansible_memtotal_mb=8192,
+                     nfs_server_nfs_conf={'mountd': {'manage-gids': True}, 'nfsd': {'vers2': None}},
+                     nfs_server_nfs_kernel_server={'RPCNFSDPRIORITY': None})
+    rendered = {item['dest']: item['content']
+                for item in storage_render.render_host('fs1', ['nfs-server'], variables, ROLES_DIR)}
+    nfs_conf = rendered.get('/etc/nfs.conf', '')
+    kernel_server = rendered.get('/etc/default/nfs-kernel-server', '')
+    passed = (
+        '[mountd]\n manage-gids = y\n' in nfs_conf
+        and ' threads = 32\n' in nfs_conf
+        and ' vers4 = y\n' in nfs_conf
+        and 'vers2' not in nfs_conf
+        and 'RPCNFSDCOUNT="32"\n' in kernel_server
+        and 'RPCNFSDPRIORITY' not in kernel_server
+        and 'Domain = cube.k8s\n' in rendered.get('/etc/idmapd.conf', '')
+        and 'NEED_GSSD="yes"\n' in rendered.get('/etc/default/nfs-common', '')
+    )
+    assert print_test("NFS daemon configs merge overrides into the role models", passed, nfs_conf + kernel_server)
+
+
+def test_idmap_static_mapping():
+    """Test that kdc_user_principals become idmapd [Static] entries on servers and clients"""
+    import storage_inventory
+
+    users = [{'name': 'alice', 'password': 'x', 'groups': ['developers']}, 'bob', 'carol@PARTNER.ORG', 'nfs/fs1']
+    rendered = {}
+    for role in ('nfs-server', 'nfs-client'):
+        defaults = storage_inventory.role_files(ROLES_DIR, role, 'defaults')
+        variables = dict(defaults, inventory_hostname='fs1', krb5_realm='CUBE.K8S', kdc_user_principals=users,
+                         ansible_processor_vcpus=4, ansible_memtotal_mb=8192)
+        for item in storage_render.render_host('fs1', [role], variables, ROLES_DIR):
+            rendered[(role, item['dest'])] = item.get('content', item.get('error'))
+
+    static = '[Static]\nalice@CUBE.K8S = alice\nbob@CUBE.K8S = bob\ncarol@PARTNER.ORG = carol\n'
+    server, client = rendered[('nfs-server', '/etc/idmapd.conf')], rendered[('nfs-client', '/etc/idmapd.conf')]
+    passed = (
+        static in server and static in client
+        and 'nfs/fs1' not in server
+        and 'GSS-Methods = static,nsswitch\n' in server
+        and 'Cache-Expiration = 3600\n' in client
+        and '/usr/sbin/nfsidmap -t 3600 %k %d' in rendered[('nfs-client', '/etc/request-key.d/id_resolver.conf')]
+    )
+    assert print_test("Static ID mapping is rendered from kdc_user_principals", passed, server + client)
+
+
+def test_kdc_replication_configs():
+    """Test primary/replica KDC configs and locality-ordered client KDC lists"""
+    import storage_inventory
+
+    topology = {
+        'kdc_realm': 'CUBE.K8S',
+        'kdc_primary': {'host': 'kdc1.cube.k8s', 'site': 'rack-a'},
+        'kdc_replicas': [{'host': 'kdc2.cube.k8s', 'site': 'rack-b'}, 'kdc3.cube.k8s:8888'],
+    }
+    kdc_defaults = storage_inventory.role_files(ROLES_DIR, 'kerberos-kdc', 'defaults')
+    stub = {'ansible_date_time': storage_inventory.STUB_DATE_TIME, 'groups': {'kdc': ['kdc1', 'kdc2']}}
+
+    def render(host, fqdn, **overrides):
+        variables = dict(kdc_defaults, **stub, **topology, inventory_hostname=host, ansible_fqdn=fqdn, **overrides)
+        return {item['dest']: item['content']
+                for item in storage_render.render_host(host, ['kerberos-kdc'], variables, ROLES_DIR)}
+
+    primary = render('kdc1', 'kdc1.cube.k8s')
+    replica = render('kdc2', 'kdc2.cube.k8s', kdc_site='rack-b', kdc_port=8888)
+    client = storage_render.render_host('w1', ['kerberos-client'], dict(
+        storage_inventory.role_files(ROLES_DIR, 'kerberos-client', 'defaults'), **stub,
+        krb5_kdcs=[topology['kdc_primary']] + topology['kdc_replicas'], krb5_site='rack-b',
+    ), ROLES_DIR)[0]['content']
+    passed = (
+        'iprop_enable = true' in primary['/etc/krb5kdc/kdc.conf']
+        and 'kiprop/kdc2.cube.k8s@CUBE.K8S  p\nkiprop/kdc3.cube.k8s@CUBE.K8S  p' in primary['/etc/krb5kdc/kadm5.acl']
+        and '/etc/krb5kdc/kpropd.acl' not in primary
+        and 'host/kdc1.cube.k8s@CUBE.K8S\nhost/kdc2.cube.k8s@CUBE.K8S' in replica['/etc/krb5kdc/kpropd.acl']
+        and 'kdc_ports = 8888' in replica['/etc/krb5kdc/kdc.conf']
+        and 'kdc = kdc2.cube.k8s\n        kdc = kdc1.cube.k8s\n        kdc = kdc3.cube.k8s:8888' in replica['/etc/krb5.conf']
+        and 'admin_server = kdc1.cube.k8s' in replica['/etc/krb5.conf']
+        and 'kdc = kdc2.cube.k8s\n        kdc = kdc1.cube.k8s\n' in client
+    )
+    assert print_test("KDC replication renders primary, replica and client configs", passed,
+                      replica.get('/etc/krb5.conf', '') + client)
+
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("Template Rendering Tests")
+    print("=" * 60)
+    print()
+
+    # Change to project root if running from tests directory
+    if Path.cwd().name == 'tests':
+        os.chdir('..')
+
+    tests = [
+        test_rendered_configs_match_baseline,
+        test_variable_change_produces_unified_diff,
+        test_date_time_header_is_stubbed,
+        test_loop_and_when_template_tasks,
+        test_samba_performance_profile,
+        test_nfs_tuning_is_sized_from_facts,
+        test_nfs_daemon_configs_merge_overrides,
+        test_idmap_static_mapping,
+        test_kdc_replication_configs,
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            test()
+            results.append(True)
+        except AssertionError:
+            results.append(False)
+        except Exception as e:
+            print_test(test.__name__, False, str(e))
+            results.append(False)
+
+    print()
+    print("=" * 60)
+    passed = sum(results)
+    total = len(results)
+
+    if passed == total:
+        print(f"{Colors.GREEN}All tests passed! ({passed}/{total}){Colors.NC}")
+        return 0
+    else:
+        print(f"{Colors.RED}Some tests failed. ({passed}/{total} passed){Colors.NC}")
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Role Fingerprint Tests
+
+These tests verify module_utils/role_fingerprint.py, used by the
+role_fingerprint action plugin and module to skip roles whose inputs and
+rendered files are unchanged: what goes into the fingerprint and how the
+state file on the host is compared.
+
+Run with: python3 tests/test_role_fingerprint.py
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / 'module_utils'))
+
+import role_fingerprint  # noqa: E402
+
+ROLES_DIR = str(PROJECT_ROOT / 'roles')
+
+
+class Colors:
+    GREEN = '\033[0;32m'
+    RED = '\033[0;31m'
+    YELLOW = '\033[1;33m'
+    NC = '\033[0m'  # No Color
+
+
+def print_test(name, passed, message=""):
+    """Print test result with color"""
+    status = f"{Colors.GREEN}✓ PASS{Colors.NC}" if passed else f"{Colors.RED}✗ FAIL{Colors.NC}"
+    print(f"{status}: {name}")
+    if message and not passed:
+        print(f"  {Colors.YELLOW}→{Colors.NC} {message}")
+    return passed
+
+
+def test_fingerprint_tracks_referenced_variables():
+    """Test that the fingerprint follows referenced variables and ignores volatile ones"""
+    sources = role_fingerprint.role_sources(ROLES_DIR, ['nfs-server'])
+    available = {
+        'nfs_server_tuning': {'threads': 16}, 'nfs_exports': [], 'unrelated_variable': 1,
+        'ansible_date_time': {'epoch': '1'}, 'ansible_check_mode': False,
+    }
+    names = role_fingerprint.referenced_names(sources, available)
+
+    def value(**changes):
+        variables = {name: dict(available, **changes)[name] for name in names}
+        return role_fingerprint.fingerprint(sources, variables)
+
+    base = value()
+    passed = (
+        names == ['nfs_exports', 'nfs_server_tuning']
+        and any(path.endswith('templates/nfs.conf.j2') for path, _ in sources)
+        and value() == base
+        and value(ansible_date_time={'epoch': '2'}) == base
+        and value(nfs_server_tuning={'threads': 32}) != base
+        and role_fingerprint.fingerprint(sources[1:], {name: available[name] for name in names}) != base
+    )
+    assert print_test("Fingerprint covers role files and referenced variables only", passed,
+                      f"names={names}")
+
+
+def test_fingerprint_tracks_plugin_sources():
+    """Test that editing a module_utils file changes the fingerprint"""
+    project = tempfile.mkdtemp()
+    for relative, content in (('roles/nfs-server/tasks/main.yml', '- name: Sync exports\n  exportfs_sync: {}\n'),
+                              ('library/exportfs_sync.py', 'from nfs_exports import plan_commands\n'),
+                              ('module_utils/nfs_exports.py', 'def plan_commands():\n    return []\n'),
+                              ('module_utils/__pycache__/nfs_exports.cpython-311.pyc', 'ignored')):
+        path = os.path.join(project, relative)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(content)
+
+    def value():
+        sources = role_fingerprint.role_sources(os.path.join(project, 'roles'), ['nfs-server'])
+        return role_fingerprint.fingerprint(sources + role_fingerprint.plugin_sources(project), {})
+
+    plugins = [path for path, _ in role_fingerprint.plugin_sources(project)]
+    base = value()
+    with open(os.path.join(project, 'module_utils', 'nfs_exports.py'), 'a') as f:
+        f.write('# fixed\n')
+    passed = (
+        plugins == ['library/exportfs_sync.py', 'module_utils/nfs_exports.py']
+        and value() != base
+        and role_fingerprint.plugin_sources(os.path.join(project, 'missing')) == []
+    )
+    assert print_test("Fingerprint covers the project's modules and module_utils", passed,
+                      f"plugins={plugins}")
+
+
+def test_check_state_reasons():
+    """Test that the state file check reports why a role has to run"""
+    directory = tempfile.mkdtemp()
+    rendered = os.path.join(directory, 'nfs.conf')
+    with open(rendered, 'w') as f:
+        f.write('[nfsd]\nthreads = 16\n')
+    state_file = role_fingerprint.state_path(directory, 'nfs-server')
+
+    reasons = [role_fingerprint.check_state(state_file, 'abc')]
+    with open(state_file, 'w') as f:
+        f.write(role_fingerprint.format_state('abc', [rendered, os.path.join(directory, 'missing')]))
+    reasons.append(role_fingerprint.check_state(state_file, 'abc'))
+    reasons.append(role_fingerprint.check_state(state_file, 'def'))
+    with open(rendered, 'a') as f:
+        f.write('vers3 = n\n')
+    reasons.append(role_fingerprint.check_state(state_file, 'abc'))
+
+    expected = [
+        (False, 'no fingerprint stored'),
+        (True, 'unchanged'),
+        (False, 'role inputs changed'),
+        (False, f"{rendered} was modified on the host"),
+    ]
+    assert print_test("State check detects missing state, changed inputs and local edits",
+                      reasons == expected, f"reasons={reasons}")
+
+
+def test_state_round_trip():
+    """Test that the state file records the fingerprint and existing files' checksums"""
+    directory = tempfile.mkdtemp()
+    rendered = os.path.join(directory, 'exports')
+    with open(rendered, 'w') as f:
+        f.write('/srv/shares *(rw,sec=krb5)\n')
+    content = role_fingerprint.format_state('abc', [rendered, rendered, os.path.join(directory, 'missing')])
+    value, files = role_fingerprint.parse_state(content)
+
+    passed = (
+        value == 'abc'
+        and files == {rendered: role_fingerprint.file_digest(rendered)}
+        and role_fingerprint.parse_state('') == (None, {})
+    )
+    assert print_test("State file round-trips fingerprint and file checksums", passed,
+                      f"content={content!r}")
+
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("Role Fingerprint Tests")
+    print("=" * 60)
+    print()
+
+    tests = [
+        test_fingerprint_tracks_referenced_variables,
+        test_fingerprint_tracks_plugin_sources,
+        test_check_state_reasons,
+        test_state_round_trip,
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            test()
+            results.append(True)
+        except AssertionError:
+            results.append(False)
+        except Exception as e:
+            print_test(test.__name__, False, str(e))
+            results.append(False)
+
+    print()
+    print("=" * 60)
+    passed = sum(results)
+    total = len(results)
+
+    if passed == total:
+        print(f"{Colors.GREEN}All tests passed! ({passed}/{total}){Colors.NC}")
+        return 0
+    else:
+        print(f"{Colors.RED}Some tests failed. ({passed}/{total} passed){Colors.NC}")
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
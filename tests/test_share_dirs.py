@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Share Directory Provisioning Tests
+
+These tests verify module_utils/share_dirs.py, which backs the
+share_directories module used by the shares role, on a temporary tree.
+Ownership is reconciled to the current user so the tests run unprivileged.
+
+Run with: python3 tests/test_share_dirs.py
+"""
+
+import os
+import stat
+import sys
+import tempfile
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / 'module_utils'))
+
+import share_dirs  # noqa: E402
+
+
+class Colors:
+    GREEN = '\033[0;32m'
+    RED = '\033[0;31m'
+    YELLOW = '\033[1;33m'
+    NC = '\033[0m'  # No Color
+
+
+def print_test(name, passed, message=""):
+    """Print test result with color"""
+    status = f"{Colors.GREEN}✓ PASS{Colors.NC}" if passed else f"{Colors.RED}✗ FAIL{Colors.NC}"
+    print(f"{status}: {name}")
+    if message and not passed:
+        print(f"  {Colors.YELLOW}→{Colors.NC} {message}")
+    return passed
+
+
+def mode_of(path):
+    return stat.S_IMODE(os.lstat(path).st_mode)
+
+
+def make_tree(root, directories=5, files=20):
+    """Create root/dN/fM files with mode 0644 and directories with 0755"""
+    for d in range(directories):
+        directory = os.path.join(root, f"d{d}", 'nested')
+        os.makedirs(directory)
+        for f in range(files):
+            path = os.path.join(directory, f"f{f}")
+            with open(path, 'w') as handle:
+                handle.write('x')
+            os.chmod(path, 0o644)
+
+
+def test_ensure_directory_states():
+    """Test created, updated and ok states and check mode"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'share')
+        planned = share_dirs.ensure_directory(path, mode='0770', check_mode=True)
+        created = share_dirs.ensure_directory(path, os.getuid(), os.getgid(), '0770')
+        unchanged = share_dirs.ensure_directory(path, os.getuid(), os.getgid(), '0770')
+        updated = share_dirs.ensure_directory(path, os.getuid(), os.getgid(), 0o750)
+        passed = (
+            planned['state'] == 'created'
+            and created['state'] == 'created'
+            and unchanged == {'path': path, 'state': 'ok', 'changes': []}
+            and updated['changes'] == ['mode'] and mode_of(path) == 0o750
+        )
+    assert print_test("ensure_directory reports created/ok/updated", passed, f"Got: {planned} {created} {updated}")
+
+
+def test_existing_file_is_rejected():
+    """Test that a non-directory at a share path is an error"""
+    with tempfile.NamedTemporaryFile() as handle:
+        try:
+            share_dirs.ensure_directory(handle.name)
+            passed = False
+        except share_dirs.ShareError as e:
+            passed = 'not a directory' in str(e)
+    assert print_test("Non-directory share path is rejected", passed)
+
+
+def test_reconcile_touches_only_differing_inodes():
+    """Test that only entries with a different mode are changed"""
+    with tempfile.TemporaryDirectory() as tmp:
+        make_tree(tmp)
+        drifted = [os.path.join(tmp, 'd1', 'nested', 'f3'), os.path.join(tmp, 'd4', 'nested', 'f7')]
+        for path in drifted:
+            os.chmod(path, 0o600)
+        os.symlink('/nonexistent', os.path.join(tmp, 'd0', 'dangling'))
+
+        planned = share_dirs.reconcile_tree(tmp, os.getuid(), os.getgid(), None, '0644', workers=4, check_mode=True)
+        applied = share_dirs.reconcile_tree(tmp, os.getuid(), os.getgid(), None, '0644', workers=4)
+        again = share_dirs.reconcile_tree(tmp, os.getuid(), os.getgid(), None, '0644', workers=4)
+        passed = (
+            planned['changed'] == 2
+            and applied['changed'] == 2 and applied['mode'] == 2
+            and applied['scanned'] == 5 * 2 + 5 * 20 + 1
+            and again['changed'] == 0 and again['errors'] == []
+            and all(mode_of(path) == 0o644 for path in drifted)
+        )
+    assert print_test("Reconciliation only touches differing inodes", passed, f"Got: {planned} / {applied} / {again}")
+
+
+def test_symlinks_are_not_followed():
+    """Test that links to directories and files outside the tree are left alone"""
+    with tempfile.TemporaryDirectory() as tmp, tempfile.TemporaryDirectory() as outside:
+        make_tree(tmp, directories=1, files=1)
+        target = os.path.join(outside, 'secret')
+        with open(target, 'w') as handle:
+            handle.write('x')
+        os.chmod(target, 0o600)
+        os.chmod(outside, 0o700)
+        os.symlink(outside, os.path.join(tmp, 'd0', 'escape'))
+        os.symlink(target, os.path.join(tmp, 'd0', 'nested', 'f0-link'))
+
+        summary = share_dirs.reconcile_tree(tmp, os.getuid(), os.getgid(), '0755', '0644', workers=2)
+        root_fd = os.open(tmp, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            through_link = share_dirs._open_dir(root_fd, ('d0', 'escape'))
+        finally:
+            os.close(root_fd)
+        passed = (
+            summary['errors'] == [] and summary['scanned'] == 5
+            and mode_of(target) == 0o600 and mode_of(outside) == 0o700
+            and through_link is None
+        )
+    assert print_test("Symbolic links are not followed", passed, f"Got: {summary}, opened: {through_link}")
+
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("Share Directory Provisioning Tests")
+    print("=" * 60)
+    print()
+
+    # Change to project root if running from tests directory
+    if Path.cwd().name == 'tests':
+        os.chdir('..')
+
+    tests = [
+        test_ensure_directory_states,
+        test_existing_file_is_rejected,
+        test_reconcile_touches_only_differing_inodes,
+        test_symlinks_are_not_followed,
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            test()
+            results.append(True)
+        except AssertionError:
+            results.append(False)
+        except Exception as e:
+            print_test(test.__name__, False, str(e))
+            results.append(False)
+
+    print()
+    print("=" * 60)
+    passed = sum(results)
+    total = len(results)
+
+    if passed == total:
+        print(f"{Colors.GREEN}All tests passed! ({passed}/{total}){Colors.NC}")
+        return 0
+    else:
+        print(f"{Colors.RED}Some tests failed. ({passed}/{total} passed){Colors.NC}")
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Share Quota Tests
+
+These tests verify module_utils/share_quota.py, which enforces share size
+limits with XFS/ext4 project quotas and reports per-share usage from the
+quota accounting: size parsing, mount lookup, the /etc/projid and
+/etc/projects bookkeeping and, when run as root on a kernel with quota
+support, a real quota on a loopback-mounted image file.
+
+Run with: sudo python3 tests/test_share_quota.py
+"""
+
+import errno
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / 'module_utils'))
+
+import share_quota  # noqa: E402
+
+MOUNTINFO = """\
+22 1 253:0 / / rw,relatime shared:1 - ext4 /dev/mapper/root rw,errors=remount-ro
+41 22 253:1 / /srv rw,relatime shared:20 - xfs /dev/mapper/data rw,attr2,inode64,prjquota
+42 41 7:0 / /srv/shares/media rw,noatime shared:21 - ext4 /dev/loop0 rw
+43 22 0:45 / /mnt/with\\040space rw - tmpfs tmpfs rw
+"""
+
+
+class Colors:
+    GREEN = '\033[0;32m'
+    RED = '\033[0;31m'
+    YELLOW = '\033[1;33m'
+    NC = '\033[0m'  # No Color
+
+
+def print_test(name, passed, message=""):
+    """Print test result with color"""
+    status = f"{Colors.GREEN}✓ PASS{Colors.NC}" if passed else f"{Colors.RED}✗ FAIL{Colors.NC}"
+    print(f"{status}: {name}")
+    if message and not passed:
+        print(f"  {Colors.YELLOW}→{Colors.NC} {message}")
+    return passed
+
+
+def write_mountinfo(directory):
+    path = os.path.join(directory, 'mountinfo')
+    with open(path, 'w') as f:
+        f.write(MOUNTINFO)
+    return path
+
+
+def test_sizes_and_mounts():
+    """Test size parsing and finding the mount (and quota support) of a share"""
+    mountinfo = write_mountinfo(tempfile.mkdtemp())
+    builds = share_quota.find_mount('/srv/shares/builds', mountinfo)
+    media = share_quota.find_mount('/srv/shares/media/films', mountinfo)
+    spaced = share_quota.find_mount('/mnt/with space/x', mountinfo)
+    errors = []
+    for mount in (media, spaced):
+        try:
+            share_quota.check_project_quota(mount)
+        except share_quota.QuotaError as e:
+            errors.append(str(e))
+
+    passed = (
+        share_quota.parse_size('500G') == 500 * 2 ** 30
+        and share_quota.parse_size('1.5TiB') == int(1.5 * 2 ** 40)
+        and share_quota.parse_size(4096) == 4096
+        and (builds['mountpoint'], builds['source']) == ('/srv', '/dev/mapper/data')
+        and share_quota.check_project_quota(builds) is None
+        and media['source'] == '/dev/loop0'
+        and spaced['mountpoint'] == '/mnt/with space'
+        and len(errors) == 2 and 'prjquota' in errors[0] and 'tmpfs' in errors[1]
+    )
+    assert print_test("Sizes parse and shares map to their mount and quota support", passed,
+                      f"builds={builds} media={media} errors={errors}")
+
+
+def test_project_files():
+    """Test that /etc/projid and /etc/projects entries are added, fixed and kept"""
+    directory = tempfile.mkdtemp()
+    projid = os.path.join(directory, 'projid')
+    projects = os.path.join(directory, 'projects')
+    with open(projid, 'w') as f:
+        f.write('# local projects\nscratch:1000\nsrv_shares_builds:1500\n')
+
+    name = share_quota.project_name('/srv/shares/media')
+    new_id = share_quota.allocate_id(set(share_quota.read_map(projid).values()))
+    changed = [
+        share_quota.update_map(projid, name, new_id),
+        share_quota.update_map(projid, name, new_id),
+        share_quota.update_map(projid, 'srv_shares_builds', 1501),
+        share_quota.update_map(projects, '/srv/shares/media', new_id, reverse=True),
+    ]
+    with open(projid) as f:
+        content = f.read()
+
+    passed = (
+        name == 'srv_shares_media' and new_id == 1001
+        and changed == [True, False, True, True]
+        and content == '# local projects\nscratch:1000\nsrv_shares_media:1001\nsrv_shares_builds:1501\n'
+        and share_quota.read_map(projects, reverse=True) == {'/srv/shares/media': 1001}
+    )
+    assert print_test("Project files get one entry per share", passed, content)
+
+
+def _loopback_filesystem(image, mountpoint):
+    """Create and mount a quota-enabled image; return a reason when this host cannot"""
+    if os.geteuid() != 0:
+        return 'needs root'
+    subprocess.run(['truncate', '-s', '300M', image], check=True)
+    if shutil.which('mkfs.xfs'):
+        mkfs = ['mkfs.xfs', '-q', image]
+    elif shutil.which('mkfs.ext4'):
+        mkfs = ['mkfs.ext4', '-q', '-O', 'quota,project', '-I', '256', image]
+    else:
+        return 'needs mkfs.xfs or mkfs.ext4'
+    subprocess.run(mkfs, check=True)
+    mount = subprocess.run(['mount', '-o', 'loop,prjquota', image, mountpoint], capture_output=True, text=True)
+    if mount.returncode != 0:
+        return f"cannot mount with prjquota: {mount.stderr.strip()}"
+    return None
+
+
+def test_loopback_quota():
+    """Test quota enforcement and usage reporting on a loopback-mounted image"""
+    directory = tempfile.mkdtemp()
+    image, mountpoint = os.path.join(directory, 'fs.img'), os.path.join(directory, 'mnt')
+    os.mkdir(mountpoint)
+    reason = _loopback_filesystem(image, mountpoint)
+    if reason:
+        print(f"{Colors.YELLOW}- SKIP{Colors.NC}: loopback quota test ({reason})")
+        shutil.rmtree(directory)
+        return
+    try:
+        share = os.path.join(mountpoint, 'builds')
+        os.makedirs(os.path.join(share, 'existing'))
+        with open(os.path.join(share, 'existing', 'old.bin'), 'wb') as f:
+            f.write(b'\0' * 2 ** 20)
+        files = {'projid_file': os.path.join(directory, 'projid'),
+                 'projects_file': os.path.join(directory, 'projects')}
+        first = share_quota.apply_quota(share, '16M', **files)
+        again = share_quota.apply_quota(share, '16M', **files)
+        with open(os.path.join(share, 'new.bin'), 'wb') as f:
+            f.write(b'\0' * 4 * 2 ** 20)
+            os.fsync(f.fileno())
+        usage = share_quota.share_usage(projects_file=files['projects_file'])
+        try:
+            with open(os.path.join(share, 'big.bin'), 'wb') as f:
+                for _ in range(32):
+                    f.write(b'\0' * 2 ** 20)
+                os.fsync(f.fileno())
+            blocked = None
+        except OSError as e:
+            blocked = e.errno
+    finally:
+        subprocess.run(['umount', mountpoint])
+        shutil.rmtree(directory)
+
+    entry = usage[0] if usage else {}
+    passed = (
+        first['changes'] == ['project', 'projid', 'projects', 'limit'] and again['changes'] == []
+        and entry.get('path') == share and entry.get('limit') == 16 * 2 ** 20
+        and 5 * 2 ** 20 <= entry.get('used', 0) < 6 * 2 ** 20
+        and blocked in (errno.EDQUOT, errno.ENOSPC)
+    )
+    assert print_test("Project quota limits a loopback share and reports its usage", passed,
+                      f"first={first} again={again} usage={usage} blocked={blocked}")
+
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("Share Quota Tests")
+    print("=" * 60)
+    print()
+
+    tests = [
+        test_sizes_and_mounts,
+        test_project_files,
+        test_loopback_quota,
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            test()
+            results.append(True)
+        except AssertionError:
+            results.append(False)
+        except Exception as e:
+            print_test(test.__name__, False, str(e))
+            results.append(False)
+
+    print()
+    print("=" * 60)
+    passed = sum(results)
+    total = len(results)
+
+    if passed == total:
+        print(f"{Colors.GREEN}All tests passed! ({passed}/{total}){Colors.NC}")
+        return 0
+    else:
+        print(f"{Colors.RED}Some tests failed. ({passed}/{total} passed){Colors.NC}")
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Share Storage Tests
+
+These tests verify module_utils/share_storage.py, which provisions the
+backing file systems of shares: profile merging and mkfs parameters,
+idempotent LVM/mkfs/fstab/mount steps against a simulated host and,
+when run as root with losetup and mkfs available, a real file system on
+a loop device.
+
+Run with: sudo python3 tests/test_share_storage.py
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / 'module_utils'))
+
+import share_storage  # noqa: E402
+import yaml  # noqa: E402
+
+PROFILES = yaml.safe_load((PROJECT_ROOT / 'roles' / 'shares' / 'defaults' / 'main.yml').read_text())[
+    'shares_storage_profiles']
+
+
+class Colors:
+    GREEN = '\033[0;32m'
+    RED = '\033[0;31m'
+    YELLOW = '\033[1;33m'
+    NC = '\033[0m'  # No Color
+
+
+def print_test(name, passed, message=""):
+    """Print test result with color"""
+    status = f"{Colors.GREEN}✓ PASS{Colors.NC}" if passed else f"{Colors.RED}✗ FAIL{Colors.NC}"
+    print(f"{status}: {name}")
+    if message and not passed:
+        print(f"  {Colors.YELLOW}→{Colors.NC} {message}")
+    return passed
+
+
+class FakeHost:
+    """Simulated LVM, blkid, mkfs and mount, recording every command"""
+
+    def __init__(self, mountinfo):
+        self.mountinfo = mountinfo
+        self.vgs = set()
+        self.lvs = {}
+        self.signatures = {}
+        self.commands = []
+        self.fail_remount = False
+        open(mountinfo, 'w').close()
+
+    def __call__(self, command, **kwargs):
+        self.commands.append(command)
+        name, args = command[0], command[1:]
+        if name == 'vgs':
+            return self.result(0 if args[-1] in self.vgs else 5)
+        if name == 'vgcreate':
+            self.vgs.add(args[1])
+        elif name == 'lvs':
+            size = self.lvs.get(args[-1])
+            return self.result(5) if size is None else self.result(0, f"  {size}\n")
+        elif name == 'lvcreate':
+            self.lvs[f"{args[-1]}/{args[args.index('-n') + 1]}"] = share_storage._bytes(args[args.index('-L') + 1])
+        elif name == 'lvextend':
+            self.lvs[args[-1]] = share_storage._bytes(args[args.index('-L') + 1])
+        elif name == 'blkid':
+            found = self.signatures.get(args[-1])
+            return self.result(2) if found is None else self.result(0, f"UUID=1234-abcd\nTYPE={found}\n")
+        elif name.startswith('mkfs.'):
+            self.signatures[args[-1]] = name.split('.', 1)[1]
+        elif name == 'mount':
+            if 'remount' in args:
+                return self.result(32 if self.fail_remount else 0, stderr='cannot change logbufs')
+            with open(self.mountinfo, 'a') as f:
+                f.write(f"90 1 253:3 / {args[-1]} rw,noatime shared:50 - xfs /dev/mapper/data rw\n")
+        return self.result(0)
+
+    @staticmethod
+    def result(returncode, stdout='', stderr=''):
+        return subprocess.CompletedProcess([], returncode, stdout, stderr)
+
+
+def test_profiles_and_mkfs_parameters():
+    """Test that profiles merge with volume overrides into mkfs arguments and mount options"""
+    spec = share_storage.volume_spec(
+        {'name': 'media', 'device': '/dev/md0', 'mountpoint': '/srv/shares/media', 'profile': 'throughput',
+         'mkfs': {'stripe_unit': '512k', 'stripe_width': 4}, 'mount_options': ['allocsize=1g', 'prjquota']},
+        PROFILES)
+    ext4 = share_storage.mkfs_command('ext4', {'stripe_unit': '256k', 'stripe_width': 4, 'lazy_init': False},
+                                      '/dev/sdc')
+    errors = []
+    for volume in ({'name': 'a', 'mountpoint': '/srv/a'},
+                   {'name': 'b', 'device': '/dev/sdb', 'mountpoint': '/srv/b', 'profile': 'fast'},
+                   {'name': 'c', 'device': '/dev/sdb', 'mountpoint': '/srv/c', 'fstype': 'ext4',
+                    'mkfs': {'agcount': 8}}):
+        try:
+            share_storage.volume_spec(volume, PROFILES)
+        except share_storage.StorageError as e:
+            errors.append(str(e))
+
+    passed = (
+        share_storage.mkfs_command(spec['fstype'], spec['mkfs'], '/dev/md0')
+        == ['mkfs.xfs', '-q', '-l', 'size=512m', '-d', 'su=512k,sw=4', '/dev/md0']
+        and spec['mount_options'][:3] == ['noatime', 'inode64', 'allocsize=1g']
+        and spec['mount_options'][-1] == 'prjquota'
+        and ext4 == ['mkfs.ext4', '-q', '-E', 'stride=64,stripe_width=256,lazy_itable_init=0', '/dev/sdc']
+        and len(errors) == 3 and 'device or vg' in errors[0] and "'fast'" in errors[1] and 'agcount' in errors[2]
+    )
+    assert print_test("Profiles become mkfs arguments and mount options", passed,
+                      f"spec={spec} ext4={ext4} errors={errors}")
+
+
+def test_provisioning_is_idempotent():
+    """Test that a second run changes nothing and an option change only rewrites fstab and remounts"""
+    directory = tempfile.mkdtemp()
+    fstab, mountinfo = os.path.join(directory, 'fstab'), os.path.join(directory, 'mountinfo')
+    with open(fstab, 'w') as f:
+        f.write('# /etc/fstab\nUUID=root / ext4 defaults 0 1\n')
+    host = FakeHost(mountinfo)
+    volume = {'name': 'builds', 'vg': 'data', 'pvs': ['/dev/sdb'], 'size': '500G',
+              'mountpoint': os.path.join(directory, 'builds'), 'profile': 'metadata-heavy'}
+
+    def provision(**changes):
+        return share_storage.provision_volume(dict(volume, **changes), PROFILES, fstab=fstab,
+                                              mountinfo=mountinfo, runner=host)
+
+    planned = share_storage.provision_volume(volume, PROFILES, check_mode=True, fstab=fstab,
+                                             mountinfo=mountinfo, runner=host)
+    planned_commands = [command[0] for command in host.commands]
+    first = provision()
+    second = provision()
+    host.fail_remount = True
+    options = provision(mount_options=['prjquota'], size='600G')
+    with open(fstab) as f:
+        lines = f.read().splitlines()
+    host.signatures['/dev/sdd'] = 'ext4'
+    try:
+        provision(name='old', vg=None, device='/dev/sdd', mountpoint=os.path.join(directory, 'old'))
+        refused = None
+    except share_storage.StorageError as e:
+        refused = str(e)
+
+    passed = (
+        planned['changes'] == ['vg', 'lv', 'mkfs', 'fstab', 'mount'] and planned_commands == ['vgs']
+        and first['changes'] == ['vg', 'lv', 'mkfs', 'fstab', 'mount']
+        and ['mkfs.xfs', '-q', '-d', 'agcount=32', '-l', 'size=1g', '-i', 'size=512',
+             '/dev/data/builds'] in host.commands
+        and second['changes'] == [] and second['state'] == 'ok'
+        and options['changes'] == ['lv_size', 'fstab'] and len(options['warnings']) == 1
+        and host.lvs['data/builds'] == 600 * 2 ** 30
+        and len(lines) == 3 and lines[:2] == ['# /etc/fstab', 'UUID=root / ext4 defaults 0 1']
+        and lines[2] == f"/dev/data/builds {volume['mountpoint']} xfs "
+                        "noatime,inode64,logbufs=8,logbsize=256k,prjquota 0 0"
+        and refused is not None and 'not formatting' in refused
+    )
+    assert print_test("Provisioning is idempotent and never reformats", passed,
+                      f"first={first} second={second} options={options} fstab={lines} refused={refused}")
+
+
+def _loop_device(image):
+    """Attach an image to a loop device; return (device, reason it cannot be tested)"""
+    if os.geteuid() != 0:
+        return None, 'needs root'
+    if not (shutil.which('losetup') and shutil.which('mkfs.ext4') and shutil.which('blkid')):
+        return None, 'needs losetup, mkfs.ext4 and blkid'
+    subprocess.run(['truncate', '-s', '128M', image], check=True)
+    attach = subprocess.run(['losetup', '--find', '--show', image], capture_output=True, text=True)
+    if attach.returncode != 0:
+        return None, f"cannot attach a loop device: {attach.stderr.strip()}"
+    return attach.stdout.strip(), None
+
+
+def test_loop_device_file_system():
+    """Test a real tuned file system and fstab entry on a loop device"""
+    directory = tempfile.mkdtemp()
+    device, reason = _loop_device(os.path.join(directory, 'disk.img'))
+    if reason:
+        print(f"{Colors.YELLOW}- SKIP{Colors.NC}: loop device test ({reason})")
+        shutil.rmtree(directory)
+        return
+    fstab, mountpoint = os.path.join(directory, 'fstab'), os.path.join(directory, 'builds')
+    volume = {'name': 'builds', 'device': device, 'mountpoint': mountpoint, 'profile': 'ext4',
+              'mkfs': {'journal_size': 16, 'stripe_unit': '64k', 'stripe_width': 2}}
+    try:
+        first = share_storage.provision_volume(volume, PROFILES, fstab=fstab)
+        second = share_storage.provision_volume(volume, PROFILES, fstab=fstab)
+        options = share_storage.provision_volume(dict(volume, mount_options=['commit=60']), PROFILES, fstab=fstab)
+        with open('/proc/self/mountinfo') as f:
+            mounted = [line for line in f if f" {mountpoint} " in line]
+        superblock = subprocess.run(['dumpe2fs', '-h', device], capture_output=True, text=True).stdout
+    finally:
+        subprocess.run(['umount', mountpoint])
+        subprocess.run(['losetup', '-d', device])
+        shutil.rmtree(directory)
+
+    passed = (
+        first['changes'] == ['mkfs', 'fstab', 'mount'] and second['changes'] == []
+        and options['changes'] == ['fstab', 'remount'] and options['warnings'] == []
+        and len(mounted) == 1 and 'noatime' in mounted[0] and 'commit=60' in mounted[0]
+        and 'RAID stride:              16' in superblock
+    )
+    assert print_test("Loop device gets a tuned file system, fstab entry and mount", passed,
+                      f"first={first} second={second} options={options} mounted={mounted}")
+
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("Share Storage Tests")
+    print("=" * 60)
+    print()
+
+    tests = [
+        test_profiles_and_mkfs_parameters,
+        test_provisioning_is_idempotent,
+        test_loop_device_file_system,
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            test()
+            results.append(True)
+        except AssertionError:
+            results.append(False)
+        except Exception as e:
+            print_test(test.__name__, False, str(e))
+            results.append(False)
+
+    print()
+    print("=" * 60)
+    passed = sum(results)
+    total = len(results)
+
+    if passed == total:
+        print(f"{Colors.GREEN}All tests passed! ({passed}/{total}){Colors.NC}")
+        return 0
+    else:
+        print(f"{Colors.RED}Some tests failed. ({passed}/{total} passed){Colors.NC}")
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Controller-side Inventory Tests
+
+These tests verify that module_utils/storage_inventory.py resolves host
+variables the way the playbooks see them (precedence, role defaults, Jinja
+templating) and that scripts/validate-config.py validates the inventory
+without contacting any host.
+
+Run with: python3 tests/test_storage_inventory.py
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import yaml
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / 'module_utils'))
+
+import storage_inventory  # noqa: E402
+
+
+class Colors:
+    GREEN = '\033[0;32m'
+    RED = '\033[0;31m'
+    YELLOW = '\033[1;33m'
+    NC = '\033[0m'  # No Color
+
+
+def print_test(name, passed, message=""):
+    """Print test result with color"""
+    status = f"{Colors.GREEN}✓ PASS{Colors.NC}" if passed else f"{Colors.RED}✗ FAIL{Colors.NC}"
+    print(f"{status}: {name}")
+    if message and not passed:
+        print(f"  {Colors.YELLOW}→{Colors.NC} {message}")
+    return passed
+
+
+def write_inventory(directory, group_vars=None, host_vars=None):
+    """Write a small two-group inventory into a temporary directory"""
+    inventory = {
+        'all': {
+            'vars': {'krb5_realm': 'ALL.REALM'},
+            'children': {
+                'fileservers': {
+                    'hosts': {'fs01': {'ansible_host': 'fs01.cube.k8s'}},
+                    'vars': {'krb5_kdc': 'inventory-kdc'},
+                },
+                'nfs_clients': {'hosts': {'worker01': {}}},
+            },
+        },
+    }
+    with open(os.path.join(directory, 'hosts.yml'), 'w') as f:
+        yaml.safe_dump(inventory, f)
+    for kind, files in (('group_vars', group_vars), ('host_vars', host_vars)):
+        os.makedirs(os.path.join(directory, kind), exist_ok=True)
+        for name, data in (files or {}).items():
+            with open(os.path.join(directory, kind, f"{name}.yml"), 'w') as f:
+                yaml.safe_dump(data, f)
+    return os.path.join(directory, 'hosts.yml')
+
+
+def test_repository_inventory_loads():
+    """Test that the project inventory parses with the expected groups"""
+    inventory = storage_inventory.Inventory(str(PROJECT_ROOT / 'inventory' / 'hosts.yml'))
+    passed = (
+        inventory.match('fileservers') == ['fileserver01']
+        and len(inventory.match('nfs_clients')) == 3
+        and inventory.match('all:!nfs_clients') == ['fileserver01']
+        and inventory.match('k8s-worker-0*')[:1] == ['k8s-worker-01']
+        and inventory.match('kdc[0]:nfs_clients[1:2]') == ['fileserver01', 'k8s-worker-02', 'k8s-worker-03']
+    )
+    assert print_test("Project inventory loads and host patterns resolve", passed)
+
+
+def test_variable_precedence():
+    """Test role defaults < group vars < group_vars files < host_vars"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = write_inventory(
+            directory,
+            group_vars={'fileservers': {'krb5_realm': 'GROUP.REALM'}},
+            host_vars={'fs01': {'krb5_keytab_path': '/host/keytab'}},
+        )
+        inventory = storage_inventory.Inventory(path)
+        variables = storage_inventory.host_variables(
+            inventory, 'fs01', ['kerberos-client'], roles_dir=str(PROJECT_ROOT / 'roles'),
+        )
+        passed = (
+            variables['krb5_realm'] == 'GROUP.REALM'
+            and variables['krb5_kdc'] == 'inventory-kdc'
+            and variables['krb5_keytab_path'] == '/host/keytab'
+            and variables['krb5_config_path'] == '/etc/krb5.conf'
+        )
+    assert print_test("Variables merge in Ansible precedence order", passed, f"Got: {variables.get('krb5_realm')}")
+
+
+def test_lazy_templating():
+    """Test that nested templates and facts resolve and loops are detected"""
+    templar = storage_inventory.Templar({
+        'krb5_realm': 'CUBE.K8S',
+        'nfs_domain': '{{ krb5_realm | lower }}',
+        'principals': ['host/{{ ansible_hostname }}@{{ krb5_realm }}'],
+        'ansible_hostname': 'worker01',
+        'enabled': '{{ "yes" | bool }}',
+        'loop_a': '{{ loop_b }}',
+        'loop_b': '{{ loop_a }}',
+    })
+    passed = (
+        templar['nfs_domain'] == 'cube.k8s'
+        and templar['principals'] == ['host/worker01@CUBE.K8S']
+        and templar['enabled'] is True
+    )
+    try:
+        templar['loop_a']
+        passed = False
+    except storage_inventory.TemplateError:
+        pass
+    assert print_test("Templates resolve lazily with loop detection", passed)
+
+
+def test_compiled_templates_are_shared():
+    """Test that hosts share compiled expressions but keep their own values"""
+    expression = '{{ ansible_hostname | upper }}-nfs'
+    first = storage_inventory.Templar({'ansible_hostname': 'worker01', 'name': expression})
+    second = storage_inventory.Templar({'ansible_hostname': 'worker02', 'name': expression})
+    passed = (
+        first['name'] == 'WORKER01-nfs' and second['name'] == 'WORKER02-nfs'
+        and storage_inventory.compile_template(expression) is storage_inventory.compile_template(expression)
+    )
+    assert print_test("Compiled expressions are shared across hosts", passed)
+
+
+def test_undefined_variable_is_reported():
+    """Test that an undefined variable becomes an error, not an exception"""
+    values, errors = storage_inventory.resolve({'krb5_kdc': '{{ missing_var }}'}, ['krb5_kdc'])
+    passed = values == {} and len(errors) == 1 and 'missing_var' in errors[0]
+    assert print_test("Undefined variables are reported per variable", passed, f"Got: {errors}")
+
+
+def test_validate_config_cli_passes_on_repository():
+    """Test that the CLI validates the project inventory without SSH"""
+    result = subprocess.run(
+        [sys.executable, str(PROJECT_ROOT / 'scripts' / 'validate-config.py'), '--format', 'json'],
+        capture_output=True, text=True, cwd=str(PROJECT_ROOT),
+    )
+    passed = result.returncode == 0 and '"failed": 0' in result.stdout
+    assert print_test("validate-config.py passes on the project inventory", passed, result.stderr or result.stdout)
+
+
+def test_validate_config_cli_reports_errors():
+    """Test that the CLI fails with every error for a broken host"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = write_inventory(directory, group_vars={'fileservers': {
+            'krb5_realm': 'lower.realm',
+            'nfs_exports': [{'path': 'relative', 'clients': [{'host': '*', 'options': 'rw'}]}],
+        }})
+        result = subprocess.run(
+            [sys.executable, str(PROJECT_ROOT / 'scripts' / 'validate-config.py'),
+             '-i', path, '-p', str(PROJECT_ROOT / 'playbooks' / 'site.yml'), '-l', 'fs01'],
+            capture_output=True, text=True,
+        )
+        passed = (
+            result.returncode == 1
+            and 'krb5_realm' in result.stdout
+            and 'nfs_exports[0].path' in result.stdout
+            and 'nfs_exports[0].clients[0].options' in result.stdout
+        )
+    assert print_test("validate-config.py reports all errors for a broken host", passed, result.stdout)
+
+
+def test_validate_config_cli_rejects_empty_limit():
+    """Test that a limit matching no hosts is an error rather than a pass"""
+    result = subprocess.run(
+        [sys.executable, str(PROJECT_ROOT / 'scripts' / 'validate-config.py'), '-l', 'nosuchhost'],
+        capture_output=True, text=True, cwd=str(PROJECT_ROOT),
+    )
+    passed = result.returncode == 2 and 'no hosts matched' in result.stderr
+    assert print_test("validate-config.py fails when the limit matches no hosts", passed,
+                      result.stderr or result.stdout)
+
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("Controller-side Inventory Tests")
+    print("=" * 60)
+    print()
+
+    # Change to project root if running from tests directory
+    if Path.cwd().name == 'tests':
+        os.chdir('..')
+
+    tests = [
+        test_repository_inventory_loads,
+        test_variable_precedence,
+        test_lazy_templating,
+        test_compiled_templates_are_shared,
+        test_undefined_variable_is_reported,
+        test_validate_config_cli_passes_on_repository,
+        test_validate_config_cli_reports_errors,
+        test_validate_config_cli_rejects_empty_limit,
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            test()
+            results.append(True)
+        except AssertionError:
+            results.append(False)
+        except Exception as e:
+            print_test(test.__name__, False, str(e))
+            results.append(False)
+
+    print()
+    print("=" * 60)
+    passed = sum(results)
+    total = len(results)
+
+    if passed == total:
+        print(f"{Colors.GREEN}All tests passed! ({passed}/{total}){Colors.NC}")
+        return 0
+    else:
+        print(f"{Colors.RED}Some tests failed. ({passed}/{total} passed){Colors.NC}")
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Storage Metrics Tests
+
+These tests verify module_utils/storage_metrics.py, the collector the
+storage-metrics role deploys for the nfs-server, samba, kerberos-kdc and
+nfs-client roles. The parsers run against /proc, smbstatus and krb5kdc
+log samples captured from a file server and an FS-Cache client in
+tests/fixtures/metrics/.
+
+Run with: python3 tests/test_storage_metrics.py
+"""
+
+import json
+import os
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import urllib.request
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / 'module_utils'))
+
+import storage_metrics  # noqa: E402
+
+FIXTURES = PROJECT_ROOT / 'tests' / 'fixtures' / 'metrics'
+
+
+class Colors:
+    GREEN = '\033[0;32m'
+    RED = '\033[0;31m'
+    YELLOW = '\033[1;33m'
+    NC = '\033[0m'  # No Color
+
+
+def print_test(name, passed, message=""):
+    """Print test result with color"""
+    status = f"{Colors.GREEN}✓ PASS{Colors.NC}" if passed else f"{Colors.RED}✗ FAIL{Colors.NC}"
+    print(f"{status}: {name}")
+    if message and not passed:
+        print(f"  {Colors.YELLOW}→{Colors.NC} {message}")
+    return passed
+
+
+def test_nfsd_metrics():
+    """Test thread, reply cache, per-op, pool and client retransmit metrics from /proc samples"""
+    proc = tempfile.mkdtemp()
+    try:
+        os.makedirs(os.path.join(proc, 'net', 'rpc'))
+        os.makedirs(os.path.join(proc, 'fs', 'nfsd'))
+        shutil.copy(FIXTURES / 'nfsd', os.path.join(proc, 'net', 'rpc', 'nfsd'))
+        shutil.copy(FIXTURES / 'rpc_nfs', os.path.join(proc, 'net', 'rpc', 'nfs'))
+        shutil.copy(FIXTURES / 'pool_stats', os.path.join(proc, 'fs', 'nfsd', 'pool_stats'))
+        text = storage_metrics.collect({'nfsd': {'proc': proc}}, {})
+    finally:
+        shutil.rmtree(proc)
+    lines = set(text.splitlines())
+    passed = (
+        'cube_storage_nfsd_threads 16' in lines
+        and 'cube_storage_nfsd_reply_cache_hits_total 12' in lines
+        and 'cube_storage_nfsd_rpc_errors_total{reason="badauth"} 2' in lines
+        and 'cube_storage_nfsd_operations_total{op="read",version="3"} 9000' in lines
+        and 'cube_storage_nfsd_operations_total{op="sequence",version="4"} 44000' in lines
+        and 'cube_storage_nfsd_operations_total{op="putfh",version="4"} 45000' in lines
+        and 'op="op0"' not in text
+        and 'cube_storage_nfsd_pool_sockets_enqueued_total{pool="0"} 1520' in lines
+        and 'cube_storage_nfsd_pool_threads_woken_total{pool="1"} 102344' in lines
+        and 'cube_storage_nfs_client_rpc_retransmits_total 17' in lines
+        and 'cube_storage_collector_success{collector="nfsd"} 1' in lines
+    )
+    assert print_test("nfsd /proc samples are exported as counters and gauges", passed, text)
+
+
+def test_smbstatus_parsing():
+    """Test session, share connection and open file counts from smbstatus output"""
+    status = storage_metrics.parse_smbstatus((FIXTURES / 'smbstatus.txt').read_text())
+    expected = {
+        'sessions': {'SMB3_11': 2, 'SMB3_02': 1},
+        'shares': {'builds': 2, 'IPC$': 1},
+        'open_files': 2,
+    }
+    assert print_test("smbstatus sessions, shares and open files are counted",
+                      status == expected, f"Got: {status}")
+
+
+def test_kdc_log_is_tailed_incrementally():
+    """Test that only new complete lines are counted and rotation restarts the tail"""
+    directory = tempfile.mkdtemp()
+    log = os.path.join(directory, 'krb5kdc.log')
+    sample = (FIXTURES / 'krb5kdc.log').read_text().splitlines(keepends=True)
+    state = {}
+    try:
+        with open(log, 'w') as f:
+            f.writelines(sample[:3])
+            f.write(sample[3][:40])  # partial line, completed later
+        storage_metrics.collect({'kdc': {'log': log}}, state)
+        first = dict(state['kdc']['counts'])
+
+        with open(log, 'a') as f:
+            f.write(sample[3][40:])
+            f.writelines(sample[4:])
+        text = storage_metrics.collect({'kdc': {'log': log}}, state)
+        second = dict(state['kdc']['counts'])
+
+        os.rename(log, log + '.1')
+        with open(log, 'w') as f:
+            f.writelines(sample[1:2])
+        storage_metrics.collect({'kdc': {'log': log}}, state)
+        rotated = state['kdc']['counts']
+    finally:
+        shutil.rmtree(directory)
+    lines = set(text.splitlines())
+    passed = (
+        first == {'AS_REQ|NEEDED_PREAUTH': 1, 'AS_REQ|ISSUE': 1, 'TGS_REQ|ISSUE': 1}
+        and second == {'AS_REQ|NEEDED_PREAUTH': 1, 'AS_REQ|ISSUE': 1, 'TGS_REQ|ISSUE': 1,
+                       'AS_REQ|CLIENT_NOT_FOUND': 1, 'TGS_REQ|UNKNOWN_SERVER': 1,
+                       'AS_REQ|PREAUTH_FAILED': 1}
+        and 'cube_storage_krb5kdc_requests_total{status="ISSUE",type="AS"} 1' in lines
+        and 'cube_storage_krb5kdc_request_errors_total{type="AS"} 2' in lines
+        and 'cube_storage_krb5kdc_request_errors_total{type="TGS"} 1' in lines
+        and rotated['AS_REQ|ISSUE'] == 2
+    )
+    assert print_test("krb5kdc log is tailed incrementally across rotation", passed,
+                      f"first={first} second={second}")
+
+
+def test_concurrent_scrapes_count_once():
+    """Test that simultaneous HTTP scrapes do not tail the KDC log twice"""
+    directory = tempfile.mkdtemp()
+    log = os.path.join(directory, 'krb5kdc.log')
+    state_file = os.path.join(directory, 'state.json')
+    sample = (FIXTURES / 'krb5kdc.log').read_text().splitlines(keepends=True)
+    with open(log, 'w') as f:
+        f.writelines(sample * 2000)
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    state = {}
+    threading.Thread(target=storage_metrics.serve, daemon=True,
+                     args=('127.0.0.1', port, 0, {'kdc': {'log': log}}, state, state_file)).start()
+    url = f"http://127.0.0.1:{port}/metrics"
+    errors = []
+
+    def scrape():
+        try:
+            urllib.request.urlopen(url, timeout=30).read()
+        except OSError as e:
+            errors.append(str(e))
+
+    try:
+        for _ in range(100):
+            try:
+                urllib.request.urlopen(url, timeout=30).read()
+                break
+            except OSError:
+                threading.Event().wait(0.05)
+        scrapers = [threading.Thread(target=scrape) for _ in range(8)]
+        for thread in scrapers:
+            thread.start()
+        for thread in scrapers:
+            thread.join()
+        with open(state_file) as f:
+            stored = json.load(f)
+    finally:
+        shutil.rmtree(directory)
+
+    passed = not errors and stored['kdc']['counts'] == state['kdc']['counts'] and set(
+        state['kdc']['counts'].values()) == {2000}
+    assert print_test("Concurrent scrapes count each KDC log line once", passed,
+                      f"counts={state.get('kdc', {}).get('counts')} errors={errors}")
+
+
+def test_fscache_metrics():
+    """Test FS-Cache counters, cache vs server reads and cache space for old and netfs kernels"""
+    proc, cache_dir = tempfile.mkdtemp(), tempfile.mkdtemp()
+    netfs_proc = tempfile.mkdtemp()
+    try:
+        os.makedirs(os.path.join(proc, 'fs', 'fscache'))
+        os.makedirs(os.path.join(proc, 'net', 'rpc'))
+        shutil.copy(FIXTURES / 'fscache_stats', os.path.join(proc, 'fs', 'fscache', 'stats'))
+        shutil.copy(FIXTURES / 'rpc_nfs', os.path.join(proc, 'net', 'rpc', 'nfs'))
+        os.makedirs(os.path.join(netfs_proc, 'fs', 'netfs'))
+        shutil.copy(FIXTURES / 'netfs_stats', os.path.join(netfs_proc, 'fs', 'netfs', 'stats'))
+        text = storage_metrics.collect({'fscache': {'proc': proc, 'cache_dir': cache_dir}}, {})
+        netfs = storage_metrics.collect({'fscache': {'proc': netfs_proc, 'cache_dir': ''}}, {})
+    finally:
+        for directory in (proc, cache_dir, netfs_proc):
+            shutil.rmtree(directory)
+    lines, netfs_lines = set(text.splitlines()), set(netfs.splitlines())
+    passed = (
+        'cube_storage_fscache_reads_total{source="cache"} 8210' in lines
+        and 'cube_storage_fscache_reads_total{source="server"} 902' in lines
+        and 'cube_storage_fscache_events_total{event="ops",section="Retrvls"} 9112' in lines
+        and 'cube_storage_fscache_events_total{event="nod",section="Retrvls"} 902' in lines
+        and 'cube_storage_nfs_client_read_calls_total{version="4"} 1200' in lines
+        and any(line.startswith('cube_storage_fscache_cache_free_ratio{resource="space"} ') for line in lines)
+        and 'cube_storage_collector_success{collector="fscache"} 1' in lines
+        and 'cube_storage_fscache_reads_total{source="cache"} 3512' in netfs_lines
+        and 'cube_storage_fscache_reads_total{source="server"} 610' in netfs_lines
+        and 'fscache_cache_free_ratio' not in netfs
+    )
+    assert print_test("FS-Cache statistics report cache hits against server reads", passed, text + netfs)
+
+
+def test_exposition_format():
+    """Test HELP/TYPE headers once per family, label escaping and failed collectors"""
+    metrics = storage_metrics.MetricSet()
+    metrics.add('smb_share_connections', 'gauge', 'Connections per SMB share.', 2, share='a"b\\c')
+    metrics.add('smb_share_connections', 'gauge', 'Connections per SMB share.', 1, share='IPC$')
+    metrics.add('collector_duration_seconds', 'gauge', 'Time spent in the collector.', 0.25)
+    text = metrics.render()
+    failed = storage_metrics.collect({'kdc': {'log': '/nonexistent/krb5kdc.log'}}, {})
+    passed = (
+        text.count('# TYPE cube_storage_smb_share_connections gauge') == 1
+        and 'cube_storage_smb_share_connections{share="a\\"b\\\\c"} 2\n' in text
+        and 'cube_storage_collector_duration_seconds 0.25\n' in text
+        and 'cube_storage_collector_success{collector="kdc"} 0' in failed
+    )
+    assert print_test("Prometheus text format is well-formed", passed, text + failed)
+
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("Storage Metrics Tests")
+    print("=" * 60)
+    print()
+
+    tests = [
+        test_nfsd_metrics,
+        test_smbstatus_parsing,
+        test_kdc_log_is_tailed_incrementally,
+        test_concurrent_scrapes_count_once,
+        test_fscache_metrics,
+        test_exposition_format,
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            test()
+            results.append(True)
+        except AssertionError:
+            results.append(False)
+        except Exception as e:
+            print_test(test.__name__, False, str(e))
+            results.append(False)
+
+    print()
+    print("=" * 60)
+    passed = sum(results)
+    total = len(results)
+
+    if passed == total:
+        print(f"{Colors.GREEN}All tests passed! ({passed}/{total}){Colors.NC}")
+        return 0
+    else:
+        print(f"{Colors.RED}Some tests failed. ({passed}/{total} passed){Colors.NC}")
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())